@@ -0,0 +1,94 @@
+"""Benchmark: die-cut background extraction at print resolution.
+
+Times the border-connected region fill and the vectorized alpha extraction
+on their own, and the full banded render (key + trim + upscale + encode) on
+synthetic sticker artwork. Inputs are 1500x1500 (sticker minimum) and
+5400x5400.
+
+Run from hobson/:
+    .venv/bin/python benchmarks/bench_background.py
+"""
+
+import io
+import os
+import resource
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, "src")
+
+import numpy as np
+from PIL import Image, ImageDraw
+
+from hobson.tools.print_file import (
+    _background_region,
+    _estimate_background,
+    _extract_alpha,
+    render_print_file,
+)
+
+SIZES = [1500, 5400]
+REPEATS = 3
+
+
+def _synthetic_sticker(size: int) -> Image.Image:
+    """Charcoal text-like blocks on an opaque bone background."""
+    img = Image.new("RGB", (size, size), (245, 240, 235))
+    draw = ImageDraw.Draw(img)
+    unit = size // 20
+    for row in range(3):
+        for col in range(8):
+            x, y = 3 * unit + col * 2 * unit, 6 * unit + row * 3 * unit
+            draw.rounded_rectangle((x, y, x + int(1.6 * unit), y + 2 * unit), radius=unit // 3, fill=(26, 26, 26))
+    return img.convert("RGBA")
+
+
+def _best_of(fn) -> float:
+    times = []
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def main():
+    print(f"{'input':>10}  {'stage':<22} {f'best of {REPEATS}':>10}  {'Mpx/s':>8}")
+    for size in SIZES:
+        img = _synthetic_sticker(size)
+        pixels = np.array(img)
+        key = _estimate_background(pixels)
+        mpx = size * size / 1e6
+
+        t = _best_of(lambda pixels=pixels: _estimate_background(pixels))
+        print(f"{size:>5}x{size:<4}  {'estimate_background':<22} {t:>9.3f}s  {mpx / t:>8.1f}")
+
+        t = _best_of(lambda pixels=pixels, key=key: _background_region(pixels, key))
+        print(f"{size:>5}x{size:<4}  {'background_region':<22} {t:>9.3f}s  {mpx / t:>8.1f}")
+
+        region = _background_region(pixels, key)
+        t = _best_of(lambda pixels=pixels, key=key, region=region: _extract_alpha(pixels, key, region))
+        print(f"{size:>5}x{size:<4}  {'extract_alpha (full)':<22} {t:>9.3f}s  {mpx / t:>8.1f}")
+
+        buf = io.BytesIO()
+        img.convert("RGB").save(buf, format="PNG")
+        src = buf.getvalue()
+        fd, out_path = tempfile.mkstemp(suffix=".png")
+        os.close(fd)
+        try:
+            t = _best_of(
+                lambda src=src, size=size, out_path=out_path: render_print_file(
+                    src, (size, size), out_path, remove_background=True
+                )
+            )
+            print(f"{size:>5}x{size:<4}  {'render (banded, keyed)':<22} {t:>9.3f}s  {mpx / t:>8.1f}")
+        finally:
+            os.unlink(out_path)
+
+    peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(f"\nPeak RSS: {peak_mb:.0f} MB")
+
+
+if __name__ == "__main__":
+    main()
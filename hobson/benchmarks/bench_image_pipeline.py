@@ -0,0 +1,319 @@
+"""Benchmark: local stages of the design image pipeline, offline.
+
+Runs every stage of hobson.tools.image_gen that happens on this machine
+(decode, print-file render, dimension check, R2 upload paths, and the whole
+generate_design call) against synthetic Imagen-sized candidates for each
+product type in _MIN_DIMENSIONS. Imagen, the vision ranker, R2 and Postgres
+are replaced by in-memory stubs, so no credentials or network are needed.
+
+Each (product, stage) runs in a freshly spawned process so its peak RSS is
+its own. Reported per stage: median wall time over --repeats runs, peak RSS
+(the stage process plus any print-file worker it started) and bytes produced.
+
+Results are compared against benchmarks/baseline_image_pipeline.json; the
+script exits 1 if any stage is slower or larger than the baseline by more
+than --tolerance, and 2 if there is no baseline to compare against. Bytes
+and peak RSS are always compared. Times are compared only above a
+half-second floor, so the millisecond stages (decode, uploads) cannot fail
+on scheduler jitter; only with at least 3 repeats, since a single run is no
+median; and only when the baseline was recorded on this host: the baseline
+stores the host it came from, and a baseline from another machine says
+nothing about this one's timings. Re-record it on the machine
+that runs the comparison with --update-baseline.
+
+Run from hobson/:
+    .venv/bin/python benchmarks/bench_image_pipeline.py
+    .venv/bin/python benchmarks/bench_image_pipeline.py --update-baseline
+"""
+
+import argparse
+import asyncio
+import base64
+import io
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+sys.path.insert(0, "src")
+
+BASELINE_PATH = Path(__file__).with_name("baseline_image_pipeline.json")
+STAGES = ["decode", "render", "dimension_check", "upload_file", "upload_base64", "end_to_end"]
+
+# Imagen 4 output size for the aspect ratio each product is generated at
+SOURCE_SIZES = {
+    "sticker": (1024, 1024),
+    "pin": (1024, 1024),
+    "small-print": (896, 1280),
+    "poster": (896, 1280),
+    "t-shirt": (896, 1280),
+}
+
+
+def _synthetic_candidate(size: tuple[int, int], seed: int = 0) -> bytes:
+    """Charcoal blocks and contour rings on a bone background, like an Imagen sticker."""
+    from PIL import Image, ImageDraw, ImageFilter
+
+    width, height = size
+    img = Image.new("RGB", size, (245, 240, 235))
+    draw = ImageDraw.Draw(img)
+    unit = min(width, height) // 20
+    for ring in range(6):
+        inset = (ring + 2) * unit + seed
+        draw.ellipse((inset, inset, width - inset, height - inset), outline=(26, 26, 26), width=unit // 4)
+    for col in range(6):
+        x = 4 * unit + col * 2 * unit
+        draw.rounded_rectangle((x, height // 2 - unit, x + int(1.5 * unit), height // 2 + unit), radius=unit // 3, fill=(45, 80, 22))
+    # Soft edges like a real render, so the encoder sees anti-aliased content
+    img = img.filter(ImageFilter.GaussianBlur(1))
+    buf = io.BytesIO()
+    img.save(buf, format="PNG")
+    return buf.getvalue()
+
+
+def _install_stubs(candidates: list[bytes]) -> dict:
+    """Replace Imagen, the vision ranker, R2 and Postgres in image_gen; return upload counters."""
+    from hobson.tools import image_gen
+
+    uploaded = {"bytes": 0}
+
+    class FakeModels:
+        def generate_images(self, **kwargs):
+            images = [SimpleNamespace(image=SimpleNamespace(image_bytes=c)) for c in candidates]
+            return SimpleNamespace(generated_images=images)
+
+        def generate_content(self, **kwargs):
+            return SimpleNamespace(text="1")
+
+    class FakeS3:
+        def upload_file(self, path, bucket, key, ExtraArgs=None):
+            uploaded["bytes"] += os.path.getsize(path)
+
+        def put_object(self, Bucket, Key, Body, ContentType=None):
+            uploaded["bytes"] += len(Body)
+
+    class FakeDB:
+        def log_design_generation(self, **fields):
+            return 1
+
+    image_gen.genai = SimpleNamespace(Client=lambda **kwargs: SimpleNamespace(models=FakeModels()))
+    image_gen._r2_client = FakeS3
+    image_gen._db = FakeDB()
+    image_gen._get_cache = lambda: None
+    return uploaded
+
+
+def _peak_rss_mb() -> float:
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    return max(own, children) / 1024
+
+
+def _run_stage(product: str, stage: str, repeats: int) -> dict:
+    """Run one stage in this (freshly spawned) process and measure it."""
+    import logging
+
+    from PIL import Image
+
+    from hobson.tools import image_gen
+    from hobson.tools.print_file import render_print_file
+
+    logging.disable(logging.WARNING)
+    candidates = [_synthetic_candidate(SOURCE_SIZES[product], seed) for seed in range(4)]
+    uploaded = _install_stubs(candidates)
+    min_size = image_gen._MIN_DIMENSIONS[product]
+    remove_background = product in image_gen._BACKGROUND_REMOVAL_TYPES
+
+    fd, print_path = tempfile.mkstemp(suffix=".png")
+    os.close(fd)
+    if stage.startswith("upload") or stage == "dimension_check":
+        rendered = render_print_file(candidates[0], min_size, print_path, remove_background=remove_background)
+
+    def decode():
+        with Image.open(io.BytesIO(candidates[0])) as img:
+            img.load()
+            return img.width * img.height * len(img.getbands())
+
+    def render():
+        return render_print_file(candidates[0], min_size, print_path, remove_background=remove_background)["bytes"]
+
+    def dimension_check():
+        image_gen._check_dimensions(rendered["width"], rendered["height"], product)
+        return 0
+
+    def upload_file():
+        uploaded["bytes"] = 0
+        image_gen._upload_file_to_r2(print_path, product)
+        return uploaded["bytes"]
+
+    def upload_base64():
+        with open(print_path, "rb") as f:
+            encoded = base64.b64encode(f.read()).decode()
+        uploaded["bytes"] = 0
+        asyncio.run(image_gen.upload_to_r2.ainvoke({"image_base64": encoded, "concept_name": product}))
+        return len(encoded)
+
+    def end_to_end():
+        uploaded["bytes"] = 0
+        result = asyncio.run(image_gen.generate_design("benchmark", product, product, "1:1"))
+        if result["status"] != "success":
+            raise RuntimeError(f"end_to_end failed: {result}")
+        return result["file_bytes"]
+
+    fn = locals()[stage]
+    times = []
+    try:
+        for _ in range(repeats):
+            start = time.perf_counter()
+            produced = fn()
+            times.append(time.perf_counter() - start)
+    finally:
+        os.unlink(print_path)
+        if image_gen._print_pool is not None:
+            image_gen._print_pool.shutdown()
+    return {"seconds": statistics.median(times), "peak_rss_mb": round(_peak_rss_mb(), 1), "bytes": produced}
+
+
+def _stage_process(product: str, stage: str, repeats: int, queue):
+    try:
+        queue.put(_run_stage(product, stage, repeats))
+    except BaseException as e:
+        queue.put({"error": f"{type(e).__name__}: {e}"})
+        raise
+
+
+def _measure(product: str, stage: str, repeats: int) -> dict:
+    """Run a stage in its own spawned process so peak RSS is not shared between stages.
+
+    A plain (non-daemon) Process is used because end_to_end starts image_gen's
+    own print-file worker pool, and pool workers cannot have children.
+    """
+    ctx = multiprocessing.get_context("spawn")
+    queue = ctx.Queue()
+    proc = ctx.Process(target=_stage_process, args=(product, stage, repeats, queue))
+    proc.start()
+    result = queue.get()
+    proc.join()
+    if "error" in result:
+        raise RuntimeError(f"{product}/{stage} failed: {result['error']}")
+    return result
+
+
+# Below these, differences are noise rather than regressions
+_FLOORS = {"seconds": 0.5, "peak_rss_mb": 1, "bytes": 1024}
+# Fewer runs than this give no usable median, so times are not compared
+_MIN_TIMED_REPEATS = 3
+
+
+def _host() -> dict:
+    """Identify the machine a baseline was recorded on."""
+    cpu = platform.processor()
+    try:
+        with open("/proc/cpuinfo") as f:
+            cpu = next((line.split(":", 1)[1].strip() for line in f if line.startswith("model name")), cpu)
+    except OSError:
+        pass
+    return {
+        "node": platform.node(),
+        "cpu": cpu,
+        "cpus": os.cpu_count(),
+        "platform": platform.platform(),
+        "python": platform.python_version(),
+    }
+
+
+def _same_host(a: dict, b: dict) -> bool:
+    return all(a.get(key) == b.get(key) for key in ("node", "cpu", "cpus"))
+
+
+def _regressions(results: dict, stages: dict, tolerance: float, compare_seconds: bool) -> list[str]:
+    problems = []
+    metrics = ("seconds", "peak_rss_mb", "bytes") if compare_seconds else ("peak_rss_mb", "bytes")
+    for name, current in results.items():
+        base = stages.get(name)
+        if base is None:
+            continue
+        for metric in metrics:
+            if current[metric] > max(base[metric], _FLOORS[metric]) * (1 + tolerance):
+                problems.append(f"{name} {metric}: {base[metric]} -> {current[metric]}")
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--products", nargs="+", default=list(SOURCE_SIZES), choices=list(SOURCE_SIZES))
+    parser.add_argument("--stages", nargs="+", default=STAGES, choices=STAGES)
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed fractional regression")
+    parser.add_argument("--update-baseline", action="store_true")
+    args = parser.parse_args()
+
+    results = {}
+    print(f"{'product':<12} {'stage':<16} {f'median of {args.repeats}':>12} {'peak RSS':>10} {'bytes':>12}")
+    for product in args.products:
+        for stage in args.stages:
+            r = _measure(product, stage, args.repeats)
+            results[f"{product}/{stage}"] = r
+            print(f"{product:<12} {stage:<16} {r['seconds']:>11.3f}s {r['peak_rss_mb']:>8.0f}MB {r['bytes']:>12,}")
+
+    host = _host()
+    if args.update_baseline:
+        baseline = json.loads(BASELINE_PATH.read_text()) if BASELINE_PATH.exists() else {}
+        # Stages recorded elsewhere are not comparable with these; start over
+        if not _same_host(baseline.get("host", {}), host):
+            baseline = {}
+        baseline["host"] = host
+        baseline["repeats"] = args.repeats
+        baseline.setdefault("stages", {}).update(results)
+        BASELINE_PATH.write_text(json.dumps(baseline, indent=2, sort_keys=True) + "\n")
+        print(f"\nBaseline written to {BASELINE_PATH}")
+        return 0
+
+    if not BASELINE_PATH.exists():
+        print(
+            f"\nERROR: no baseline at {BASELINE_PATH}; nothing was compared. "
+            "Run with --update-baseline to record one.",
+            file=sys.stderr,
+        )
+        return 2
+
+    baseline = json.loads(BASELINE_PATH.read_text())
+    stages = baseline.get("stages", {})
+    missing = sorted(name for name in results if name not in stages)
+    if missing:
+        print(f"\nWARNING: not in the baseline, not compared: {', '.join(missing)}", file=sys.stderr)
+    compare_seconds = args.repeats >= _MIN_TIMED_REPEATS and _same_host(baseline.get("host", {}), host)
+    if args.repeats < _MIN_TIMED_REPEATS:
+        print(
+            f"\nWARNING: times not compared with fewer than {_MIN_TIMED_REPEATS} repeats, "
+            "only bytes and peak RSS.",
+            file=sys.stderr,
+        )
+    elif not compare_seconds:
+        recorded = baseline.get("host", {})
+        print(
+            f"\nWARNING: baseline recorded on {recorded.get('node', 'an unknown host')} "
+            f"({recorded.get('cpu', 'unknown CPU')}); times not compared, only bytes and peak RSS. "
+            "Run with --update-baseline on this host to compare times.",
+            file=sys.stderr,
+        )
+
+    problems = _regressions(results, stages, args.tolerance, compare_seconds)
+    if problems:
+        print(f"\nRegressions beyond {args.tolerance:.0%}:")
+        for line in problems:
+            print(f"  {line}")
+        return 1
+    print(f"\nNo regressions beyond {args.tolerance:.0%} against baseline.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -160,6 +160,7 @@ async def main():
                 "concept_name": name,
                 "product_type": "sticker",
                 "aspect_ratio": "1:1",
+                "reuse_cached": True,
             })
             result = json.loads(result_json)
             elapsed = time.time() - start
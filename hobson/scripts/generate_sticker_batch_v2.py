@@ -79,6 +79,7 @@ async def main():
                 "concept_name": f"v2-{name.lower().replace(' ', '-')}",
                 "product_type": "sticker",
                 "aspect_ratio": "1:1",
+                "reuse_cached": True,
             })
             result = json.loads(result_json)
             elapsed = time.time() - start
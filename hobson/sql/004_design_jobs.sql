@@ -0,0 +1,40 @@
+-- Hobson: design generation job queue on hobson.design_generations
+-- Apply: psql -U hobson -d project_data -f 004_design_jobs.sql
+--
+-- Queued jobs are rows with generation_status = 'queued'. Workers claim them
+-- with SELECT ... FOR UPDATE SKIP LOCKED, mark them 'running', and finish
+-- them as 'success', 'failed' or 'filtered' (the statuses the synchronous
+-- generate_design_image tool already logs). locked_at is the running job's
+-- lease: the worker renews it while the job runs, and a job whose lease has
+-- expired is requeued (or failed, with a result, after too many attempts).
+
+CREATE TABLE IF NOT EXISTS hobson.design_generations (
+    id SERIAL PRIMARY KEY,
+    concept_name TEXT NOT NULL,
+    generation_prompt TEXT NOT NULL,
+    model_version TEXT,
+    image_url TEXT,
+    r2_filename TEXT,
+    product_type TEXT,
+    generation_status TEXT NOT NULL DEFAULT 'success',
+    status_reason TEXT,
+    image_width INTEGER,
+    image_height INTEGER,
+    created_at TIMESTAMPTZ DEFAULT NOW()
+);
+
+ALTER TABLE hobson.design_generations
+    ADD COLUMN IF NOT EXISTS aspect_ratio TEXT,
+    ADD COLUMN IF NOT EXISTS reuse_cached BOOLEAN DEFAULT FALSE,
+    ADD COLUMN IF NOT EXISTS notify BOOLEAN DEFAULT FALSE,
+    ADD COLUMN IF NOT EXISTS attempts INTEGER DEFAULT 0,
+    ADD COLUMN IF NOT EXISTS locked_by TEXT,
+    ADD COLUMN IF NOT EXISTS locked_at TIMESTAMPTZ,
+    ADD COLUMN IF NOT EXISTS completed_at TIMESTAMPTZ,
+    ADD COLUMN IF NOT EXISTS result JSONB;
+
+-- Workers only ever scan the small set of unfinished jobs
+CREATE INDEX IF NOT EXISTS idx_design_generations_queued
+    ON hobson.design_generations (id) WHERE generation_status = 'queued';
+CREATE INDEX IF NOT EXISTS idx_design_generations_running
+    ON hobson.design_generations (locked_at) WHERE generation_status = 'running';
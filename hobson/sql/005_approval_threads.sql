@@ -0,0 +1,15 @@
+-- Hobson: resumable approvals
+-- Apply: psql -U hobson -d project_data -f 005_approval_threads.sql
+--
+-- Workflow runs pause on send_approval_request (a LangGraph interrupt) and
+-- resume from their checkpoint when the approval is resolved. thread_id is
+-- the checkpoint thread of the paused run; NULL for approvals that nothing
+-- waits on (conversation turns, standing order proposals). Approvals left
+-- unanswered past approval_timeout_hours are set to 'expired'.
+
+ALTER TABLE hobson.approvals
+    ADD COLUMN IF NOT EXISTS thread_id TEXT;
+
+CREATE INDEX IF NOT EXISTS idx_approvals_pending
+    ON hobson.approvals (created_at)
+    WHERE resolved_at IS NULL;
@@ -0,0 +1,44 @@
+-- Hobson: event bus on LISTEN/NOTIFY
+-- Apply: psql -U hobson -d project_data -f 006_events.sql
+--
+-- Every event is a row in hobson.events; hobson.emit_event() inserts it and
+-- sends NOTIFY hobson_events with the new id, in the caller's transaction, so
+-- listeners are only woken once the change that caused the event commits.
+-- Listeners read rows after the last id they processed, which also gives
+-- them backfill after a reconnect. hobson.event_cursors stores that position
+-- per named consumer so it survives restarts. Events older than
+-- event_retention_days that every named consumer has passed are deleted
+-- daily (HobsonDB.prune_events).
+
+CREATE TABLE IF NOT EXISTS hobson.events (
+    id BIGSERIAL PRIMARY KEY,
+    topic TEXT NOT NULL,
+    payload JSONB NOT NULL DEFAULT '{}',
+    created_at TIMESTAMPTZ DEFAULT NOW()
+);
+
+CREATE INDEX IF NOT EXISTS idx_events_topic_id
+    ON hobson.events (topic, id);
+
+CREATE INDEX IF NOT EXISTS idx_events_created_at
+    ON hobson.events (created_at);
+
+CREATE TABLE IF NOT EXISTS hobson.event_cursors (
+    consumer TEXT PRIMARY KEY,
+    last_event_id BIGINT NOT NULL,
+    updated_at TIMESTAMPTZ DEFAULT NOW()
+);
+
+CREATE OR REPLACE FUNCTION hobson.emit_event(p_topic TEXT, p_payload JSONB)
+RETURNS BIGINT AS $$
+DECLARE
+    new_id BIGINT;
+BEGIN
+    INSERT INTO hobson.events (topic, payload)
+    VALUES (p_topic, COALESCE(p_payload, '{}'))
+    RETURNING id INTO new_id;
+    -- Payload stays tiny (NOTIFY caps it at 8000 bytes); listeners read the row
+    PERFORM pg_notify('hobson_events', json_build_object('id', new_id, 'topic', p_topic)::text);
+    RETURN new_id;
+END;
+$$ LANGUAGE plpgsql;
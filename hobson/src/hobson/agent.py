@@ -10,12 +10,27 @@ from hobson.tools.obsidian import (
     append_to_daily_log,
     append_to_note,
     list_vault_folder,
+    read_daily_log,
     read_note,
+    search_vault,
     write_note,
 )
-from hobson.tools.analytics import get_site_stats, get_top_pages, get_top_referrers
-from hobson.tools.git_ops import create_blog_post_pr, list_open_blog_prs, publish_blog_post, publish_product
-from hobson.tools.image_gen import generate_design_image, upload_to_r2
+from hobson.tools.analytics import get_site_stats, get_top_pages, get_top_referrers, get_traffic_insights
+from hobson.tools.git_ops import (
+    check_site_content,
+    create_blog_post_pr,
+    list_open_blog_prs,
+    publish_batch,
+    publish_blog_post,
+    publish_product,
+)
+from hobson.tools.novelty import check_topic_novelty
+from hobson.tools.image_gen import (
+    enqueue_design_image,
+    generate_design_image,
+    get_design_job_status,
+    upload_to_r2,
+)
 from hobson.tools.printful import (
     create_store_product,
     generate_product_mockup,
@@ -90,7 +105,9 @@ _COMMON_TOOLS = [
     read_note,
     append_to_note,
     append_to_daily_log,
+    read_daily_log,
     list_vault_folder,
+    search_vault,
     send_message,
     send_alert,
     send_approval_request,
@@ -104,17 +121,22 @@ _COMMON_TOOLS = [
     get_mockup_styles,
     generate_product_mockup,
     generate_design_image,
+    enqueue_design_image,
+    get_design_job_status,
     upload_to_r2,
     get_site_stats,
     get_top_pages,
     get_top_referrers,
+    get_traffic_insights,
     create_substack_draft,
     publish_substack_draft,
     get_substack_posts,
+    check_site_content,
+    check_topic_novelty,
 ]
 
-_BOOTSTRAP_GIT_TOOLS = [publish_blog_post, publish_product, list_open_blog_prs]
-_STEADYSTATE_GIT_TOOLS = [create_blog_post_pr, publish_product, list_open_blog_prs]
+_BOOTSTRAP_GIT_TOOLS = [publish_blog_post, publish_product, publish_batch, list_open_blog_prs]
+_STEADYSTATE_GIT_TOOLS = [create_blog_post_pr, publish_product, publish_batch, list_open_blog_prs]
 
 
 def _get_tools() -> list:
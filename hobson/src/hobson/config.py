@@ -13,6 +13,12 @@ class Settings(BaseSettings):
     # Telegram
     telegram_bot_token: str = ""
     telegram_chat_id: str = ""
+    telegram_streaming: bool = True  # Stream conversation replies into an edited placeholder
+    telegram_stream_edit_interval: float = 2.0  # Min seconds between streamed edits
+    # Webhook mode: public HTTPS base URL that proxies to the health server
+    # (:8080). Empty = long polling. The secret is generated per start if unset.
+    telegram_webhook_url: str = ""
+    telegram_webhook_secret: str = ""
 
     # Printful
     printful_api_key: str = ""
@@ -21,17 +27,40 @@ class Settings(BaseSettings):
     obsidian_host: str = "192.168.2.140"
     obsidian_port: int = 27124
     obsidian_api_key: str = ""
+    obsidian_coalesce_window: float = 0.2  # Seconds to gather concurrent appends to one note
+    obsidian_cache_ttl: float = 120.0  # Seconds a read note is served from cache
+    # search_vault index: a local copy of the vault (synced folder) is scanned by
+    # mtime; without one, notes are listed and read over the REST API
+    obsidian_vault_path: str = ""
+    vault_index_path: str = ".cache/vault_index.sqlite3"
+    vault_index_list_interval: float = 300.0  # Min seconds between REST folder listings
+    vault_index_recheck_hours: float = 24.0  # REST only: re-read unchanged notes this often
+
+    # check_topic_novelty MinHash index (backfill: python -m hobson.tools.novelty)
+    topic_index_path: str = ".cache/topic_index.json"
+    topic_index_refresh_minutes: float = 60.0  # Minutes between background source syncs
 
     # Substack
     substack_cookies: str = ""
+    substack_session_check_minutes: float = 30.0  # Re-check an idle session before reuse
+    substack_index_path: str = ".cache/substack_posts.json"
+    substack_index_refresh_minutes: float = 30.0  # Min minutes between posts index refreshes
 
     # GitHub (for PR-based content workflow)
     github_token: str = ""  # Personal access token with repo scope
     github_repo: str = "pieChartsAreLies/buildscharacter"  # owner/repo
+    github_cache_path: str = ".cache/github_etags.json"  # ETag cache for conditional GETs
+    site_checkout_path: str = ""  # Local clone for the site content index (else GitHub API)
+    git_backend: str = "rest"  # "rest" (GitHub API) or "local" (commit + push from git_local_path)
+    git_local_path: str = ""  # Dedicated working clone used by the local backend
+    git_remote: str = "origin"
+    git_author_name: str = "Hobson"
+    git_author_email: str = "hobson@buildscharacter.com"
 
     # Cloudflare Analytics
     cloudflare_api_token: str = ""  # API token with Analytics:Read permission
     cloudflare_zone_id: str = ""  # Zone ID for buildscharacter.com
+    analytics_snapshot_ttl: float = 600.0  # Seconds the analytics tools share a dataset load
 
     # Cloudflare R2 (design image storage)
     r2_account_id: str = ""
@@ -40,6 +69,22 @@ class Settings(BaseSettings):
     r2_bucket_name: str = "hobson-designs"
     r2_public_url: str = ""  # e.g., https://pub-{hash}.r2.dev
 
+    # Print-file rendering (worker processes for upscaling large print files)
+    print_file_workers: int = 2
+
+    # Imagen result cache (opt-in): "" = disabled, "local" or "r2"
+    imagen_cache_backend: str = ""
+    imagen_cache_dir: str = ".cache/imagen"
+    imagen_cache_ttl_hours: float = 168.0
+
+    # Design job queue (enqueue_design_image). Set design_worker_in_process to
+    # false when running the worker as its own service (python -m hobson.design_worker)
+    design_workers: int = 2
+    design_worker_in_process: bool = True
+    # A running job whose lease has not been renewed for this long is requeued
+    design_job_stale_minutes: int = 15
+    design_job_max_attempts: int = 3
+
     # Uptime Kuma push URLs (one per workflow)
     uptime_kuma_push_morning_briefing: str = ""
     uptime_kuma_push_content_pipeline: str = ""
@@ -51,6 +96,16 @@ class Settings(BaseSettings):
     monthly_cost_cap: float = 50.0
     single_action_cost_threshold: float = 5.0
 
+    # Approvals: workflow runs pause on send_approval_request and resume when
+    # answered; unanswered requests expire (and the run resumes as denied) after this
+    approval_timeout_hours: float = 48.0
+
+    # Event bus: delivered events (hobson.events) are kept this long
+    event_retention_days: float = 30.0
+
+    # Workflow prefetch: longest wait for each tool call gathered before a run
+    workflow_prefetch_timeout: float = 60.0
+
     # Bootstrap mode
     bootstrap_mode: bool = False
 
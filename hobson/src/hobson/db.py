@@ -8,6 +8,18 @@ import psycopg
 from psycopg.rows import dict_row
 from psycopg.types.json import Json
 
+# design_generations statuses that end a queued job
+DESIGN_JOB_TERMINAL_STATUSES = ("success", "failed", "filtered")
+
+
+def _resolved_payload(approval: dict) -> dict:
+    return {
+        "request_id": approval["request_id"],
+        "status": approval["status"],
+        "action": approval["action"],
+        "thread_id": approval.get("thread_id"),
+    }
+
 
 class HobsonDB:
     def __init__(self, database_url: str):
@@ -16,6 +28,28 @@ class HobsonDB:
     def _conn(self):
         return psycopg.connect(self.database_url, row_factory=dict_row)
 
+    @staticmethod
+    def _emit(conn, topic: str, payload: dict):
+        """Emit an event in the caller's transaction (see sql/006_events.sql)."""
+        conn.execute("SELECT hobson.emit_event(%s, %s)", (topic, Json(payload)))
+
+    def emit_event(self, topic: str, payload: dict):
+        with self._conn() as conn:
+            self._emit(conn, topic, payload)
+
+    def prune_events(self, retention_days: float) -> int:
+        """Delete events older than retention_days that every named consumer has handled."""
+        with self._conn() as conn:
+            cur = conn.execute(
+                """DELETE FROM hobson.events e
+                   WHERE e.created_at < NOW() - make_interval(secs => %s)
+                     AND NOT EXISTS (
+                         SELECT 1 FROM hobson.event_cursors c WHERE c.last_event_id < e.id
+                     )""",
+                (retention_days * 86400,),
+            )
+            return cur.rowcount
+
     def log_run_start(self, workflow: str, inputs: dict, llm_provider: str | None = None) -> str:
         run_id = str(uuid.uuid4())
         with self._conn() as conn:
@@ -94,6 +128,26 @@ class HobsonDB:
                 (target_date, metric_type, Json(data)),
             )
 
+    def log_metrics(self, metric_type: str, by_date: dict[date, dict]):
+        """Upsert one metric_type for many days in a single transaction."""
+        with self._conn() as conn, conn.cursor() as cur:
+            cur.executemany(
+                """INSERT INTO hobson.metrics (date, metric_type, data)
+                   VALUES (%s, %s, %s)
+                   ON CONFLICT (date, metric_type) DO UPDATE SET data = EXCLUDED.data""",
+                [(day, metric_type, Json(data)) for day, data in by_date.items()],
+            )
+
+    def get_metrics(self, metric_types: list[str], start: date, end: date) -> list[dict]:
+        """Stored metrics of the given types for days in [start, end), oldest first."""
+        with self._conn() as conn:
+            return conn.execute(
+                """SELECT date, metric_type, data FROM hobson.metrics
+                   WHERE metric_type = ANY(%s) AND date >= %s AND date < %s
+                   ORDER BY date""",
+                (list(metric_types), start, end),
+            ).fetchall()
+
     def create_task(
         self,
         title: str,
@@ -142,23 +196,62 @@ class HobsonDB:
 
     # -- Approvals --
 
-    def create_approval(self, request_id: str, action: str, reasoning: str, estimated_cost: float = 0):
+    def create_approval(
+        self,
+        request_id: str,
+        action: str,
+        reasoning: str,
+        estimated_cost: float = 0,
+        thread_id: str | None = None,
+    ) -> bool:
+        """Record an approval request; returns False if request_id already exists."""
         with self._conn() as conn:
-            conn.execute(
-                """INSERT INTO hobson.approvals (request_id, action, reasoning, estimated_cost)
-                   VALUES (%s, %s, %s, %s)""",
-                (request_id, action, reasoning, estimated_cost),
-            )
+            row = conn.execute(
+                """INSERT INTO hobson.approvals (request_id, action, reasoning, estimated_cost, thread_id)
+                   VALUES (%s, %s, %s, %s, %s)
+                   ON CONFLICT (request_id) DO NOTHING
+                   RETURNING request_id""",
+                (request_id, action, reasoning, estimated_cost, thread_id),
+            ).fetchone()
+            if row is None:
+                return False
+            self._emit(conn, "approval.created", {
+                "request_id": request_id,
+                "action": action,
+                "estimated_cost": estimated_cost,
+                "thread_id": thread_id,
+            })
+            return True
 
-    def resolve_approval(self, request_id: str, approved: bool):
+    def resolve_approval(self, request_id: str, approved: bool) -> dict | None:
+        """Resolve a pending approval; returns the updated row, or None if it was already resolved."""
         status = "approved" if approved else "denied"
         with self._conn() as conn:
-            conn.execute(
+            row = conn.execute(
                 """UPDATE hobson.approvals
                    SET status = %s, resolved_at = NOW()
-                   WHERE request_id = %s""",
+                   WHERE request_id = %s AND resolved_at IS NULL
+                   RETURNING *""",
                 (status, request_id),
-            )
+            ).fetchone()
+            if row is not None:
+                self._emit(conn, "approval.resolved", _resolved_payload(row))
+            return row
+
+    def expire_stale_approvals(self, max_age_hours: float) -> list[dict]:
+        """Mark approvals pending longer than max_age_hours as expired and return them."""
+        with self._conn() as conn:
+            rows = conn.execute(
+                """UPDATE hobson.approvals
+                   SET status = 'expired', resolved_at = NOW()
+                   WHERE resolved_at IS NULL
+                     AND created_at < NOW() - make_interval(secs => %s)
+                   RETURNING *""",
+                (max_age_hours * 3600,),
+            ).fetchall()
+            for row in rows:
+                self._emit(conn, "approval.resolved", _resolved_payload(row))
+            return rows
 
     def get_approval_status(self, request_id: str) -> str | None:
         with self._conn() as conn:
@@ -214,3 +307,128 @@ class HobsonDB:
                 ),
             ).fetchone()
             return row["id"]
+
+    # -- Design job queue (rows in design_generations, see sql/004_design_jobs.sql) --
+
+    def enqueue_design_job(
+        self,
+        concept_name: str,
+        generation_prompt: str,
+        product_type: str,
+        aspect_ratio: str,
+        reuse_cached: bool = False,
+        notify: bool = True,
+        model_version: str = "imagen-4.0-generate-001",
+    ) -> int:
+        with self._conn() as conn:
+            row = conn.execute(
+                """INSERT INTO hobson.design_generations
+                   (concept_name, generation_prompt, model_version, product_type,
+                    aspect_ratio, reuse_cached, notify, generation_status)
+                   VALUES (%s, %s, %s, %s, %s, %s, %s, 'queued')
+                   RETURNING id""",
+                (
+                    concept_name, generation_prompt, model_version, product_type,
+                    aspect_ratio, reuse_cached, notify,
+                ),
+            ).fetchone()
+            return row["id"]
+
+    def claim_design_job(self, worker_id: str) -> dict | None:
+        """Atomically claim the oldest queued job; concurrent workers skip locked rows."""
+        with self._conn() as conn:
+            return conn.execute(
+                """UPDATE hobson.design_generations
+                   SET generation_status = 'running', locked_by = %s, locked_at = NOW(),
+                       attempts = attempts + 1
+                   WHERE id = (
+                       SELECT id FROM hobson.design_generations
+                       WHERE generation_status = 'queued'
+                       ORDER BY id
+                       FOR UPDATE SKIP LOCKED
+                       LIMIT 1
+                   )
+                   RETURNING *""",
+                (worker_id,),
+            ).fetchone()
+
+    def finish_design_job(
+        self,
+        job_id: int,
+        worker_id: str,
+        generation_status: str,
+        status_reason: str | None = None,
+        image_url: str | None = None,
+        r2_filename: str | None = None,
+        image_width: int | None = None,
+        image_height: int | None = None,
+        result: dict | None = None,
+    ) -> bool:
+        """Mark a job finished, storing its result in the same update.
+
+        Only the worker still holding the job's lease can finish it; returns
+        False (and changes nothing) if the reaper has since requeued or failed it.
+        """
+        with self._conn() as conn:
+            cur = conn.execute(
+                """UPDATE hobson.design_generations
+                   SET generation_status = %s, status_reason = %s, image_url = %s,
+                       r2_filename = %s, image_width = %s, image_height = %s,
+                       result = %s, completed_at = NOW(), locked_by = NULL
+                   WHERE id = %s AND locked_by = %s AND generation_status = 'running'""",
+                (
+                    generation_status, status_reason, image_url, r2_filename,
+                    image_width, image_height,
+                    Json(result) if result is not None else None, job_id, worker_id,
+                ),
+            )
+            return cur.rowcount == 1
+
+    def heartbeat_design_job(self, job_id: int, worker_id: str) -> bool:
+        """Renew a running job's lease (locked_at); False if the worker no longer holds it."""
+        with self._conn() as conn:
+            cur = conn.execute(
+                """UPDATE hobson.design_generations SET locked_at = NOW()
+                   WHERE id = %s AND locked_by = %s AND generation_status = 'running'""",
+                (job_id, worker_id),
+            )
+            return cur.rowcount == 1
+
+    def requeue_stale_design_jobs(self, stale_after_seconds: int, max_attempts: int) -> list[dict]:
+        """Return running jobs whose lease expired to the queue, or fail them after max_attempts.
+
+        Workers renew the lease while a job runs (heartbeat_design_job), so an
+        expired lease means the worker died. Returns the affected jobs; failed
+        ones carry a result like any other finished job.
+        """
+        with self._conn() as conn:
+            return conn.execute(
+                """UPDATE hobson.design_generations
+                   SET generation_status = CASE WHEN attempts >= %s THEN 'failed' ELSE 'queued' END,
+                       status_reason = CASE WHEN attempts >= %s
+                           THEN 'Worker lost the job ' || attempts || ' times'
+                           ELSE status_reason END,
+                       result = CASE WHEN attempts >= %s
+                           THEN jsonb_build_object(
+                               'status', 'error',
+                               'concept_name', concept_name,
+                               'message', 'Worker lost the job ' || attempts || ' times')
+                           ELSE result END,
+                       completed_at = CASE WHEN attempts >= %s THEN NOW() ELSE NULL END,
+                       locked_by = NULL, locked_at = NULL
+                   WHERE generation_status = 'running'
+                     AND locked_at < NOW() - make_interval(secs => %s)
+                   RETURNING id, concept_name, notify, generation_status, result""",
+                (max_attempts, max_attempts, max_attempts, max_attempts, stale_after_seconds),
+            ).fetchall()
+
+    def get_design_jobs(self, job_ids: list[int]) -> list[dict]:
+        with self._conn() as conn:
+            return conn.execute(
+                """SELECT id, concept_name, product_type, generation_status, status_reason,
+                          attempts, result, created_at, completed_at
+                   FROM hobson.design_generations
+                   WHERE id = ANY(%s)
+                   ORDER BY id""",
+                (list(job_ids),),
+            ).fetchall()
@@ -0,0 +1,176 @@
+"""Design job worker: drains the design_generations queue.
+
+Jobs are queued by the enqueue_design_image tool. Each worker task claims one
+job at a time (FOR UPDATE SKIP LOCKED, so any number of workers in any number
+of processes can share the queue), runs the same pipeline as
+generate_design_image, stores the result on the job row, and optionally posts
+a Telegram notification.
+
+While a job runs its worker renews the job's lease every
+_HEARTBEAT_SECONDS. The reaper only requeues jobs whose lease has gone
+unrenewed for design_job_stale_minutes, so a slow job is not run twice;
+jobs it fails after too many attempts get a result and a notification like
+any other. A worker that finds its lease gone cancels the generation, and a
+result finished after the lease was lost is dropped (finish_design_job only
+updates a row the worker still holds), so it never overwrites the job's
+next run.
+
+Runs inside the agent process by default (see main.py), or standalone:
+    python -m hobson.design_worker
+"""
+
+import asyncio
+import logging
+import os
+import socket
+
+from hobson.config import settings
+from hobson.db import HobsonDB
+from hobson.tools.image_gen import LeaseLostError, generate_design
+from hobson.tools.telegram import send_message
+
+logger = logging.getLogger(__name__)
+
+_IDLE_POLL_SECONDS = 5
+_STALE_CHECK_SECONDS = 60
+_HEARTBEAT_SECONDS = 60
+
+
+def _format_notification(job: dict, result: dict) -> str:
+    name = job["concept_name"]
+    if result.get("status") == "success":
+        line = f"Design job {job['id']} ({name}) finished: {result.get('image_url') or 'upload failed'}"
+        for key in ("dimension_warning", "size_warning", "r2_warning"):
+            if result.get(key):
+                line += f"\n{result[key]}"
+        return line
+    return f"Design job {job['id']} ({name}) {result.get('status')}: {result.get('message')}"
+
+
+async def _notify(job: dict, result: dict):
+    try:
+        await send_message.ainvoke({"text": _format_notification(job, result)})
+    except Exception as e:
+        logger.warning("Design job %d notification failed: %s", job["id"], e)
+
+
+async def _heartbeat(db: HobsonDB, job: dict, generation: asyncio.Task) -> bool:
+    """Renew the job's lease until cancelled; if it is lost, cancel generation and return True."""
+    while True:
+        await asyncio.sleep(_HEARTBEAT_SECONDS)
+        try:
+            held = await asyncio.to_thread(db.heartbeat_design_job, job["id"], job["locked_by"])
+        except Exception as e:
+            logger.warning("Design job %d heartbeat failed: %s", job["id"], e)
+            continue
+        if not held:
+            logger.warning("Design job %d: lease lost to the stale-job reaper, cancelling", job["id"])
+            generation.cancel()
+            return True
+
+
+async def process_job(db: HobsonDB, job: dict) -> dict | None:
+    """Run one claimed job to completion and record its result.
+
+    generate_design finishes the job row itself (status and result in one
+    update); only an unexpected error is recorded here. Returns None, without
+    notifying, if the job's lease was lost and its result dropped.
+    """
+    logger.info("Design job %d: generating %s", job["id"], job["concept_name"])
+    generation = asyncio.create_task(generate_design(
+        job["generation_prompt"],
+        job["concept_name"],
+        job["product_type"] or "sticker",
+        job["aspect_ratio"] or "1:1",
+        bool(job["reuse_cached"]),
+        generation_id=job["id"],
+        worker_id=job["locked_by"],
+    ))
+    heartbeat = asyncio.create_task(_heartbeat(db, job, generation))
+    try:
+        result = await generation
+    except LeaseLostError:
+        logger.warning("Design job %d: lease lost before finishing, result dropped", job["id"])
+        return None
+    except asyncio.CancelledError:
+        if not (heartbeat.done() and not heartbeat.cancelled() and heartbeat.result()):
+            raise
+        return None
+    except Exception as e:
+        logger.exception("Design job %d failed", job["id"])
+        result = {
+            "status": "error",
+            "concept_name": job["concept_name"],
+            "message": f"Worker error: {e}",
+        }
+        finished = await asyncio.to_thread(
+            db.finish_design_job, job["id"], job["locked_by"], "failed",
+            status_reason=result["message"], result=result,
+        )
+        if not finished:
+            logger.warning("Design job %d: lease lost before finishing, error dropped", job["id"])
+            return None
+    finally:
+        heartbeat.cancel()
+        generation.cancel()
+    result.setdefault("concept_name", job["concept_name"])
+
+    if job["notify"]:
+        await _notify(job, result)
+    return result
+
+
+async def _worker_loop(db: HobsonDB, worker_id: str):
+    while True:
+        try:
+            job = await asyncio.to_thread(db.claim_design_job, worker_id)
+        except Exception as e:
+            logger.error("Design worker %s could not claim a job: %s", worker_id, e)
+            job = None
+        if job is None:
+            await asyncio.sleep(_IDLE_POLL_SECONDS)
+            continue
+        try:
+            await process_job(db, job)
+        except Exception:
+            # Recording the outcome failed (e.g. the database went away); the
+            # job's lease lapses and the reaper requeues it
+            logger.exception("Design worker %s: job %d not recorded", worker_id, job["id"])
+
+
+async def _requeue_loop(db: HobsonDB):
+    while True:
+        try:
+            jobs = await asyncio.to_thread(
+                db.requeue_stale_design_jobs,
+                settings.design_job_stale_minutes * 60,
+                settings.design_job_max_attempts,
+            )
+        except Exception as e:
+            logger.error("Stale design job check failed: %s", e)
+            jobs = []
+        if jobs:
+            logger.warning("Requeued or failed %d stale design jobs", len(jobs))
+        for job in jobs:
+            if job["generation_status"] == "failed" and job["notify"]:
+                await _notify(job, job["result"])
+        await asyncio.sleep(_STALE_CHECK_SECONDS)
+
+
+async def run_workers(db: HobsonDB, concurrency: int | None = None):
+    """Run design workers (and the stale-lock reaper) until cancelled."""
+    concurrency = concurrency or settings.design_workers
+    prefix = f"{socket.gethostname()}:{os.getpid()}"
+    logger.info("Starting %d design workers (%s)", concurrency, prefix)
+    await asyncio.gather(
+        _requeue_loop(db),
+        *(_worker_loop(db, f"{prefix}:{i}") for i in range(concurrency)),
+    )
+
+
+if __name__ == "__main__":
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s [%(levelname)s] %(name)s: %(message)s",
+    )
+    asyncio.run(run_workers(HobsonDB(settings.database_url)))
@@ -0,0 +1,225 @@
+"""Event bus on Postgres LISTEN/NOTIFY.
+
+Producers call hobson.emit_event() (HobsonDB._emit, order_guard.db.log_event)
+inside the transaction that makes the change; it stores the event in
+hobson.events and sends NOTIFY hobson_events. An EventBus holds one LISTEN
+connection, and on each notification reads every event after the last id it
+processed and hands them to subscribers in id order. Reading by id rather
+than trusting notification payloads means a reconnect simply continues from
+the last id: events emitted while disconnected are backfilled.
+
+Ids are handed out at insert but rows only become visible at commit, so
+transactions committing out of order leave a gap: event 6 can be read while
+event 5's transaction is still open. The bus remembers ids it skipped and
+reads them again on every drain until they show up (delivered late, after
+higher ids) or gap_timeout passes (the id was rolled back, which leaves a
+permanent gap in the sequence). Old events are deleted by
+HobsonDB.prune_events once every named consumer has handled them.
+
+Topics in use:
+    approval.created    request_id, action, estimated_cost, thread_id
+    approval.resolved   request_id, status, action, thread_id
+    order.event         printful_order_id, event_type, costs, rule_violated
+
+Subscribers are async callables run as separate tasks, so a slow one (a
+resumed workflow) does not hold up delivery to the rest.
+
+Delivery to a named consumer is at-least-once. Its stored cursor only moves
+past an event once that event's handlers, and every earlier event's, have
+finished (a handler that raises is logged, not retried), and never past a
+gap still being waited on, so events whose handlers were still running when
+the process stopped are delivered again on restart. Handlers must tolerate
+seeing an event twice.
+"""
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from datetime import datetime
+
+import psycopg
+from psycopg.rows import dict_row
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = "hobson_events"
+
+# A larger jump in ids is a sequence reset or bulk rollback, not transactions
+# still in flight; it is not tracked id by id
+_MAX_GAP = 1000
+
+
+@dataclass
+class Event:
+    id: int
+    topic: str
+    payload: dict
+    created_at: datetime | None = None
+
+
+def _matches(topics: tuple[str, ...], topic: str) -> bool:
+    """Exact topic names, "prefix.*" wildcards, or every topic when empty."""
+    return not topics or any(
+        topic == t or (t.endswith(".*") and topic.startswith(t[:-1])) for t in topics
+    )
+
+
+class EventBus:
+    """Async subscriber side of the event bus, with reconnect and backfill."""
+
+    def __init__(
+        self,
+        database_url: str,
+        consumer: str | None = None,
+        poll_interval: float = 60.0,
+        cursor_flush_interval: float = 5.0,
+        gap_timeout: float = 300.0,
+        min_reconnect_delay: float = 1.0,
+        max_reconnect_delay: float = 30.0,
+        connect=psycopg.AsyncConnection.connect,
+    ):
+        self.database_url = database_url
+        # Named consumers persist their position in hobson.event_cursors and
+        # catch up on restart; anonymous ones start from the newest event
+        self.consumer = consumer
+        self.poll_interval = poll_interval
+        # How soon to store a named consumer's cursor once handlers finish
+        self.cursor_flush_interval = cursor_flush_interval
+        # How long to wait for a skipped id's transaction to commit
+        self.gap_timeout = gap_timeout
+        self.min_reconnect_delay = min_reconnect_delay
+        self.max_reconnect_delay = max_reconnect_delay
+        self._connect = connect
+        self._subscribers: list[tuple[tuple[str, ...], object]] = []
+        self._waiters: list[tuple[tuple[str, ...], object, asyncio.Future]] = []
+        self._tasks: set[asyncio.Task] = set()
+        # event id -> handler tasks still running for it
+        self._inflight: dict[int, int] = {}
+        # skipped event id -> when it was first missed
+        self._gaps: dict[int, float] = {}
+        self.last_id: int | None = None
+        self._saved_id: int | None = None
+        self.connected = asyncio.Event()
+
+    def subscribe(self, topics: str | list[str], handler):
+        """Call `await handler(event)` for every event on the given topic(s)."""
+        if isinstance(topics, str):
+            topics = [topics]
+        self._subscribers.append((tuple(topics), handler))
+
+    async def wait_for(self, topics: str | list[str], predicate=None, timeout: float | None = None) -> Event:
+        """Wait for the next event on the topic(s) that satisfies predicate(event).
+
+        Raises asyncio.TimeoutError if none arrives within timeout seconds.
+        """
+        if isinstance(topics, str):
+            topics = [topics]
+        future = asyncio.get_running_loop().create_future()
+        waiter = (tuple(topics), predicate, future)
+        self._waiters.append(waiter)
+        try:
+            return await asyncio.wait_for(future, timeout)
+        finally:
+            self._waiters.remove(waiter)
+
+    # -- Delivery --
+
+    def dispatch(self, event: Event):
+        for topics, predicate, future in self._waiters:
+            if not future.done() and _matches(topics, event.topic) and (predicate is None or predicate(event)):
+                future.set_result(event)
+        for topics, handler in self._subscribers:
+            if _matches(topics, event.topic):
+                self._inflight[event.id] = self._inflight.get(event.id, 0) + 1
+                task = asyncio.create_task(self._call(handler, event))
+                self._tasks.add(task)
+                task.add_done_callback(self._tasks.discard)
+
+    async def _call(self, handler, event: Event):
+        try:
+            await handler(event)
+        except Exception:
+            logger.exception("Event handler %s failed on %s #%d", getattr(handler, "__name__", handler), event.topic, event.id)
+        finally:
+            self._inflight[event.id] -= 1
+            if not self._inflight[event.id]:
+                del self._inflight[event.id]
+
+    def _handled_through(self) -> int:
+        """Highest event id whose handlers, and every earlier event's, have finished."""
+        return min([self.last_id, *(i - 1 for i in self._inflight), *(i - 1 for i in self._gaps)])
+
+    async def _initial_position(self, conn) -> int:
+        if self.consumer:
+            cur = await conn.execute(
+                "SELECT last_event_id FROM hobson.event_cursors WHERE consumer = %s", (self.consumer,)
+            )
+            row = await cur.fetchone()
+            if row:
+                self._saved_id = row["last_event_id"]
+                return row["last_event_id"]
+        cur = await conn.execute("SELECT COALESCE(MAX(id), 0) AS id FROM hobson.events")
+        return (await cur.fetchone())["id"]
+
+    async def _drain(self, conn):
+        """Dispatch every event after last_id or in a gap, then record how far handling has got."""
+        cur = await conn.execute(
+            """SELECT id, topic, payload, created_at FROM hobson.events
+               WHERE id > %s OR id = ANY(%s) ORDER BY id""",
+            (self.last_id, list(self._gaps)),
+        )
+        now = time.monotonic()
+        for row in await cur.fetchall():
+            if self._gaps.pop(row["id"], None) is None:
+                if row["id"] - self.last_id <= _MAX_GAP:
+                    self._gaps.update((i, now) for i in range(self.last_id + 1, row["id"]))
+                self.last_id = row["id"]
+            self.dispatch(Event(**row))
+        for event_id, missed_at in list(self._gaps.items()):
+            if now - missed_at > self.gap_timeout:
+                del self._gaps[event_id]
+                logger.info("Event #%d never committed; no longer waiting for it", event_id)
+        position = self._handled_through()
+        if self.consumer and position != self._saved_id:
+            await conn.execute(
+                """INSERT INTO hobson.event_cursors (consumer, last_event_id) VALUES (%s, %s)
+                   ON CONFLICT (consumer) DO UPDATE
+                   SET last_event_id = EXCLUDED.last_event_id, updated_at = NOW()""",
+                (self.consumer, position),
+            )
+            self._saved_id = position
+
+    def _wait_timeout(self) -> float:
+        # Come back soon to store the cursor while handlers are catching up
+        if self.consumer and (self._inflight or self._handled_through() != self._saved_id):
+            return min(self.cursor_flush_interval, self.poll_interval)
+        return self.poll_interval
+
+    async def run(self):
+        """Listen forever, reconnecting with backoff; cancel the task to stop."""
+        delay = self.min_reconnect_delay
+        while True:
+            try:
+                conn = await self._connect(self.database_url, autocommit=True, row_factory=dict_row)
+                async with conn:
+                    await conn.execute(f"LISTEN {CHANNEL}")
+                    if self.last_id is None:
+                        self.last_id = await self._initial_position(conn)
+                    # LISTEN is active, so anything from here on wakes us; first
+                    # catch up on whatever was emitted while we were not listening
+                    await self._drain(conn)
+                    self.connected.set()
+                    delay = self.min_reconnect_delay
+                    while True:
+                        # The timeout is a safety net; notifications normally end the wait
+                        async for _ in conn.notifies(timeout=self._wait_timeout(), stop_after=1):
+                            pass
+                        await self._drain(conn)
+            except (psycopg.Error, OSError) as e:
+                # Connection drops, and query errors such as a missing events
+                # table, are retried alike rather than ending the task
+                self.connected.clear()
+                logger.warning("Event bus error (%s); reconnecting in %.1fs", e, delay)
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, self.max_reconnect_delay)
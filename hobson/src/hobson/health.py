@@ -1,10 +1,54 @@
-"""Health endpoint for Uptime Kuma monitoring."""
+"""Health endpoint for Uptime Kuma monitoring, metrics, and the Telegram webhook.
 
-from fastapi import FastAPI
+The webhook route is inert until main.py stores the PTB Application and the
+webhook secret on app.state (webhook mode); in polling mode it returns 404.
+"""
+
+import hmac
+import json
+import logging
+
+from fastapi import FastAPI, Request, Response
+from telegram import Update
+
+from hobson.tools.obsidian import vault
+
+logger = logging.getLogger(__name__)
+
+TELEGRAM_WEBHOOK_PATH = "/telegram/webhook"
 
 app = FastAPI(title="Hobson Agent", version="0.1.0")
+app.state.telegram_app = None
+app.state.telegram_webhook_secret = ""
 
 
 @app.get("/health")
 async def health():
     return {"status": "ok", "agent": "hobson", "version": "0.1.0"}
+
+
+@app.get("/metrics")
+async def metrics():
+    return {"vault": vault().metrics()}
+
+
+@app.post(TELEGRAM_WEBHOOK_PATH)
+async def telegram_webhook(request: Request):
+    telegram_app = app.state.telegram_app
+    secret = app.state.telegram_webhook_secret
+    if telegram_app is None or not secret:
+        return Response(status_code=404)
+
+    # Telegram echoes the secret_token given to setWebhook in this header
+    token = request.headers.get("X-Telegram-Bot-Api-Secret-Token", "")
+    if not hmac.compare_digest(token.encode(), secret.encode()):
+        return Response(status_code=401, content="Invalid secret token")
+
+    try:
+        update = Update.de_json(json.loads(await request.body()), telegram_app.bot)
+    except (json.JSONDecodeError, TypeError, KeyError, ValueError):
+        return Response(status_code=400, content="Invalid update")
+
+    # Handlers run on the Application's own update loop; answer Telegram right away
+    await telegram_app.update_queue.put(update)
+    return {"ok": True}
@@ -2,6 +2,7 @@
 
 import asyncio
 import logging
+import secrets
 
 import uvicorn
 from langgraph.checkpoint.postgres.aio import AsyncPostgresSaver
@@ -9,8 +10,10 @@ from langgraph.checkpoint.postgres.aio import AsyncPostgresSaver
 from hobson.agent import create_agent
 from hobson.config import settings
 from hobson.db import HobsonDB
-from hobson.health import app
-from hobson.scheduler import scheduler, setup_schedules
+from hobson.design_worker import run_workers
+from hobson.events import EventBus
+from hobson.health import TELEGRAM_WEBHOOK_PATH, app
+from hobson.scheduler import approval_resolved_handler, scheduler, setup_schedules
 from hobson.tools.telegram import init_telegram
 
 logging.basicConfig(
@@ -42,22 +45,53 @@ async def main():
         scheduler.start()
         logger.info("Scheduler started with %d jobs", len(scheduler.get_jobs()))
 
+        # Event bus: resume paused workflows as their approvals are resolved
+        # (including ones resolved while Hobson was down, via the cursor)
+        event_bus = EventBus(settings.database_url, consumer="hobson-agent")
+        event_bus.subscribe("approval.resolved", approval_resolved_handler(agent))
+        event_bus_task = asyncio.create_task(event_bus.run())
+
+        # Drain the design job queue here unless a separate worker service does
+        design_workers = None
+        if settings.design_worker_in_process:
+            design_workers = asyncio.create_task(run_workers(db))
+
         # Start health server
         health_config = uvicorn.Config(app, host="0.0.0.0", port=8080, log_level="info")
         health_server = uvicorn.Server(health_config)
 
-        # Run Telegram polling + health server concurrently
-        logger.info("Starting Telegram polling and health server on :8080")
+        # Receive Telegram updates by webhook (served by the health server)
+        # when a public URL is configured, otherwise by long polling
+        webhook_mode = bool(settings.telegram_webhook_url)
 
         async with telegram_app:
             await telegram_app.initialize()
             await telegram_app.start()
-            await telegram_app.updater.start_polling(drop_pending_updates=True)
+            if webhook_mode:
+                secret = settings.telegram_webhook_secret or secrets.token_urlsafe(32)
+                app.state.telegram_app = telegram_app
+                app.state.telegram_webhook_secret = secret
+                webhook_url = settings.telegram_webhook_url.rstrip("/") + TELEGRAM_WEBHOOK_PATH
+                await telegram_app.bot.set_webhook(
+                    url=webhook_url,
+                    secret_token=secret,
+                    allowed_updates=["message", "callback_query"],
+                    drop_pending_updates=True,
+                )
+                logger.info("Telegram webhook set to %s; health server on :8080", webhook_url)
+            else:
+                # start_polling removes any webhook left over from webhook mode
+                await telegram_app.updater.start_polling(drop_pending_updates=True)
+                logger.info("Starting Telegram polling and health server on :8080")
 
             try:
                 await health_server.serve()
             finally:
-                await telegram_app.updater.stop()
+                if design_workers:
+                    design_workers.cancel()
+                event_bus_task.cancel()
+                if telegram_app.updater.running:
+                    await telegram_app.updater.stop()
                 await telegram_app.stop()
                 await telegram_app.shutdown()
 
@@ -1,20 +1,27 @@
 """APScheduler setup for Hobson's scheduled workflows."""
 
+import asyncio
 import logging
 import traceback
+from datetime import UTC, datetime
 
 import httpx
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.cron import CronTrigger
+from apscheduler.triggers.interval import IntervalTrigger
+from langgraph.types import Command
 
 from hobson.config import settings
 from hobson.db import HobsonDB
-from hobson.workflows.business_review import BUSINESS_REVIEW_PROMPT
-from hobson.workflows.content_pipeline import CONTENT_PIPELINE_PROMPT
-from hobson.workflows.bootstrap_diary import BOOTSTRAP_DIARY_PROMPT
-from hobson.workflows.design_batch import DESIGN_BATCH_BOOTSTRAP_PROMPT, DESIGN_BATCH_PROMPT
-from hobson.workflows.morning_briefing import MORNING_BRIEFING_PROMPT
-from hobson.workflows.substack_dispatch import SUBSTACK_DISPATCH_PROMPT
+from hobson.tools.image_gen import prune_imagen_cache
+from hobson.tools.novelty import sync_topic_index
+from hobson.workflows.business_review import BUSINESS_REVIEW_PREFETCH, BUSINESS_REVIEW_PROMPT
+from hobson.workflows.content_pipeline import CONTENT_PIPELINE_PREFETCH, CONTENT_PIPELINE_PROMPT
+from hobson.workflows.bootstrap_diary import BOOTSTRAP_DIARY_PREFETCH, BOOTSTRAP_DIARY_PROMPT
+from hobson.workflows.design_batch import DESIGN_BATCH_BOOTSTRAP_PROMPT, DESIGN_BATCH_PREFETCH, DESIGN_BATCH_PROMPT
+from hobson.workflows.morning_briefing import MORNING_BRIEFING_PREFETCH, MORNING_BRIEFING_PROMPT
+from hobson.workflows.prefetch import Prefetch, gather_context
+from hobson.workflows.substack_dispatch import SUBSTACK_DISPATCH_PREFETCH, SUBSTACK_DISPATCH_PROMPT
 
 logger = logging.getLogger(__name__)
 
@@ -35,8 +42,41 @@ _PUSH_URLS = {
 }
 
 
-async def run_workflow(agent, workflow_name: str, message: str):
-    """Execute a workflow with retry, circuit breaking, and run logging."""
+# One lock per checkpoint thread, so a resume never overlaps the run it resumes
+_thread_locks: dict[str, asyncio.Lock] = {}
+
+
+def _workflow_thread_id(workflow_name: str, run_id: str) -> str:
+    """Checkpoint thread for one workflow run (each run starts from a clean history)."""
+    return f"workflow-{workflow_name}:{run_id}"
+
+
+def _workflow_config(thread_id: str) -> dict:
+    # resumable_approvals makes send_approval_request pause the run (interrupt)
+    # instead of returning immediately
+    return {"configurable": {"thread_id": thread_id, "resumable_approvals": True}}
+
+
+def _log_outcome(db: HobsonDB, thread_id: str, workflow_name: str, run_id: str, result: dict):
+    """Log a finished invocation as success, or as waiting if it paused on approvals."""
+    interrupts = result.get("__interrupt__") or []
+    if interrupts:
+        pending = [i.value.get("request_id") for i in interrupts if isinstance(i.value, dict)]
+        db.log_run_complete(run_id, status="waiting_approval", outputs={"pending_approvals": pending})
+        logger.info(f"Workflow {workflow_name} paused for approval {pending} (run_id={run_id})")
+    else:
+        db.log_run_complete(run_id, status="success", outputs={"response": "ok"})
+        logger.info(f"Workflow {workflow_name} completed successfully (run_id={run_id})")
+        # Nothing left to resume on this thread
+        _thread_locks.pop(thread_id, None)
+
+
+async def run_workflow(agent, workflow_name: str, message: str, prefetch: list[Prefetch] | None = None):
+    """Execute a workflow with retry, circuit breaking, and run logging.
+
+    The prefetch specs, if any, are run concurrently first and their results
+    prepended to the message.
+    """
     db = HobsonDB(settings.database_url)
 
     # Circuit breaker check
@@ -44,14 +84,22 @@ async def run_workflow(agent, workflow_name: str, message: str):
         logger.error(f"Circuit breaker OPEN for {workflow_name}. Skipping.")
         return
 
-    run_id = db.log_run_start(workflow=workflow_name, inputs={"message": message})
+    inputs = {"message": message}
+    if prefetch:
+        inputs["prefetch"] = [spec.call for spec in prefetch]
+    run_id = db.log_run_start(workflow=workflow_name, inputs=inputs)
+    thread_id = _workflow_thread_id(workflow_name, run_id)
 
     try:
-        result = await agent.ainvoke(
-            {"messages": [{"role": "user", "content": message}]},
-            config={"configurable": {"thread_id": f"workflow-{workflow_name}"}},
-        )
-        db.log_run_complete(run_id, status="success", outputs={"response": "ok"})
+        if prefetch:
+            context = await gather_context(prefetch, timeout=settings.workflow_prefetch_timeout)
+            message = f"{context}\n\n## Workflow\n{message}"
+        async with _thread_locks.setdefault(thread_id, asyncio.Lock()):
+            result = await agent.ainvoke(
+                {"messages": [{"role": "user", "content": message}]},
+                config=_workflow_config(thread_id),
+            )
+        _log_outcome(db, thread_id, workflow_name, run_id, result)
         _failure_counts[workflow_name] = 0
 
         # Ping this workflow's Uptime Kuma push URL on success
@@ -63,18 +111,87 @@ async def run_workflow(agent, workflow_name: str, message: str):
             except Exception:
                 pass
 
-        logger.info(f"Workflow {workflow_name} completed successfully (run_id={run_id})")
-
     except Exception as e:
         error_msg = f"{type(e).__name__}: {e}\n{traceback.format_exc()}"
         db.log_run_complete(run_id, status="failed", error=error_msg)
         _failure_counts[workflow_name] = _failure_counts.get(workflow_name, 0) + 1
         logger.error(f"Workflow {workflow_name} failed (run_id={run_id}): {e}")
+        _thread_locks.pop(thread_id, None)
 
         if _failure_counts[workflow_name] >= _CIRCUIT_BREAKER_THRESHOLD:
             logger.critical(f"Circuit breaker TRIPPED for {workflow_name}")
 
 
+async def resume_workflow(agent, thread_id: str, request_id: str, status: str) -> bool:
+    """Resume a workflow run paused on approval request_id, from its checkpoint.
+
+    status is the approval's final status ("approved", "denied" or "expired");
+    send_approval_request returns it to the agent, which carries on from that
+    tool call without repeating earlier steps. Returns False if no run is
+    waiting on this approval.
+    """
+    workflow_name, _, run_id = thread_id.removeprefix("workflow-").partition(":")
+    db = HobsonDB(settings.database_url)
+    config = _workflow_config(thread_id)
+
+    async with _thread_locks.setdefault(thread_id, asyncio.Lock()):
+        state = await agent.aget_state(config)
+        pending = {
+            interrupt.value.get("request_id"): interrupt.id
+            for task in state.tasks
+            for interrupt in task.interrupts
+            if isinstance(interrupt.value, dict)
+        }
+        if request_id not in pending:
+            logger.warning(f"No paused run of {workflow_name} is waiting on approval {request_id}")
+            return False
+
+        logger.info(f"Resuming {workflow_name} (run_id={run_id}) after approval {request_id}: {status}")
+        try:
+            result = await agent.ainvoke(
+                Command(resume={pending[request_id]: {"status": status}}),
+                config=config,
+            )
+        except Exception as e:
+            error_msg = f"{type(e).__name__}: {e}\n{traceback.format_exc()}"
+            db.log_run_complete(run_id, status="failed", error=error_msg)
+            logger.error(f"Resumed workflow {workflow_name} failed (run_id={run_id}): {e}")
+            return True
+    _log_outcome(db, thread_id, workflow_name, run_id, result)
+    return True
+
+
+def approval_resolved_handler(agent):
+    """Event bus subscriber for approval.resolved: resume the run waiting on it.
+
+    Approvals are resolved from Telegram callbacks and by the expiry job; both
+    emit approval.resolved, so every resume goes through here.
+    """
+    async def on_approval_resolved(event):
+        payload = event.payload
+        if payload.get("thread_id"):
+            await resume_workflow(agent, payload["thread_id"], payload["request_id"], payload["status"])
+
+    return on_approval_resolved
+
+
+async def prune_events():
+    """Delete old events that every named event bus consumer has handled."""
+    db = HobsonDB(settings.database_url)
+    deleted = await asyncio.to_thread(db.prune_events, settings.event_retention_days)
+    if deleted:
+        logger.info(f"Pruned {deleted} events older than {settings.event_retention_days:g} days")
+
+
+async def expire_stale_approvals():
+    """Expire approvals nobody answered in time (their runs resume via approval.resolved)."""
+    db = HobsonDB(settings.database_url)
+    for record in db.expire_stale_approvals(settings.approval_timeout_hours):
+        logger.warning(
+            f"Approval {record['request_id']} expired after {settings.approval_timeout_hours}h: {record['action']}"
+        )
+
+
 def setup_schedules(agent):
     """Register all scheduled workflows. Cadence depends on bootstrap_mode."""
 
@@ -82,7 +199,7 @@ def setup_schedules(agent):
     scheduler.add_job(
         run_workflow,
         CronTrigger(hour=7, minute=0, timezone="America/New_York"),
-        args=[agent, "morning_briefing", MORNING_BRIEFING_PROMPT],
+        args=[agent, "morning_briefing", MORNING_BRIEFING_PROMPT, MORNING_BRIEFING_PREFETCH],
         id="morning_briefing",
     )
 
@@ -92,7 +209,7 @@ def setup_schedules(agent):
             scheduler.add_job(
                 run_workflow,
                 CronTrigger(hour=hour, minute=0, timezone="America/New_York"),
-                args=[agent, "content_pipeline", CONTENT_PIPELINE_PROMPT],
+                args=[agent, "content_pipeline", CONTENT_PIPELINE_PROMPT, CONTENT_PIPELINE_PREFETCH],
                 id=f"content_pipeline_{suffix}",
             )
 
@@ -100,7 +217,7 @@ def setup_schedules(agent):
         scheduler.add_job(
             run_workflow,
             CronTrigger(hour=21, minute=0, timezone="America/New_York"),
-            args=[agent, "bootstrap_diary", BOOTSTRAP_DIARY_PROMPT],
+            args=[agent, "bootstrap_diary", BOOTSTRAP_DIARY_PROMPT, BOOTSTRAP_DIARY_PREFETCH],
             id="bootstrap_diary",
         )
 
@@ -108,7 +225,7 @@ def setup_schedules(agent):
         scheduler.add_job(
             run_workflow,
             CronTrigger(hour=14, minute=0, timezone="America/New_York"),
-            args=[agent, "design_batch", DESIGN_BATCH_BOOTSTRAP_PROMPT],
+            args=[agent, "design_batch", DESIGN_BATCH_BOOTSTRAP_PROMPT, DESIGN_BATCH_PREFETCH],
             id="design_batch",
         )
     else:
@@ -116,7 +233,7 @@ def setup_schedules(agent):
         scheduler.add_job(
             run_workflow,
             CronTrigger(day_of_week="mon,wed,fri", hour=10, timezone="America/New_York"),
-            args=[agent, "content_pipeline", CONTENT_PIPELINE_PROMPT],
+            args=[agent, "content_pipeline", CONTENT_PIPELINE_PROMPT, CONTENT_PIPELINE_PREFETCH],
             id="content_pipeline",
         )
 
@@ -124,7 +241,7 @@ def setup_schedules(agent):
         scheduler.add_job(
             run_workflow,
             CronTrigger(day_of_week="mon", hour=14, timezone="America/New_York"),
-            args=[agent, "design_batch", DESIGN_BATCH_PROMPT],
+            args=[agent, "design_batch", DESIGN_BATCH_PROMPT, DESIGN_BATCH_PREFETCH],
             id="design_batch",
         )
 
@@ -132,7 +249,7 @@ def setup_schedules(agent):
     scheduler.add_job(
         run_workflow,
         CronTrigger(day_of_week="fri", hour=15, timezone="America/New_York"),
-        args=[agent, "substack_dispatch", SUBSTACK_DISPATCH_PROMPT],
+        args=[agent, "substack_dispatch", SUBSTACK_DISPATCH_PROMPT, SUBSTACK_DISPATCH_PREFETCH],
         id="substack_dispatch",
     )
 
@@ -140,6 +257,37 @@ def setup_schedules(agent):
     scheduler.add_job(
         run_workflow,
         CronTrigger(day_of_week="sun", hour=18, timezone="America/New_York"),
-        args=[agent, "business_review", BUSINESS_REVIEW_PROMPT],
+        args=[agent, "business_review", BUSINESS_REVIEW_PROMPT, BUSINESS_REVIEW_PREFETCH],
         id="business_review",
     )
+
+    # Approval timeouts: expire requests nobody answered
+    scheduler.add_job(
+        expire_stale_approvals,
+        IntervalTrigger(minutes=30),
+        id="expire_stale_approvals",
+    )
+
+    # Event bus: drop events every consumer has handled, past retention
+    scheduler.add_job(
+        prune_events,
+        CronTrigger(hour=4, minute=0, timezone="America/New_York"),
+        id="prune_events",
+    )
+
+    # Topic novelty index: sync sources in the background, so checks stay local
+    scheduler.add_job(
+        asyncio.to_thread,
+        IntervalTrigger(minutes=settings.topic_index_refresh_minutes),
+        args=[sync_topic_index],
+        id="sync_topic_index",
+        next_run_time=datetime.now(UTC),
+    )
+
+    # Imagen cache: drop expired entries and blobs nothing references
+    scheduler.add_job(
+        asyncio.to_thread,
+        CronTrigger(hour=4, minute=30, timezone="America/New_York"),
+        args=[prune_imagen_cache],
+        id="prune_imagen_cache",
+    )
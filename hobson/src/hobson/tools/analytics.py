@@ -3,17 +3,68 @@
 Uses the Cloudflare GraphQL Analytics API (free tier) to pull pageviews,
 visitors, top pages, and referrers for buildscharacter.com. No additional
 service to deploy -- the domain is already on Cloudflare.
+
+Complete days are stored in hobson.metrics (daily totals, and each day's top
+paths and referrers), so a tool call only asks Cloudflare for the days it has
+not seen yet, and multi-week windows and comparisons are one Postgres read.
+Missing days come from one GraphQL request per Cloudflare dataset: daily
+totals from the daily dataset, top pages and referrers from the adaptive one,
+each sized to the windows asked of it. Each load is kept as an in-memory
+snapshot the tools share, so a workflow run makes at most one request per
+dataset, and an adaptive-dataset error leaves the traffic tools working.
+get_traffic_insights turns the stored series into trends and anomalies (see
+trends.py) so the model quotes computed numbers instead of working them out
+from tables.
 """
 
-from datetime import date, timedelta
+import logging
+import threading
+from dataclasses import dataclass
+from datetime import UTC, date, datetime, time, timedelta
+from time import monotonic
 
 import httpx
+import numpy as np
+import psycopg
 from langchain_core.tools import tool
 
 from hobson.config import settings
+from hobson.db import HobsonDB
+from hobson.tools import trends
+
+logger = logging.getLogger(__name__)
 
 _GQL_ENDPOINT = "https://api.cloudflare.com/client/v4/graphql"
 
+# Daily rows in hobson.metrics, one per (date, metric_type)
+TRAFFIC = "cf_traffic"  # pageviews, requests, uniques, bytes
+PAGES = "cf_pages"  # {"paths": {path: hits}} for the day's top paths
+REFERRERS = "cf_referrers"  # {"hosts": {host: hits}} for the day's top referrers
+
+# Paths/referrers kept per day; window rankings sum these daily lists
+_STORED_TOP_N = 50
+# Cloudflare keeps adding late data for a while after a (UTC) day ends; a day
+# fetched sooner than this is stored as provisional and fetched again
+_SETTLE_HOURS = 6
+# Snapshots per Cloudflare dataset: the metric types loaded together, and the
+# days a load covers at least (two weeks plus the two before them for
+# traffic; the default page/referrer window for the adaptive dataset)
+_DATASETS = {
+    "daily": ((TRAFFIC,), 28),
+    "adaptive": ((PAGES, REFERRERS), 7),
+}
+# get_traffic_insights: 28 days against the 28 before (which also gives each
+# of the last 7 days a full 28-day anomaly baseline)
+_INSIGHT_DAYS = 56
+_ANOMALY_BASELINE = 28
+
+# Module-level DB instance (reused across tool calls)
+_db = HobsonDB(settings.database_url)
+
+
+class AnalyticsError(RuntimeError):
+    """The Cloudflare API returned an error or no zone data."""
+
 
 def _headers() -> dict:
     return {
@@ -23,14 +74,230 @@ def _headers() -> dict:
 
 
 def _query(query: str, variables: dict) -> dict:
-    """Execute a GraphQL query against the Cloudflare Analytics API."""
+    """Execute a GraphQL query against the Cloudflare Analytics API; return the zone."""
     with httpx.Client(headers=_headers(), timeout=30) as client:
         resp = client.post(_GQL_ENDPOINT, json={"query": query, "variables": variables})
         resp.raise_for_status()
         data = resp.json()
     if data.get("errors"):
-        return {"error": str(data["errors"])}
-    return data.get("data", {})
+        raise AnalyticsError(str(data["errors"]))
+    zones = (data.get("data") or {}).get("viewer", {}).get("zones", [])
+    if not zones:
+        raise AnalyticsError("No analytics data returned (check zone ID).")
+    return zones[0]
+
+
+def _days(start: date, end: date) -> list[date]:
+    return [start + timedelta(days=i) for i in range((end - start).days)]
+
+
+def _adaptive_filter(start: date, end: date) -> dict:
+    return {
+        "datetime_geq": f"{start}T00:00:00Z",
+        "datetime_lt": f"{end}T00:00:00Z",
+        "requestSource": "eyeball",
+    }
+
+
+# -- Cloudflare --
+
+# One request for the missing days: the fields present depend on which days
+# (and datasets) are missing, so the query and its variables are assembled
+# per request
+_ANALYTICS_QUERY = """
+query Analytics({params}) {{
+  viewer {{
+    zones(filter: {{zoneTag: $zoneTag}}) {{{fields}
+    }}
+  }}
+}}
+"""
+
+_TRAFFIC_FIELD = """
+      traffic: httpRequests1dGroups(
+        filter: {date_geq: $start, date_lt: $end}
+        orderBy: [date_ASC]
+        limit: $days
+      ) {
+        dimensions { date }
+        sum { pageViews requests bytes }
+        uniq { uniques }
+      }"""
+
+# One ranking per day and dimension: a limit shared across days would let
+# the busiest days crowd the quiet ones out of the top N
+_RANKED_FIELD = """
+      {alias}: httpRequestsAdaptiveGroups(filter: ${var}, limit: $ranked, orderBy: [count_DESC]) {{
+        count
+        dimensions {{ {dimension} }}
+      }}"""
+
+# metric_type -> (alias prefix, Cloudflare dimension, key in the stored data)
+_RANKED = {
+    PAGES: ("pages", "clientRequestPath", "paths"),
+    REFERRERS: ("referrers", "clientRefererHost", "hosts"),
+}
+
+_EMPTY = {
+    TRAFFIC: {"pageviews": 0, "requests": 0, "bytes": 0, "uniques": 0},
+    PAGES: {"paths": {}},
+    REFERRERS: {"hosts": {}},
+}
+
+
+def _fetch(missing: dict[str, list[date]]) -> dict[str, dict[date, dict]]:
+    """The listed days of each metric type, in one GraphQL request.
+
+    Traffic comes from the daily dataset as one date range; pages and
+    referrers from the adaptive dataset, as a separate top-N ranking for
+    each day.
+    """
+    params = ["$zoneTag: string!"]
+    fields = []
+    variables: dict = {"zoneTag": settings.cloudflare_zone_id}
+    traffic_days = missing.get(TRAFFIC)
+    if traffic_days:
+        start, end = traffic_days[0], traffic_days[-1] + timedelta(days=1)
+        params += ["$start: Date!", "$end: Date!", "$days: uint64!"]
+        fields.append(_TRAFFIC_FIELD)
+        variables.update(start=start.isoformat(), end=end.isoformat(), days=len(_days(start, end)))
+    ranked = [(metric_type, day) for metric_type in _RANKED for day in missing.get(metric_type, [])]
+    if ranked:
+        params.append("$ranked: uint64!")
+        variables["ranked"] = _STORED_TOP_N
+    for metric_type, day in ranked:
+        var = f"filter_{day:%Y%m%d}"
+        if var not in variables:
+            params.append(f"${var}: ZoneHttpRequestsAdaptiveGroupsFilter_InputObject!")
+            variables[var] = _adaptive_filter(day, day + timedelta(days=1))
+        prefix, dimension, _ = _RANKED[metric_type]
+        fields.append(_RANKED_FIELD.format(alias=f"{prefix}_{day:%Y%m%d}", var=var, dimension=dimension))
+    zone = _query(_ANALYTICS_QUERY.format(params=", ".join(params), fields="".join(fields)), variables)
+
+    fetched: dict[str, dict[date, dict]] = {metric_type: {} for metric_type in _EMPTY}
+    for g in zone.get("traffic") or []:
+        fetched[TRAFFIC][date.fromisoformat(g["dimensions"]["date"])] = {
+            "pageviews": g["sum"]["pageViews"],
+            "requests": g["sum"]["requests"],
+            "bytes": g["sum"]["bytes"],
+            "uniques": g["uniq"]["uniques"],
+        }
+    for metric_type, day in ranked:
+        prefix, dimension, key = _RANKED[metric_type]
+        ranking: dict[str, int] = {}
+        for g in zone.get(f"{prefix}_{day:%Y%m%d}") or []:
+            name = g["dimensions"][dimension] or ""
+            ranking[name] = ranking.get(name, 0) + g["count"]
+        fetched[metric_type][day] = {key: ranking}
+    return fetched
+
+
+# -- Warehouse and snapshot --
+
+
+def _settled(day: date, data: dict) -> bool:
+    fetched_at = data.get("fetched_at")
+    if not fetched_at:
+        return False
+    day_end = datetime.combine(day + timedelta(days=1), time(), tzinfo=UTC)
+    return datetime.fromisoformat(fetched_at) >= day_end + timedelta(hours=_SETTLE_HOURS)
+
+
+def _load(metric_types: tuple[str, ...], start: date, end: date) -> dict[str, dict[date, dict]]:
+    """Daily data of metric_types for [start, end), from hobson.metrics topped up from Cloudflare.
+
+    One Postgres read; then, if any type is missing (or has provisional) days,
+    one Cloudflare request for them, and only those days are written back.
+    Without Postgres the whole window is fetched.
+    """
+    stored: dict[str, dict[date, dict]] = {metric_type: {} for metric_type in metric_types}
+    db_ok = True
+    try:
+        for row in _db.get_metrics(list(metric_types), start, end):
+            stored[row["metric_type"]][row["date"]] = row["data"]
+    except psycopg.Error as e:
+        logger.warning("Metrics store unavailable, fetching from Cloudflare: %s", e)
+        db_ok = False
+
+    missing = {
+        metric_type: [day for day in _days(start, end) if day not in rows or not _settled(day, rows[day])]
+        for metric_type, rows in stored.items()
+    }
+    if any(missing.values()):
+        fetched = _fetch(missing)
+        fetched_at = datetime.now(UTC).isoformat()
+        for metric_type, days in missing.items():
+            if not days:
+                continue
+            # Days Cloudflare returns nothing for had no traffic; store zeros
+            # so they are not fetched again
+            new = {
+                day: {**_EMPTY[metric_type], **fetched[metric_type].get(day, {}), "fetched_at": fetched_at}
+                for day in days
+            }
+            stored[metric_type].update(new)
+            if db_ok:
+                try:
+                    _db.log_metrics(metric_type, new)
+                except psycopg.Error as e:
+                    logger.warning("Could not store %s metrics: %s", metric_type, e)
+    return {metric_type: dict(sorted(rows.items())) for metric_type, rows in stored.items()}
+
+
+@dataclass
+class _Snapshot:
+    start: date
+    end: date
+    loaded_at: float
+    series: dict[str, dict[date, dict]]
+
+
+# The last load of each dataset, shared by the tools: a workflow's analytics
+# calls are served from one load per dataset (one request at most) while fresh
+_snapshots: dict[str, _Snapshot] = {}
+_snapshot_lock = threading.Lock()
+
+
+def _series(metric_type: str, start: date, end: date) -> dict[date, dict]:
+    """Daily data for [start, end), from its dataset's snapshot when that covers the window."""
+    dataset = next(name for name, (types, _) in _DATASETS.items() if metric_type in types)
+    metric_types, min_days = _DATASETS[dataset]
+    with _snapshot_lock:
+        snap = _snapshots.get(dataset)
+        fresh = (
+            snap is not None
+            and snap.end == end
+            and snap.start <= start
+            and monotonic() - snap.loaded_at < settings.analytics_snapshot_ttl
+        )
+        if not fresh:
+            # Load a minimum window up front so the other tools' usual windows
+            # (and a previous-window comparison) come from the same load
+            lo = min(start, end - timedelta(days=min_days))
+            snap = _snapshots[dataset] = _Snapshot(lo, end, monotonic(), _load(metric_types, lo, end))
+    return {day: data for day, data in snap.series[metric_type].items() if start <= day < end}
+
+
+def _window(days: int) -> tuple[date, date]:
+    """[start, end) of the last `days` complete days."""
+    end = date.today()
+    return end - timedelta(days=max(days, 1)), end
+
+
+def _window_totals(series: dict[date, dict], key: str, start: date, end: date) -> dict[str, int]:
+    """Per-path (or per-host) hits summed over the days of [start, end)."""
+    totals: dict[str, int] = {}
+    for day, data in series.items():
+        if start <= day < end:
+            for name, count in data[key].items():
+                totals[name] = totals.get(name, 0) + count
+    return totals
+
+
+def _ranked_totals(metric_type: str, key: str, days: int, limit: int) -> list[tuple[str, int]]:
+    start, end = _window(days)
+    totals = _window_totals(_series(metric_type, start, end), key, start, end)
+    return sorted(totals.items(), key=lambda item: (-item[1], item[0]))[:max(limit, 1)]
 
 
 @tool
@@ -39,67 +306,48 @@ def get_site_stats(days: int = 1) -> str:
 
     Pulls from Cloudflare Analytics for buildscharacter.com. Use this in
     the morning briefing to report yesterday's traffic, or with a larger
-    window for weekly/monthly summaries.
+    window for weekly/monthly summaries. Includes the same numbers for the
+    previous window of equal length for comparison.
 
     Args:
         days: Number of days to look back (default 1 = yesterday only).
     """
-    end = date.today()
-    start = end - timedelta(days=days)
-
-    query = """
-    query SiteStats($zoneTag: string!, $start: Date!, $end: Date!) {
-      viewer {
-        zones(filter: {zoneTag: $zoneTag}) {
-          httpRequests1dGroups(
-            filter: {date_geq: $start, date_lt: $end}
-            orderBy: [date_ASC]
-            limit: 31
-          ) {
-            dimensions { date }
-            sum { pageViews requests bytes }
-            uniq { uniques }
-          }
-        }
-      }
-    }
-    """
-    variables = {
-        "zoneTag": settings.cloudflare_zone_id,
-        "start": start.isoformat(),
-        "end": end.isoformat(),
-    }
-
-    data = _query(query, variables)
-    if "error" in data:
-        return f"Analytics error: {data['error']}"
-
-    zones = data.get("viewer", {}).get("zones", [])
-    if not zones:
-        return "No analytics data returned (check zone ID)."
-
-    groups = zones[0].get("httpRequests1dGroups", [])
-    if not groups:
+    start, end = _window(days)
+    days = (end - start).days
+    # Current and previous window in one read (and at most one fetch)
+    try:
+        series = _series(TRAFFIC, start - timedelta(days=days), end)
+    except (AnalyticsError, httpx.HTTPError) as e:
+        return f"Analytics error: {e}"
+    current = [data for day, data in series.items() if day >= start]
+    previous = [data for day, data in series.items() if day < start]
+
+    if not any(d["requests"] for d in current):
         return f"No traffic data for {start} to {end}."
 
-    total_pageviews = sum(g["sum"]["pageViews"] for g in groups)
-    total_visitors = sum(g["uniq"]["uniques"] for g in groups)
-    total_requests = sum(g["sum"]["requests"] for g in groups)
+    total_pageviews = sum(d["pageviews"] for d in current)
+    total_visitors = sum(d["uniques"] for d in current)
+    total_requests = sum(d["requests"] for d in current)
 
     lines = [f"Site stats for {start} to {end} ({days} day{'s' if days > 1 else ''}):",
              f"  Pageviews: {total_pageviews:,} (actual page loads, the real number)",
              f"  Unique IPs: {total_visitors:,} (includes bots/crawlers, not real visitors)",
-             f"  Total requests: {total_requests:,} (all requests including assets/bots)",
-             "",
-             "NOTE: Use pageviews as the primary traffic metric. Unique IPs are inflated",
-             "by bots and crawlers. For Substack reporting, lead with pageviews."]
+             f"  Total requests: {total_requests:,} (all requests including assets/bots)"]
+
+    previous_pageviews = sum(d["pageviews"] for d in previous)
+    if previous_pageviews:
+        change = (total_pageviews - previous_pageviews) / previous_pageviews
+        lines.append(f"  Previous {days} day{'s' if days > 1 else ''}: {previous_pageviews:,} pageviews ({change:+.0%})")
 
-    if days > 1 and len(groups) > 1:
+    lines += ["",
+              "NOTE: Use pageviews as the primary traffic metric. Unique IPs are inflated",
+              "by bots and crawlers. For Substack reporting, lead with pageviews."]
+
+    if days > 1:
         lines.append("\nDaily breakdown:")
-        for g in groups:
-            d = g["dimensions"]["date"]
-            pv = g["sum"]["pageViews"]
-            lines.append(f"  {d}: {pv} pageviews")
+        for day, data in series.items():
+            if day >= start:
+                lines.append(f"  {day}: {data['pageviews']} pageviews")
 
     return "\n".join(lines)
 
@@ -112,51 +360,15 @@ def get_top_pages(days: int = 7, limit: int = 10) -> str:
         days: Number of days to look back (default 7).
         limit: Max pages to return (default 10).
     """
-    end = date.today()
-    start = end - timedelta(days=days)
-
-    query = """
-    query TopPages($zoneTag: string!, $filter: ZoneHttpRequestsAdaptiveGroupsFilter_InputObject!) {
-      viewer {
-        zones(filter: {zoneTag: $zoneTag}) {
-          httpRequestsAdaptiveGroups(
-            filter: $filter
-            limit: %d
-            orderBy: [count_DESC]
-          ) {
-            count
-            dimensions { clientRequestPath }
-          }
-        }
-      }
-    }
-    """ % limit
-
-    variables = {
-        "zoneTag": settings.cloudflare_zone_id,
-        "filter": {
-            "datetime_geq": f"{start}T00:00:00Z",
-            "datetime_lt": f"{end}T00:00:00Z",
-            "requestSource": "eyeball",
-        },
-    }
-
-    data = _query(query, variables)
-    if "error" in data:
-        return f"Analytics error: {data['error']}"
-
-    zones = data.get("viewer", {}).get("zones", [])
-    if not zones:
-        return "No data returned."
-
-    groups = zones[0].get("httpRequestsAdaptiveGroups", [])
-    if not groups:
+    try:
+        ranked = _ranked_totals(PAGES, "paths", days, limit)
+    except (AnalyticsError, httpx.HTTPError) as e:
+        return f"Analytics error: {e}"
+    if not ranked:
         return f"No page data for the last {days} days."
 
-    lines = [f"Top {len(groups)} pages (last {days} days):"]
-    for g in groups:
-        path = g["dimensions"]["clientRequestPath"]
-        count = g["count"]
+    lines = [f"Top {len(ranked)} pages (last {days} days):"]
+    for path, count in ranked:
         lines.append(f"  {count:>6,} hits  {path}")
 
     return "\n".join(lines)
@@ -170,51 +382,82 @@ def get_top_referrers(days: int = 7, limit: int = 10) -> str:
         days: Number of days to look back (default 7).
         limit: Max referrers to return (default 10).
     """
-    end = date.today()
-    start = end - timedelta(days=days)
-
-    query = """
-    query TopReferrers($zoneTag: string!, $filter: ZoneHttpRequestsAdaptiveGroupsFilter_InputObject!) {
-      viewer {
-        zones(filter: {zoneTag: $zoneTag}) {
-          httpRequestsAdaptiveGroups(
-            filter: $filter
-            limit: %d
-            orderBy: [count_DESC]
-          ) {
-            count
-            dimensions { clientRefererHost }
-          }
-        }
-      }
-    }
-    """ % limit
-
-    variables = {
-        "zoneTag": settings.cloudflare_zone_id,
-        "filter": {
-            "datetime_geq": f"{start}T00:00:00Z",
-            "datetime_lt": f"{end}T00:00:00Z",
-            "requestSource": "eyeball",
-        },
-    }
+    try:
+        ranked = _ranked_totals(REFERRERS, "hosts", days, limit)
+    except (AnalyticsError, httpx.HTTPError) as e:
+        return f"Analytics error: {e}"
+    if not ranked:
+        return f"No referrer data for the last {days} days."
 
-    data = _query(query, variables)
-    if "error" in data:
-        return f"Analytics error: {data['error']}"
+    lines = [f"Top {len(ranked)} referrers (last {days} days):"]
+    for referrer, count in ranked:
+        lines.append(f"  {count:>6,} hits  {referrer or '(direct)'}")
 
-    zones = data.get("viewer", {}).get("zones", [])
-    if not zones:
-        return "No data returned."
+    return "\n".join(lines)
 
-    groups = zones[0].get("httpRequestsAdaptiveGroups", [])
-    if not groups:
-        return f"No referrer data for the last {days} days."
 
-    lines = [f"Top {len(groups)} referrers (last {days} days):"]
-    for g in groups:
-        referrer = g["dimensions"]["clientRefererHost"] or "(direct)"
-        count = g["count"]
-        lines.append(f"  {count:>6,} hits  {referrer}")
+def _fmt_change(change: float | None) -> str:
+    return "n/a" if change is None else f"{change:+.0%}"
+
+
+@tool
+def get_traffic_insights(days: int = 7) -> str:
+    """Get precomputed traffic trends and anomalies: averages, week-over-week and
+    month-over-month changes, unusual days, and the pages and referrers gaining or
+    losing traffic. Use this instead of working these out from raw numbers.
+
+    Args:
+        days: Window for the page and referrer comparison (default 7: this week vs last).
+    """
+    days = max(1, min(days, _INSIGHT_DAYS // 2))
+    end = date.today()
+    start = end - timedelta(days=_INSIGHT_DAYS)
+    try:
+        traffic = _series(TRAFFIC, start, end)
+        pages = _series(PAGES, end - timedelta(days=2 * days), end)
+        referrers = _series(REFERRERS, end - timedelta(days=2 * days), end)
+    except (AnalyticsError, httpx.HTTPError) as e:
+        return f"Analytics error: {e}"
+
+    dates = list(traffic)
+    pageviews = np.array([traffic[day]["pageviews"] for day in dates], dtype=float)
+    if not pageviews.any():
+        return f"No traffic data for {start} to {end}."
+
+    avg7 = trends.rolling_mean(pageviews, 7)[-1]
+    avg28 = trends.rolling_mean(pageviews, 28)[-1]
+    lines = [
+        f"Traffic insights through {dates[-1]} (pageviews):",
+        f"  Yesterday: {int(pageviews[-1]):,} (7-day avg {avg7:,.1f}, 28-day avg {avg28:,.1f})",
+    ]
+    for label, window in (("Week over week", 7), ("Month over month (28 days)", 28)):
+        delta = trends.period_delta(pageviews, window)
+        if delta is not None:
+            lines.append(
+                f"  {label}: {int(delta.current):,} vs {int(delta.previous):,} ({_fmt_change(delta.change)})"
+            )
+
+    found = trends.anomalies(pageviews, baseline=_ANOMALY_BASELINE)
+    if found:
+        lines.append(f"  Anomalies (last 7 days vs the {_ANOMALY_BASELINE} days before each):")
+        for a in found:
+            lines.append(
+                f"    {dates[a.index]}: {int(a.value):,} pageviews, {a.direction} "
+                f"(typical {a.expected:,.0f}; z {a.z:+.1f}, robust z {a.robust_z:+.1f})"
+            )
+    else:
+        lines.append("  Anomalies (last 7 days): none")
+
+    mid = end - timedelta(days=days)
+    for label, series, key in (("Pages", pages, "paths"), ("Referrers", referrers, "hosts")):
+        rising, falling, new = trends.growth(
+            _window_totals(series, key, mid, end), _window_totals(series, key, mid - timedelta(days=days), mid)
+        )
+        moves = [
+            f"{g.key or '(direct)'} {int(g.previous)}->{int(g.current)} ({_fmt_change(g.change)})"
+            for g in rising + falling
+        ]
+        moves += [f"{g.key or '(direct)'} new, {int(g.current)} hits" for g in new]
+        lines.append(f"  {label} (last {days} days vs previous {days}): {'; '.join(moves) or 'no notable changes'}")
 
     return "\n".join(lines)
@@ -0,0 +1,199 @@
+"""Backends that commit site files for git_ops.
+
+RestGitBackend talks to the GitHub Git Data API (tree -> commit -> ref
+update). LocalGitBackend writes into a dedicated working clone, commits once
+and pushes once, so a publish costs a single network operation in the common
+case and can be tested against a bare local repository.
+
+Both implement the same two calls:
+    ensure_branch(branch, base)            create branch from base if missing
+    commit_files(branch, files, message)   one commit, returns {"sha", "html_url"}
+"""
+
+import logging
+import subprocess
+import tempfile
+import threading
+from pathlib import Path
+
+from hobson.tools.github_client import API_BASE, GitHubClient
+
+logger = logging.getLogger(__name__)
+
+_MAX_ATTEMPTS = 3
+
+
+class GitBackendError(RuntimeError):
+    """A git operation failed in a way retrying won't fix."""
+
+
+class RestGitBackend:
+    """Commit through the GitHub REST Git Data API."""
+
+    def __init__(self, client: GitHubClient, repo: str):
+        self.client = client
+        self.repo = repo
+
+    def _url(self, path: str) -> str:
+        return f"{API_BASE}/repos/{self.repo}/{path}"
+
+    def ensure_branch(self, branch: str, base: str = "master"):
+        resp = self.client.get(self._url(f"git/ref/heads/{base}"))
+        resp.raise_for_status()
+        resp = self.client.post(
+            self._url("git/refs"),
+            json={"ref": f"refs/heads/{branch}", "sha": resp.json()["object"]["sha"]},
+        )
+        # An existing branch is fine: commits go on top of its head
+        if not (resp.status_code == 422 and "Reference already exists" in resp.text):
+            resp.raise_for_status()
+
+    def commit_files(self, branch: str, files: dict[str, str], message: str) -> dict:
+        """Commit several files to a branch as a single commit.
+
+        File contents are sent inline in the tree, so this is five API calls
+        regardless of how many files are included. If the branch moves between
+        reading and updating the ref (someone else pushed), the commit is
+        rebuilt on the new head and retried.
+        """
+        for attempt in range(_MAX_ATTEMPTS):
+            # 1. Current head of the branch and its tree
+            resp = self.client.get(self._url(f"git/ref/heads/{branch}"))
+            resp.raise_for_status()
+            head_sha = resp.json()["object"]["sha"]
+            resp = self.client.get(self._url(f"git/commits/{head_sha}"))
+            resp.raise_for_status()
+            base_tree = resp.json()["tree"]["sha"]
+
+            # 2. New tree with every file on top of the current one
+            resp = self.client.post(
+                self._url("git/trees"),
+                json={
+                    "base_tree": base_tree,
+                    "tree": [
+                        {"path": path, "mode": "100644", "type": "blob", "content": content}
+                        for path, content in files.items()
+                    ],
+                },
+            )
+            resp.raise_for_status()
+            tree_sha = resp.json()["sha"]
+
+            # 3. Commit pointing at the new tree
+            resp = self.client.post(
+                self._url("git/commits"),
+                json={"message": message, "tree": tree_sha, "parents": [head_sha]},
+            )
+            resp.raise_for_status()
+            commit = resp.json()
+
+            # 4. Fast-forward the branch (422 = branch moved underneath us)
+            resp = self.client.patch(
+                self._url(f"git/refs/heads/{branch}"),
+                json={"sha": commit["sha"], "force": False},
+            )
+            if resp.status_code == 422 and attempt < _MAX_ATTEMPTS - 1:
+                logger.warning("Branch %s moved during commit, retrying", branch)
+                continue
+            resp.raise_for_status()
+            return {"sha": commit["sha"], "html_url": commit["html_url"]}
+        raise AssertionError("unreachable")
+
+
+class LocalGitBackend:
+    """Commit from a dedicated local clone and push once.
+
+    Each commit is built in a throwaway worktree detached at the
+    remote-tracking branch, so the clone's own checkout (and whatever branch
+    it is on) is never touched. Pushes are optimistic; if the remote moved,
+    the branch is fetched and the commit rebuilt on the new head.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        remote: str = "origin",
+        author_name: str = "Hobson",
+        author_email: str = "hobson@buildscharacter.com",
+        github_repo: str = "",
+    ):
+        self.path = Path(path)
+        self.remote = remote
+        self.author_name = author_name
+        self.author_email = author_email
+        self.github_repo = github_repo
+        # Tools can run concurrently in worker threads; fetches and pushes
+        # update the clone's shared remote-tracking refs
+        self._lock = threading.Lock()
+
+    def _git(self, *args: str, check: bool = True, cwd: Path | None = None) -> subprocess.CompletedProcess:
+        proc = subprocess.run(
+            [
+                "git", "-C", str(cwd or self.path),
+                "-c", f"user.name={self.author_name}",
+                "-c", f"user.email={self.author_email}",
+                *args,
+            ],
+            capture_output=True,
+            text=True,
+            check=False,
+        )
+        if check and proc.returncode != 0:
+            raise GitBackendError(f"git {args[0]} failed: {proc.stderr.strip()}")
+        return proc
+
+    def _has_tracking_ref(self, branch: str) -> bool:
+        ref = f"refs/remotes/{self.remote}/{branch}"
+        return self._git("rev-parse", "--verify", "--quiet", ref, check=False).returncode == 0
+
+    def _fetch(self, branch: str) -> bool:
+        return self._git("fetch", "--quiet", self.remote, branch, check=False).returncode == 0
+
+    def ensure_branch(self, branch: str, base: str = "master"):
+        with self._lock:
+            if self._has_tracking_ref(branch) or self._fetch(branch):
+                return
+            if not self._has_tracking_ref(base):
+                self._git("fetch", "--quiet", self.remote, base)
+            self._git("push", "--quiet", self.remote, f"refs/remotes/{self.remote}/{base}:refs/heads/{branch}")
+
+    def commit_files(self, branch: str, files: dict[str, str], message: str) -> dict:
+        with self._lock:
+            if not self._has_tracking_ref(branch):
+                self._git("fetch", "--quiet", self.remote, branch)
+            # Drop worktrees left behind by a crashed process
+            self._git("worktree", "prune", check=False)
+            for attempt in range(_MAX_ATTEMPTS):
+                sha, push = self._commit_in_worktree(branch, files, message)
+                if push.returncode == 0:
+                    url = f"https://github.com/{self.github_repo}/commit/{sha}" if self.github_repo else sha
+                    return {"sha": sha, "html_url": url}
+                if attempt == _MAX_ATTEMPTS - 1:
+                    raise GitBackendError(f"git push failed: {push.stderr.strip()}")
+                logger.warning("Push to %s rejected (%s), refetching", branch, push.stderr.strip())
+                self._git("fetch", "--quiet", self.remote, branch)
+        raise AssertionError("unreachable")
+
+    def _commit_in_worktree(
+        self, branch: str, files: dict[str, str], message: str
+    ) -> tuple[str, subprocess.CompletedProcess]:
+        """Commit files on top of the remote-tracking branch in a temporary worktree and push."""
+        with tempfile.TemporaryDirectory(prefix="hobson-worktree-") as tmp:
+            tree = Path(tmp) / "tree"
+            self._git("worktree", "add", "--quiet", "--detach", str(tree), f"{self.remote}/{branch}")
+            try:
+                for rel_path, content in files.items():
+                    target = tree / rel_path
+                    target.parent.mkdir(parents=True, exist_ok=True)
+                    target.write_text(content)
+                self._git("add", "--", *files, cwd=tree)
+                if not self._git("diff", "--cached", "--quiet", check=False, cwd=tree).returncode:
+                    raise GitBackendError("Nothing to commit: files already match the branch")
+                self._git("commit", "--quiet", "-m", message, cwd=tree)
+                sha = self._git("rev-parse", "HEAD", cwd=tree).stdout.strip()
+                push = self._git(
+                    "push", "--quiet", self.remote, f"HEAD:refs/heads/{branch}", check=False, cwd=tree
+                )
+            finally:
+                self._git("worktree", "remove", "--force", str(tree), check=False)
+        return sha, push
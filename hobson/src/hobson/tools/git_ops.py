@@ -1,31 +1,179 @@
 """GitHub API client for PR-based content workflows.
 
-Uses the GitHub REST API directly (no git CLI required on the container).
 Hobson creates branches, commits blog posts, and opens PRs for human review.
+Branches, PRs and reads go through the GitHub REST API.
+
+Files are committed through a backend from git_backends so any number of
+files lands as one commit and one Cloudflare Pages build. The default
+backend uses the Git Data API and needs no git CLI on the container;
+GIT_BACKEND=local commits from a working clone and does need it.
 """
 
+import atexit
 import base64
+import json
+import logging
 import re
 from datetime import date
 
-import httpx
 from langchain_core.tools import tool
 
 from hobson.config import settings
+from hobson.tools.git_backends import LocalGitBackend, RestGitBackend
+from hobson.tools.github_client import API_BASE, GitHubClient
+from hobson.tools.site_index import SiteIndex
+
+logger = logging.getLogger(__name__)
+
+_client: GitHubClient | None = None
+_backend_instance: RestGitBackend | LocalGitBackend | None = None
+
+
+def _github() -> GitHubClient:
+    """Return the shared GitHub client (kept open for connection reuse)."""
+    global _client
+    if _client is None:
+        _client = GitHubClient(settings.github_token, cache_path=settings.github_cache_path)
+        atexit.register(_client.close)
+    return _client
+
+
+def _backend() -> RestGitBackend | LocalGitBackend:
+    """Return the configured commit backend (GIT_BACKEND=rest or local)."""
+    global _backend_instance
+    if _backend_instance is None:
+        if settings.git_backend == "local":
+            _backend_instance = LocalGitBackend(
+                settings.git_local_path,
+                remote=settings.git_remote,
+                author_name=settings.git_author_name,
+                author_email=settings.git_author_email,
+                github_repo=settings.github_repo,
+            )
+        else:
+            _backend_instance = RestGitBackend(_github(), settings.github_repo)
+    return _backend_instance
 
-_API_BASE = "https://api.github.com"
 
+def _repo_url(path: str) -> str:
+    return f"{API_BASE}/repos/{settings.github_repo}/{path}"
 
-def _headers() -> dict:
-    return {
-        "Authorization": f"Bearer {settings.github_token}",
-        "Accept": "application/vnd.github+json",
-        "X-GitHub-Api-Version": "2022-11-28",
-    }
 
+# Slugs and titles already on the site (see site_index.py); refreshed before each check
+_site_index = SiteIndex()
 
-def _repo_url(path: str) -> str:
-    return f"{_API_BASE}/repos/{settings.github_repo}/{path}"
+
+def fetch_blob_text(sha: str) -> str:
+    """Text of a blob in the site repository, by SHA."""
+    # Blobs are immutable and the index keeps what it needs, so skip the ETag cache
+    resp = _github().get(_repo_url(f"git/blobs/{sha}"), cache=False)
+    resp.raise_for_status()
+    return base64.b64decode(resp.json()["content"]).decode()
+
+
+def refresh_site_index() -> SiteIndex | None:
+    """Bring the site index up to date; None if it can't be refreshed.
+
+    Reads a local checkout when SITE_CHECKOUT_PATH is set, otherwise one
+    recursive tree listing of master (a 304 when nothing changed), fetching
+    only blobs that changed since the last refresh.
+    """
+    try:
+        if settings.site_checkout_path:
+            _site_index.refresh_from_directory(settings.site_checkout_path)
+        else:
+            resp = _github().get(_repo_url("git/trees/master"), params={"recursive": "1"})
+            resp.raise_for_status()
+            data = resp.json()
+            if data.get("truncated"):
+                logger.warning("Repository tree listing truncated; site index may be incomplete")
+            _site_index.refresh_from_tree(data["sha"], data["tree"], fetch_blob_text)
+    except Exception as e:
+        logger.warning("Site index refresh failed, skipping collision checks: %s", e)
+        return None
+    return _site_index
+
+
+def _slug_collisions(items: list[tuple[str, str]]) -> list[str]:
+    """Errors for (kind, slug) pairs that already exist on master."""
+    index = refresh_site_index()
+    if index is None:
+        return []
+    errors = []
+    for kind, slug in items:
+        existing = index.get(kind, slug)
+        if existing:
+            errors.append(
+                f"Slug '{slug}' already exists ({existing.path}: \"{existing.title}\"); "
+                "choose a different slug"
+            )
+    return errors
+
+
+def _similar_title_warnings(kind: str, title: str) -> list[str]:
+    """Warnings for existing entries whose titles closely match (uses the refreshed index)."""
+    return [
+        f"Similar {entry.kind} already published: \"{entry.title}\" ({entry.slug}, {score:.0%} word overlap)"
+        for entry, score in _site_index.similar_titles(title, kind=kind)
+    ]
+
+
+def _with_warnings(message: str, warnings: list[str]) -> str:
+    if not warnings:
+        return message
+    return message + "\n" + "\n".join(f"WARNING: {w}" for w in warnings)
+
+
+def _blog_post_file(
+    slug: str, title: str, description: str, content: str, tags: str, pub_date: str = ""
+) -> tuple[str, str]:
+    """Return (repo path, markdown with frontmatter) for a blog post."""
+    pub_date = pub_date or date.today().isoformat()
+    tag_list = [t.strip() for t in tags.split(",") if t.strip()]
+    tags_yaml = ", ".join(tag_list)
+
+    safe_title = title.replace('"', '\\"')
+    safe_desc = description.replace('"', '\\"')
+    file_content = f"""---
+title: "{safe_title}"
+description: "{safe_desc}"
+pubDate: {pub_date}
+author: Builds Character
+tags: [{tags_yaml}]
+---
+
+{content}
+"""
+    return f"site/src/data/blog/{slug}.md", file_content
+
+
+def _product_file(
+    slug: str,
+    name: str,
+    description: str,
+    price: str,
+    image: str,
+    printful_url: str,
+    product_type: str,
+) -> tuple[str, str]:
+    """Return (repo path, markdown frontmatter) for a product page."""
+    added_date = date.today().isoformat()
+    price_float = float(price)
+
+    safe_name = name.replace('"', '\\"')
+    safe_desc = description.replace('"', '\\"')
+    file_content = f"""---
+name: "{safe_name}"
+description: "{safe_desc}"
+price: {price_float}
+image: "{image}"
+printful_url: "{printful_url}"
+product_type: "{product_type}"
+status: "active"
+addedDate: {added_date}
+---
+"""
+    return f"site/src/data/products/{slug}.md", file_content
 
 
 @tool
@@ -50,103 +198,90 @@ def create_blog_post_pr(
         tags: Comma-separated tags (e.g., 'outdoor, humor, camping')
         pub_date: Publication date as YYYY-MM-DD (defaults to today)
     """
-    pub_date = pub_date or date.today().isoformat()
-    tag_list = [t.strip() for t in tags.split(",") if t.strip()]
-    tags_yaml = ", ".join(tag_list)
-
-    # Build the full markdown file with frontmatter
-    safe_title = title.replace('"', '\\"')
-    safe_desc = description.replace('"', '\\"')
-    file_content = f"""---
-title: "{safe_title}"
-description: "{safe_desc}"
-pubDate: {pub_date}
-author: Builds Character
-tags: [{tags_yaml}]
----
+    errors = _slug_collisions([("blog", slug)])
+    if errors:
+        bullet_list = "\n".join(f"- {e}" for e in errors)
+        return f"PR BLOCKED - pre-flight checks failed:\n{bullet_list}"
+    warnings = _similar_title_warnings("blog", title)
 
-{content}
-"""
+    file_path, file_content = _blog_post_file(slug, title, description, content, tags, pub_date)
+    tags_yaml = ", ".join(t.strip() for t in tags.split(",") if t.strip())
 
     branch_name = f"blog/{slug}"
-    file_path = f"site/src/data/blog/{slug}.md"
-
-    with httpx.Client(headers=_headers(), timeout=30) as client:
-        # 1. Get the latest commit SHA on master
-        resp = client.get(_repo_url("git/ref/heads/master"))
-        resp.raise_for_status()
-        master_sha = resp.json()["object"]["sha"]
-
-        # 2. Create a new branch from master
-        resp = client.post(
-            _repo_url("git/refs"),
-            json={"ref": f"refs/heads/{branch_name}", "sha": master_sha},
-        )
-        if resp.status_code == 422 and "Reference already exists" in resp.text:
-            # Branch exists, get its current SHA
-            resp = client.get(_repo_url(f"git/ref/heads/{branch_name}"))
-            resp.raise_for_status()
-        else:
-            resp.raise_for_status()
-
-        # 3. Create the blog post file on the branch
-        encoded = base64.b64encode(file_content.encode()).decode()
-        resp = client.put(
-            _repo_url(f"contents/{file_path}"),
-            json={
-                "message": f"feat: add blog post '{title}'",
-                "content": encoded,
-                "branch": branch_name,
-            },
-        )
-        resp.raise_for_status()
-
-        # 4. Create a pull request
-        pr_body = (
-            f"## New Blog Post\n\n"
-            f"**Title:** {title}\n"
-            f"**Description:** {description}\n"
-            f"**Tags:** {tags_yaml}\n\n"
-            f"---\n\n"
-            f"*This post was drafted by Hobson's content pipeline.*"
-        )
-        resp = client.post(
-            _repo_url("pulls"),
-            json={
-                "title": f"blog: {title}",
-                "body": pr_body,
-                "head": branch_name,
-                "base": "master",
-            },
-        )
-        resp.raise_for_status()
-        pr_url = resp.json()["html_url"]
-        pr_number = resp.json()["number"]
 
-    return f"PR #{pr_number} created: {pr_url}"
+    # 1. Create the branch from master (or reuse it) and commit the post there
+    backend = _backend()
+    backend.ensure_branch(branch_name, "master")
+    backend.commit_files(branch_name, {file_path: file_content}, f"feat: add blog post '{title}'")
+
+    # 2. Create a pull request
+    pr_body = (
+        f"## New Blog Post\n\n"
+        f"**Title:** {title}\n"
+        f"**Description:** {description}\n"
+        f"**Tags:** {tags_yaml}\n\n"
+        f"---\n\n"
+        f"*This post was drafted by Hobson's content pipeline.*"
+    )
+    resp = _github().post(
+        _repo_url("pulls"),
+        json={
+            "title": f"blog: {title}",
+            "body": pr_body,
+            "head": branch_name,
+            "base": "master",
+        },
+    )
+    resp.raise_for_status()
+    pr_url = resp.json()["html_url"]
+    pr_number = resp.json()["number"]
+
+    return _with_warnings(f"PR #{pr_number} created: {pr_url}", warnings)
+
+
+_OPEN_PRS_QUERY = """
+query($owner: String!, $name: String!) {
+  repository(owner: $owner, name: $name) {
+    pullRequests(states: OPEN, first: 50, orderBy: {field: CREATED_AT, direction: DESC}) {
+      nodes {
+        number
+        title
+        url
+        headRefName
+        createdAt
+        files(first: 20) { nodes { path } }
+        commits(last: 1) { nodes { commit { statusCheckRollup { state } } } }
+      }
+    }
+  }
+}
+"""
 
 
 @tool
 def list_open_blog_prs() -> str:
     """List open pull requests for blog posts.
 
-    Returns a summary of open blog PRs for tracking content in review.
+    Returns a summary of open blog PRs for tracking content in review,
+    including the files each PR touches and its CI check status.
     """
-    with httpx.Client(headers=_headers(), timeout=30) as client:
-        resp = client.get(
-            _repo_url("pulls"),
-            params={"state": "open", "per_page": 20},
-        )
-        resp.raise_for_status()
-        prs = resp.json()
+    owner, name = settings.github_repo.split("/", 1)
+    data = _github().graphql(_OPEN_PRS_QUERY, {"owner": owner, "name": name})
+    prs = data["repository"]["pullRequests"]["nodes"]
 
-    blog_prs = [pr for pr in prs if pr["head"]["ref"].startswith("blog/")]
+    blog_prs = [pr for pr in prs if pr["headRefName"].startswith("blog/")]
     if not blog_prs:
         return "No open blog post PRs."
 
     lines = []
     for pr in blog_prs:
-        lines.append(f"- PR #{pr['number']}: {pr['title']} ({pr['html_url']})")
+        commits = pr["commits"]["nodes"]
+        rollup = commits[0]["commit"]["statusCheckRollup"] if commits else None
+        checks = rollup["state"].lower() if rollup else "no checks"
+        files = ", ".join(f["path"] for f in pr["files"]["nodes"]) or "no files"
+        lines.append(
+            f"- PR #{pr['number']}: {pr['title']} ({pr['url']}) [checks: {checks}] files: {files}"
+        )
     return "\n".join(lines)
 
 
@@ -213,43 +348,21 @@ def publish_blog_post(
         pub_date: Publication date as YYYY-MM-DD (defaults to today)
     """
     errors = _validate_blog_post(slug, title, description, content, tags)
+    errors += _slug_collisions([("blog", slug)])
     if errors:
         bullet_list = "\n".join(f"- {e}" for e in errors)
         return f"PUBLISH BLOCKED - pre-flight checks failed:\n{bullet_list}"
 
-    pub_date = pub_date or date.today().isoformat()
-    tag_list = [t.strip() for t in tags.split(",") if t.strip()]
-    tags_yaml = ", ".join(tag_list)
+    file_path, file_content = _blog_post_file(slug, title, description, content, tags, pub_date)
 
-    safe_title = title.replace('"', '\\"')
-    safe_desc = description.replace('"', '\\"')
-    file_content = f"""---
-title: "{safe_title}"
-description: "{safe_desc}"
-pubDate: {pub_date}
-author: Builds Character
-tags: [{tags_yaml}]
----
-
-{content}
-"""
-
-    file_path = f"site/src/data/blog/{slug}.md"
-
-    with httpx.Client(headers=_headers(), timeout=30) as client:
-        encoded = base64.b64encode(file_content.encode()).decode()
-        resp = client.put(
-            _repo_url(f"contents/{file_path}"),
-            json={
-                "message": f"feat: add blog post '{title}'",
-                "content": encoded,
-                "branch": "master",
-            },
-        )
-        resp.raise_for_status()
-        commit_url = resp.json()["commit"]["html_url"]
+    commit = _backend().commit_files(
+        "master", {file_path: file_content}, f"feat: add blog post '{title}'"
+    )
+    commit_url = commit["html_url"]
 
-    return f"Published to master: {commit_url}"
+    return _with_warnings(
+        f"Published to master: {commit_url}", _similar_title_warnings("blog", title)
+    )
 
 
 _PRODUCT_TYPES = {"sticker", "mug", "pin", "print", "poster", "t-shirt"}
@@ -330,40 +443,131 @@ def publish_product(
     errors = _validate_product(
         slug, name, description, price, image, printful_url, product_type,
     )
+    errors += _slug_collisions([("product", slug)])
     if errors:
         bullet_list = "\n".join(f"- {e}" for e in errors)
         return f"PUBLISH BLOCKED - pre-flight checks failed:\n{bullet_list}"
 
-    added_date = date.today().isoformat()
-    price_float = float(price)
+    file_path, file_content = _product_file(
+        slug, name, description, price, image, printful_url, product_type,
+    )
 
-    safe_name = name.replace('"', '\\"')
-    safe_desc = description.replace('"', '\\"')
-    file_content = f"""---
-name: "{safe_name}"
-description: "{safe_desc}"
-price: {price_float}
-image: "{image}"
-printful_url: "{printful_url}"
-product_type: "{product_type}"
-status: "active"
-addedDate: {added_date}
----
-"""
+    commit = _backend().commit_files(
+        "master", {file_path: file_content}, f"feat: add product '{name}'"
+    )
+    commit_url = commit["html_url"]
+
+    return f"Published to master: {commit_url}"
+
+
+_BLOG_POST_FIELDS = ("slug", "title", "description", "content", "tags")
+_PRODUCT_FIELDS = (
+    "slug", "name", "description", "price", "image", "printful_url", "product_type",
+)
+
+
+@tool
+def publish_batch(blog_posts_json: str = "[]", products_json: str = "[]") -> str:
+    """Publish several blog posts and/or product pages to master as ONE commit.
+
+    Prefer this over repeated publish_product / publish_blog_post calls: one
+    commit means one site deploy. Every item runs the same pre-flight checks
+    as the single-item tools; if any item fails, nothing is published.
+    Blog posts are only accepted in bootstrap mode (otherwise use
+    create_blog_post_pr so posts get reviewed).
 
-    file_path = f"site/src/data/products/{slug}.md"
-
-    with httpx.Client(headers=_headers(), timeout=30) as client:
-        encoded = base64.b64encode(file_content.encode()).decode()
-        resp = client.put(
-            _repo_url(f"contents/{file_path}"),
-            json={
-                "message": f"feat: add product '{name}'",
-                "content": encoded,
-                "branch": "master",
-            },
+    Args:
+        blog_posts_json: JSON list of objects with slug, title, description,
+            content, tags and optional pub_date (same fields as publish_blog_post).
+        products_json: JSON list of objects with slug, name, description, price,
+            image, printful_url and product_type (same fields as publish_product).
+    """
+    try:
+        blog_posts = json.loads(blog_posts_json or "[]")
+        products = json.loads(products_json or "[]")
+    except json.JSONDecodeError as e:
+        return f"PUBLISH BLOCKED - invalid JSON: {e}"
+    if not isinstance(blog_posts, list) or not isinstance(products, list):
+        return "PUBLISH BLOCKED - blog_posts_json and products_json must be JSON lists"
+    if not blog_posts and not products:
+        return "Nothing to publish."
+
+    errors: list[str] = []
+    files: dict[str, str] = {}
+    if blog_posts and not settings.bootstrap_mode:
+        errors.append("Blog posts need review outside bootstrap mode; use create_blog_post_pr")
+
+    for kind, items, fields, validate, render in (
+        ("Blog post", blog_posts, _BLOG_POST_FIELDS, _validate_blog_post, _blog_post_file),
+        ("Product", products, _PRODUCT_FIELDS, _validate_product, _product_file),
+    ):
+        for i, item in enumerate(items, 1):
+            label = f"{kind} {i} ({item.get('slug', '?')})" if isinstance(item, dict) else f"{kind} {i}"
+            if not isinstance(item, dict):
+                errors.append(f"{label}: not a JSON object")
+                continue
+            missing = [f for f in fields if f not in item]
+            if missing:
+                errors.append(f"{label}: missing {', '.join(missing)}")
+                continue
+            args = [str(item[f]) for f in fields]
+            errors.extend(f"{label}: {e}" for e in validate(*args))
+            if kind == "Blog post":
+                args.append(str(item.get("pub_date", "")))
+            if not errors:
+                path, content = render(*args)
+                if path in files:
+                    errors.append(f"{label}: duplicate slug")
+                files[path] = content
+
+    if not errors:
+        errors += _slug_collisions(
+            [("blog", str(p["slug"])) for p in blog_posts]
+            + [("product", str(p["slug"])) for p in products]
         )
-        resp.raise_for_status()
-        commit_url = resp.json()["commit"]["html_url"]
+    if errors:
+        bullet_list = "\n".join(f"- {e}" for e in errors)
+        return f"PUBLISH BLOCKED - pre-flight checks failed:\n{bullet_list}"
+    warnings = [w for p in blog_posts for w in _similar_title_warnings("blog", str(p["title"]))]
 
-    return f"Published to master: {commit_url}"
+    parts = []
+    if blog_posts:
+        parts.append(f"{len(blog_posts)} blog post{'s' if len(blog_posts) != 1 else ''}")
+    if products:
+        parts.append(f"{len(products)} product{'s' if len(products) != 1 else ''}")
+    names = [p["title"] for p in blog_posts] + [p["name"] for p in products]
+    message = f"feat: add {' and '.join(parts)}\n\n" + "\n".join(f"- {n}" for n in names)
+
+    commit = _backend().commit_files("master", files, message)
+
+    return _with_warnings(
+        f"Published {len(files)} files to master in one commit: {commit['html_url']}", warnings
+    )
+
+
+@tool
+def check_site_content(slug: str, title: str = "", kind: str = "blog") -> str:
+    """Check whether a slug is taken and whether similar titles are already on the site.
+
+    Use this while choosing a topic or slug, before writing or publishing.
+
+    Args:
+        slug: Proposed URL slug (e.g., 'rain-on-day-three')
+        title: Proposed title or product name, to find near-duplicates
+        kind: "blog" or "product"
+    """
+    index = refresh_site_index()
+    if index is None:
+        return json.dumps({"status": "unavailable", "message": "Site index could not be refreshed"})
+    existing = index.get(kind, slug)
+    similar = index.similar_titles(title, kind=kind) if title else []
+    return json.dumps({
+        "status": "ok",
+        "slug_taken": existing is not None,
+        "existing": {"path": existing.path, "title": existing.title} if existing else None,
+        "similar": [
+            {"slug": e.slug, "title": e.title, "tags": e.tags, "overlap": score}
+            for e, score in similar
+        ],
+        "indexed": len(index),
+    })
@@ -0,0 +1,198 @@
+"""Shared GitHub API client: keep-alive, conditional requests, rate-limit pacing.
+
+One httpx.Client is reused for every GitHub call so connections stay open
+between tool invocations. GET responses that carry an ETag are cached; the
+next GET for the same URL sends If-None-Match, and a 304 Not Modified, which
+GitHub does not count against the rate limit, is answered from the cache.
+The cache is written to disk at most every save_interval seconds and on
+close(), not on every response. X-RateLimit-Remaining/Reset are tracked per resource
+(core, graphql) and requests are spaced out as the budget runs low, instead of
+running into 403s mid-workflow.
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+API_BASE = "https://api.github.com"
+_CACHE_HEADER = "X-Hobson-Cache"
+
+
+class GitHubClient:
+    """Thin wrapper over httpx.Client with an ETag cache and rate-limit pacing."""
+
+    def __init__(
+        self,
+        token: str,
+        cache_path: str | None = None,
+        max_cache_entries: int = 500,
+        slowdown_below: int = 200,
+        max_delay: float = 30.0,
+        save_interval: float = 60.0,
+        sleep=time.sleep,
+    ):
+        self._http = httpx.Client(
+            headers={
+                "Authorization": f"Bearer {token}",
+                "Accept": "application/vnd.github+json",
+                "X-GitHub-Api-Version": "2022-11-28",
+            },
+            timeout=30,
+        )
+        self.cache_path = Path(cache_path) if cache_path else None
+        self.max_cache_entries = max_cache_entries
+        self.slowdown_below = slowdown_below
+        self.max_delay = max_delay
+        self.save_interval = save_interval
+        self._sleep = sleep
+        # Tools call the client from worker threads; the lock guards _etags
+        # and the dirty/saved-at state below.
+        self._lock = threading.Lock()
+        self._etags: dict[str, dict] = self._load_cache()
+        self._dirty = False
+        self._saved_at = time.monotonic()
+        # resource -> (remaining, reset epoch seconds)
+        self.rate_limits: dict[str, tuple[int, float]] = {}
+        self.stats = {"requests": 0, "not_modified": 0}
+
+    # -- ETag cache --
+
+    def _load_cache(self) -> dict[str, dict]:
+        if not self.cache_path or not self.cache_path.exists():
+            return {}
+        try:
+            return json.loads(self.cache_path.read_text())
+        except (OSError, ValueError) as e:
+            logger.warning("Ignoring unreadable GitHub cache %s: %s", self.cache_path, e)
+            return {}
+
+    def flush(self):
+        """Write the ETag cache to disk if it changed since the last write."""
+        with self._lock:
+            if not self._dirty or not self.cache_path:
+                return
+            data = json.dumps(self._etags)
+            self._dirty = False
+            self._saved_at = time.monotonic()
+        try:
+            self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.cache_path.with_suffix(self.cache_path.suffix + ".tmp")
+            tmp.write_text(data)
+            os.replace(tmp, self.cache_path)
+        except OSError as e:
+            logger.warning("Could not persist GitHub cache: %s", e)
+
+    def _cached(self, key: str) -> dict | None:
+        with self._lock:
+            return self._etags.get(key)
+
+    def _remember(self, key: str, resp: httpx.Response):
+        etag = resp.headers.get("ETag")
+        if not etag:
+            return
+        with self._lock:
+            self._etags.pop(key, None)
+            self._etags[key] = {
+                "etag": etag,
+                "body": resp.text,
+                "content_type": resp.headers.get("Content-Type", "application/json"),
+            }
+            while len(self._etags) > self.max_cache_entries:
+                self._etags.pop(next(iter(self._etags)))
+            self._dirty = True
+            due = time.monotonic() - self._saved_at >= self.save_interval
+        if due:
+            self.flush()
+
+    # -- Rate limiting --
+
+    def _track_rate_limit(self, resp: httpx.Response):
+        remaining = resp.headers.get("X-RateLimit-Remaining")
+        reset = resp.headers.get("X-RateLimit-Reset")
+        if remaining is None or reset is None:
+            return
+        resource = resp.headers.get("X-RateLimit-Resource", "core")
+        self.rate_limits[resource] = (int(remaining), float(reset))
+
+    def pacing_delay(self, resource: str = "core", now: float | None = None) -> float:
+        """Seconds to wait before the next request so the budget lasts until reset."""
+        if resource not in self.rate_limits:
+            return 0.0
+        remaining, reset = self.rate_limits[resource]
+        if remaining >= self.slowdown_below:
+            return 0.0
+        window = max(reset - (now if now is not None else time.time()), 0.0)
+        if window == 0:
+            return 0.0
+        # Spread what is left evenly across the rest of the window
+        return min(window / max(remaining, 1), self.max_delay)
+
+    def _pace(self, resource: str):
+        delay = self.pacing_delay(resource)
+        if delay:
+            remaining, _ = self.rate_limits[resource]
+            logger.info("GitHub %s rate limit low (%d left), waiting %.1fs", resource, remaining, delay)
+            self._sleep(delay)
+
+    # -- Requests --
+
+    def request(self, method: str, url: str, cache: bool = True, **kwargs) -> httpx.Response:
+        """Send a request; GETs are conditional unless cache=False (e.g. immutable blobs)."""
+        resource = "graphql" if url.endswith("/graphql") else "core"
+        self._pace(resource)
+
+        cached = None
+        key = None
+        if method == "GET" and cache:
+            key = str(self._http.build_request("GET", url, params=kwargs.get("params")).url)
+            cached = self._cached(key)
+            if cached:
+                kwargs["headers"] = {**kwargs.get("headers", {}), "If-None-Match": cached["etag"]}
+
+        resp = self._http.request(method, url, **kwargs)
+        self.stats["requests"] += 1
+        self._track_rate_limit(resp)
+
+        if resp.status_code == 304 and cached:
+            self.stats["not_modified"] += 1
+            return httpx.Response(
+                200,
+                content=cached["body"].encode(),
+                headers={"Content-Type": cached["content_type"], "ETag": cached["etag"], _CACHE_HEADER: "hit"},
+                request=resp.request,
+            )
+        if key and resp.status_code == 200:
+            self._remember(key, resp)
+        return resp
+
+    def get(self, url: str, **kwargs) -> httpx.Response:
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url: str, **kwargs) -> httpx.Response:
+        return self.request("POST", url, **kwargs)
+
+    def patch(self, url: str, **kwargs) -> httpx.Response:
+        return self.request("PATCH", url, **kwargs)
+
+    def put(self, url: str, **kwargs) -> httpx.Response:
+        return self.request("PUT", url, **kwargs)
+
+    def graphql(self, query: str, variables: dict | None = None) -> dict:
+        """Run a GraphQL query and return its data, raising on HTTP or GraphQL errors."""
+        resp = self.post(f"{API_BASE}/graphql", json={"query": query, "variables": variables or {}})
+        resp.raise_for_status()
+        payload = resp.json()
+        if payload.get("errors"):
+            raise RuntimeError(f"GitHub GraphQL error: {payload['errors'][0].get('message')}")
+        return payload["data"]
+
+    def close(self):
+        self.flush()
+        self._http.close()
@@ -1,22 +1,28 @@
 """Image generation and R2 upload tools for design batch workflow."""
 
+import asyncio
 import base64
-import io
+import functools
 import json
 import logging
+import multiprocessing
+import os
 import re
+import tempfile
 import time
 import uuid
+from concurrent.futures import ProcessPoolExecutor
 
 import boto3
 from google import genai
 from google.api_core import exceptions as google_exceptions
 from google.genai import types
 from langchain_core.tools import tool
-from PIL import Image
 
 from hobson.config import settings
-from hobson.db import HobsonDB
+from hobson.db import DESIGN_JOB_TERMINAL_STATUSES, HobsonDB
+from hobson.tools.imagen_cache import ImagenCache, LocalCacheStore, R2CacheStore
+from hobson.tools.print_file import render_print_file
 
 logger = logging.getLogger(__name__)
 
@@ -31,12 +37,57 @@ _MIN_DIMENSIONS = {
     "t-shirt": (4500, 5100),
 }
 
+# Die-cut products get their background keyed out and the artwork trimmed
+_BACKGROUND_REMOVAL_TYPES = {"sticker"}
+
 _MODEL = "imagen-4.0-generate-001"
 _MAX_RETRIES = 3
+_CANDIDATES = 4
+_JOB_POLL_SECONDS = 5
 
 # Module-level DB instance (reused across tool calls)
 _db = HobsonDB(settings.database_url)
 
+# Print-file rendering runs in worker processes so concurrent generations
+# never hold full-size print files in the agent process. Created lazily.
+_print_pool: ProcessPoolExecutor | None = None
+
+
+_cache: ImagenCache | None = None
+
+
+def _get_cache() -> ImagenCache | None:
+    """Return the Imagen result cache, or None if IMAGEN_CACHE_BACKEND is unset."""
+    global _cache
+    backend = settings.imagen_cache_backend
+    if _cache is None and backend:
+        if backend == "r2":
+            store = R2CacheStore(_r2_client(), settings.r2_bucket_name)
+        else:
+            store = LocalCacheStore(settings.imagen_cache_dir)
+        _cache = ImagenCache(store, ttl_seconds=settings.imagen_cache_ttl_hours * 3600)
+    return _cache
+
+
+def prune_imagen_cache() -> None:
+    """Delete expired Imagen cache entries and the blobs only they used."""
+    cache = _get_cache()
+    if cache is None:
+        return
+    entries, blobs = cache.prune()
+    if entries or blobs:
+        logger.info("Pruned Imagen cache: %d expired entries, %d unreferenced blobs", entries, blobs)
+
+
+def _get_print_pool() -> ProcessPoolExecutor:
+    global _print_pool
+    if _print_pool is None:
+        _print_pool = ProcessPoolExecutor(
+            max_workers=settings.print_file_workers,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+    return _print_pool
+
 
 def _sanitize_filename(concept_name: str) -> str:
     """Create a UUID-prefixed, filesystem-safe filename from a concept name."""
@@ -47,12 +98,8 @@ def _sanitize_filename(concept_name: str) -> str:
     return f"{uuid.uuid4()}-{sanitized}.png"
 
 
-def _upload_bytes_to_r2(image_bytes: bytes, concept_name: str) -> tuple[str, str]:
-    """Upload image bytes to R2 and return (public_url, filename)."""
-    filename = _sanitize_filename(concept_name)
-    r2_key = f"designs/{filename}"
-
-    s3 = boto3.client(
+def _r2_client():
+    return boto3.client(
         "s3",
         endpoint_url=f"https://{settings.r2_account_id}.r2.cloudflarestorage.com",
         aws_access_key_id=settings.r2_access_key_id,
@@ -60,11 +107,17 @@ def _upload_bytes_to_r2(image_bytes: bytes, concept_name: str) -> tuple[str, str
         region_name="auto",
     )
 
-    s3.put_object(
-        Bucket=settings.r2_bucket_name,
-        Key=r2_key,
-        Body=image_bytes,
-        ContentType="image/png",
+
+def _upload_file_to_r2(path: str, concept_name: str) -> tuple[str, str]:
+    """Stream a PNG file from disk to R2 and return (public_url, filename)."""
+    filename = _sanitize_filename(concept_name)
+    r2_key = f"designs/{filename}"
+
+    _r2_client().upload_file(
+        path,
+        settings.r2_bucket_name,
+        r2_key,
+        ExtraArgs={"ContentType": "image/png"},
     )
 
     public_url = f"{settings.r2_public_url}/{r2_key}"
@@ -87,34 +140,6 @@ def _check_dimensions(
     return None
 
 
-def _upscale_if_needed(
-    img: Image.Image, product_type: str
-) -> tuple[Image.Image, bool]:
-    """Upscale image to meet Printful minimums if needed.
-
-    Returns (image, was_upscaled). The returned image is either the original
-    (if already large enough) or an upscaled copy using LANCZOS resampling.
-    """
-    key = product_type.lower().strip()
-    if key not in _MIN_DIMENSIONS:
-        return img, False
-    min_w, min_h = _MIN_DIMENSIONS[key]
-    width, height = img.size
-    if width >= min_w and height >= min_h:
-        return img, False
-
-    # Calculate scale factor to meet both minimum dimensions
-    scale = max(min_w / width, min_h / height)
-    new_w = int(width * scale)
-    new_h = int(height * scale)
-    upscaled = img.resize((new_w, new_h), Image.LANCZOS)
-    logger.info(
-        "Upscaled %s from %dx%d to %dx%d (%.1fx) for product type '%s'",
-        product_type, width, height, new_w, new_h, scale, key,
-    )
-    return upscaled, True
-
-
 def _rank_images_with_vision(
     images: list[bytes], prompt: str
 ) -> int:
@@ -160,24 +185,44 @@ def _rank_images_with_vision(
         return 0
 
 
-@tool
-async def generate_design_image(
-    prompt: str,
-    concept_name: str,
-    product_type: str = "sticker",
-    aspect_ratio: str = "1:1",
-) -> str:
-    """Generate a design image using Gemini Imagen 4.0 and upload it to R2.
+class LeaseLostError(Exception):
+    """A queued job was requeued or failed by the reaper before its worker finished it."""
 
-    Generates 4 candidate images, uses vision AI to select the best one,
-    validates dimensions, uploads to Cloudflare R2, and logs metadata to
-    PostgreSQL. Returns a JSON string with the public image URL.
 
-    Args:
-        prompt: Detailed image generation prompt assembled from the structured template.
-        concept_name: Human-readable concept name (for logging and filenames).
-        product_type: Target product type for dimension validation (sticker, pin, poster, etc.).
-        aspect_ratio: Image aspect ratio. One of "1:1", "3:4", "4:3", "9:16", "16:9".
+def _record_generation(
+    generation_id: int | None, result: dict | None = None, worker_id: str | None = None, **fields
+) -> int:
+    """Log a generation outcome: insert a new row, or finish a queued job's row.
+
+    A queued job's result (what get_design_job_status reports) is written in
+    the same update that marks the job finished, so a finished job always
+    has one. The update only applies while worker_id still holds the job's
+    lease; otherwise the result is dropped and LeaseLostError raised.
+    """
+    if generation_id is None:
+        return _db.log_design_generation(model_version=_MODEL, **fields)
+    concept_name = fields.pop("concept_name", None)
+    fields.pop("generation_prompt", None)
+    fields.pop("product_type", None)
+    if result is not None:
+        result = {"concept_name": concept_name, **result}
+    if not _db.finish_design_job(generation_id, worker_id, result=result, **fields):
+        raise LeaseLostError(f"Design job {generation_id} is no longer held by {worker_id}")
+    return generation_id
+
+
+def _generate_candidates(
+    prompt: str,
+    concept_name: str,
+    product_type: str,
+    aspect_ratio: str,
+    generation_id: int | None = None,
+    worker_id: str | None = None,
+) -> tuple[list[bytes] | None, dict | None]:
+    """Call Imagen (with retries) and return (candidate_bytes, None).
+
+    On failure or a safety-filtered response, records the failed generation and
+    returns (None, error) with the result the caller should report.
     """
     # Retry loop for transient API failures
     last_error = None
@@ -188,7 +233,7 @@ async def generate_design_image(
                 model=_MODEL,
                 prompt=prompt,
                 config=types.GenerateImagesConfig(
-                    number_of_images=4,
+                    number_of_images=_CANDIDATES,
                     aspect_ratio=aspect_ratio,
                     include_rai_reason=True,
                     output_mime_type="image/png",
@@ -217,48 +262,57 @@ async def generate_design_image(
             google_exceptions.NotFound,
         ) as e:
             # Non-retryable errors: bad request, auth failure, wrong model
-            _db.log_design_generation(
+            error = {
+                "status": "error",
+                "message": f"Image generation failed (non-retryable): {e}",
+            }
+            _record_generation(
+                generation_id,
+                error,
+                worker_id,
                 concept_name=concept_name,
                 generation_prompt=prompt,
-                model_version=_MODEL,
                 product_type=product_type,
                 generation_status="failed",
                 status_reason=f"Non-retryable API error: {e}",
             )
-            return json.dumps({
-                "status": "error",
-                "message": f"Image generation failed (non-retryable): {e}",
-            })
+            return None, error
     else:
         # All retries exhausted
-        _db.log_design_generation(
+        error = {
+            "status": "error",
+            "message": f"Image generation failed after {_MAX_RETRIES} retries: {last_error}",
+        }
+        _record_generation(
+            generation_id,
+            error,
+            worker_id,
             concept_name=concept_name,
             generation_prompt=prompt,
-            model_version=_MODEL,
             product_type=product_type,
             generation_status="failed",
             status_reason=f"API error after {_MAX_RETRIES} retries: {last_error}",
         )
-        return json.dumps({
-            "status": "error",
-            "message": f"Image generation failed after {_MAX_RETRIES} retries: {last_error}",
-        })
+        return None, error
 
     # Check for safety-filtered or empty response
     if not response.generated_images:
         reason = "No images returned (likely safety filter)"
-        _db.log_design_generation(
+        error = {
+            "status": "filtered",
+            "message": f"{reason}. Try modifying the prompt to avoid content filter triggers.",
+        }
+        _record_generation(
+            generation_id,
+            error,
+            worker_id,
             concept_name=concept_name,
             generation_prompt=prompt,
-            model_version=_MODEL,
             product_type=product_type,
             generation_status="filtered",
             status_reason=reason,
         )
-        return json.dumps({
-            "status": "filtered",
-            "message": f"{reason}. Try modifying the prompt to avoid content filter triggers.",
-        })
+        return None, error
 
     # Collect raw bytes from all candidates
     candidate_bytes = []
@@ -267,43 +321,107 @@ async def generate_design_image(
         if isinstance(img_data, str):
             img_data = base64.b64decode(img_data)
         candidate_bytes.append(img_data)
+    return candidate_bytes, None
+
+
+async def generate_design(
+    prompt: str,
+    concept_name: str,
+    product_type: str = "sticker",
+    aspect_ratio: str = "1:1",
+    reuse_cached: bool = False,
+    generation_id: int | None = None,
+    worker_id: str | None = None,
+) -> dict:
+    """Generate, rank, render and upload a design; return the result dict.
+
+    Shared by the generate_design_image tool and the design job worker. When
+    generation_id is given (a queued job's design_generations row, leased by
+    worker_id), the outcome is written to that row instead of inserting a new
+    one; LeaseLostError if the lease has passed to another worker.
+    """
+    # Reuse cached candidates for an identical prompt if the caller allows it
+    cache = _get_cache()
+    candidate_bytes = None
+    if reuse_cached and cache is not None:
+        try:
+            candidate_bytes = cache.get(_MODEL, prompt, aspect_ratio, _CANDIDATES)
+        except Exception as e:
+            logger.warning("Imagen cache read failed (%s), generating fresh", e)
+        if candidate_bytes:
+            logger.info("Reusing %d cached candidates for %s", len(candidate_bytes), concept_name)
+    cached = bool(candidate_bytes)
+
+    if not cached:
+        candidate_bytes, error = await asyncio.to_thread(
+            _generate_candidates,
+            prompt, concept_name, product_type, aspect_ratio, generation_id, worker_id,
+        )
+        if error:
+            return error
+        if cache is not None:
+            try:
+                cache.put(_MODEL, prompt, aspect_ratio, _CANDIDATES, candidate_bytes)
+            except Exception as e:
+                logger.warning("Imagen cache write failed for %s: %s", concept_name, e)
 
     # Rank with vision model and select best
-    best_idx = _rank_images_with_vision(candidate_bytes, prompt)
+    best_idx = await asyncio.to_thread(_rank_images_with_vision, candidate_bytes, prompt)
     selected_bytes = candidate_bytes[best_idx]
 
-    # Upscale if below Printful minimums, then check final dimensions
-    img = Image.open(io.BytesIO(selected_bytes))
-    img, was_upscaled = _upscale_if_needed(img, product_type)
-    if was_upscaled:
-        # Re-encode upscaled image to bytes for upload
-        buf = io.BytesIO()
-        img.save(buf, format="PNG")
-        selected_bytes = buf.getvalue()
-    width, height = img.size
-    dim_warning = _check_dimensions(width, height, product_type)
-    if dim_warning:
-        logger.warning(dim_warning)
-
-    # Upload to R2 directly (avoids passing megabytes of base64 through LLM context)
+    # Render the print file (upscaled in bands if below Printful minimums) in a
+    # worker process, then stream it from disk to R2. This avoids passing
+    # megabytes of base64 through LLM context and keeps full-size buffers out
+    # of the agent process.
+    key = product_type.lower().strip()
+    fd, print_path = tempfile.mkstemp(prefix="hobson-print-", suffix=".png")
+    os.close(fd)
     try:
-        public_url, filename = _upload_bytes_to_r2(selected_bytes, concept_name)
-    except Exception as e:
-        logger.error("R2 upload failed for %s: %s", concept_name, e)
-        public_url, filename = "", ""
+        rendered = await asyncio.get_running_loop().run_in_executor(
+            _get_print_pool(),
+            functools.partial(
+                render_print_file,
+                selected_bytes,
+                _MIN_DIMENSIONS.get(key),
+                print_path,
+                remove_background=key in _BACKGROUND_REMOVAL_TYPES,
+            ),
+        )
+        width, height = rendered["width"], rendered["height"]
+        if rendered["background"]:
+            logger.info(
+                "Removed %s background from %s (trimmed to %s)",
+                rendered["background"], concept_name, rendered["trim_box"],
+            )
+        if rendered["upscaled"]:
+            logger.info(
+                "Upscaled %s from %dx%d to %dx%d for product type '%s'",
+                concept_name, rendered["source_width"], rendered["source_height"],
+                width, height, key,
+            )
+        logger.info(
+            "Encoded %s print file as %s PNG: %d bytes (%.1f%% smaller than a default RGBA PNG)",
+            concept_name, rendered["mode"], rendered["bytes"], rendered["savings_pct"],
+        )
+        dim_warning = _check_dimensions(width, height, product_type)
+        if dim_warning:
+            logger.warning(dim_warning)
+        size_warning = None
+        if not rendered["within_printful_limits"]:
+            size_warning = (
+                f"Print file is {rendered['bytes']} bytes, over Printful's upload limit"
+            )
+            logger.warning(size_warning)
 
-    # Log to DB with URL
-    generation_id = _db.log_design_generation(
-        concept_name=concept_name,
-        generation_prompt=prompt,
-        model_version=_MODEL,
-        product_type=product_type,
-        generation_status="success",
-        image_url=public_url or None,
-        r2_filename=filename or None,
-        image_width=width,
-        image_height=height,
-    )
+        try:
+            public_url, filename = await asyncio.to_thread(
+                _upload_file_to_r2, print_path, concept_name
+            )
+        except Exception as e:
+            logger.error("R2 upload failed for %s: %s", concept_name, e)
+            public_url, filename = "", ""
+    finally:
+        os.unlink(print_path)
 
     result = {
         "status": "success",
@@ -314,14 +432,134 @@ async def generate_design_image(
         "height": height,
         "candidates": len(candidate_bytes),
         "selected": best_idx + 1,
+        "cached": cached,
         "model": _MODEL,
+        "encoding": rendered["mode"],
+        "file_bytes": rendered["bytes"],
+        "background_removed": rendered["background"],
     }
     if dim_warning:
         result["dimension_warning"] = dim_warning
+    if size_warning:
+        result["size_warning"] = size_warning
     if not public_url:
         result["r2_warning"] = "Upload to R2 failed; image generated but not stored"
 
-    return json.dumps(result)
+    # Log to DB with URL
+    result["generation_id"] = _record_generation(
+        generation_id,
+        result,
+        worker_id,
+        concept_name=concept_name,
+        generation_prompt=prompt,
+        product_type=product_type,
+        generation_status="success",
+        image_url=public_url or None,
+        r2_filename=filename or None,
+        image_width=width,
+        image_height=height,
+    )
+    return result
+
+
+@tool
+async def generate_design_image(
+    prompt: str,
+    concept_name: str,
+    product_type: str = "sticker",
+    aspect_ratio: str = "1:1",
+    reuse_cached: bool = False,
+) -> str:
+    """Generate a design image using Gemini Imagen 4.0 and upload it to R2.
+
+    Generates 4 candidate images, uses vision AI to select the best one,
+    validates dimensions, uploads to Cloudflare R2, and logs metadata to
+    PostgreSQL. Returns a JSON string with the public image URL.
+
+    Args:
+        prompt: Detailed image generation prompt assembled from the structured template.
+        concept_name: Human-readable concept name (for logging and filenames).
+        product_type: Target product type for dimension validation (sticker, pin, poster, etc.).
+        aspect_ratio: Image aspect ratio. One of "1:1", "3:4", "4:3", "9:16", "16:9".
+        reuse_cached: Reuse candidates from an earlier identical prompt if cached
+            (e.g. when retrying a batch). Defaults to False: always generate fresh.
+    """
+    return json.dumps(await generate_design(
+        prompt, concept_name, product_type, aspect_ratio, reuse_cached
+    ))
+
+
+@tool
+def enqueue_design_image(
+    prompt: str,
+    concept_name: str,
+    product_type: str = "sticker",
+    aspect_ratio: str = "1:1",
+    reuse_cached: bool = False,
+    notify: bool = True,
+) -> str:
+    """Queue a design image for background generation and return its job ID immediately.
+
+    A design worker generates, ranks, renders and uploads the image exactly as
+    generate_design_image does. Use get_design_job_status to collect results.
+
+    Args:
+        prompt: Detailed image generation prompt assembled from the structured template.
+        concept_name: Human-readable concept name (for logging and filenames).
+        product_type: Target product type for dimension validation (sticker, pin, poster, etc.).
+        aspect_ratio: Image aspect ratio. One of "1:1", "3:4", "4:3", "9:16", "16:9".
+        reuse_cached: Reuse candidates from an earlier identical prompt if cached.
+        notify: Send a Telegram message when the job finishes.
+    """
+    job_id = _db.enqueue_design_job(
+        concept_name=concept_name,
+        generation_prompt=prompt,
+        product_type=product_type,
+        aspect_ratio=aspect_ratio,
+        reuse_cached=reuse_cached,
+        notify=notify,
+        model_version=_MODEL,
+    )
+    return json.dumps({"status": "queued", "job_id": job_id, "concept_name": concept_name})
+
+
+def _job_summary(job: dict) -> dict:
+    """Reduce a design_generations row to what the agent needs to see."""
+    if job["generation_status"] in DESIGN_JOB_TERMINAL_STATUSES and job.get("result"):
+        return {"job_id": job["id"], **job["result"]}
+    return {
+        "job_id": job["id"],
+        "concept_name": job["concept_name"],
+        "status": job["generation_status"],
+        "message": job.get("status_reason"),
+    }
+
+
+@tool
+async def get_design_job_status(job_ids: list[int], wait_seconds: int = 0) -> str:
+    """Check queued design jobs, optionally waiting for them to finish.
+
+    Finished jobs return the same fields as generate_design_image (image_url,
+    generation_id, width, height, ...). Unfinished jobs report "queued" or "running".
+
+    Args:
+        job_ids: Job IDs returned by enqueue_design_image.
+        wait_seconds: Wait up to this many seconds (max 900) for all jobs to finish. 0 = check once.
+    """
+    deadline = time.monotonic() + min(max(wait_seconds, 0), 900)
+    while True:
+        jobs = await asyncio.to_thread(_db.get_design_jobs, job_ids)
+        pending = [j for j in jobs if j["generation_status"] not in DESIGN_JOB_TERMINAL_STATUSES]
+        if not pending or time.monotonic() >= deadline:
+            break
+        await asyncio.sleep(min(_JOB_POLL_SECONDS, max(deadline - time.monotonic(), 0)))
+
+    found = {j["id"] for j in jobs}
+    return json.dumps({
+        "jobs": [_job_summary(j) for j in jobs],
+        "pending": len(pending),
+        "unknown_job_ids": [i for i in job_ids if i not in found],
+    }, default=str)
 
 
 @tool
@@ -341,15 +579,7 @@ async def upload_to_r2(
     filename = _sanitize_filename(concept_name)
     r2_key = f"designs/{filename}"
 
-    s3 = boto3.client(
-        "s3",
-        endpoint_url=f"https://{settings.r2_account_id}.r2.cloudflarestorage.com",
-        aws_access_key_id=settings.r2_access_key_id,
-        aws_secret_access_key=settings.r2_secret_access_key,
-        region_name="auto",
-    )
-
-    s3.put_object(
+    _r2_client().put_object(
         Bucket=settings.r2_bucket_name,
         Key=r2_key,
         Body=image_bytes,
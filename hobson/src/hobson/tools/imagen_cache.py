@@ -0,0 +1,200 @@
+"""Prompt-level result cache for Imagen generations.
+
+Prompts are built deterministically (PROMPT_TEMPLATE + concept fields), so a
+rerun of a sticker script or a retried design batch asks Imagen for exactly
+the same thing again. This cache lets those reruns reuse earlier candidates
+instead of regenerating and paying for them.
+
+Entries are keyed by (model, sha256(prompt), aspect_ratio, candidate count).
+Candidate images are stored content-addressed under blobs/<sha256>.png, so an
+image shared by several entries is stored once. Each entry
+(entries/<key>.json) lists its blob hashes and when it was generated; entries
+older than the TTL are treated as misses. prune() deletes expired entries and
+the blobs no live entry references, so the store does not grow without bound.
+
+Two stores are provided: a local directory and an R2 bucket prefix.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import time
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+
+class LocalCacheStore:
+    """Cache objects as files under a local directory."""
+
+    def __init__(self, root: str):
+        self.root = Path(root)
+
+    def get(self, name: str) -> bytes | None:
+        path = self.root / name
+        try:
+            return path.read_bytes()
+        except FileNotFoundError:
+            return None
+
+    def exists(self, name: str) -> bool:
+        return (self.root / name).exists()
+
+    def put(self, name: str, data: bytes) -> None:
+        path = self.root / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Write a temp file of our own, then rename, so a concurrent reader
+        # never sees a partial file and concurrent writers never share one
+        with tempfile.NamedTemporaryFile(
+            dir=path.parent, prefix=f".{path.name}.", suffix=".tmp", delete=False
+        ) as tmp:
+            tmp.write(data)
+        try:
+            os.replace(tmp.name, path)
+        except OSError:
+            Path(tmp.name).unlink(missing_ok=True)
+            raise
+
+    def list(self, prefix: str):
+        """Yield (name, modified time) for each object under prefix/."""
+        for path in (self.root / prefix).glob("*"):
+            try:
+                modified = path.stat().st_mtime
+            except FileNotFoundError:
+                continue
+            yield f"{prefix}/{path.name}", modified
+
+    def delete(self, name: str) -> None:
+        (self.root / name).unlink(missing_ok=True)
+
+
+class R2CacheStore:
+    """Cache objects in an R2 (S3-compatible) bucket under a key prefix."""
+
+    def __init__(self, s3_client, bucket: str, prefix: str = "imagen-cache"):
+        self.s3 = s3_client
+        self.bucket = bucket
+        self.prefix = prefix.rstrip("/")
+
+    def _key(self, name: str) -> str:
+        return f"{self.prefix}/{name}"
+
+    def get(self, name: str) -> bytes | None:
+        try:
+            obj = self.s3.get_object(Bucket=self.bucket, Key=self._key(name))
+        except self.s3.exceptions.NoSuchKey:
+            return None
+        return obj["Body"].read()
+
+    def exists(self, name: str) -> bool:
+        try:
+            self.s3.head_object(Bucket=self.bucket, Key=self._key(name))
+        except Exception:
+            return False
+        return True
+
+    def put(self, name: str, data: bytes) -> None:
+        content_type = "image/png" if name.endswith(".png") else "application/json"
+        self.s3.put_object(
+            Bucket=self.bucket, Key=self._key(name), Body=data, ContentType=content_type,
+        )
+
+    def list(self, prefix: str):
+        """Yield (name, modified time) for each object under prefix/."""
+        paginator = self.s3.get_paginator("list_objects_v2")
+        for page in paginator.paginate(Bucket=self.bucket, Prefix=self._key(prefix) + "/"):
+            for obj in page.get("Contents", []):
+                yield obj["Key"][len(self.prefix) + 1:], obj["LastModified"].timestamp()
+
+    def delete(self, name: str) -> None:
+        self.s3.delete_object(Bucket=self.bucket, Key=self._key(name))
+
+
+class ImagenCache:
+    """Content-addressed candidate cache with a TTL on entries."""
+
+    def __init__(self, store, ttl_seconds: float):
+        self.store = store
+        self.ttl_seconds = ttl_seconds
+
+    @staticmethod
+    def key(model: str, prompt: str, aspect_ratio: str, count: int) -> str:
+        prompt_hash = hashlib.sha256(prompt.encode()).hexdigest()
+        raw = f"{model}\n{prompt_hash}\n{aspect_ratio}\n{count}"
+        return hashlib.sha256(raw.encode()).hexdigest()
+
+    def get(self, model: str, prompt: str, aspect_ratio: str, count: int) -> list[bytes] | None:
+        """Return cached candidate images, or None on a miss or expired entry."""
+        raw = self.store.get(f"entries/{self.key(model, prompt, aspect_ratio, count)}.json")
+        if raw is None:
+            return None
+        entry = json.loads(raw)
+        if time.time() - entry["created_at"] > self.ttl_seconds:
+            return None
+        images = []
+        for digest in entry["blobs"]:
+            data = self.store.get(f"blobs/{digest}.png")
+            if data is None or hashlib.sha256(data).hexdigest() != digest:
+                logger.warning("Imagen cache blob %s missing or corrupt, treating as miss", digest)
+                return None
+            images.append(data)
+        return images
+
+    def put(
+        self, model: str, prompt: str, aspect_ratio: str, count: int, images: list[bytes]
+    ) -> None:
+        """Store candidate images and (re)write the entry pointing at them."""
+        digests = []
+        for data in images:
+            digest = hashlib.sha256(data).hexdigest()
+            name = f"blobs/{digest}.png"
+            if not self.store.exists(name):
+                self.store.put(name, data)
+            digests.append(digest)
+        entry = {
+            "model": model,
+            "aspect_ratio": aspect_ratio,
+            "count": count,
+            "blobs": digests,
+            "created_at": time.time(),
+        }
+        self.store.put(
+            f"entries/{self.key(model, prompt, aspect_ratio, count)}.json",
+            json.dumps(entry).encode(),
+        )
+
+    def prune(self, grace_seconds: float = 3600) -> tuple[int, int]:
+        """Delete expired entries and unreferenced blobs; return (entries, blobs) removed.
+
+        Unreadable entries and unreferenced blobs are only deleted once older
+        than grace_seconds, so a put() in progress (blobs written, entry not
+        yet) keeps its blobs. A blob removed under a racing put() only costs
+        that entry a miss: get() checks every blob.
+        """
+        now = time.time()
+        live: set[str] = set()
+        entries_removed = 0
+        for name, modified in list(self.store.list("entries")):
+            try:
+                entry = json.loads(self.store.get(name) or b"")
+                created_at, digests = entry["created_at"], entry["blobs"]
+            except (ValueError, TypeError, KeyError):
+                if now - modified > grace_seconds:
+                    self.store.delete(name)
+                    entries_removed += 1
+                continue
+            if now - created_at > self.ttl_seconds:
+                self.store.delete(name)
+                entries_removed += 1
+            else:
+                live.update(digests)
+
+        blobs_removed = 0
+        for name, modified in list(self.store.list("blobs")):
+            digest = name.removeprefix("blobs/").removesuffix(".png")
+            if digest not in live and now - modified > grace_seconds:
+                self.store.delete(name)
+                blobs_removed += 1
+        return entries_removed, blobs_removed
@@ -0,0 +1,196 @@
+"""Markdown to HTML for Substack drafts.
+
+Substack's draft API takes HTML. Rendering it here means the agent writes an
+edition once, as markdown (the same text it saves to Obsidian), instead of
+spending a second full generation re-emitting it as HTML.
+
+Covers what an edition uses, in the subset of HTML the Substack editor keeps:
+
+- paragraphs (lines joined; two trailing spaces or a backslash break the line),
+- headings: # and ## become <h2>, deeper levels <h3> (the edition title is set
+  separately),
+- bulleted and numbered lists, nested by indentation,
+- blockquotes, horizontal rules, fenced code blocks,
+- inline **bold**, *italic*, `code`, [links](url) and ![images](url); an
+  image alone on a line becomes a block image.
+
+Text is HTML-escaped, so raw HTML in the markdown shows up as written. Link
+and image URLs may contain balanced parentheses, and must be http(s), mailto
+or relative: any other scheme (javascript:, data:) is dropped, leaving the
+link text or the image's alt text.
+"""
+
+import html
+import re
+
+_HEADING_RE = re.compile(r"^(#{1,6})\s+(.*?)\s*#*\s*$")
+_RULE_RE = re.compile(r"^(?:-\s*){3,}$|^(?:\*\s*){3,}$|^(?:_\s*){3,}$")
+_FENCE_RE = re.compile(r"^(```|~~~)")
+_ITEM_RE = re.compile(r"^(\s*)([-*+]|\d+[.)])\s+(.*)$")
+# A link destination: no spaces, parentheses only in balanced pairs
+_URL = r"((?:[^()\s]|\([^()\s]*\))+)"
+_IMAGE_LINE_RE = re.compile(rf"^!\[([^\]]*)\]\({_URL}(?:\s+\"([^\"]*)\")?\)$")
+# http(s) and mailto, or a relative URL (no scheme before the first /, ? or #)
+_SAFE_URL_RE = re.compile(r"(?:https?|mailto):|[^:/?#]*(?:[/?#]|$)", re.IGNORECASE)
+
+_CODE_RE = re.compile(r"`([^`]+)`")
+_IMAGE_RE = re.compile(rf"!\[([^\]]*)\]\({_URL}(?:\s+&quot;(.*?)&quot;)?\)")
+_LINK_RE = re.compile(rf"\[([^\]]+)\]\({_URL}(?:\s+&quot;(.*?)&quot;)?\)")
+_BOLD_RE = re.compile(r"\*\*(?=\S)(.+?)(?<=\S)\*\*|__(?=\S)(.+?)(?<=\S)__")
+_ITALIC_RE = re.compile(r"\*(?=\S)(.+?)(?<=\S)\*|(?<!\w)_(?=\S)(.+?)(?<=\S)_(?!\w)")
+_BREAK_RE = re.compile(r"(?: {2,}|\\)$")
+
+# Placeholder for spans that later inline rules must not touch
+_HOLD = "\x00{}\x00"
+_HOLD_RE = re.compile("\x00(\\d+)\x00")
+
+
+def _attr(value: str) -> str:
+    return html.escape(html.unescape(value), quote=True)
+
+
+def _safe_url(url: str) -> bool:
+    return bool(_SAFE_URL_RE.match(html.unescape(url)))
+
+
+def _inline(text: str) -> str:
+    """Render inline markdown in one block of (unescaped) text."""
+    held: list[str] = []
+
+    def hold(fragment: str) -> str:
+        held.append(fragment)
+        return _HOLD.format(len(held) - 1)
+
+    text = html.escape(text, quote=True)
+    text = _CODE_RE.sub(lambda m: hold(f"<code>{m.group(1)}</code>"), text)
+
+    def image(m: re.Match) -> str:
+        if not _safe_url(m.group(2)):
+            return m.group(1)
+        title = f' title="{_attr(m.group(3))}"' if m.group(3) else ""
+        return hold(f'<img src="{_attr(m.group(2))}" alt="{_attr(m.group(1))}"{title}>')
+
+    text = _IMAGE_RE.sub(image, text)
+
+    def link(m: re.Match) -> str:
+        if not _safe_url(m.group(2)):
+            return m.group(1)
+        title = f' title="{_attr(m.group(3))}"' if m.group(3) else ""
+        return hold(f'<a href="{_attr(m.group(2))}"{title}>') + m.group(1) + hold("</a>")
+
+    text = _LINK_RE.sub(link, text)
+    text = _BOLD_RE.sub(lambda m: f"<strong>{m.group(1) or m.group(2)}</strong>", text)
+    text = _ITALIC_RE.sub(lambda m: f"<em>{m.group(1) or m.group(2)}</em>", text)
+    return _HOLD_RE.sub(lambda m: held[int(m.group(1))], text)
+
+
+def _paragraph(lines: list[str]) -> str:
+    parts = []
+    for i, line in enumerate(lines):
+        last = i == len(lines) - 1
+        if not last and _BREAK_RE.search(line):
+            parts.append(_inline(_BREAK_RE.sub("", line).strip()) + "<br>")
+        else:
+            parts.append(_inline(line.strip()) + ("" if last else " "))
+    return "".join(parts)
+
+
+def _list(items: list[tuple[int, bool, str]]) -> str:
+    """Nested <ul>/<ol> from (indent, ordered, text) items in document order."""
+    out: list[str] = []
+    stack: list[tuple[int, str]] = []  # (indent, tag) of each open list
+    for indent, ordered, text in items:
+        tag = "ol" if ordered else "ul"
+        while stack and indent < stack[-1][0]:
+            out.append(f"</li></{stack.pop()[1]}>")
+        if stack and indent == stack[-1][0]:
+            out.append("</li>")
+            if stack[-1][1] != tag:
+                out.append(f"</{stack.pop()[1]}><{tag}>")
+                stack.append((indent, tag))
+        else:
+            out.append(f"<{tag}>")
+            stack.append((indent, tag))
+        out.append(f"<li>{_inline(text)}")
+    while stack:
+        out.append(f"</li></{stack.pop()[1]}>")
+    return "".join(out)
+
+
+def render(markdown: str) -> str:
+    """Render markdown as Substack-compatible HTML, one block element per line."""
+    lines = markdown.replace("\r\n", "\n").replace("\t", "    ").split("\n")
+    blocks: list[str] = []
+    i = 0
+    while i < len(lines):
+        line = lines[i]
+        stripped = line.strip()
+
+        if not stripped:
+            i += 1
+            continue
+
+        fence = _FENCE_RE.match(stripped)
+        if fence:
+            code = []
+            i += 1
+            while i < len(lines) and not lines[i].strip().startswith(fence.group(1)):
+                code.append(lines[i])
+                i += 1
+            blocks.append(f"<pre><code>{html.escape(chr(10).join(code))}</code></pre>")
+            i += 1
+            continue
+
+        heading = _HEADING_RE.match(stripped)
+        if heading:
+            level = 2 if len(heading.group(1)) <= 2 else 3
+            blocks.append(f"<h{level}>{_inline(heading.group(2))}</h{level}>")
+            i += 1
+            continue
+
+        if _RULE_RE.match(stripped):
+            blocks.append("<hr>")
+            i += 1
+            continue
+
+        image = _IMAGE_LINE_RE.match(stripped)
+        if image and _safe_url(image.group(2)):
+            blocks.append(f"<figure>{_inline(stripped)}</figure>")
+            i += 1
+            continue
+
+        if stripped.startswith(">"):
+            quoted = []
+            while i < len(lines) and lines[i].strip().startswith(">"):
+                quoted.append(lines[i].strip()[1:].removeprefix(" "))
+                i += 1
+            blocks.append(f"<blockquote>{render(chr(10).join(quoted))}</blockquote>")
+            continue
+
+        if _ITEM_RE.match(line):
+            items = []
+            while i < len(lines) and lines[i].strip():
+                item = _ITEM_RE.match(lines[i])
+                if item:
+                    items.append((len(item.group(1)), item.group(2)[0].isdigit(), item.group(3)))
+                elif items:
+                    # A wrapped line continues the previous item
+                    indent, ordered, text = items[-1]
+                    items[-1] = (indent, ordered, f"{text} {lines[i].strip()}")
+                i += 1
+            blocks.append(_list(items))
+            continue
+
+        paragraph = []
+        while i < len(lines) and lines[i].strip():
+            nxt = lines[i].strip()
+            if paragraph and (
+                _HEADING_RE.match(nxt) or _FENCE_RE.match(nxt) or nxt.startswith(">")
+                or _ITEM_RE.match(lines[i]) or _RULE_RE.match(nxt)
+            ):
+                break
+            paragraph.append(lines[i])
+            i += 1
+        blocks.append(f"<p>{_paragraph(paragraph)}</p>")
+
+    return "\n".join(blocks)
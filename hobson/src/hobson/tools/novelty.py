@@ -0,0 +1,169 @@
+"""Topic novelty checks against everything Hobson has already made.
+
+Feeds the MinHash index in topic_index.py from three sources and exposes
+check_topic_novelty:
+
+- blog: posts under site/src/data/blog/, via the site index (a local checkout
+  or the GitHub tree, re-reading only changed blobs),
+- concept: design concept notes, via the local vault index,
+- substack: edition drafts in the vault, and published posts and drafts
+  from the local Substack posts index.
+
+Sources are synced in the background, by a scheduler job that runs at
+startup and then every TOPIC_INDEX_REFRESH_MINUTES; a check only queries the
+index as last synced, so it never waits on GitHub, the vault or Substack. A
+source that cannot be reached is skipped and its documents stay as last
+synced.
+
+Backfill (or rebuild) the whole corpus with:
+
+    python -m hobson.tools.novelty [--rebuild]
+"""
+
+import hashlib
+import json
+import logging
+import sys
+import threading
+from pathlib import Path
+
+from langchain_core.tools import tool
+
+from hobson.config import settings
+from hobson.tools import git_ops, obsidian, substack
+from hobson.tools.site_index import strip_frontmatter
+from hobson.tools.topic_index import TopicIndex
+
+logger = logging.getLogger(__name__)
+
+CONCEPTS_PREFIX = "98 - Hobson Builds Character/Content/Designs/Concepts/"
+SUBSTACK_DRAFTS_PREFIX = "98 - Hobson Builds Character/Content/Substack/Drafts/"
+KINDS = ("blog", "concept", "substack")
+
+_topic_index: TopicIndex | None = None
+_sync_lock = threading.Lock()
+
+
+def topic_index() -> TopicIndex:
+    global _topic_index
+    if _topic_index is None:
+        _topic_index = TopicIndex.load(settings.topic_index_path)
+    return _topic_index
+
+
+def _digest(text: str) -> str:
+    return hashlib.sha256(text.encode()).hexdigest()[:16]
+
+
+# -- Sources --
+
+
+def _blog_items() -> dict | None:
+    site = git_ops.refresh_site_index()
+    if site is None:
+        return None
+
+    def loader(entry):
+        if settings.site_checkout_path:
+            return lambda: strip_frontmatter((Path(settings.site_checkout_path) / entry.path).read_text())
+        return lambda: strip_frontmatter(git_ops.fetch_blob_text(entry.version))
+
+    return {
+        f"blog:{entry.slug}": (entry.title or entry.slug, entry.version, loader(entry))
+        for entry in site.entries.values()
+        if entry.kind == "blog"
+    }
+
+
+def _vault_items(prefix: str) -> dict:
+    index = obsidian.refresh_vault_index()
+    return {
+        f"vault:{path}": (title, digest, lambda body=body: body)
+        for path, digest, title, body in index.documents(prefix)
+    }
+
+
+def _post_items(backfill: bool) -> dict | None:
+    """Substack posts and drafts from the local posts index (every page re-listed when backfilling)."""
+    index = substack.refresh_posts_index(full=backfill)
+    if index.synced_at is None:
+        return None
+    return {
+        f"post:{post.id}": (post.title, _digest(post.text), lambda text=post.text: text)
+        for post in index.posts()
+    }
+
+
+def sync_topic_index(backfill: bool = False, rebuild: bool = False) -> dict[str, int]:
+    """Bring the topic index up to date; return documents (re)indexed per source.
+
+    backfill re-lists every published Substack post instead of only the new
+    ones (and drops posts no longer published); rebuild discards the saved
+    index first.
+    """
+    global _topic_index
+    with _sync_lock:
+        if rebuild:
+            _topic_index = TopicIndex()
+            backfill = True
+        index = topic_index()
+        # (source, kind, items, prune, id scope for pruning)
+        sources = [
+            ("blog", "blog", _blog_items, True, ""),
+            ("concepts", "concept", lambda: _vault_items(CONCEPTS_PREFIX), True, ""),
+            ("substack drafts", "substack", lambda: _vault_items(SUBSTACK_DRAFTS_PREFIX), True, "vault:"),
+            ("substack posts", "substack", lambda: _post_items(backfill), True, "post:"),
+        ]
+        changed = {}
+        for source, kind, items, prune, scope in sources:
+            try:
+                found = items()
+            except Exception as e:
+                logger.warning("Topic index source %s failed: %s", source, e)
+                continue
+            if found is not None:
+                changed[source] = index.sync(kind, found, prune=prune, scope=scope)
+        if any(changed.values()) or rebuild:
+            index.save(settings.topic_index_path)
+        return changed
+
+
+@tool
+def check_topic_novelty(text: str, kinds: str = "", k: int = 5) -> str:
+    """Check a proposed topic against past blog posts, design concepts and Substack
+    editions, returning the closest matches with their estimated Jaccard similarity.
+
+    Pass a title and a few sentences (or a concept description, or the opening
+    of a draft). Matches are ranked by word overlap with the title and opening of
+    each past piece. Everything on the brand shares one theme, so typical scores
+    are low (0.02-0.15); the top matches are the closest existing work and your
+    angle should clearly differ from theirs. A score of 0.3 or more means a
+    near-copy: pick another topic.
+
+    Args:
+        text: The proposed title, concept description or outline
+        kinds: Optional comma-separated filter: blog, concept, substack
+        k: Maximum number of matches to return
+    """
+    wanted = [kind.strip() for kind in kinds.split(",") if kind.strip()] or None
+    unknown = [kind for kind in wanted or [] if kind not in KINDS]
+    if unknown:
+        return json.dumps({"status": "error", "message": f"Unknown kinds {unknown}; use {list(KINDS)}"})
+    matches = topic_index().query(text, k=max(1, min(k, 20)), kinds=wanted)
+    return json.dumps({
+        "status": "similar_found" if matches else "novel",
+        "indexed_documents": len(topic_index()),
+        "matches": [
+            {"kind": m.kind, "title": m.title, "id": m.doc_id.split(":", 1)[1], "jaccard": m.score}
+            for m in matches
+        ],
+    })
+
+
+if __name__ == "__main__":
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s [%(levelname)s] %(name)s: %(message)s",
+    )
+    counts = sync_topic_index(backfill=True, rebuild="--rebuild" in sys.argv[1:])
+    logger.info("Topic index: %d documents (%s re-indexed)", len(topic_index()), counts)
@@ -1,18 +1,105 @@
 """Obsidian REST API client for vault operations."""
 
-from datetime import date
+import json
+import logging
+import re
+import time
+from datetime import date, timedelta
 
 import httpx
 from langchain_core.tools import tool
 
 from hobson.config import settings
+from hobson.tools.vault_client import VaultClient
+from hobson.tools.vault_index import VaultIndex
+
+logger = logging.getLogger(__name__)
 
 _BASE_URL = f"https://{settings.obsidian_host}:{settings.obsidian_port}"
-_HEADERS = {"Authorization": f"Bearer {settings.obsidian_api_key}"}
+
+# The daily log is one note per day ("Daily Log/YYYY-MM-DD.md"), so appends and
+# reads touch only the days involved. "Daily Log.md" is the pre-sharding log,
+# kept read-only for days before the switch.
+DAILY_LOG_DIR = "98 - Hobson Builds Character/Operations/Daily Log"
+LEGACY_DAILY_LOG = "98 - Hobson Builds Character/Operations/Daily Log.md"
+
+# Days whose note is known to exist (with its "## day" heading), so repeat
+# appends skip the existence check
+_days_started: set[str] = set()
+# Sections of the legacy log by day, parsed once (the note no longer changes)
+_legacy_sections: dict[str, str] | None = None
+# read_daily_log reads one note per day; a month is plenty for any workflow
+_MAX_LOG_DAYS = 31
+
+# Folders covered by search_vault (the daily log has read_daily_log)
+INDEXED_FOLDERS = [
+    "98 - Hobson Builds Character/Content",
+    "98 - Hobson Builds Character/Strategy",
+]
+
+_vault_client: VaultClient | None = None
+_vault_index: VaultIndex | None = None
+_index_listed_at: float | None = None
+
+
+def vault() -> VaultClient:
+    """Shared keep-alive vault client (also used by telegram.py for standing orders)."""
+    global _vault_client
+    if _vault_client is None:
+        _vault_client = VaultClient(
+            _BASE_URL,
+            settings.obsidian_api_key,
+            coalesce_window=settings.obsidian_coalesce_window,
+            cache_ttl=settings.obsidian_cache_ttl,
+            on_change=lambda path: vault_index().mark_dirty(path),
+        )
+    return _vault_client
 
 
-def _client() -> httpx.Client:
-    return httpx.Client(base_url=_BASE_URL, headers=_HEADERS, timeout=30, verify=False)
+def vault_index() -> VaultIndex:
+    global _vault_index
+    if _vault_index is None:
+        _vault_index = VaultIndex(
+            settings.vault_index_path, recheck_after=settings.vault_index_recheck_hours * 3600
+        )
+    return _vault_index
+
+
+def _list_notes(folder: str) -> dict[str, None]:
+    """Every note under a folder (recursively) over the REST API, with no version."""
+    listing = vault().list_folder(folder)
+    if listing is None:
+        return {}
+    notes = {}
+    for name in json.loads(listing).get("files", []):
+        path = f"{folder.rstrip('/')}/{name}"
+        if name.endswith("/"):
+            notes.update(_list_notes(path))
+        elif name.endswith(".md"):
+            notes[path] = None
+    return notes
+
+
+def refresh_vault_index() -> VaultIndex:
+    """Bring the search index up to date, listing folders over REST at most every interval."""
+    global _index_listed_at
+    index = vault_index()
+    if settings.obsidian_vault_path:
+        index.refresh_from_directory(settings.obsidian_vault_path, INDEXED_FOLDERS)
+        return index
+    prefixes = tuple(f"{folder}/" for folder in INDEXED_FOLDERS)
+    now = time.monotonic()
+    if _index_listed_at is None or now - _index_listed_at >= settings.vault_index_list_interval:
+        listing = {}
+        for folder in INDEXED_FOLDERS:
+            listing.update(_list_notes(folder))
+        _index_listed_at = now
+        changed = index.sync(listing, vault().read, prefixes)
+    else:
+        changed = index.sync(None, vault().read, prefixes)
+    if changed:
+        logger.info("Vault index: %d note(s) re-indexed", changed)
+    return index
 
 
 @tool
@@ -20,12 +107,10 @@ def write_note(path: str, content: str) -> str:
     """Write or overwrite a note in the Obsidian vault.
 
     Args:
-        path: Vault-relative path (e.g., '98 - Hobson Builds Character/Operations/Daily Log.md')
+        path: Vault-relative path (e.g., '98 - Hobson Builds Character/Operations/Weekly Review.md')
         content: Full markdown content for the note
     """
-    with _client() as client:
-        resp = client.put(f"/vault/{path}", content=content, headers={"Content-Type": "text/markdown"})
-        resp.raise_for_status()
+    vault().write(path, content)
     return f"Wrote note: {path}"
 
 
@@ -36,12 +121,10 @@ def read_note(path: str) -> str:
     Args:
         path: Vault-relative path (e.g., '98 - Hobson Builds Character/Dashboard.md')
     """
-    with _client() as client:
-        resp = client.get(f"/vault/{path}", headers={"Accept": "text/markdown"})
-        if resp.status_code == 404:
-            return f"Note not found: {path}"
-        resp.raise_for_status()
-    return resp.text
+    text = vault().read(path)
+    if text is None:
+        return f"Note not found: {path}"
+    return text
 
 
 @tool
@@ -52,16 +135,14 @@ def append_to_note(path: str, content: str) -> str:
         path: Vault-relative path
         content: Markdown content to append
     """
-    with _client() as client:
-        resp = client.post(
-            f"/vault/{path}",
-            content=content,
-            headers={"Content-Type": "text/markdown"},
-        )
-        resp.raise_for_status()
+    vault().append(path, content)
     return f"Appended to note: {path}"
 
 
+def _daily_log_path(day: str) -> str:
+    return f"{DAILY_LOG_DIR}/{day}.md"
+
+
 @tool
 def append_to_daily_log(entry: str) -> str:
     """Append an entry to today's section in the Hobson daily log.
@@ -70,28 +151,94 @@ def append_to_daily_log(entry: str) -> str:
         entry: A single log entry line (will be prefixed with '- ')
     """
     today = date.today().isoformat()
-    log_path = "98 - Hobson Builds Character/Operations/Daily Log.md"
-
-    with _client() as client:
-        # Read current content
-        resp = client.get(f"/vault/{log_path}", headers={"Accept": "text/markdown"})
-        current = resp.text if resp.status_code == 200 else ""
-
-        # Check if today's section exists
-        if f"## {today}" not in current:
-            addition = f"\n## {today}\n- {entry}\n"
-        else:
-            addition = f"- {entry}\n"
-
-        resp = client.post(
-            f"/vault/{log_path}",
-            content=addition,
-            headers={"Content-Type": "text/markdown"},
-        )
-        resp.raise_for_status()
+    log_path = _daily_log_path(today)
+
+    # Only the first append of the day (per process) checks whether today's
+    # note exists, and then only reads today's note
+    if today not in _days_started:
+        current = vault().read(log_path)
+        started = current is not None and f"## {today}" in current
+    else:
+        started = True
+
+    addition = f"- {entry}\n" if started else f"## {today}\n- {entry}\n"
+    vault().append(log_path, addition)
+    _days_started.add(today)
     return f"Logged to daily log: {entry}"
 
 
+def _split_legacy_log(text: str) -> dict[str, str]:
+    """Split the legacy single-note log into {day: "## day" section}."""
+    sections = {}
+    for match in re.finditer(r"^## (\d{4}-\d{2}-\d{2})\s*$", text, flags=re.MULTILINE):
+        day = match.group(1)
+        end = text.find("\n## ", match.end())
+        section = text[match.start(): end if end != -1 else len(text)].strip()
+        # A day may appear twice if two processes raced; keep both parts
+        sections[day] = f"{sections[day]}\n{section}" if day in sections else section
+    return sections
+
+
+def _legacy_day(day: str) -> str | None:
+    """The legacy log's section for day. A failed read is retried next time, not cached."""
+    global _legacy_sections
+    if _legacy_sections is None:
+        try:
+            text = vault().read(LEGACY_DAILY_LOG)
+        except httpx.HTTPError as e:
+            logger.warning("Could not read the legacy daily log: %s", e)
+            return None
+        _legacy_sections = _split_legacy_log(text or "")
+    return _legacy_sections.get(day)
+
+
+@tool
+def read_daily_log(days: int = 1) -> str:
+    """Read the Hobson daily log for the last N days (today included), oldest first.
+
+    Args:
+        days: Number of days to read, e.g. 1 for today, 2 for yesterday and today,
+              7 for the past week (at most 31)
+    """
+    days = max(1, min(days, _MAX_LOG_DAYS))
+    today = date.today()
+    wanted = [(today - timedelta(days=offset)).isoformat() for offset in range(days - 1, -1, -1)]
+
+    sections = []
+    for day in wanted:
+        text = vault().read(_daily_log_path(day))
+        if text is None:
+            text = _legacy_day(day)
+        if text:
+            sections.append(text.strip())
+    if not sections:
+        return f"No daily log entries for the last {days} day(s)."
+    return "\n\n".join(sections)
+
+
+@tool
+def search_vault(query: str, folder: str = "", k: int = 5) -> str:
+    """Full-text search over Hobson's vault notes (content and strategy), returning the
+    best-matching snippets. Use this to check past design concepts, blog drafts and
+    Substack editions for overlap instead of listing a folder and reading every note.
+
+    Args:
+        query: Words to look for, e.g. a concept's theme or a post's topic
+        folder: Optional vault-relative folder to restrict results to
+                (e.g., '98 - Hobson Builds Character/Content/Designs/Concepts')
+        k: Maximum number of notes to return
+    """
+    try:
+        index = refresh_vault_index()
+    except Exception as e:
+        logger.warning("Vault index refresh failed, searching the existing index: %s", e)
+        index = vault_index()
+    hits = index.search(query, k=max(1, min(k, 20)), folder=folder)
+    if not hits:
+        return f"No vault notes match: {query}"
+    return "\n\n".join(f"{hit.path} ({hit.title})\n{hit.snippet}" for hit in hits)
+
+
 @tool
 def list_vault_folder(path: str) -> str:
     """List files in a vault folder.
@@ -99,9 +246,4 @@ def list_vault_folder(path: str) -> str:
     Args:
         path: Vault-relative folder path (e.g., '98 - Hobson Builds Character/Content/Blog/Drafts')
     """
-    with _client() as client:
-        resp = client.get(f"/vault/{path}/")
-        if resp.status_code == 404:
-            return "[]"
-        resp.raise_for_status()
-    return resp.text
+    return vault().list_folder(path) or "[]"
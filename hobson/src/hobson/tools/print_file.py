@@ -0,0 +1,581 @@
+"""Print-file rendering: bounded-memory upscaling with a streamed PNG encoder.
+
+Printful minimums for posters and t-shirts (5400x7200, 4500x5100) put a full
+RGBA print file well over 100 MB in memory, plus another copy when it is
+re-encoded into a BytesIO. This module renders the print file in horizontal
+bands and writes each band straight into a PNG on disk, so peak memory is one
+band plus the (small) source image.
+
+Encoding is two-pass. The analysis pass renders each band, counts colors and
+checks for grayscale/alpha. When rendering is costly (upscaling or background
+keying) it also spools the raw band to a temporary file, so the write pass
+re-reads the exact pixels it analysed instead of resampling again. The write
+pass then picks the smallest lossless PNG representation:
+
+- palette (indexed, with tRNS alpha) when the artwork has <= 256 colors
+- grayscale (+alpha) when every pixel is neutral, e.g. charcoal on transparent
+- truecolor otherwise, with per-row adaptive filtering
+
+Fully transparent pixels are normalised to (0, 0, 0, 0) first: their RGB is
+invisible, and letting it vary only defeats compression.
+
+Die-cut stickers can also have their background keyed out. Imagen often
+ignores "transparent background" and returns opaque white or bone. The
+background color is estimated from the image border, and only background
+connected to the border is keyed: a bone-colored counter inside a letter or a
+highlight inside a shape stays opaque. Each print-resolution band gets a soft
+alpha ramp with the background un-blended from anti-aliased edge pixels. The
+artwork is then trimmed to its bounding box plus a margin.
+
+Band rendering runs inside spawned worker processes (see
+image_gen._get_print_pool).
+"""
+
+import io
+import struct
+import tempfile
+import zlib
+from dataclasses import dataclass
+
+import numpy as np
+from PIL import Image, ImageFilter
+
+_PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+
+# PNG color types and bytes per pixel for each output mode
+_COLOR_TYPES = {"P": 3, "L": 0, "LA": 4, "RGB": 2, "RGBA": 6}
+_BYTES_PER_PIXEL = {"P": 1, "L": 1, "LA": 2, "RGB": 3, "RGBA": 4}
+
+# Output rows rendered per band. 256 rows of a 5400px RGBA poster is ~5.5 MB.
+_BAND_ROWS = 256
+
+# Uncompressed bytes fed to zlib before flushing an IDAT chunk
+_IDAT_CHUNK_BYTES = 1 << 20
+
+# Flat one-color artwork compresses far better at level 9 and costs little
+# extra time; photographic truecolor gains almost nothing past 6.
+_COMPRESS_LEVELS = {"P": 9, "L": 9, "LA": 9, "RGB": 6, "RGBA": 6}
+
+# Printful print-file requirements: 8-bit non-interlaced PNG in sRGB, under
+# 200 MB. The pHYs chunk declares 300 DPI, Printful's recommended resolution.
+PRINTFUL_MAX_BYTES = 200 * 1024 * 1024
+_DPI = 300
+
+
+# Background keying. Distances are max-channel differences from the
+# background color (0-255). Pixels within _KEY_LOW are background; coverage
+# ramps linearly up to the ink distance, which is measured per image and
+# never below _KEY_MIN_INK.
+_KEY_LOW = 24
+_KEY_MIN_INK = 96
+# The border must be at least this uniform to be treated as a background
+_BORDER_UNIFORMITY = 0.8
+# Margin kept around the trimmed artwork, as a fraction of its larger side
+_TRIM_MARGIN = 0.04
+
+
+@dataclass(frozen=True)
+class BackgroundKey:
+    color: tuple[int, int, int]
+    low: float
+    ink: float
+
+
+def _scaled_size(
+    width: int, height: int, min_size: tuple[int, int] | None
+) -> tuple[int, int] | None:
+    """Return the size needed to meet min_size, or None if no upscale is needed.
+
+    Scales uniformly so both minimum dimensions are met (aspect ratio kept).
+    """
+    if min_size is None:
+        return None
+    min_w, min_h = min_size
+    if width >= min_w and height >= min_h:
+        return None
+    scale = max(min_w / width, min_h / height)
+    return int(width * scale), int(height * scale)
+
+
+class PNGStreamWriter:
+    """Write a PNG incrementally: header up front, IDAT chunks as rows arrive.
+
+    Rows are passed already prefixed with their PNG filter-type byte.
+    extra_chunks (PLTE, tRNS, pHYs, ...) are written between IHDR and IDAT.
+    """
+
+    def __init__(
+        self,
+        fileobj,
+        width: int,
+        height: int,
+        color_type: int,
+        compress_level: int = 6,
+        extra_chunks: list[tuple[bytes, bytes]] | None = None,
+    ):
+        self._f = fileobj
+        self._compressor = zlib.compressobj(compress_level, memLevel=9)
+        self._pending: list[bytes] = []
+        self._pending_len = 0
+        self._f.write(_PNG_SIGNATURE)
+        self._chunk(
+            b"IHDR",
+            struct.pack(">IIBBBBB", width, height, 8, color_type, 0, 0, 0),
+        )
+        for tag, data in extra_chunks or []:
+            self._chunk(tag, data)
+
+    def _chunk(self, tag: bytes, data: bytes) -> None:
+        self._f.write(struct.pack(">I", len(data)))
+        self._f.write(tag)
+        self._f.write(data)
+        self._f.write(struct.pack(">I", zlib.crc32(data, zlib.crc32(tag))))
+
+    def write_rows(self, data: bytes) -> None:
+        self._pending.append(data)
+        self._pending_len += len(data)
+        if self._pending_len >= _IDAT_CHUNK_BYTES:
+            self._flush_pending()
+
+    def _flush_pending(self) -> None:
+        compressed = self._compressor.compress(b"".join(self._pending))
+        self._pending.clear()
+        self._pending_len = 0
+        if compressed:
+            self._chunk(b"IDAT", compressed)
+
+    def close(self) -> None:
+        self._flush_pending()
+        tail = self._compressor.flush()
+        if tail:
+            self._chunk(b"IDAT", tail)
+        self._chunk(b"IEND", b"")
+
+
+def _border_pixels(pixels: np.ndarray) -> np.ndarray:
+    """Return the outer ring of an RGBA image as an (n, 4) array."""
+    height, width = pixels.shape[:2]
+    ring = max(2, min(height, width) // 100)
+    return np.concatenate([
+        pixels[:ring].reshape(-1, 4),
+        pixels[-ring:].reshape(-1, 4),
+        pixels[ring:-ring, :ring].reshape(-1, 4),
+        pixels[ring:-ring, -ring:].reshape(-1, 4),
+    ])
+
+
+def _color_distance(pixels: np.ndarray, color) -> np.ndarray:
+    """Max-channel distance (0-255, uint8) of each RGB(A) pixel from color."""
+    dist = np.zeros(pixels.shape[:-1], dtype=np.uint8)
+    for channel, value in enumerate(color):
+        plane = pixels[..., channel]
+        np.maximum(dist, np.maximum(plane, value) - np.minimum(plane, value), out=dist)
+    return dist
+
+
+def _estimate_background(pixels: np.ndarray) -> BackgroundKey | None:
+    """Estimate the background from the image border.
+
+    Returns None if the border is already transparent or too varied to be a
+    plain background (e.g. full-bleed artwork).
+    """
+    border = _border_pixels(pixels)
+    if np.median(border[:, 3]) < 128:
+        return None
+    color = tuple(int(c) for c in np.median(border[:, :3], axis=0))
+    if (_color_distance(border, color) <= _KEY_LOW).mean() < _BORDER_UNIFORMITY:
+        return None
+    # Ink distance: how far the artwork sits from the background. Measured so
+    # a 50% anti-aliased edge pixel gets 50% alpha, not full coverage.
+    hist = np.bincount(_color_distance(pixels, color).ravel(), minlength=256)
+    inked = hist[2 * _KEY_LOW + 1:]
+    ink = 255.0
+    if inked.sum():
+        ink = float(2 * _KEY_LOW + 1 + np.searchsorted(inked.cumsum(), 0.9 * inked.sum()))
+    return BackgroundKey(color=color, low=_KEY_LOW, ink=max(ink, _KEY_MIN_INK))
+
+
+def _run_labels(mask: np.ndarray) -> tuple[np.ndarray, int]:
+    """Label each horizontal run of True pixels in mask (1..n; 0 outside mask)."""
+    starts = mask.copy()
+    starts[:, 1:] &= ~mask[:, :-1]
+    labels = np.cumsum(starts.ravel(), dtype=np.int32).reshape(mask.shape)
+    labels *= mask
+    return labels, int(labels.max(initial=0))
+
+
+def _border_connected(passable: np.ndarray) -> np.ndarray:
+    """Pixels of passable reachable from the image border through passable pixels.
+
+    A 4-connected flood fill done as alternating row and column run passes: a
+    run touched by the fill is filled whole. Each pass is vectorised, and the
+    number of passes grows with how often the fill has to turn, not with the
+    image size.
+    """
+    row_labels, row_runs = _run_labels(passable)
+    col_labels, col_runs = _run_labels(np.ascontiguousarray(passable.T))
+    col_labels = col_labels.T
+    reached = np.zeros_like(passable)
+    for edge in (np.s_[0], np.s_[-1], np.s_[:, 0], np.s_[:, -1]):
+        reached[edge] = passable[edge]
+    count = int(reached.sum())
+    while True:
+        for labels, runs in ((row_labels, row_runs), (col_labels, col_runs)):
+            hit = np.zeros(runs + 1, dtype=bool)
+            hit[labels[reached]] = True
+            hit[0] = False
+            reached = hit[labels]
+        grown = int(reached.sum())
+        if grown == count:
+            return reached
+        count = grown
+
+
+def _background_region(pixels: np.ndarray, key: BackgroundKey) -> np.ndarray:
+    """Boolean mask of the pixels that may be keyed: those not fully inked and
+    connected to the border through other such pixels."""
+    return _border_connected(_color_distance(pixels, key.color) < key.ink)
+
+
+def _region_image(region: np.ndarray) -> Image.Image:
+    """The keyable region as an "L" image, grown by a pixel so resampled edges stay keyable."""
+    return Image.fromarray(region.astype(np.uint8) * 255).filter(ImageFilter.MaxFilter(3))
+
+
+def _extract_alpha(
+    pixels: np.ndarray, key: BackgroundKey, region: np.ndarray | None = None
+) -> np.ndarray:
+    """Key the background out of an RGBA array, vectorised over all pixels.
+
+    Alpha ramps from 0 at key.low to full at key.ink. For partially covered
+    edge pixels the background contribution is un-blended from the color
+    (fg = bg + (pixel - bg) / coverage), so die-cut edges don't keep a halo.
+    Coverage depends only on the 0-255 distance, so it is a table lookup;
+    only the (few) edge pixels take the floating-point path.
+
+    Only pixels in region are keyed. It defaults to the background connected
+    to the border of pixels, so pass it explicitly when pixels is one band of
+    a larger image.
+    """
+    dist = _color_distance(pixels, key.color)
+    if region is None:
+        region = _border_connected(dist < key.ink)
+    coverage = np.clip((np.arange(256) - key.low) / (key.ink - key.low), 0.0, 1.0)
+    coverage_u8 = np.rint(coverage * 255).astype(np.uint16)
+
+    out = pixels.copy()
+    alpha = (coverage_u8[dist] * pixels[..., 3] + 127) // 255
+    out[..., 3] = np.where(region, alpha, pixels[..., 3]).astype(np.uint8)
+
+    edge = np.nonzero((dist > key.low) & (dist < key.ink) & region)
+    if edge[0].size:
+        bg = np.asarray(key.color, dtype=np.float32)
+        diff = pixels[edge][:, :3].astype(np.float32) - bg
+        fg = bg + diff / coverage[dist[edge]][:, None].astype(np.float32)
+        out[edge[0], edge[1], :3] = np.clip(np.rint(fg), 0, 255).astype(np.uint8)
+    return out
+
+
+def _trim_box(alpha: np.ndarray, margin: float = _TRIM_MARGIN) -> tuple[int, int, int, int] | None:
+    """Bounding box of non-transparent pixels plus margin, clipped to the image.
+
+    Returns None if the image is fully transparent.
+    """
+    rows = np.flatnonzero(alpha.any(axis=1))
+    cols = np.flatnonzero(alpha.any(axis=0))
+    if not rows.size:
+        return None
+    height, width = alpha.shape
+    pad = round(margin * max(rows[-1] - rows[0] + 1, cols[-1] - cols[0] + 1))
+    return (
+        int(max(0, cols[0] - pad)),
+        int(max(0, rows[0] - pad)),
+        int(min(width, cols[-1] + 1 + pad)),
+        int(min(height, rows[-1] + 1 + pad)),
+    )
+
+
+def _iter_bands(
+    img: Image.Image,
+    size: tuple[int, int],
+    band_rows: int = _BAND_ROWS,
+    key: BackgroundKey | None = None,
+    region: Image.Image | None = None,
+):
+    """Yield RGBA bands (uint8 arrays, rows x width x 4) of img rendered at size.
+
+    When size differs from img.size each band is resampled with LANCZOS from
+    its own source box. Pillow reads filter support from outside the box, so
+    the bands join without seams. Resampling is premultiplied (as
+    Image.resize does for RGBA) to avoid dark fringes. If key is given the
+    background is extracted from each band at print resolution, limited to
+    region (an "L" mask at img.size, nonzero where keyable) if given. Fully
+    transparent pixels come out as (0, 0, 0, 0).
+    """
+    src_w, src_h = img.size
+    out_w, out_h = size
+    resize = size != img.size
+    work = img.convert("RGBa") if resize else img
+    scale_y = src_h / out_h
+    for top in range(0, out_h, band_rows):
+        bottom = min(out_h, top + band_rows)
+        if resize:
+            band = work.resize(
+                (out_w, bottom - top),
+                Image.LANCZOS,
+                box=(0, top * scale_y, src_w, bottom * scale_y),
+            ).convert("RGBA")
+        else:
+            band = work.crop((0, top, out_w, bottom))
+        pixels = np.array(band)
+        if key is not None:
+            band_region = None
+            if region is not None:
+                if resize:
+                    region_band = region.resize(
+                        (out_w, bottom - top),
+                        Image.NEAREST,
+                        box=(0, top * scale_y, src_w, bottom * scale_y),
+                    )
+                else:
+                    region_band = region.crop((0, top, out_w, bottom))
+                band_region = np.array(region_band) != 0
+            pixels = _extract_alpha(pixels, key, band_region)
+        pixels *= (pixels[..., 3:] != 0).astype(np.uint8)
+        yield pixels
+
+
+def _analyse(
+    img: Image.Image,
+    size: tuple[int, int],
+    band_rows: int,
+    key: BackgroundKey | None,
+    region: Image.Image | None = None,
+    spool=None,
+) -> dict:
+    """First pass: collect the palette (if <= 256 colors), grayscale and alpha flags.
+
+    If spool (a binary file) is given, each rendered band is appended to it
+    as raw RGBA for _spooled_bands.
+    """
+    colors: set[int] | None = set()
+    gray = True
+    has_alpha = False
+    for pixels in _iter_bands(img, size, band_rows, key, region):
+        if spool is not None:
+            spool.write(pixels.tobytes())
+        if colors is not None:
+            colors.update(np.unique(pixels.view(np.uint32)).tolist())
+            if len(colors) > 256:
+                colors = None
+        if gray:
+            gray = bool(
+                (pixels[..., 0] == pixels[..., 1]).all()
+                and (pixels[..., 1] == pixels[..., 2]).all()
+            )
+        if not has_alpha:
+            has_alpha = bool((pixels[..., 3] != 255).any())
+    palette = np.array(sorted(colors), dtype=np.uint32) if colors is not None else None
+    return {"palette": palette, "gray": gray, "has_alpha": has_alpha}
+
+
+def _spooled_bands(spool, size: tuple[int, int], band_rows: int):
+    """Yield the bands _analyse wrote to spool, in order."""
+    width, height = size
+    spool.seek(0)
+    for top in range(0, height, band_rows):
+        rows = min(band_rows, height - top)
+        data = spool.read(rows * width * 4)
+        yield np.frombuffer(data, dtype=np.uint8).reshape(rows, width, 4)
+
+
+def _choose_mode(analysis: dict) -> str:
+    if analysis["palette"] is not None:
+        return "P"
+    if analysis["gray"]:
+        return "LA" if analysis["has_alpha"] else "L"
+    return "RGBA" if analysis["has_alpha"] else "RGB"
+
+
+def _encode_band(pixels: np.ndarray, mode: str, palette: np.ndarray | None) -> np.ndarray:
+    """Convert an RGBA band to mode's sample layout.
+
+    The band must be one _analyse saw, so every color is in the palette and
+    the gray/alpha flags hold for it.
+    """
+    if mode == "P":
+        packed = pixels.view(np.uint32)[..., 0]
+        return np.searchsorted(palette, packed).astype(np.uint8)
+    if mode in ("L", "LA"):
+        channels = [0, 3] if mode == "LA" else [0]
+        return np.ascontiguousarray(pixels[..., channels])
+    if mode == "RGB":
+        return np.ascontiguousarray(pixels[..., :3])
+    return pixels
+
+
+def _filter_rows(rows: np.ndarray, prev: np.ndarray, bpp: int, adaptive: bool) -> bytes:
+    """Prefix each row with a PNG filter byte, choosing None/Sub/Up per row.
+
+    Uses libpng's heuristic (smallest sum of absolute signed residuals).
+    Palette data is left unfiltered, as the PNG spec recommends.
+    """
+    height, width = rows.shape
+    out = np.empty((height, width + 1), dtype=np.uint8)
+    if not adaptive:
+        out[:, 0] = 0
+        out[:, 1:] = rows
+        return out.tobytes()
+
+    up = rows - np.vstack([prev[None, :], rows[:-1]])
+    sub = rows.copy()
+    sub[:, bpp:] -= rows[:, :-bpp]
+    candidates = (rows, sub, up)
+    scores = np.stack([
+        np.abs(c.view(np.int8), dtype=np.int16).sum(axis=1, dtype=np.int64)
+        for c in candidates
+    ])
+    choice = scores.argmin(axis=0).astype(np.uint8)
+    out[:, 0] = choice
+    out[:, 1:] = np.where(
+        (choice == 0)[:, None], rows, np.where((choice == 1)[:, None], sub, up)
+    )
+    return out.tobytes()
+
+
+def _header_chunks(mode: str, palette: np.ndarray | None, has_alpha: bool) -> list[tuple[bytes, bytes]]:
+    pixels_per_metre = round(_DPI / 0.0254)
+    chunks = [
+        (b"sRGB", b"\x00"),
+        (b"pHYs", struct.pack(">IIB", pixels_per_metre, pixels_per_metre, 1)),
+    ]
+    if mode == "P":
+        entries = palette.view(np.uint8).reshape(-1, 4)
+        chunks.append((b"PLTE", entries[:, :3].tobytes()))
+        if has_alpha:
+            chunks.append((b"tRNS", entries[:, 3].tobytes()))
+    return chunks
+
+
+class _ByteCounter:
+    """Write-only sink that keeps the byte count and discards the data."""
+
+    def __init__(self):
+        self.count = 0
+
+    def write(self, data: bytes) -> None:
+        self.count += len(data)
+
+
+def _write_png(
+    bands, size: tuple[int, int], out_path: str, mode: str, analysis: dict
+) -> tuple[int, int]:
+    """Second pass: encode bands in mode and stream them to out_path.
+
+    Each band is also encoded, uncounted toward the file, the way a default
+    Image.save(..., "PNG") of the RGBA pixels would be (zlib level 6, adaptive
+    filtering), as the baseline the savings are reported against. Returns
+    (bytes written, bytes of that default RGBA encode).
+    """
+    width, height = size
+    palette = analysis["palette"]
+    bpp = _BYTES_PER_PIXEL[mode]
+    prev = np.zeros(width * bpp, dtype=np.uint8)
+    prev_rgba = np.zeros(width * 4, dtype=np.uint8)
+    baseline = _ByteCounter()
+    default_writer = PNGStreamWriter(baseline, width, height, _COLOR_TYPES["RGBA"], compress_level=6)
+    with open(out_path, "wb") as f:
+        writer = PNGStreamWriter(
+            f,
+            width,
+            height,
+            _COLOR_TYPES[mode],
+            compress_level=_COMPRESS_LEVELS[mode],
+            extra_chunks=_header_chunks(mode, palette, analysis["has_alpha"]),
+        )
+        for pixels in bands:
+            rows = _encode_band(pixels, mode, palette).reshape(pixels.shape[0], -1)
+            writer.write_rows(_filter_rows(rows, prev, bpp, adaptive=mode != "P"))
+            prev = rows[-1]
+            rgba_rows = pixels.reshape(pixels.shape[0], -1)
+            default_writer.write_rows(_filter_rows(rgba_rows, prev_rgba, 4, adaptive=True))
+            prev_rgba = rgba_rows[-1]
+        writer.close()
+        default_writer.close()
+        return f.tell(), baseline.count
+
+
+def render_print_file(
+    image_bytes: bytes,
+    min_size: tuple[int, int] | None,
+    out_path: str,
+    band_rows: int = _BAND_ROWS,
+    remove_background: bool = False,
+) -> dict:
+    """Write a print-ready PNG to out_path, upscaling in bands if below min_size.
+
+    Chooses palette, grayscale or truecolor encoding losslessly (see module
+    docstring). With remove_background, an opaque plain background is keyed
+    out and the artwork trimmed to its bounding box plus margin before the
+    size check, so the trimmed design still meets min_size.
+
+    Returns a dict with width, height, source_width, source_height, upscaled,
+    background (hex color keyed out, or None), trim_box (source-pixel crop, or
+    None), mode, colors (palette size, or None), bytes (size of the written
+    file), default_bytes (size of a default RGBA PNG encode of the same
+    pixels), savings_pct (relative to default_bytes) and
+    within_printful_limits.
+    """
+    img = Image.open(io.BytesIO(image_bytes))
+    src_w, src_h = img.size
+    if img.mode != "RGBA":
+        img = img.convert("RGBA")
+
+    key = None
+    region = None
+    trim_box = None
+    if remove_background:
+        pixels = np.array(img)
+        key = _estimate_background(pixels)
+        alpha = pixels[..., 3]
+        if key is not None:
+            keyable = _background_region(pixels, key)
+            region = _region_image(keyable)
+            alpha = _extract_alpha(pixels, key, keyable)[..., 3]
+        trim_box = _trim_box(alpha)
+        if trim_box is not None and trim_box != (0, 0, src_w, src_h):
+            img = img.crop(trim_box)
+            region = region.crop(trim_box) if region is not None else None
+        else:
+            trim_box = None
+
+    scaled = _scaled_size(img.size[0], img.size[1], min_size)
+    size = scaled or img.size
+
+    if key is None and size == img.size:
+        # Plain crops of the source: cheaper to cut them again than to spool
+        analysis = _analyse(img, size, band_rows, key)
+        mode = _choose_mode(analysis)
+        written, default_bytes = _write_png(_iter_bands(img, size, band_rows), size, out_path, mode, analysis)
+    else:
+        with tempfile.TemporaryFile() as spool:
+            analysis = _analyse(img, size, band_rows, key, region, spool)
+            mode = _choose_mode(analysis)
+            written, default_bytes = _write_png(_spooled_bands(spool, size, band_rows), size, out_path, mode, analysis)
+
+    width, height = size
+    return {
+        "width": width,
+        "height": height,
+        "source_width": src_w,
+        "source_height": src_h,
+        "upscaled": scaled is not None,
+        "background": "#{:02x}{:02x}{:02x}".format(*key.color) if key else None,
+        "trim_box": trim_box,
+        "mode": mode,
+        "colors": len(analysis["palette"]) if mode == "P" else None,
+        "bytes": written,
+        "default_bytes": default_bytes,
+        "savings_pct": round(100 * (1 - written / default_bytes), 1),
+        "within_printful_limits": written <= PRINTFUL_MAX_BYTES,
+    }
@@ -0,0 +1,207 @@
+"""In-memory index of the site's blog posts and product pages.
+
+Holds the slug, title, tags and product type of every file under
+site/src/data/blog/ and site/src/data/products/ so the publish tools can
+refuse slug collisions with a dict lookup and flag near-duplicate titles
+before anything is committed.
+
+The index is refreshed incrementally. From GitHub, the caller passes one
+recursive tree listing; only blobs whose SHA changed are fetched and parsed,
+and an unchanged root tree SHA skips the refresh entirely. From a local
+checkout, files are re-read only when their mtime or size changes.
+"""
+
+import os
+import re
+from collections import defaultdict
+from dataclasses import dataclass, field
+from pathlib import Path
+
+BLOG_DIR = "site/src/data/blog/"
+PRODUCTS_DIR = "site/src/data/products/"
+_KINDS = {BLOG_DIR: "blog", PRODUCTS_DIR: "product"}
+
+_WORD_RE = re.compile(r"[a-z0-9]+")
+# Words that make unrelated titles look alike
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "how", "in",
+    "is", "it", "its", "not", "of", "on", "or", "our", "that", "the", "this", "to",
+    "was", "we", "were", "what", "when", "why", "with", "you", "your",
+}
+
+
+def parse_frontmatter(text: str) -> dict:
+    """Parse the flat YAML frontmatter the site uses (scalars and [a, b] lists)."""
+    if not text.startswith("---"):
+        return {}
+    end = text.find("\n---", 3)
+    if end == -1:
+        return {}
+    meta = {}
+    for line in text[3:end].splitlines():
+        key, sep, value = line.partition(":")
+        if not sep or not key.strip() or line[:1].isspace():
+            continue
+        value = value.strip()
+        if value.startswith("[") and value.endswith("]"):
+            meta[key.strip()] = [
+                v.strip().strip("\"'") for v in value[1:-1].split(",") if v.strip()
+            ]
+        elif len(value) >= 2 and value[0] == value[-1] and value[0] in "\"'":
+            meta[key.strip()] = value[1:-1].replace('\\"', '"')
+        else:
+            meta[key.strip()] = value
+    return meta
+
+
+def strip_frontmatter(text: str) -> str:
+    """The text after a leading frontmatter block (unchanged if there is none)."""
+    if not text.startswith("---"):
+        return text
+    end = text.find("\n---", 3)
+    if end == -1:
+        return text
+    return text[end + 4:].lstrip("\n")
+
+
+def title_tokens(title: str) -> frozenset[str]:
+    """Significant lowercase words of a title, for similarity comparisons."""
+    words = _WORD_RE.findall(title.lower().replace("'", "").replace("\u2019", ""))
+    return frozenset(w for w in words if w not in STOPWORDS)
+
+
+def _kind_and_slug(path: str) -> tuple[str, str] | None:
+    for prefix, kind in _KINDS.items():
+        if path.startswith(prefix) and path.endswith(".md") and "/" not in path[len(prefix):]:
+            return kind, path[len(prefix):-3]
+    return None
+
+
+@dataclass
+class SiteEntry:
+    kind: str  # "blog" or "product"
+    slug: str
+    path: str
+    version: str  # blob SHA (GitHub) or "mtime:size" (local checkout)
+    title: str = ""
+    tags: list[str] = field(default_factory=list)
+    product_type: str | None = None
+    tokens: frozenset[str] = frozenset()
+
+
+class SiteIndex:
+    """Slug and title index over blog posts and product pages."""
+
+    def __init__(self):
+        self.entries: dict[str, SiteEntry] = {}  # path -> entry
+        self._by_slug: dict[tuple[str, str], SiteEntry] = {}
+        self._by_token: dict[str, set[str]] = defaultdict(set)  # token -> paths
+        self.tree_sha: str | None = None
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    # -- Maintenance --
+
+    def _add(self, kind: str, slug: str, path: str, version: str, text: str):
+        self._remove(path)
+        meta = parse_frontmatter(text)
+        title = meta.get("title") or meta.get("name") or ""
+        tags = meta.get("tags") or []
+        entry = SiteEntry(
+            kind=kind,
+            slug=slug,
+            path=path,
+            version=version,
+            title=title,
+            tags=tags if isinstance(tags, list) else [tags],
+            product_type=meta.get("product_type"),
+            tokens=title_tokens(title),
+        )
+        self.entries[path] = entry
+        self._by_slug[(kind, slug)] = entry
+        for token in entry.tokens:
+            self._by_token[token].add(path)
+
+    def _remove(self, path: str):
+        entry = self.entries.pop(path, None)
+        if entry is None:
+            return
+        self._by_slug.pop((entry.kind, entry.slug), None)
+        for token in entry.tokens:
+            self._by_token[token].discard(path)
+
+    def _sync(self, listing: dict[str, str], read) -> int:
+        """Apply a {path: version} listing, reading only new or changed files."""
+        for path in set(self.entries) - set(listing):
+            self._remove(path)
+        changed = 0
+        for path, version in listing.items():
+            current = self.entries.get(path)
+            if current is not None and current.version == version:
+                continue
+            kind, slug = _kind_and_slug(path)
+            self._add(kind, slug, path, version, read(path, version))
+            changed += 1
+        return changed
+
+    def refresh_from_tree(self, tree_sha: str, tree: list[dict], fetch_blob) -> int:
+        """Refresh from a recursive git tree listing; return how many files were (re)read.
+
+        tree is the "tree" array of GET git/trees/<sha>?recursive=1 and
+        fetch_blob(sha) returns a blob's decoded text.
+        """
+        if tree_sha == self.tree_sha:
+            return 0
+        listing = {
+            item["path"]: item["sha"]
+            for item in tree
+            if item.get("type") == "blob" and _kind_and_slug(item["path"])
+        }
+        changed = self._sync(listing, lambda path, sha: fetch_blob(sha))
+        self.tree_sha = tree_sha
+        return changed
+
+    def refresh_from_directory(self, root: str) -> int:
+        """Refresh from a local checkout of the repo; return how many files were (re)read."""
+        root_path = Path(root)
+        listing = {}
+        for prefix in _KINDS:
+            directory = root_path / prefix
+            if not directory.is_dir():
+                continue
+            for item in os.scandir(directory):
+                if item.is_file() and item.name.endswith(".md"):
+                    st = item.stat()
+                    listing[prefix + item.name] = f"{st.st_mtime_ns}:{st.st_size}"
+        self.tree_sha = None
+        return self._sync(listing, lambda path, _: (root_path / path).read_text())
+
+    # -- Queries --
+
+    def get(self, kind: str, slug: str) -> SiteEntry | None:
+        return self._by_slug.get((kind, slug))
+
+    def similar_titles(
+        self, title: str, kind: str | None = None, threshold: float = 0.6, limit: int = 5
+    ) -> list[tuple[SiteEntry, float]]:
+        """Entries whose title shares at least `threshold` of its words (Jaccard) with `title`.
+
+        Only entries sharing a word with the title are scored, via the token index.
+        """
+        tokens = title_tokens(title)
+        if not tokens:
+            return []
+        candidates = set()
+        for token in tokens:
+            candidates |= self._by_token.get(token, set())
+        scored = []
+        for path in candidates:
+            entry = self.entries[path]
+            if kind and entry.kind != kind:
+                continue
+            score = len(tokens & entry.tokens) / len(tokens | entry.tokens)
+            if score >= threshold:
+                scored.append((entry, round(score, 2)))
+        scored.sort(key=lambda pair: (-pair[1], pair[0].slug))
+        return scored[:limit]
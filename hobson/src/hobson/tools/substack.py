@@ -4,89 +4,202 @@ Uses python-substack (reverse-engineered, fragile). All operations include
 fallback behavior: if the Substack API fails, drafts are saved to Obsidian
 and a Telegram alert is sent for manual posting.
 
-Cookies expire periodically and must be refreshed in the .env file.
+One authenticated session is shared by every tool call. It is re-checked
+with a cheap profile request once it has gone SUBSTACK_SESSION_CHECK_MINUTES
+without one, and rebuilt when a call fails with 401/403. Rebuilding signs in
+again with the same SUBSTACK_COOKIES, so it recovers a dropped session but
+not expired cookies. Draft bodies are written as markdown
+and rendered locally (markdown_html.py). Published posts and drafts are
+mirrored in a local index (substack_index.py) that get_substack_posts and the
+topic novelty checks read.
+
+Cookies expire periodically and must be refreshed in the .env file (and the
+agent restarted to load them).
 """
 
 import hashlib
 import logging
+import threading
+import time
 
 from langchain_core.tools import tool
 
 from hobson.config import settings
+from hobson.tools import markdown_html
+from hobson.tools.site_index import strip_frontmatter
+from hobson.tools.substack_index import SubstackIndex
 
 logger = logging.getLogger(__name__)
 
 _PUBLICATION_URL = "https://buildscharacter.substack.com"
+# Seconds before a Substack request is abandoned
+_REQUEST_TIMEOUT = 30
+# Posts per page when listing published posts and drafts
+_PAGE_SIZE = 25
 
+_api = None
+_api_checked_at = 0.0
+_api_lock = threading.Lock()
 
-def _get_api():
-    """Create an authenticated Substack API client.
+_posts_index: SubstackIndex | None = None
+_posts_refreshed_at: float | None = None
+_posts_lock = threading.Lock()
 
-    Returns None if cookies are missing or expired.
+
+class SubstackAuthError(RuntimeError):
+    """No authenticated Substack session: cookies missing or expired."""
+
+
+def _get_api(refresh: bool = False):
+    """The shared authenticated Substack API client.
+
+    Signs in on first use, and again when refresh is set or the periodic
+    session check fails. Returns None if cookies are missing or expired.
     """
+    global _api, _api_checked_at
     if not settings.substack_cookies:
         return None
+    with _api_lock:
+        now = time.monotonic()
+        if _api is not None and not refresh:
+            if now - _api_checked_at < settings.substack_session_check_minutes * 60:
+                return _api
+            try:
+                _api.get_user_profile()
+                _api_checked_at = now
+                return _api
+            except Exception as e:
+                logger.info(f"Substack session check failed, signing in again: {e}")
+        _api = None
+        try:
+            from substack import Api
+
+            _api = Api(
+                cookies_string=settings.substack_cookies,
+                publication_url=_PUBLICATION_URL,
+                timeout=_REQUEST_TIMEOUT,
+            )
+            _api_checked_at = now
+        except Exception as e:
+            logger.warning(f"Substack auth failed: {e}")
+        return _api
+
+
+def _is_auth_error(e: Exception) -> bool:
+    return getattr(e, "status_code", None) in (401, 403)
+
+
+def _call(action):
+    """Run action(api) on the shared session, signing in again once if it has expired."""
+    api = _get_api()
+    if api is None:
+        raise SubstackAuthError("Substack cookies missing or expired")
     try:
-        from substack import Api
+        return action(api)
+    except Exception as e:
+        if not _is_auth_error(e):
+            raise
+        logger.info(f"Substack session expired ({e}), signing in again")
+    api = _get_api(refresh=True)
+    if api is None:
+        raise SubstackAuthError("Substack cookies expired")
+    return action(api)
+
+
+def _published_page(api, offset: int, limit: int) -> list[dict]:
+    page = api.get_published_posts(offset=offset, limit=limit)
+    return page.get("posts", []) if isinstance(page, dict) else page or []
+
+
+def _drafts_page(api, offset: int, limit: int) -> list[dict]:
+    return api.get_drafts(offset=offset, limit=limit) or []
+
 
-        return Api(
-            cookies_string=settings.substack_cookies,
-            publication_url=_PUBLICATION_URL,
+def posts_index() -> SubstackIndex:
+    global _posts_index
+    if _posts_index is None:
+        _posts_index = SubstackIndex.load(settings.substack_index_path)
+    return _posts_index
+
+
+def refresh_posts_index(force: bool = False, full: bool = False) -> SubstackIndex:
+    """The posts index, refreshed first if SUBSTACK_INDEX_REFRESH_MINUTES have passed.
+
+    force refreshes regardless; full pages through every published post. If
+    Substack cannot be reached the index is returned as last synced.
+    """
+    global _posts_refreshed_at
+    with _posts_lock:
+        index = posts_index()
+        stale = (
+            _posts_refreshed_at is None
+            or time.monotonic() - _posts_refreshed_at >= settings.substack_index_refresh_minutes * 60
         )
-    except Exception as e:
-        logger.warning(f"Substack auth failed: {e}")
-        return None
+        if not (force or full or stale):
+            return index
+        try:
+            changed = _call(lambda api: index.refresh(
+                lambda offset, limit: _published_page(api, offset, limit),
+                lambda offset, limit: _drafts_page(api, offset, limit),
+                page_size=_PAGE_SIZE,
+                full=full,
+            ))
+        except Exception as e:
+            logger.warning(f"Substack posts index not refreshed: {e}")
+            return index
+        _posts_refreshed_at = time.monotonic()
+        if changed or full:
+            index.save(settings.substack_index_path)
+        return index
+
+
+def _mark_posts_stale():
+    """Refresh the posts index on next use (after creating or publishing a post)."""
+    global _posts_refreshed_at
+    _posts_refreshed_at = None
 
 
 @tool
-def create_substack_draft(title: str, body_html: str, subtitle: str = "") -> str:
+def create_substack_draft(title: str, body_markdown: str, subtitle: str = "") -> str:
     """Create a draft post on Substack.
 
     The draft is NOT published automatically. Use publish_substack_draft
     after review, or send a Telegram notification for the owner to review
     and publish manually.
 
-    IMPORTANT: body must be HTML, not markdown. Convert markdown to HTML
-    before calling this tool. Use <p> tags for paragraphs, <h2>/<h3> for
-    headings, <ul>/<li> for lists, <strong>/<em> for emphasis.
+    Pass the body as markdown, exactly as saved in Obsidian; frontmatter is
+    dropped and the rest rendered to HTML here. Do not convert it yourself. Supported: paragraphs, ## and
+    ### headings, bulleted and numbered lists, **bold**, *italic*, links,
+    images, blockquotes and horizontal rules.
 
     If Substack auth fails, the draft content is returned with instructions
     to save it to Obsidian instead.
 
     Args:
         title: Newsletter edition title.
-        body_html: Full HTML body of the newsletter.
+        body_markdown: Full markdown body of the newsletter.
         subtitle: Optional subtitle/preview text.
     """
-    # Generate content hash for signing
-    content_hash = hashlib.sha256(body_html.encode()).hexdigest()[:16]
+    # Sign the markdown body without frontmatter: the frontmatter records this
+    # hash, so a hash over the whole file could never match its own record
+    body = strip_frontmatter(body_markdown)
+    content_hash = hashlib.sha256(body.encode()).hexdigest()[:16]
 
-    # Append signature to body
+    # Render, then append signature to body
     signed_body = (
-        f"{body_html}"
+        f"{markdown_html.render(body)}"
         f"<hr>"
         f"<p><em>source-sha256: {content_hash}</em></p>"
     )
 
-    api = _get_api()
-    if api is None:
-        return (
-            f"SUBSTACK AUTH FAILED. Save this draft to Obsidian at "
-            f"'98 - Hobson Builds Character/Content/Substack/Drafts/' and "
-            f"alert the owner via Telegram for manual posting.\n\n"
-            f"Title: {title}\n"
-            f"Subtitle: {subtitle}\n"
-            f"Content hash: {content_hash}\n"
-            f"Body length: {len(body_html)} chars"
-        )
+    draft_body = {"title": title, "body": signed_body, "type": "newsletter"}
+    if subtitle:
+        draft_body["subtitle"] = subtitle
 
     try:
-        draft_body = {"title": title, "body": signed_body, "type": "newsletter"}
-        if subtitle:
-            draft_body["subtitle"] = subtitle
-
-        result = api.post_draft(draft_body)
+        result = _call(lambda api: api.post_draft(draft_body))
         draft_id = result.get("id", "unknown")
+        _mark_posts_stale()
 
         return (
             f"Draft created on Substack: ID {draft_id}\n"
@@ -94,6 +207,16 @@ def create_substack_draft(title: str, body_html: str, subtitle: str = "") -> str
             f"Content hash: {content_hash}\n"
             f"Status: draft (not published). Review at {_PUBLICATION_URL}/publish/post/{draft_id}"
         )
+    except SubstackAuthError:
+        return (
+            f"SUBSTACK AUTH FAILED. Save this draft to Obsidian at "
+            f"'98 - Hobson Builds Character/Content/Substack/Drafts/' and "
+            f"alert the owner via Telegram for manual posting.\n\n"
+            f"Title: {title}\n"
+            f"Subtitle: {subtitle}\n"
+            f"Content hash: {content_hash}\n"
+            f"Body length: {len(body)} chars"
+        )
     except Exception as e:
         return (
             f"SUBSTACK API ERROR: {e}\n"
@@ -113,16 +236,15 @@ def publish_substack_draft(draft_id: str) -> str:
     Args:
         draft_id: The draft ID from create_substack_draft.
     """
-    api = _get_api()
-    if api is None:
+    try:
+        _call(lambda api: api.publish_draft(draft_id, send=True))
+        _mark_posts_stale()
+        return f"Published draft {draft_id}. Newsletter sent to all subscribers."
+    except SubstackAuthError:
         return (
             "SUBSTACK AUTH FAILED. Cannot publish. "
             "Alert the owner via Telegram to publish manually."
         )
-
-    try:
-        api.publish_draft(draft_id, send=True)
-        return f"Published draft {draft_id}. Newsletter sent to all subscribers."
     except Exception as e:
         return (
             f"SUBSTACK PUBLISH ERROR: {e}\n"
@@ -131,34 +253,32 @@ def publish_substack_draft(draft_id: str) -> str:
 
 
 @tool
-def get_substack_posts(limit: int = 10) -> str:
-    """List recently published Substack posts.
+def get_substack_posts(limit: int = 10, include_drafts: bool = False) -> str:
+    """List recently published Substack posts (and optionally drafts).
 
     Use this to check what's already been published and avoid duplicate
-    topics in the weekly edition.
+    topics in the weekly edition. Reads a local index that is refreshed
+    from Substack at most every few minutes.
 
     Args:
         limit: Number of posts to return (default 10).
+        include_drafts: Also list unpublished drafts on Substack.
     """
-    api = _get_api()
-    if api is None:
+    index = refresh_posts_index()
+    if index.synced_at is None:
         return (
             "SUBSTACK AUTH FAILED. Cannot retrieve posts. "
             "Check if cookies need refreshing."
         )
 
-    try:
-        posts = api.get_published_posts(limit=limit)
-        if not posts:
-            return "No published posts yet."
-
-        lines = [f"Last {min(limit, len(posts))} published posts:"]
-        for p in posts[:limit]:
-            title = p.get("title", "Untitled")
-            slug = p.get("slug", "")
-            pub_date = p.get("post_date", "")[:10]
-            lines.append(f"  - [{pub_date}] {title} ({_PUBLICATION_URL}/p/{slug})")
-
-        return "\n".join(lines)
-    except Exception as e:
-        return f"SUBSTACK API ERROR: {e}. Cookies may need refreshing."
+    posts = index.posts("published")[:limit]
+    lines = [f"Last {len(posts)} published posts:"] if posts else ["No published posts yet."]
+    for p in posts:
+        lines.append(f"  - [{p.date[:10]}] {p.title} ({_PUBLICATION_URL}/p/{p.slug})")
+    if include_drafts:
+        drafts = index.posts("draft")[:limit]
+        lines.append(f"{len(drafts)} draft(s) on Substack:" if drafts else "No drafts on Substack.")
+        for p in drafts:
+            lines.append(f"  - [edited {p.date[:10]}] {p.title} (ID {p.id})")
+
+    return "\n".join(lines)
@@ -0,0 +1,162 @@
+"""Local index of Substack posts: published editions and drafts.
+
+Listing published posts is a paged API call through a session that keeps
+expiring, and both the weekly dispatch and the topic novelty checks want the
+whole list. The index keeps each post's title, date and plain-text opening
+on disk, and refreshes incrementally:
+
+- Published posts are listed newest first, and paging stops at the first
+  page that reaches the newest post already indexed. A full refresh pages
+  through everything and drops posts that are no longer published.
+- Drafts are few and change in place, so each refresh replaces them from one
+  listing.
+"""
+
+import html
+import json
+import os
+import re
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+
+_TAG_RE = re.compile(r"<[^>]+>")
+_SPACE_RE = re.compile(r"\s+")
+# Plain text kept per post: enough for topic checks, which read the opening
+_TEXT_CHARS = 4000
+
+
+@dataclass
+class SubstackPost:
+    id: str
+    title: str
+    subtitle: str
+    slug: str
+    status: str  # "published" or "draft"
+    date: str  # ISO post date, or last edit for drafts
+    text: str  # subtitle, description and opening of the body as plain text
+
+
+def post_from_api(raw: dict, status: str) -> SubstackPost:
+    """A post or draft as returned by the Substack API, reduced to what the index keeps."""
+    text = " ".join(
+        html.unescape(_TAG_RE.sub(" ", str(raw.get(field) or "")))
+        for field in ("subtitle", "description", "truncated_body_text", "body_html", "draft_body")
+        if raw.get(field)
+    )
+    if status == "published":
+        date = raw.get("post_date") or ""
+    else:
+        date = raw.get("draft_updated_at") or raw.get("draft_created_at") or ""
+    return SubstackPost(
+        id=str(raw.get("id") or raw.get("slug")),
+        title=raw.get("title") or raw.get("draft_title") or "Untitled",
+        subtitle=raw.get("subtitle") or raw.get("draft_subtitle") or "",
+        slug=raw.get("slug") or "",
+        status=status,
+        date=str(date),
+        text=_SPACE_RE.sub(" ", text).strip()[:_TEXT_CHARS],
+    )
+
+
+class SubstackIndex:
+    """Published posts and drafts, refreshed incrementally by post date."""
+
+    def __init__(self):
+        self._posts: dict[str, SubstackPost] = {}
+        self.synced_at: float | None = None  # wall-clock time of the last refresh
+
+    def __len__(self) -> int:
+        return len(self._posts)
+
+    def posts(self, status: str | None = None) -> list[SubstackPost]:
+        """Indexed posts (optionally only "published" or "draft"), newest first."""
+        found = [post for post in self._posts.values() if status is None or post.status == status]
+        return sorted(found, key=lambda post: (post.date, post.id), reverse=True)
+
+    def newest(self) -> str | None:
+        """Date of the newest published post, or None if there are none."""
+        dates = [post.date for post in self._posts.values() if post.status == "published" and post.date]
+        return max(dates, default=None)
+
+    def _put(self, post: SubstackPost) -> bool:
+        if self._posts.get(post.id) == post:
+            return False
+        self._posts[post.id] = post
+        return True
+
+    def refresh(self, fetch_published, fetch_drafts=None, page_size: int = 25, full: bool = False) -> int:
+        """Bring the index up to date; return how many posts were added or changed.
+
+        fetch_published(offset, limit) returns a page of published posts,
+        newest first; fetch_drafts(offset, limit) a page of the current
+        drafts. Drafts are always listed in full, since any indexed draft
+        missing from the listing is dropped.
+        """
+        newest = None if full else self.newest()
+        published: dict[str, SubstackPost] = {}
+        offset = 0
+        while True:
+            page = [post_from_api(raw, "published") for raw in fetch_published(offset, page_size)]
+            published.update((post.id, post) for post in page)
+            if len(page) < page_size:
+                break
+            if newest is not None and any(post.date <= newest for post in page):
+                break
+            offset += len(page)
+
+        changed = sum(self._put(post) for post in published.values())
+        if full:
+            for post in self.posts("published"):
+                if post.id not in published:
+                    del self._posts[post.id]
+                    changed += 1
+
+        if fetch_drafts is not None:
+            drafts = {}
+            listed = set()
+            offset = 0
+            while True:
+                page = [(raw, post_from_api(raw, "draft")) for raw in fetch_drafts(offset, page_size)]
+                new = [(raw, post) for raw, post in page if post.id not in listed]
+                for raw, post in new:
+                    listed.add(post.id)
+                    # The drafts listing can include posts that have since gone out
+                    if not raw.get("is_published") and post.id not in published:
+                        drafts[post.id] = post
+                # A short page ends the listing; so does one with nothing new,
+                # in case the offset is ignored
+                if len(page) < page_size or not new:
+                    break
+                offset += len(page)
+            for post in self.posts("draft"):
+                if post.id not in drafts:
+                    del self._posts[post.id]
+                    changed += 1
+            changed += sum(self._put(post) for post in drafts.values())
+
+        self.synced_at = time.time()
+        return changed
+
+    # -- Persistence --
+
+    def save(self, path: str):
+        data = {"synced_at": self.synced_at, "posts": [asdict(post) for post in self._posts.values()]}
+        target = Path(path)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        tmp = target.with_suffix(target.suffix + ".tmp")
+        tmp.write_text(json.dumps(data))
+        os.replace(tmp, target)
+
+    @classmethod
+    def load(cls, path: str) -> "SubstackIndex":
+        """Load a saved index; an empty one if the file is missing or unreadable."""
+        index = cls()
+        try:
+            data = json.loads(Path(path).read_text())
+            posts = [SubstackPost(**post) for post in data.get("posts", [])]
+        except (OSError, ValueError, TypeError):
+            return index
+        index._posts = {post.id: post for post in posts}
+        index.synced_at = data.get("synced_at")
+        return index
@@ -1,13 +1,12 @@
 """Telegram bot: bidirectional messaging, approvals, and standing order learning."""
 
+import asyncio
+import hashlib
 import logging
 import traceback
 import uuid
-from typing import Optional
-from urllib.parse import quote
+from typing import Annotated, Optional
 
-import httpx
-import telegram.error
 from telegram import Bot, InlineKeyboardButton, InlineKeyboardMarkup, Update
 from telegram.ext import (
     Application,
@@ -16,17 +15,20 @@ from telegram.ext import (
     MessageHandler,
     filters,
 )
-from langchain_core.tools import tool
+from langchain_core.runnables import RunnableConfig
+from langchain_core.tools import InjectedToolCallId, tool
+from langgraph.types import interrupt
 
 from hobson.config import settings
 from hobson.db import HobsonDB
+from hobson.tools.obsidian import vault
+from hobson.tools.telegram_outbox import TG_MAX_LEN, Outbox
+from hobson.tools.telegram_stream import StreamingReply, stream_agent
 
 logger = logging.getLogger(__name__)
 
-_TG_MAX_LEN = 4096
 
-
-def _chunk_text(text: str, max_len: int = _TG_MAX_LEN) -> list[str]:
+def _chunk_text(text: str, max_len: int = TG_MAX_LEN) -> list[str]:
     """Split text into chunks that fit within Telegram's message limit."""
     if len(text) <= max_len:
         return [text]
@@ -48,6 +50,7 @@ _app: Optional[Application] = None
 _agent = None
 _db: Optional[HobsonDB] = None
 _processing_chats: set[str] = set()
+_outbox: Outbox | None = None
 
 STANDING_ORDERS_PATH = "98 - Hobson Builds Character/Operations/Standing Orders.md"
 
@@ -70,6 +73,21 @@ def init_telegram(agent, db: HobsonDB) -> Application:
     return _app
 
 
+def _get_outbox() -> Outbox:
+    """Return the send queue for the running event loop, on the shared bot.
+
+    Uses the Application's bot once init_telegram() has run; processes without
+    the Application (e.g. the design worker) get one Bot for the loop instead
+    of one per message.
+    """
+    global _outbox
+    loop = asyncio.get_running_loop()
+    if _outbox is None or _outbox.loop is not loop:
+        bot = _app.bot if _app is not None else Bot(token=settings.telegram_bot_token)
+        _outbox = Outbox(bot)
+    return _outbox
+
+
 def _format_history(messages: list[dict]) -> str:
     """Format recent messages as conversation context."""
     lines = []
@@ -80,17 +98,11 @@ def _format_history(messages: list[dict]) -> str:
 
 
 async def _load_standing_orders() -> str:
-    """Load standing orders from Obsidian (async-safe via httpx)."""
-    url = f"https://{settings.obsidian_host}:{settings.obsidian_port}/vault/{quote(STANDING_ORDERS_PATH)}"
-    headers = {
-        "Authorization": f"Bearer {settings.obsidian_api_key}",
-        "Accept": "text/markdown",
-    }
+    """Load standing orders from Obsidian (cached by the shared vault client)."""
     try:
-        async with httpx.AsyncClient(timeout=10, verify=False) as client:
-            resp = await client.get(url, headers=headers)
-            if resp.status_code == 200:
-                return resp.text
+        text = await asyncio.to_thread(vault().read, STANDING_ORDERS_PATH)
+        if text is not None:
+            return text
     except Exception:
         pass
     return "(Standing orders not available)"
@@ -116,6 +128,7 @@ async def _handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
     if chat_id in _processing_chats:
         return
     _processing_chats.add(chat_id)
+    reply: StreamingReply | None = None
 
     try:
         # Store incoming message
@@ -138,11 +151,16 @@ async def _handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
             "the proposed text. Do NOT write directly to Standing Orders without confirmation."
         )
 
-        # Invoke agent
-        result = await _agent.ainvoke(
-            {"messages": [{"role": "user", "content": conversation_prompt}]},
-            config={"configurable": {"thread_id": f"telegram-{chat_id}"}},
-        )
+        # Invoke agent, streaming progress into a placeholder reply if enabled
+        inputs = {"messages": [{"role": "user", "content": conversation_prompt}]}
+        config = {"configurable": {"thread_id": f"telegram-{chat_id}"}}
+        outbox = _get_outbox()
+        if settings.telegram_streaming:
+            reply = StreamingReply(outbox, chat_id, min_interval=settings.telegram_stream_edit_interval)
+            await reply.start()
+            result = await stream_agent(_agent, inputs, config, reply)
+        else:
+            result = await _agent.ainvoke(inputs, config=config)
 
         # Extract response text from agent output
         response_text = _extract_response(result)
@@ -150,12 +168,13 @@ async def _handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
         # Store and send response
         _db.store_message(chat_id, "Hobson", response_text, is_from_hobson=True)
 
-        # S4: Chunk long messages, Markdown fallback on BadRequest
-        for chunk in _chunk_text(response_text):
-            try:
-                await update.message.reply_text(chunk, parse_mode="Markdown")
-            except telegram.error.BadRequest:
-                await update.message.reply_text(chunk)
+        # S4: Chunk long messages; the outbox paces them and falls back to plain text
+        chunks = _chunk_text(response_text)
+        if reply is not None:
+            await reply.finish(chunks)
+        else:
+            for chunk in chunks:
+                await outbox.send(chat_id, chunk)
 
         # Log the conversation turn
         logger.info(f"Telegram conversation: {sender_name} -> Hobson in chat {chat_id}")
@@ -164,7 +183,10 @@ async def _handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
         error_msg = f"Something went wrong. Check the logs.\n`{type(e).__name__}`"
         logger.error(f"Telegram handler error: {e}\n{traceback.format_exc()}")
         try:
-            await update.message.reply_text(error_msg)
+            if reply is not None and reply.message_id is not None:
+                await reply.finish([error_msg])
+            else:
+                await update.message.reply_text(error_msg)
         except Exception:
             pass
     finally:
@@ -196,12 +218,21 @@ async def _handle_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
     if action in ("approve", "deny"):
         approved = action == "approve"
-        _db.resolve_approval(request_id, approved)
+        record = _db.resolve_approval(request_id, approved)
+        if record is None:
+            # Double tap, or the request already expired
+            status = (_db.get_approval_status(request_id) or "unknown").upper()
+            await query.edit_message_text(
+                text=f"{query.message.text}\n\n*Already resolved: {status}*",
+                parse_mode="Markdown",
+            )
+            return
         status = "APPROVED" if approved else "DENIED"
         await query.edit_message_text(
             text=f"{query.message.text}\n\n*Status: {status}*",
             parse_mode="Markdown",
         )
+        # A workflow paused on this request resumes via the approval.resolved event
         logger.info(f"Approval {request_id}: {status}")
 
     elif action == "confirm_order":
@@ -211,20 +242,9 @@ async def _handle_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
         if record:
             proposed_text = record["action"]
-            url = f"https://{settings.obsidian_host}:{settings.obsidian_port}/vault/{quote(STANDING_ORDERS_PATH)}"
-            headers = {
-                "Authorization": f"Bearer {settings.obsidian_api_key}",
-                "Content-Type": "text/markdown",
-            }
             # I2: Error handling around Obsidian POST (append)
             try:
-                async with httpx.AsyncClient(timeout=10, verify=False) as client:
-                    resp = await client.post(
-                        url,
-                        content=f"\n- {proposed_text}",
-                        headers=headers,
-                    )
-                    resp.raise_for_status()
+                await asyncio.to_thread(vault().append, STANDING_ORDERS_PATH, f"\n- {proposed_text}")
             except Exception as e:
                 logger.error(f"Failed to write standing order to Obsidian: {e}")
                 await query.edit_message_text(
@@ -257,13 +277,9 @@ async def send_message(text: str) -> str:
     Args:
         text: Message text (supports Telegram markdown)
     """
-    bot = Bot(token=settings.telegram_bot_token)
+    outbox = _get_outbox()
     for chunk in _chunk_text(text):
-        await bot.send_message(
-            chat_id=settings.telegram_chat_id,
-            text=chunk,
-            parse_mode="Markdown",
-        )
+        await outbox.send(settings.telegram_chat_id, chunk, coalesce=True)
     return "Message sent to Telegram"
 
 
@@ -276,47 +292,80 @@ async def send_alert(title: str, details: str) -> str:
         details: Alert details
     """
     text = f"*{title}*\n\n{details}"
-    bot = Bot(token=settings.telegram_bot_token)
-    await bot.send_message(
-        chat_id=settings.telegram_chat_id,
-        text=text,
-        parse_mode="Markdown",
-    )
+    await _get_outbox().send(settings.telegram_chat_id, text, coalesce=True)
     return f"Alert sent: {title}"
 
 
+def _approval_request_id(thread_id: str, tool_call_id: str) -> str:
+    """Stable id for an approval tool call.
+
+    A resumed run re-executes the interrupted tool call from the top, so the
+    id must come out the same on every execution.
+    """
+    return hashlib.sha256(f"{thread_id}:{tool_call_id}".encode()).hexdigest()[:12]
+
+
+def _approval_outcome(request_id: str, action: str, status: str) -> str:
+    if status == "approved":
+        return f"Approval {request_id} APPROVED. Proceed with: {action}"
+    if status == "expired":
+        return (
+            f"Approval {request_id} EXPIRED after {settings.approval_timeout_hours:g}h "
+            "with no response. Do not proceed with this action."
+        )
+    return f"Approval {request_id} DENIED. Do not proceed with this action."
+
+
 @tool
-async def send_approval_request(action: str, reasoning: str, estimated_cost: float = 0.0) -> str:
+async def send_approval_request(
+    action: str,
+    reasoning: str,
+    estimated_cost: float = 0.0,
+    tool_call_id: Annotated[str, InjectedToolCallId] = "",
+    config: RunnableConfig = None,
+) -> str:
     """Send an approval request with Approve/Deny buttons.
 
+    In scheduled workflows this pauses the run until the owner answers and
+    returns the decision (APPROVED, DENIED or EXPIRED).
+
     Args:
         action: What Hobson wants to do
         reasoning: Why this action is recommended
         estimated_cost: Estimated cost in USD (0.0 if free)
     """
-    request_id = uuid.uuid4().hex[:12]
+    configurable = (config or {}).get("configurable", {})
+    thread_id = configurable.get("thread_id", "")
+    resumable = bool(configurable.get("resumable_approvals"))
+    request_id = _approval_request_id(thread_id, tool_call_id) if tool_call_id else uuid.uuid4().hex[:12]
 
+    created = True
     if _db:
-        _db.create_approval(request_id, action, reasoning, estimated_cost)
+        created = _db.create_approval(
+            request_id, action, reasoning, estimated_cost,
+            thread_id=thread_id if resumable else None,
+        )
 
-    cost_line = f"\n*Cost:* ${estimated_cost:.2f}" if estimated_cost > 0 else ""
-    text = f"*Approval Request* `{request_id}`\n\n*Action:* {action}\n*Reasoning:* {reasoning}{cost_line}"
+    # On resume the request already exists and was already sent
+    if created:
+        cost_line = f"\n*Cost:* ${estimated_cost:.2f}" if estimated_cost > 0 else ""
+        text = f"*Approval Request* `{request_id}`\n\n*Action:* {action}\n*Reasoning:* {reasoning}{cost_line}"
 
-    keyboard = InlineKeyboardMarkup([
-        [
-            InlineKeyboardButton("Approve", callback_data=f"approve:{request_id}"),
-            InlineKeyboardButton("Deny", callback_data=f"deny:{request_id}"),
-        ]
-    ])
+        keyboard = InlineKeyboardMarkup([
+            [
+                InlineKeyboardButton("Approve", callback_data=f"approve:{request_id}"),
+                InlineKeyboardButton("Deny", callback_data=f"deny:{request_id}"),
+            ]
+        ])
 
-    bot = Bot(token=settings.telegram_bot_token)
-    await bot.send_message(
-        chat_id=settings.telegram_chat_id,
-        text=text,
-        parse_mode="Markdown",
-        reply_markup=keyboard,
-    )
-    return f"Approval request sent (ID: {request_id}). Waiting for response."
+        await _get_outbox().send(settings.telegram_chat_id, text, reply_markup=keyboard)
+
+    if not resumable:
+        return f"Approval request sent (ID: {request_id}). Waiting for response."
+
+    # Pause here; the approval.resolved event resumes the run with the decision
+    decision = interrupt({"request_id": request_id, "action": action})
+    return _approval_outcome(request_id, action, decision.get("status", "denied"))
 
 
 @tool
@@ -345,13 +394,7 @@ async def send_standing_order_proposal(category: str, proposed_text: str) -> str
         ]
     ])
 
-    bot = Bot(token=settings.telegram_bot_token)
-    await bot.send_message(
-        chat_id=settings.telegram_chat_id,
-        text=text,
-        parse_mode="Markdown",
-        reply_markup=keyboard,
-    )
+    await _get_outbox().send(settings.telegram_chat_id, text, reply_markup=keyboard)
     return f"Standing order proposal sent (ID: {request_id}). Waiting for confirmation."
 
 
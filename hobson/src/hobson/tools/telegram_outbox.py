@@ -0,0 +1,256 @@
+"""Outbound Telegram send queue with rate limiting and coalescing.
+
+Every message Hobson sends goes through one Outbox per event loop, on the
+shared Bot instance. A single sender task drains the queue in order:
+
+- Token buckets cap the global send rate and the per-chat rate (Telegram
+  allows roughly 30 messages/s overall and 20 messages/minute in a group).
+- RetryAfter (flood control) pauses all sending for the requested time and
+  then retries the same message.
+- Consecutive plain notifications for the same chat that pile up while the
+  sender waits for a token are merged into one message (up to Telegram's
+  4096-character limit). Messages with buttons are never merged.
+- Message edits share the same buckets. A queued edit is dropped when a
+  newer edit of the same message is queued behind it, so a fast-changing
+  message (a streamed reply) only ever sends its latest text.
+- A Markdown parse error falls back to sending the text unformatted.
+"""
+
+import asyncio
+import logging
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import timedelta
+
+import telegram.error
+
+logger = logging.getLogger(__name__)
+
+TG_MAX_LEN = 4096
+_COALESCE_SEPARATOR = "\n\n"
+_MAX_RETRY_AFTER_ATTEMPTS = 5
+
+
+class TokenBucket:
+    """Classic token bucket: `rate` tokens/second, holding at most `capacity`."""
+
+    def __init__(self, rate: float, capacity: float, clock=time.monotonic):
+        self.rate = rate
+        self.capacity = capacity
+        self._clock = clock
+        self._tokens = capacity
+        self._updated = clock()
+
+    def _refill(self):
+        now = self._clock()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def delay(self) -> float:
+        """Seconds until a token is available (0 if one is available now)."""
+        self._refill()
+        return 0.0 if self._tokens >= 1 else (1 - self._tokens) / self.rate
+
+    def take(self):
+        self._refill()
+        self._tokens -= 1
+
+
+@dataclass
+class _Pending:
+    chat_id: str
+    text: str
+    parse_mode: str | None
+    reply_markup: object | None
+    coalesce: bool
+    futures: list[asyncio.Future] = field(default_factory=list)
+    message_id: int | None = None  # set for edits of an existing message
+
+
+class Outbox:
+    """Rate-limited, coalescing send queue bound to the running event loop."""
+
+    def __init__(
+        self,
+        bot,
+        global_rate: float = 25.0,
+        chat_rate: float = 20 / 60,
+        chat_burst: float = 5,
+        clock=time.monotonic,
+    ):
+        self.bot = bot
+        self.loop = asyncio.get_running_loop()
+        self._clock = clock
+        self._global = TokenBucket(global_rate, max(global_rate, 1), clock)
+        self._chat_rate = chat_rate
+        self._chat_burst = chat_burst
+        self._chats: dict[str, TokenBucket] = {}
+        self._queue: deque[_Pending] = deque()
+        self._wakeup = asyncio.Event()
+        self._paused_until = 0.0
+        self._task: asyncio.Task | None = None
+        self.stats = {"sent": 0, "coalesced": 0, "superseded": 0, "retry_after": 0}
+
+    async def send(
+        self,
+        chat_id: str,
+        text: str,
+        parse_mode: str | None = "Markdown",
+        reply_markup=None,
+        coalesce: bool = False,
+    ):
+        """Queue a message and wait until it is delivered; returns the sent Message."""
+        return await self._enqueue(_Pending(
+            chat_id=str(chat_id),
+            text=text,
+            parse_mode=parse_mode,
+            reply_markup=reply_markup,
+            coalesce=coalesce and reply_markup is None,
+        ))
+
+    async def edit(
+        self,
+        chat_id: str,
+        message_id: int,
+        text: str,
+        parse_mode: str | None = "Markdown",
+        reply_markup=None,
+    ):
+        """Queue an edit of a sent message; returns the edited Message (None if unchanged)."""
+        return await self._enqueue(_Pending(
+            chat_id=str(chat_id),
+            text=text,
+            parse_mode=parse_mode,
+            reply_markup=reply_markup,
+            coalesce=False,
+            message_id=message_id,
+        ))
+
+    async def _enqueue(self, item: _Pending):
+        future = self.loop.create_future()
+        item.futures.append(future)
+        self._queue.append(item)
+        if self._task is None or self._task.done():
+            self._task = self.loop.create_task(self._run())
+        self._wakeup.set()
+        return await future
+
+    def _chat_bucket(self, chat_id: str) -> TokenBucket:
+        if chat_id not in self._chats:
+            self._chats[chat_id] = TokenBucket(self._chat_rate, self._chat_burst, self._clock)
+        return self._chats[chat_id]
+
+    async def _wait_until_ready(self, chat_id: str):
+        """Sleep until both buckets have a token for this chat and no pause is active."""
+        chat = self._chat_bucket(chat_id)
+        while True:
+            delay = max(
+                self._paused_until - self._clock(),
+                self._global.delay(),
+                chat.delay(),
+            )
+            if delay <= 0:
+                return
+            await asyncio.sleep(delay)
+
+    def _next_batch(self) -> _Pending | None:
+        """Pop the head of the queue, merging contiguous coalescible followers into it.
+
+        Returns None when the head is an edit superseded by a later queued edit
+        of the same message; its waiters are handed to that later edit.
+        """
+        item = self._queue.popleft()
+        if item.message_id is not None:
+            for later in self._queue:
+                if later.message_id == item.message_id and later.chat_id == item.chat_id:
+                    later.futures = item.futures + later.futures
+                    self.stats["superseded"] += 1
+                    return None
+            return item
+        if not item.coalesce:
+            return item
+        while self._queue:
+            nxt = self._queue[0]
+            merged_len = len(item.text) + len(_COALESCE_SEPARATOR) + len(nxt.text)
+            if (
+                not nxt.coalesce
+                or nxt.message_id is not None
+                or nxt.chat_id != item.chat_id
+                or nxt.parse_mode != item.parse_mode
+                or merged_len > TG_MAX_LEN
+            ):
+                break
+            self._queue.popleft()
+            item = _Pending(
+                chat_id=item.chat_id,
+                text=item.text + _COALESCE_SEPARATOR + nxt.text,
+                parse_mode=item.parse_mode,
+                reply_markup=None,
+                coalesce=True,
+                futures=item.futures + nxt.futures,
+            )
+            self.stats["coalesced"] += 1
+        return item
+
+    async def _deliver(self, item: _Pending):
+        parse_mode = item.parse_mode
+        for _ in range(_MAX_RETRY_AFTER_ATTEMPTS):
+            await self._wait_until_ready(item.chat_id)
+            self._global.take()
+            self._chat_bucket(item.chat_id).take()
+            try:
+                if item.message_id is not None:
+                    return await self.bot.edit_message_text(
+                        chat_id=item.chat_id,
+                        message_id=item.message_id,
+                        text=item.text,
+                        parse_mode=parse_mode,
+                        reply_markup=item.reply_markup,
+                    )
+                return await self.bot.send_message(
+                    chat_id=item.chat_id,
+                    text=item.text,
+                    parse_mode=parse_mode,
+                    reply_markup=item.reply_markup,
+                )
+            except telegram.error.RetryAfter as e:
+                wait = e.retry_after
+                if isinstance(wait, timedelta):
+                    wait = wait.total_seconds()
+                self.stats["retry_after"] += 1
+                logger.warning("Telegram flood control: pausing sends for %.0fs", wait)
+                self._paused_until = self._clock() + float(wait)
+            except telegram.error.BadRequest as e:
+                if item.message_id is not None and "not modified" in str(e).lower():
+                    return None
+                if parse_mode is None:
+                    raise
+                # Usually unbalanced Markdown entities; send as plain text instead
+                parse_mode = None
+        raise RuntimeError(f"Telegram send failed after {_MAX_RETRY_AFTER_ATTEMPTS} flood-control retries")
+
+    async def _run(self):
+        while True:
+            if not self._queue:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+            # Wait for a token before picking the batch, so anything queued
+            # meanwhile can still be coalesced into it
+            await self._wait_until_ready(self._queue[0].chat_id)
+            item = self._next_batch()
+            if item is None:
+                continue
+            try:
+                message = await self._deliver(item)
+            except Exception as e:
+                logger.error("Telegram send to %s failed: %s", item.chat_id, e)
+                for future in item.futures:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            self.stats["sent"] += 1
+            for future in item.futures:
+                if not future.done():
+                    future.set_result(message)
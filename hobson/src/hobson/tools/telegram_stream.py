@@ -0,0 +1,160 @@
+"""Streamed Telegram replies: one placeholder message edited as the agent runs.
+
+A conversation turn with tool calls can take tens of seconds. Instead of
+staying silent until the agent finishes, the reply is posted as a placeholder
+straight away and then edited in place:
+
+- one progress line per tool call ("Running x..." then "Ran x"),
+- the answer text as the model streams it,
+- and finally the complete response, with Markdown, once the run is done.
+
+Edits go through the Outbox, so they share the chat's rate limit. On top of
+that a single flusher task edits at most once per `min_interval` and always
+sends the latest state, never a backlog of intermediate ones. In-progress
+edits are sent as plain text because a half-streamed reply usually has
+unbalanced Markdown.
+
+stream_agent() drives a StreamingReply from a LangGraph agent's astream().
+"""
+
+import asyncio
+import logging
+
+from langchain_core.messages import AIMessageChunk, ToolMessage
+
+from hobson.tools.telegram_outbox import TG_MAX_LEN, Outbox
+
+logger = logging.getLogger(__name__)
+
+PLACEHOLDER = "Working on it..."
+
+
+def message_text(content) -> str:
+    """Text of a LangChain message content (a string or a list of content parts)."""
+    if isinstance(content, str):
+        return content
+    parts = []
+    for part in content or []:
+        if isinstance(part, str):
+            parts.append(part)
+        elif isinstance(part, dict) and part.get("type") == "text":
+            parts.append(part.get("text", ""))
+    return "".join(parts)
+
+
+class StreamingReply:
+    """A reply message that shows tool progress and streamed text while the agent runs."""
+
+    def __init__(self, outbox: Outbox, chat_id: str, min_interval: float = 2.0):
+        self.outbox = outbox
+        self.chat_id = str(chat_id)
+        self.min_interval = min_interval
+        self.message_id: int | None = None
+        self._progress: list[str] = []
+        self._running: dict[str, int] = {}  # tool call id -> index in _progress
+        self._text = ""
+        self._shown = PLACEHOLDER
+        self._dirty = asyncio.Event()
+        self._flusher: asyncio.Task | None = None
+
+    async def start(self):
+        """Post the placeholder and start the edit loop."""
+        message = await self.outbox.send(self.chat_id, PLACEHOLDER, parse_mode=None)
+        self.message_id = message.message_id
+        self._flusher = asyncio.create_task(self._flush_loop())
+
+    # -- Events from the agent stream --
+
+    def tool_started(self, call_id: str, name: str):
+        if call_id in self._running:
+            return
+        self._running[call_id] = len(self._progress)
+        self._progress.append(f"Running {name}...")
+        # Text streamed before a tool call is preamble, not the answer
+        self._text = ""
+        self._dirty.set()
+
+    def tool_finished(self, call_id: str, name: str):
+        index = self._running.pop(call_id, None)
+        if index is not None:
+            self._progress[index] = f"Ran {name}"
+            self._dirty.set()
+
+    def add_text(self, text: str):
+        if text:
+            self._text += text
+            self._dirty.set()
+
+    # -- Rendering --
+
+    def render(self) -> str:
+        """Current in-progress view: progress lines, then the tail of the streamed text."""
+        body = "\n".join(self._progress)
+        if self._text:
+            body = f"{body}\n\n{self._text}" if body else self._text
+        body = body or PLACEHOLDER
+        if len(body) > TG_MAX_LEN:
+            body = "..." + body[-(TG_MAX_LEN - 3):]
+        return body
+
+    async def _flush_loop(self):
+        while True:
+            await self._dirty.wait()
+            self._dirty.clear()
+            text = self.render()
+            if text != self._shown:
+                try:
+                    await self.outbox.edit(self.chat_id, self.message_id, text, parse_mode=None)
+                    self._shown = text
+                except Exception as e:
+                    # Progress is best effort; the final edit still delivers the answer
+                    logger.warning("Streaming edit failed: %s", e)
+            await asyncio.sleep(self.min_interval)
+
+    async def _stop(self):
+        if self._flusher is not None:
+            self._flusher.cancel()
+            try:
+                await self._flusher
+            except asyncio.CancelledError:
+                pass
+            self._flusher = None
+
+    async def finish(self, chunks: list[str]):
+        """Replace the placeholder with the final response, sending overflow chunks after it."""
+        await self._stop()
+        first, rest = chunks[0], chunks[1:]
+        try:
+            await self.outbox.edit(self.chat_id, self.message_id, first)
+        except Exception as e:
+            logger.warning("Final edit failed, sending as a new message: %s", e)
+            await self.outbox.send(self.chat_id, first)
+        for chunk in rest:
+            await self.outbox.send(self.chat_id, chunk)
+
+
+async def stream_agent(agent, inputs: dict, config: dict, reply: StreamingReply) -> dict:
+    """Run the agent with astream(), feeding progress into `reply`; return the final state.
+
+    "messages" mode carries the model's tokens, "updates" mode the complete
+    tool calls and tool results per node, and "values" mode the full state,
+    the last of which is the same result ainvoke() would return.
+    """
+    final = {}
+    async for mode, chunk in agent.astream(inputs, config=config, stream_mode=["messages", "updates", "values"]):
+        if mode == "messages":
+            msg, metadata = chunk
+            if isinstance(msg, AIMessageChunk) and metadata.get("langgraph_node") == "agent":
+                reply.add_text(message_text(msg.content))
+        elif mode == "updates":
+            for update in chunk.values():
+                if not isinstance(update, dict):
+                    continue
+                for msg in update.get("messages", []):
+                    if isinstance(msg, ToolMessage):
+                        reply.tool_finished(msg.tool_call_id, msg.name or "tool")
+                    for call in getattr(msg, "tool_calls", None) or []:
+                        reply.tool_started(call["id"], call["name"])
+        else:
+            final = chunk
+    return final
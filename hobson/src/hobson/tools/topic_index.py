@@ -0,0 +1,255 @@
+"""MinHash/LSH index of past topics: blog posts, design concepts, Substack editions.
+
+Each document is reduced to a set of shingles (the first `lead_words`
+significant words, lightly stemmed) and then to a MinHash signature of
+`num_perm` values, whose agreement rate with another signature estimates the
+Jaccard similarity of the two sets. Signatures are split into bands of `rows`
+values, and a query only scores documents that share at least one band with
+it.
+
+Tuned for topic checks in a corpus with one theme, where a rewrite of an
+existing post scores only around 0.1 against it and its neighbours a little
+lower:
+
+- Words rather than word pairs, which score several times lower still.
+- Only the lead of each text (title and opening), so a two-line pitch and a
+  finished post are compared on similar-sized sets. The same cap applies to
+  both sides.
+- Single-row bands: any shared minimum makes a candidate, which keeps
+  matches down to a Jaccard of about 0.02. The price is that banding barely
+  filters: in a one-theme corpus nearly every document shares a word with the
+  query, so a query is in effect a scan of every signature, skipping only
+  documents with no words in common. That is cheap at this corpus size
+  (hundreds of documents); use more rows per band if it grows enough for
+  banding to need to prune.
+
+Copies and near-copies score close to 1.
+
+Signatures, not texts, are persisted (as JSON), and each document keeps the
+version it was built from so a resync only rehashes what changed.
+"""
+
+import hashlib
+import json
+import os
+import re
+import threading
+from collections import defaultdict
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+
+from hobson.tools.site_index import STOPWORDS
+
+_WORD_RE = re.compile(r"[a-z0-9]+")
+# Permutations are (a*x + b) mod p over 32-bit shingle hashes, as in datasketch.
+# a must span the whole field for the result to look random; the product then
+# wraps modulo 2^64 in uint64 arithmetic, which only mixes it further.
+_PRIME = (1 << 61) - 1
+
+
+_SUFFIXES = ("ing", "ed", "s", "ly")
+
+
+def _stem(word: str) -> str:
+    for suffix in _SUFFIXES:
+        if word.endswith(suffix) and len(word) - len(suffix) >= 3:
+            return word[: -len(suffix)]
+    return word
+
+
+def shingles(text: str, lead_words: int | None = None) -> set[str]:
+    """Significant lowercase words of the text (the first lead_words), suffixes stripped."""
+    words = [
+        _stem(w) for w in _WORD_RE.findall(text.lower().replace("'", "").replace("’", ""))
+        if w not in STOPWORDS and len(w) > 2
+    ]
+    return set(words[:lead_words])
+
+
+@dataclass
+class TopicMatch:
+    doc_id: str
+    kind: str
+    title: str
+    score: float  # estimated Jaccard similarity
+
+
+@dataclass
+class _Doc:
+    kind: str
+    title: str
+    version: str | None
+    signature: np.ndarray
+
+
+class TopicIndex:
+    """Near-duplicate lookup over MinHash signatures, with candidates found by banding.
+
+    Safe to query from one thread while another syncs.
+    """
+
+    def __init__(self, num_perm: int = 256, bands: int = 256, seed: int = 1, lead_words: int = 60):
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.seed = seed
+        self.lead_words = lead_words
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(1, _PRIME, num_perm, dtype=np.uint64)
+        self._b = rng.integers(0, _PRIME, num_perm, dtype=np.uint64)
+        self._docs: dict[str, _Doc] = {}
+        self._buckets: dict[tuple[int, bytes], set[str]] = defaultdict(set)
+        # Guards _docs and _buckets; reentrant because add() calls remove()
+        self._lock = threading.RLock()
+
+    def __len__(self) -> int:
+        return len(self._docs)
+
+    def signature(self, text: str) -> np.ndarray | None:
+        """MinHash signature of the text, or None if it has no significant words."""
+        items = shingles(text, self.lead_words)
+        if not items:
+            return None
+        hashes = np.fromiter(
+            (int.from_bytes(hashlib.blake2b(s.encode(), digest_size=4).digest(), "little") for s in items),
+            dtype=np.uint64,
+            count=len(items),
+        )
+        return ((np.outer(hashes, self._a) + self._b) % np.uint64(_PRIME)).min(axis=0)
+
+    def _band_keys(self, signature: np.ndarray):
+        for band in range(self.bands):
+            yield band, signature[band * self.rows: (band + 1) * self.rows].tobytes()
+
+    # -- Maintenance --
+
+    def version(self, doc_id: str) -> str | None:
+        with self._lock:
+            doc = self._docs.get(doc_id)
+        return doc.version if doc else None
+
+    def ids(self, kind: str) -> set[str]:
+        with self._lock:
+            return {doc_id for doc_id, doc in self._docs.items() if doc.kind == kind}
+
+    def add(self, doc_id: str, kind: str, title: str, text: str, version: str | None = None) -> bool:
+        """Index (or re-index) a document; False if it has no significant words."""
+        signature = self.signature(f"{title}\n{text}")
+        with self._lock:
+            self.remove(doc_id)
+            if signature is None:
+                return False
+            self._docs[doc_id] = _Doc(kind, title, version, signature)
+            for key in self._band_keys(signature):
+                self._buckets[key].add(doc_id)
+        return True
+
+    def remove(self, doc_id: str):
+        with self._lock:
+            doc = self._docs.pop(doc_id, None)
+            if doc is None:
+                return
+            for key in self._band_keys(doc.signature):
+                bucket = self._buckets.get(key)
+                if bucket is not None:
+                    bucket.discard(doc_id)
+                    if not bucket:
+                        del self._buckets[key]
+
+    def sync(
+        self, kind: str, items: dict[str, tuple[str, str | None, object]], prune: bool = True, scope: str = ""
+    ) -> int:
+        """Make the documents of `kind` match `items`; return how many were (re)indexed.
+
+        items maps doc_id -> (title, version, load) where load() returns the
+        text. load is only called for new documents and changed versions.
+        With prune, documents of this kind whose id starts with `scope` and
+        that are missing from items are removed; pass prune=False when items
+        is only part of the source (e.g. the latest page of posts).
+        """
+        if prune:
+            for doc_id in self.ids(kind) - set(items):
+                if doc_id.startswith(scope):
+                    self.remove(doc_id)
+        changed = 0
+        for doc_id, (title, version, load) in items.items():
+            # Texts are loaded outside the lock so queries are not held up
+            if version is not None and self.version(doc_id) == version:
+                continue
+            self.add(doc_id, kind, title, load(), version)
+            changed += 1
+        return changed
+
+    # -- Queries --
+
+    def query(
+        self, text: str, k: int = 5, kinds: list[str] | None = None, min_score: float = 0.02
+    ) -> list[TopicMatch]:
+        """Up to k indexed documents most similar to `text`, best first."""
+        signature = self.signature(text)
+        if signature is None:
+            return []
+        with self._lock:
+            candidates = set()
+            for key in self._band_keys(signature):
+                candidates |= self._buckets.get(key, set())
+            docs = [(doc_id, self._docs[doc_id]) for doc_id in candidates]
+        matches = []
+        for doc_id, doc in docs:
+            if kinds and doc.kind not in kinds:
+                continue
+            score = float(np.mean(doc.signature == signature))
+            if score >= min_score:
+                matches.append(TopicMatch(doc_id, doc.kind, doc.title, round(score, 2)))
+        matches.sort(key=lambda m: (-m.score, m.doc_id))
+        return matches[:k]
+
+    # -- Persistence --
+
+    def save(self, path: str):
+        with self._lock:
+            docs = dict(self._docs)
+        data = {
+            "num_perm": self.num_perm,
+            "bands": self.bands,
+            "seed": self.seed,
+            "lead_words": self.lead_words,
+            "docs": {
+                doc_id: {
+                    "kind": doc.kind,
+                    "title": doc.title,
+                    "version": doc.version,
+                    "signature": doc.signature.tolist(),
+                }
+                for doc_id, doc in docs.items()
+            },
+        }
+        target = Path(path)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        tmp = target.with_suffix(target.suffix + ".tmp")
+        tmp.write_text(json.dumps(data))
+        os.replace(tmp, target)
+
+    @classmethod
+    def load(
+        cls, path: str, num_perm: int = 256, bands: int = 256, seed: int = 1, lead_words: int = 60
+    ) -> "TopicIndex":
+        """Load a saved index; an empty one if the file is missing, unreadable or built differently."""
+        index = cls(num_perm, bands, seed, lead_words)
+        try:
+            data = json.loads(Path(path).read_text())
+        except (OSError, ValueError):
+            return index
+        built_with = (data.get("num_perm"), data.get("bands"), data.get("seed"), data.get("lead_words"))
+        if built_with != (num_perm, bands, seed, lead_words):
+            return index
+        for doc_id, doc in data.get("docs", {}).items():
+            signature = np.array(doc["signature"], dtype=np.uint64)
+            index._docs[doc_id] = _Doc(doc["kind"], doc["title"], doc["version"], signature)
+            for key in index._band_keys(signature):
+                index._buckets[key].add(doc_id)
+        return index
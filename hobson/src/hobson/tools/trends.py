@@ -0,0 +1,154 @@
+"""Trend and anomaly calculations over daily traffic series.
+
+Everything works on NumPy arrays of daily values (oldest first, one entry per
+day, zeros for days without traffic), so the numbers the briefing and review
+quote are computed here rather than by the model from pasted tables:
+
+- rolling means,
+- period-over-period deltas (this week vs last, last 28 days vs the 28
+  before),
+- anomaly scores for each recent day against the days before it: the classic
+  z-score and a robust score from the median and MAD, which a single earlier
+  spike cannot inflate the way it inflates a standard deviation,
+- per-key growth between two windows (pages, referrers).
+"""
+
+from dataclasses import dataclass
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+# Scale the MAD, or failing that the mean absolute deviation, to estimate the
+# standard deviation of normally distributed data
+_MAD_SCALE = 1.4826
+_MEAN_AD_SCALE = 1.2533
+
+
+def rolling_mean(values: np.ndarray, window: int) -> np.ndarray:
+    """Mean of each trailing `window` days; NaN until a full window is available."""
+    values = np.asarray(values, dtype=float)
+    out = np.full(values.shape, np.nan)
+    if len(values) >= window:
+        out[window - 1:] = sliding_window_view(values, window).mean(axis=1)
+    return out
+
+
+def pct_change(current: float, previous: float) -> float | None:
+    """Relative change from previous to current, or None when previous is zero."""
+    if not previous:
+        return None
+    return (current - previous) / previous
+
+
+@dataclass
+class PeriodDelta:
+    current: float
+    previous: float
+    change: float | None  # relative, e.g. -0.06 for -6%
+
+
+def period_delta(values: np.ndarray, window: int) -> PeriodDelta | None:
+    """Sum of the last `window` days vs the `window` days before; None without enough data."""
+    values = np.asarray(values, dtype=float)
+    if len(values) < 2 * window:
+        return None
+    current = float(values[-window:].sum())
+    previous = float(values[-2 * window:-window].sum())
+    return PeriodDelta(current, previous, pct_change(current, previous))
+
+
+@dataclass
+class Anomaly:
+    index: int  # position in the series
+    value: float
+    expected: float  # median of the baseline
+    z: float
+    robust_z: float
+
+    @property
+    def direction(self) -> str:
+        return "spike" if self.value > self.expected else "drop"
+
+
+def anomaly_scores(
+    values: np.ndarray, baseline: int = 28, min_scale: float = 1.0
+) -> tuple[np.ndarray, np.ndarray]:
+    """z and robust (median/MAD) z of each day against the `baseline` days before it.
+
+    Both arrays have the series' length, NaN for days without a full baseline.
+    When more than half the baseline is one value the MAD is 0, and the
+    robust score falls back to the mean absolute deviation from the median.
+    Both scales are floored at min_scale (one visit, for daily counts), so a
+    flat or sparse baseline gives finite scores and a one-visit wobble on a
+    steady 12 a day is not an anomaly.
+    """
+    values = np.asarray(values, dtype=float)
+    z = np.full(values.shape, np.nan)
+    robust = np.full(values.shape, np.nan)
+    if len(values) <= baseline:
+        return z, robust
+    windows = sliding_window_view(values[:-1], baseline)  # windows[i] precedes day i + baseline
+    target = values[baseline:]
+    deviation = target - windows.mean(axis=1)
+    std = windows.std(axis=1, ddof=1)
+    median = np.median(windows, axis=1)
+    spread = np.abs(windows - median[:, None])
+    mad = np.median(spread, axis=1) * _MAD_SCALE
+    robust_scale = np.where(mad > 0, mad, spread.mean(axis=1) * _MEAN_AD_SCALE)
+    z[baseline:] = deviation / np.maximum(std, min_scale)
+    robust[baseline:] = (target - median) / np.maximum(robust_scale, min_scale)
+    return z, robust
+
+
+def anomalies(
+    values: np.ndarray,
+    baseline: int = 28,
+    recent: int = 7,
+    z_threshold: float = 3.0,
+    robust_threshold: float = 3.5,
+) -> list[Anomaly]:
+    """Days among the last `recent` whose z or robust z passes its threshold."""
+    values = np.asarray(values, dtype=float)
+    z, robust = anomaly_scores(values, baseline)
+    flagged = (np.abs(z) >= z_threshold) | (np.abs(robust) >= robust_threshold)
+    flagged[: max(len(values) - recent, 0)] = False
+    found = []
+    for i in np.flatnonzero(flagged):
+        expected = float(np.median(values[i - baseline:i]))
+        found.append(Anomaly(int(i), float(values[i]), expected, float(z[i]), float(robust[i])))
+    return found
+
+
+@dataclass
+class Growth:
+    key: str
+    current: float
+    previous: float
+    change: float | None  # None for keys new in the current window
+
+
+def growth(
+    current: dict[str, float], previous: dict[str, float], min_total: float = 5, limit: int = 3
+) -> tuple[list[Growth], list[Growth], list[Growth]]:
+    """(rising, falling, new) keys between two windows, biggest movers first.
+
+    Keys with fewer than `min_total` hits across both windows are ignored.
+    """
+    keys = sorted(set(current) | set(previous))
+    cur = np.array([current.get(k, 0) for k in keys], dtype=float)
+    prev = np.array([previous.get(k, 0) for k in keys], dtype=float)
+    delta = cur - prev
+    keep = (cur + prev) >= min_total
+
+    def ranked(mask: np.ndarray, order: np.ndarray) -> list[int]:
+        idx = np.flatnonzero(mask)
+        return idx[np.argsort(order[idx], kind="stable")][:limit].tolist()
+
+    def item(i: int) -> Growth:
+        change = delta[i] / prev[i] if prev[i] else None
+        return Growth(keys[i], float(cur[i]), float(prev[i]), None if change is None else float(change))
+
+    rising = ranked(keep & (prev > 0) & (delta > 0), -delta)
+    falling = ranked(keep & (delta < 0), delta)
+    new = ranked(keep & (prev == 0), -cur)
+    return [item(i) for i in rising], [item(i) for i in falling], [item(i) for i in new]
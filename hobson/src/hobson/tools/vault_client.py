@@ -0,0 +1,222 @@
+"""Shared client for the Obsidian Local REST API.
+
+One keep-alive httpx.Client serves every vault call instead of a new client
+(and TLS handshake) per tool invocation. On top of it:
+
+- Appends to the same note that arrive within `coalesce_window` seconds of
+  each other are sent as one POST (group commit). Agent tools run in worker
+  threads, so parallel tool calls in one step land in the same window. Every
+  caller waits for the combined request and sees its result or error.
+- Notes are cached on read for `cache_ttl` seconds. Our own writes and
+  appends to a note invalidate its entry; the TTL bounds staleness from
+  edits made in Obsidian itself.
+- `on_change(path)`, if given, is called after every write or append, so a
+  local index of the vault can mark the note for re-reading.
+- Each request's latency is recorded per operation; metrics() summarises
+  counts, errors, p50/p95/max (over the last 500 requests) and the cache
+  and coalescing counters.
+"""
+
+import logging
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+_LATENCY_SAMPLES = 500
+
+
+@dataclass
+class _AppendBatch:
+    parts: list[str] = field(default_factory=list)
+    done: threading.Event = field(default_factory=threading.Event)
+    error: Exception | None = None
+
+
+def _percentile(samples: list[float], pct: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, round(pct / 100 * (len(ordered) - 1)))]
+
+
+class VaultClient:
+    """Keep-alive Obsidian REST client with append coalescing, note cache and metrics."""
+
+    def __init__(
+        self,
+        base_url: str,
+        api_key: str,
+        coalesce_window: float = 0.2,
+        cache_ttl: float = 120.0,
+        max_cache_entries: int = 256,
+        timeout: float = 30,
+        transport: httpx.BaseTransport | None = None,
+        clock=time.monotonic,
+        on_change=None,
+    ):
+        self._http = httpx.Client(
+            base_url=base_url,
+            headers={"Authorization": f"Bearer {api_key}"},
+            timeout=timeout,
+            verify=False,  # the plugin serves a self-signed certificate
+            transport=transport,
+        )
+        self.coalesce_window = coalesce_window
+        self.cache_ttl = cache_ttl
+        self.max_cache_entries = max_cache_entries
+        self._clock = clock
+        self._on_change = on_change
+        self._lock = threading.Lock()
+        self._cache: dict[str, tuple[float, str]] = {}  # path -> (fetched at, text)
+        self._pending: dict[str, _AppendBatch] = {}
+        self._latency: dict[str, deque] = {}
+        self._counters = {"cache_hits": 0, "cache_misses": 0, "appends": 0, "append_requests": 0}
+        self._requests: dict[str, int] = {}
+        self._errors: dict[str, int] = {}
+
+    # -- Transport --
+
+    def _request(self, op: str, method: str, path: str, **kwargs) -> httpx.Response:
+        start = self._clock()
+        try:
+            resp = self._http.request(method, f"/vault/{path}", **kwargs)
+        except httpx.HTTPError:
+            self._record(op, start, error=True)
+            raise
+        self._record(op, start, error=resp.status_code >= 400 and resp.status_code != 404)
+        return resp
+
+    def _record(self, op: str, start: float, error: bool):
+        elapsed_ms = (self._clock() - start) * 1000
+        with self._lock:
+            self._latency.setdefault(op, deque(maxlen=_LATENCY_SAMPLES)).append(elapsed_ms)
+            self._requests[op] = self._requests.get(op, 0) + 1
+            if error:
+                self._errors[op] = self._errors.get(op, 0) + 1
+
+    # -- Cache --
+
+    def _cached(self, path: str) -> str | None:
+        with self._lock:
+            entry = self._cache.get(path)
+            if entry and self._clock() - entry[0] < self.cache_ttl:
+                self._counters["cache_hits"] += 1
+                return entry[1]
+            self._counters["cache_misses"] += 1
+            return None
+
+    def _store(self, path: str, text: str):
+        with self._lock:
+            self._cache.pop(path, None)
+            self._cache[path] = (self._clock(), text)
+            while len(self._cache) > self.max_cache_entries:
+                self._cache.pop(next(iter(self._cache)))
+
+    def invalidate(self, path: str):
+        with self._lock:
+            self._cache.pop(path, None)
+
+    def _changed(self, path: str):
+        self.invalidate(path)
+        if self._on_change is not None:
+            try:
+                self._on_change(path)
+            except Exception:
+                logger.exception("Vault on_change hook failed for %s", path)
+
+    # -- Operations --
+
+    def read(self, path: str) -> str | None:
+        """Note content as markdown, or None if the note does not exist."""
+        self._flush_pending(path)
+        cached = self._cached(path)
+        if cached is not None:
+            return cached
+        resp = self._request("read", "GET", path, headers={"Accept": "text/markdown"})
+        if resp.status_code == 404:
+            return None
+        resp.raise_for_status()
+        self._store(path, resp.text)
+        return resp.text
+
+    def write(self, path: str, content: str):
+        """Create or overwrite a note."""
+        self._flush_pending(path)
+        try:
+            resp = self._request("write", "PUT", path, content=content, headers={"Content-Type": "text/markdown"})
+            resp.raise_for_status()
+        finally:
+            self._changed(path)
+
+    def append(self, path: str, content: str):
+        """Append to a note (creating it if missing), coalescing with concurrent appends."""
+        with self._lock:
+            self._counters["appends"] += 1
+            batch = self._pending.get(path)
+            leader = batch is None
+            if leader:
+                batch = self._pending[path] = _AppendBatch()
+            batch.parts.append(content)
+        if leader:
+            if self.coalesce_window > 0:
+                # Ends early if a reader or writer flushes the batch first
+                batch.done.wait(self.coalesce_window)
+            self._send_batch(path, batch)
+        batch.done.wait()
+        if batch.error is not None:
+            raise batch.error
+
+    def _send_batch(self, path: str, batch: _AppendBatch):
+        with self._lock:
+            if self._pending.get(path) is not batch:
+                return  # already sent by a reader or writer that needed it flushed
+            del self._pending[path]
+            self._counters["append_requests"] += 1
+        try:
+            resp = self._request(
+                "append", "POST", path, content="".join(batch.parts), headers={"Content-Type": "text/markdown"}
+            )
+            resp.raise_for_status()
+        except Exception as e:
+            batch.error = e
+        finally:
+            self._changed(path)
+            batch.done.set()
+
+    def _flush_pending(self, path: str):
+        """Send any appends waiting in the window so a read or write sees them."""
+        with self._lock:
+            batch = self._pending.get(path)
+        if batch is not None:
+            self._send_batch(path, batch)
+            batch.done.wait()
+
+    def list_folder(self, path: str) -> str | None:
+        """Raw JSON listing of a folder, or None if it does not exist."""
+        resp = self._request("list", "GET", f"{path.rstrip('/')}/")
+        if resp.status_code == 404:
+            return None
+        resp.raise_for_status()
+        return resp.text
+
+    # -- Metrics --
+
+    def metrics(self) -> dict:
+        with self._lock:
+            ops = {}
+            for op, samples in self._latency.items():
+                values = list(samples)
+                ops[op] = {
+                    "count": self._requests[op],
+                    "errors": self._errors.get(op, 0),
+                    "p50_ms": round(_percentile(values, 50), 1),
+                    "p95_ms": round(_percentile(values, 95), 1),
+                    "max_ms": round(max(values), 1),
+                }
+            return {"operations": ops, **self._counters, "cached_notes": len(self._cache)}
+
+    def close(self):
+        self._http.close()
@@ -0,0 +1,233 @@
+"""Local full-text index over the Obsidian vault folders Hobson works in.
+
+Notes are stored in a SQLite FTS5 table (porter-stemmed, title weighted over
+body), so "have we done something like this before?" is one local query
+returning ranked snippets instead of a folder listing, a read_note per file
+and every note's text in the prompt.
+
+The index is persisted to disk and refreshed incrementally:
+
+- From a local copy of the vault, files are re-read only when their mtime or
+  size changes.
+- Over the REST API, which lists names but not modification times, new notes
+  are read when they first appear in a listing, notes Hobson itself wrote are
+  marked dirty by the vault client and re-read on the next refresh, and every
+  other note is re-checked once `recheck_after` seconds have passed.
+
+Either way a note whose content hash is unchanged is not re-indexed.
+"""
+
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+from hobson.tools.site_index import parse_frontmatter, strip_frontmatter
+
+_WORD_RE = re.compile(r"\w+")
+_HEADING_RE = re.compile(r"^#\s+(.+)$", re.MULTILINE)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS notes (
+    id INTEGER PRIMARY KEY,
+    path TEXT NOT NULL UNIQUE,
+    version TEXT,
+    hash TEXT NOT NULL,
+    checked_at REAL NOT NULL
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS notes_fts USING fts5(
+    path UNINDEXED, title, body, tokenize = 'porter unicode61'
+);
+"""
+
+
+@dataclass
+class SearchHit:
+    path: str
+    title: str
+    snippet: str
+    score: float
+
+
+def _split_note(path: str, text: str) -> tuple[str, str]:
+    """(title, body) of a note: frontmatter title, else first H1, else file name."""
+    meta = parse_frontmatter(text)
+    body = strip_frontmatter(text)
+    heading = _HEADING_RE.search(body)
+    title = meta.get("title") or (heading.group(1).strip() if heading else "") or Path(path).stem
+    if isinstance(title, list):
+        title = " ".join(title)
+    return title, body.strip()
+
+
+def _fts_query(text: str) -> str:
+    """Free text as an FTS5 query: any of the words, each quoted so punctuation is inert."""
+    return " OR ".join(f'"{word}"' for word in _WORD_RE.findall(text.lower()))
+
+
+class VaultIndex:
+    """Incrementally refreshed FTS5 index of vault notes."""
+
+    def __init__(self, db_path: str = ":memory:", recheck_after: float = 86400.0, clock=time.time):
+        if db_path != ":memory:":
+            Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(db_path, check_same_thread=False)
+        self._db.executescript(_SCHEMA)
+        self.recheck_after = recheck_after
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._dirty: set[str] = set()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM notes").fetchone()[0]
+
+    def close(self):
+        self._db.close()
+
+    # -- Maintenance --
+
+    def mark_dirty(self, path: str):
+        """Re-read this note on the next sync (called when Hobson writes to it)."""
+        if path.endswith(".md"):
+            with self._lock:
+                self._dirty.add(path)
+
+    def _put(self, path: str, version: str | None, digest: str, text: str):
+        title, body = _split_note(path, text)
+        now = self._clock()
+        with self._lock, self._db:
+            row = self._db.execute("SELECT id FROM notes WHERE path = ?", (path,)).fetchone()
+            if row is None:
+                note_id = self._db.execute(
+                    "INSERT INTO notes (path, version, hash, checked_at) VALUES (?, ?, ?, ?)",
+                    (path, version, digest, now),
+                ).lastrowid
+            else:
+                note_id = row[0]
+                self._db.execute(
+                    "UPDATE notes SET version = ?, hash = ?, checked_at = ? WHERE id = ?",
+                    (version, digest, now, note_id),
+                )
+                self._db.execute("DELETE FROM notes_fts WHERE rowid = ?", (note_id,))
+            self._db.execute(
+                "INSERT INTO notes_fts (rowid, path, title, body) VALUES (?, ?, ?, ?)",
+                (note_id, path, title, body),
+            )
+
+    def _remove(self, path: str):
+        with self._lock, self._db:
+            row = self._db.execute("SELECT id FROM notes WHERE path = ?", (path,)).fetchone()
+            if row is not None:
+                self._db.execute("DELETE FROM notes_fts WHERE rowid = ?", (row[0],))
+                self._db.execute("DELETE FROM notes WHERE id = ?", (row[0],))
+
+    def sync(self, listing: dict[str, str | None] | None, read, prefixes: tuple[str, ...] = ()) -> int:
+        """Bring the index up to date; return how many notes were (re)indexed.
+
+        listing maps every note path under `prefixes` to a cheap version string
+        (e.g. "mtime:size"), or to None when the source has none. Indexed notes
+        under `prefixes` missing from it are dropped. With listing=None only
+        dirty notes are re-read. read(path) returns the text, or None if the
+        note is gone.
+        """
+        with self._lock:
+            known = {
+                path: (version, digest, checked_at)
+                for path, version, digest, checked_at in self._db.execute(
+                    "SELECT path, version, hash, checked_at FROM notes"
+                )
+            }
+            dirty, self._dirty = self._dirty, set()
+
+        if listing is None:
+            # Only notes we wrote; those outside the indexed folders stay out
+            candidates = {path: None for path in dirty if path in known or path.startswith(prefixes)}
+        else:
+            for path in known:
+                if path.startswith(prefixes) and path not in listing:
+                    self._remove(path)
+            candidates = listing
+
+        now = self._clock()
+        changed = 0
+        for path, version in candidates.items():
+            current = known.get(path)
+            if current is not None and path not in dirty:
+                if version is not None and current[0] == version:
+                    continue
+                if version is None and now - current[2] < self.recheck_after:
+                    continue
+            text = read(path)
+            if text is None:
+                self._remove(path)
+                continue
+            digest = hashlib.sha256(text.encode()).hexdigest()
+            if current is not None and current[1] == digest:
+                with self._lock, self._db:
+                    self._db.execute(
+                        "UPDATE notes SET version = ?, checked_at = ? WHERE path = ?", (version, now, path)
+                    )
+                continue
+            self._put(path, version, digest, text)
+            changed += 1
+        return changed
+
+    def refresh_from_directory(self, root: str, folders: list[str]) -> int:
+        """Refresh from a local copy of the vault; return how many notes were (re)indexed."""
+        root_path = Path(root)
+        listing = {}
+        for folder in folders:
+            for dirpath, _, filenames in os.walk(root_path / folder):
+                for name in filenames:
+                    if name.endswith(".md"):
+                        full = Path(dirpath) / name
+                        st = full.stat()
+                        listing[full.relative_to(root_path).as_posix()] = f"{st.st_mtime_ns}:{st.st_size}"
+
+        def read(path: str) -> str | None:
+            try:
+                return (root_path / path).read_text()
+            except FileNotFoundError:
+                return None
+
+        prefixes = tuple(f"{folder.rstrip('/')}/" for folder in folders)
+        return self.sync(listing, read, prefixes)
+
+    # -- Queries --
+
+    def documents(self, prefix: str = "") -> list[tuple[str, str, str, str]]:
+        """(path, content hash, title, body) of every indexed note under `prefix`."""
+        escaped = prefix.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        with self._lock:
+            return self._db.execute(
+                "SELECT notes.path, notes.hash, notes_fts.title, notes_fts.body"
+                " FROM notes JOIN notes_fts ON notes_fts.rowid = notes.id"
+                " WHERE notes.path LIKE ? ESCAPE '\\' ORDER BY notes.path",
+                (f"{escaped}%",),
+            ).fetchall()
+
+    def search(self, query: str, k: int = 5, folder: str = "") -> list[SearchHit]:
+        """Top-k notes matching any word of `query`, best first, optionally under `folder`."""
+        match = _fts_query(query)
+        if not match:
+            return []
+        sql = (
+            "SELECT path, title, snippet(notes_fts, 2, '**', '**', ' ... ', 24), bm25(notes_fts, 0.0, 5.0, 1.0) AS rank"
+            " FROM notes_fts WHERE notes_fts MATCH ?"
+        )
+        params: list = [match]
+        if folder:
+            sql += " AND path LIKE ? ESCAPE '\\'"
+            escaped = folder.rstrip("/").replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+            params.append(f"{escaped}/%")
+        sql += " ORDER BY rank LIMIT ?"
+        params.append(k)
+        with self._lock:
+            rows = self._db.execute(sql, params).fetchall()
+        # bm25() is lower-is-better; report higher-is-better
+        return [SearchHit(path, title, snippet, round(-rank, 2)) for path, title, snippet, rank in rows]
@@ -6,15 +6,28 @@ feeds into the weekly Substack dispatch (the right platform for AI operational
 transparency). Blog posts should only contain human-experience content.
 """
 
+from hobson.tools.obsidian import read_daily_log, read_note
+from hobson.tools.printful import list_store_products
+from hobson.workflows.prefetch import Prefetch
+
+BOOTSTRAP_DIARY_PREFETCH = [
+    Prefetch("Daily log, today", read_daily_log, {"days": 1}),
+    Prefetch("Content calendar", read_note, {"path": "98 - Hobson Builds Character/Content/Blog/Content Calendar.md"}),
+    Prefetch("Store products", list_store_products),
+]
+
 BOOTSTRAP_DIARY_PROMPT = """Write today's Bootstrap Diary entry. Follow these steps:
 
-1. **Gather today's data.** Read the daily log at
-   '98 - Hobson Builds Character/Operations/Daily Log.md' to see what
-   happened today. Check what workflows ran, what was published, any errors.
+The Prefetched Data above already holds today's daily log, the content
+calendar and the store products. Work from it; do not repeat those calls.
+
+1. **Gather today's data.** Today's daily log entries (read_daily_log with
+   days=1) show what happened today. Check what workflows ran, what was
+   published, any errors.
 
-2. **Count current progress.** Check the content calendar at
-   '98 - Hobson Builds Character/Content/Blog/Content Calendar.md' to count
-   published posts. Use list_store_products to count products in the store.
+2. **Count current progress.** Count published posts in the content calendar
+   at '98 - Hobson Builds Character/Content/Blog/Content Calendar.md' and
+   products in the store (list_store_products).
 
 3. **Write the diary entry.** This is a short (300-500 words), raw operational
    summary written in first person as Hobson. Format:
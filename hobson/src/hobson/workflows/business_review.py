@@ -5,26 +5,51 @@ quarterly goals, identifies trends, and proposes actions for the coming week.
 This is the source material for the weekly Substack edition.
 """
 
+from hobson.tools.analytics import (
+    get_site_stats,
+    get_top_pages,
+    get_top_referrers,
+    get_traffic_insights,
+)
+from hobson.tools.obsidian import read_daily_log, read_note
+from hobson.tools.printful import list_store_products
+from hobson.workflows.prefetch import Prefetch
+
+BUSINESS_REVIEW_PREFETCH = [
+    Prefetch("This week's traffic", get_site_stats, {"days": 7}),
+    Prefetch("Top pages", get_top_pages, {"days": 7}),
+    Prefetch("Top referrers", get_top_referrers, {"days": 7}),
+    Prefetch("Traffic trends", get_traffic_insights),
+    Prefetch("Store products", list_store_products),
+    Prefetch("Daily log, last 7 days", read_daily_log, {"days": 7}),
+    Prefetch("Quarterly goals", read_note, {"path": "98 - Hobson Builds Character/Strategy/Quarterly Goals.md"}),
+]
+
 BUSINESS_REVIEW_PROMPT = """Run the weekly business review. Follow these steps:
 
-1. **Collect the week's metrics.** Use get_site_stats with days=7 for
-   this week's traffic. Also use get_site_stats with days=14 so you can
-   compare this week vs. last week.
+The Prefetched Data above already holds the results of steps 1-5. Work from
+it; do not repeat those calls.
+
+1. **Collect the week's metrics.** get_site_stats with days=7 has this
+   week's traffic. It also reports last week's pageviews and the
+   week-over-week change.
+
+2. **Get top content.** get_top_pages and get_top_referrers with days=7
+   show which pages performed best and where traffic came from.
 
-2. **Get top content.** Use get_top_pages with days=7 to see which pages
-   performed best. Use get_top_referrers with days=7 to see where traffic
-   came from.
+   get_traffic_insights has the computed trends: week-over-week and
+   month-over-month changes, anomalous days, and the pages and referrers
+   rising, falling or new this week. Quote its numbers in the review
+   rather than working out changes yourself.
 
-3. **Check the store.** Use list_store_products to get the current catalog.
+3. **Check the store.** list_store_products has the current catalog.
    Note total products, any new additions this week.
 
-4. **Review the week's daily logs.** Read
-   '98 - Hobson Builds Character/Operations/Daily Log.md' and summarize
-   what happened each day.
+4. **Review the week's daily logs.** read_daily_log with days=7 has the
+   week's entries; summarize what happened each day.
 
-5. **Check quarterly goals.** Read
-   '98 - Hobson Builds Character/Strategy/Quarterly Goals.md' to see
-   current targets. Assess progress against each goal.
+5. **Check quarterly goals.** Assess progress against each target in
+   '98 - Hobson Builds Character/Strategy/Quarterly Goals.md'.
 
 6. **Compose the review.** Write a comprehensive weekly review including:
 
@@ -46,7 +71,8 @@ BUSINESS_REVIEW_PROMPT = """Run the weekly business review. Follow these steps:
 
    **Trends & Observations**
    - What's working, what isn't
-   - Patterns in traffic or engagement
+   - Patterns in traffic or engagement (from get_traffic_insights: the
+     month-over-month change, anomalies, rising and falling pages)
    - Honest assessment of momentum
 
    **Next Week's Priorities**
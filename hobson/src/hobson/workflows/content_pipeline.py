@@ -5,11 +5,19 @@ When triggered by the scheduler, the agent reads the content calendar, picks
 a topic, generates a blog post, commits it to a branch, and opens a PR.
 """
 
+from hobson.tools.obsidian import read_note
+from hobson.workflows.prefetch import Prefetch
+
+CONTENT_PIPELINE_PREFETCH = [
+    Prefetch("Content calendar", read_note, {"path": "98 - Hobson Builds Character/Content/Blog/Content Calendar.md"}),
+]
+
 CONTENT_PIPELINE_PROMPT = """Run the content pipeline. Follow these steps:
 
-1. **Check the content calendar.** Read the note at
-   '98 - Hobson Builds Character/Content/Blog/Content Calendar.md' to see
-   what topics are planned and what's already been written.
+1. **Check the content calendar.** The note at
+   '98 - Hobson Builds Character/Content/Blog/Content Calendar.md' is in the
+   Prefetched Data above; use it to see what topics are planned and what's
+   already been written.
 
 2. **Pick the next topic.** Choose a topic that:
    - Hasn't been written yet
@@ -22,6 +30,15 @@ CONTENT_PIPELINE_PROMPT = """Run the content pipeline. Follow these steps:
      "why do people choose hard things?" not "here is a gear list."
    - If no topics are planned, generate one based on the brand guidelines
 
+   Before writing, call check_site_content with your proposed slug and title.
+   If the slug is taken, pick another. If a similar post already exists,
+   choose a different angle or a different topic. Also use search_vault with
+   the topic's key words and folder='98 - Hobson Builds Character/Content' to
+   catch drafts and Substack editions that covered the same ground. Then run
+   check_topic_novelty with your title and a two or three sentence summary.
+   A match of 0.3 or higher is a near-copy: choose a different topic.
+   Otherwise make sure your angle differs clearly from the top matches.
+
 3. **Write the blog post.** Generate a complete blog post:
    - 400-800 words
    - Voice: measured, calm, direct. Write as if you've already done the miles.
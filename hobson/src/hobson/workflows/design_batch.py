@@ -2,19 +2,32 @@
 
 This module provides the structured prompt for the weekly design batch workflow.
 When triggered by the scheduler (Monday 2pm ET in steady-state, daily 2pm ET in bootstrap),
-the agent ideates design concepts, generates artwork via Imagen, and manages the
-Printful product pipeline.
+the agent ideates design concepts, queues artwork generation via Imagen for the
+design worker, and manages the Printful product pipeline.
 """
 
+from hobson.tools.obsidian import read_note
+from hobson.tools.printful import list_store_products
+from hobson.workflows.prefetch import Prefetch
+
+DESIGN_BATCH_PREFETCH = [
+    Prefetch("Store products", list_store_products),
+    Prefetch("Brand guidelines", read_note, {"path": "98 - Hobson Builds Character/Strategy/Brand Guidelines.md"}),
+]
+
 DESIGN_BATCH_PROMPT = """Run the design batch workflow. Follow these steps:
 
-1. **Review current store inventory.** Use list_store_products to see what's
+The Prefetched Data above already holds the store products and brand
+guidelines. Work from it; do not repeat those calls.
+
+1. **Review current store inventory.** list_store_products shows what's
    already in the store. Note gaps in the product line.
 
-2. **Read brand guidelines and past concepts.** Read the brand guidelines from
-   '98 - Hobson Builds Character/Strategy/Brand Guidelines.md' and check
-   '98 - Hobson Builds Character/Content/Designs/Concepts/' for previous concepts
-   to avoid repetition.
+2. **Review brand guidelines and check past concepts.** Go over the brand guidelines from
+   '98 - Hobson Builds Character/Strategy/Brand Guidelines.md'. To avoid
+   repetition, use search_vault with the themes and phrases you are considering
+   and folder='98 - Hobson Builds Character/Content/Designs/Concepts'. Read a
+   full concept note only if a snippet looks like a real overlap.
 
 3. **Generate 5-10 new design concepts.** For each concept, define:
    - A name (short, deliberate, brand-aligned)
@@ -23,6 +36,10 @@ DESIGN_BATCH_PROMPT = """Run the design batch workflow. Follow these steps:
    - The text/copy on the design (if text-based)
    - Why it fits the brand
 
+   Run check_topic_novelty with each concept's name and description
+   (kinds='concept'). A match of 0.3 or higher is a near-copy: drop the
+   concept. Otherwise make sure it differs clearly from the top matches.
+
    Prioritize low-cost, impulse-buy products (stickers, pins, small prints) during
    early inventory building. Save premium items (hoodies, posters) for after you
    have traffic data showing demand.
@@ -69,21 +86,28 @@ DESIGN_BATCH_PROMPT = """Run the design batch workflow. Follow these steps:
      no bright colors, no playful elements)
 
    Assemble these fields into a single detailed prompt, then call
-   generate_design_image with the prompt, concept_name, product_type, and
-   appropriate aspect_ratio.
+   enqueue_design_image with the prompt, concept_name, product_type, and
+   appropriate aspect_ratio. It returns a job_id immediately; queue all 3
+   before waiting on any of them so they generate in parallel.
 
-   The result is JSON with image_url (the public R2 URL), generation_id,
+   Then call get_design_job_status with all 3 job_ids and wait_seconds=600.
+   Each finished job has image_url (the public R2 URL), generation_id,
    width, height, and other metadata. The image is automatically uploaded
    to R2 during generation. Use the image_url for Printful and Telegram.
+   If a job is still pending, call get_design_job_status again; if one
+   failed or was filtered, adjust its prompt and enqueue it again.
 
 7. **Send approval request via Telegram.** Use send_approval_request to present
    the top 3 concepts to the owner. Include the concept name, description,
-   target product type, and image URL (from generate_design_image result) for
+   target product type, and image URL (from the design job result) for
    each so the owner can see the designs before approving.
+   The workflow pauses until the owner answers and the tool returns
+   APPROVED, DENIED or EXPIRED. Only continue to step 8 if APPROVED;
+   otherwise skip to step 10 and log the decision.
 
 8. **Generate product mockups.** For each product created on Printful, call
    generate_product_mockup with the catalog_product_id, catalog_variant_id,
-   design image URL (from generate_design_image result), and concept name.
+   design image URL (from the design job result), and concept name.
 
    This generates a realistic photo of the design on the actual product
    (e.g., sticker on a surface, mug on a desk). The mockup image is
@@ -92,8 +116,9 @@ DESIGN_BATCH_PROMPT = """Run the design batch workflow. Follow these steps:
    If mockup generation fails, the tool falls back to the raw design URL.
    Either way, you get an image_url in the response to use in step 9.
 
-9. **Publish product to site.** For each product created on Printful, call
-   the publish_product tool with these parameters:
+9. **Publish products to site.** Publish every product created on Printful
+   in a single publish_batch call. Pass products_json as a JSON list with one
+   object per product, each with these fields:
 
    - slug: lowercase-hyphenated product name (e.g. "effort-compounds-sticker")
    - name: Product display name (e.g. "Effort Compounds Sticker")
@@ -101,13 +126,14 @@ DESIGN_BATCH_PROMPT = """Run the design batch workflow. Follow these steps:
    - price: Retail price as a string (e.g. "4.99" for stickers, "14.99" for
      mugs, "24.99" for t-shirts)
    - image_url: The mockup URL from generate_product_mockup (step 8). If mockup
-     generation failed, use the design URL from generate_design_image (step 6).
+     generation failed, use the design URL from the design job (step 6).
    - printful_url: "https://buildscharacter.printful.me"
    - product_type: One of sticker, mug, pin, print, poster, t-shirt
 
-   This tool writes the product markdown file to site/src/data/products/{slug}.md
-   on the master branch via GitHub API and triggers a Cloudflare Pages deploy.
-   No separate git commit or PR step is needed.
+   This writes each product markdown file to site/src/data/products/{slug}.md
+   on the master branch as one commit via GitHub API, which triggers a single
+   Cloudflare Pages deploy. No separate git commit or PR step is needed. If
+   it reports PUBLISH BLOCKED, fix the listed products and call it again.
 
 10. **Log to daily log.** Append to the daily log noting how many concepts were
     generated, the top picks, image generation results, mockup results, and
@@ -125,10 +151,13 @@ volume and iteration, not perfection.
 DESIGN_BATCH_BOOTSTRAP_PROMPT = DESIGN_BATCH_PROMPT.replace(
     "7. **Send approval request via Telegram.** Use send_approval_request to present\n"
     "   the top 3 concepts to the owner. Include the concept name, description,\n"
-    "   target product type, and image URL (from generate_design_image result) for\n"
-    "   each so the owner can see the designs before approving.",
+    "   target product type, and image URL (from the design job result) for\n"
+    "   each so the owner can see the designs before approving.\n"
+    "   The workflow pauses until the owner answers and the tool returns\n"
+    "   APPROVED, DENIED or EXPIRED. Only continue to step 8 if APPROVED;\n"
+    "   otherwise skip to step 10 and log the decision.",
     "7. **Create products on Printful.** For your top 3 ranked concepts, use\n"
-    "   upload_design_file with the image URL from generate_design_image, then\n"
+    "   upload_design_file with the image URL from the design job, then\n"
     "   create_store_product to create each one. Note: products may go live\n"
     "   immediately, so only push concepts you are confident in.\n"
     "\n"
@@ -5,42 +5,61 @@ writes a briefing to Obsidian, snapshots metrics to PostgreSQL,
 and sends a Telegram summary.
 """
 
+from hobson.tools.analytics import get_site_stats, get_traffic_insights
+from hobson.tools.obsidian import read_daily_log, read_note
+from hobson.tools.printful import list_store_products
+from hobson.tools.telegram import get_pending_approvals
+from hobson.workflows.prefetch import Prefetch
+
+MORNING_BRIEFING_PREFETCH = [
+    Prefetch("Yesterday's traffic", get_site_stats, {"days": 1}),
+    Prefetch("Traffic trends", get_traffic_insights),
+    Prefetch("Store products", list_store_products),
+    Prefetch("Daily log, yesterday and today", read_daily_log, {"days": 2}),
+    Prefetch("Pending approvals", get_pending_approvals),
+    Prefetch("Dashboard", read_note, {"path": "98 - Hobson Builds Character/Dashboard.md"}),
+]
+
 MORNING_BRIEFING_PROMPT = """Run the morning briefing. Follow these steps:
 
-1. **Collect site traffic.** Use get_site_stats with days=1 to get
-   yesterday's pageviews, visitors, and requests. Also use get_site_stats
-   with days=7 to get the weekly trend for comparison.
+The Prefetched Data above already holds the results of steps 1-4 and the
+current dashboard. Work from it; do not repeat those calls.
+
+1. **Collect site traffic.** get_site_stats with days=1 gives yesterday's
+   pageviews, visitors, and requests. get_traffic_insights gives the 7-day
+   and 28-day averages, week-over-week change and any anomalous days.
+   Quote its numbers; do not recompute them.
 
-2. **Check the store.** Use list_store_products to see the current
-   merch catalog and note any changes.
+2. **Check the store.** list_store_products shows the current merch
+   catalog; note any changes.
 
-3. **Review yesterday's activity.** Read the daily log at
-   '98 - Hobson Builds Character/Operations/Daily Log.md' to see what
-   happened yesterday. Check if any scheduled workflows ran.
+3. **Review yesterday's activity.** read_daily_log with days=2 has
+   yesterday's and today's daily log entries. See what happened yesterday
+   and check if any scheduled workflows ran.
 
-4. **Check pending approvals.** Call get_pending_approvals to retrieve
-   any unresolved approval requests. Note how many there are and whether
-   any are older than 24 hours (compare created_at to today's date).
+4. **Check pending approvals.** get_pending_approvals lists any unresolved
+   approval requests. Note how many there are and whether any are older
+   than 24 hours (compare created_at to today's date).
 
 5. **Compose the briefing.** Write a concise daily briefing including:
    - Yesterday's traffic numbers vs. 7-day average
    - Store product count and any new additions
    - Workflow execution summary (what ran, what failed)
    - Pending approval count and any stale requests
-   - Any anomalies worth flagging (traffic spike, zero visitors, errors)
+   - Any anomalies worth flagging: the days get_traffic_insights flags,
+     zero visitors, errors
 
    Format the briefing in Hobson's voice: factual, dry, self-aware.
    Example: "Yesterday: 12 pageviews, 8 visitors. The 7-day average is 9
    visitors, so we're technically growing. The content pipeline ran
    successfully. No one bought anything. Standard Tuesday."
 
-6. **Write to Obsidian.** Append today's briefing to the daily log at
-   '98 - Hobson Builds Character/Operations/Daily Log.md' using
+6. **Write to Obsidian.** Append today's briefing to the daily log using
    append_to_daily_log.
 
-7. **Update the dashboard.** Read the current dashboard at
-   '98 - Hobson Builds Character/Dashboard.md', update the Key Metrics
-   table with current numbers, and write it back.
+7. **Update the dashboard.** Take the current dashboard at
+   '98 - Hobson Builds Character/Dashboard.md' from the prefetched data,
+   update the Key Metrics table with current numbers, and write it back.
 
 8. **Send the daily digest via Telegram.** Use send_message to send a
    structured morning digest. This is NOT a 2-line summary -- it is the
@@ -70,7 +89,8 @@ MORNING_BRIEFING_PROMPT = """Run the morning briefing. Follow these steps:
    NEEDS YOUR ATTENTION:
    [Flag these if present:
    - Approval requests older than 24 hours (stale)
-   - Traffic anomalies (zero visitors, unusual spikes or drops vs. 7-day avg)
+   - Traffic anomalies (zero visitors, spikes or drops flagged by
+     get_traffic_insights)
    - Failed workflow runs from yesterday
    - Any other operational issues found during collection
    If nothing needs attention, say "Nothing -- smooth sailing."]
@@ -0,0 +1,72 @@
+"""Deterministic workflow inputs, gathered before the agent runs.
+
+Most workflows open with the same read-only tool calls every time (site
+stats, store products, the daily log, pending approvals, a strategy note).
+Each workflow module declares those calls as a list of Prefetch specs; the
+scheduler runs them concurrently and prepends the results to the workflow
+prompt, so the agent starts with its inputs instead of spending an LLM turn
+on each one.
+
+A call that fails or times out is reported in its section and the agent can
+still make it itself.
+"""
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+
+from langchain_core.tools import BaseTool
+
+logger = logging.getLogger(__name__)
+
+# Longest tool result included as is; the rest is cut with a pointer to the tool
+_MAX_SECTION_CHARS = 6000
+
+
+@dataclass(frozen=True)
+class Prefetch:
+    """One tool call to run before the workflow, and the heading for its result."""
+
+    label: str
+    tool: BaseTool
+    args: dict = field(default_factory=dict)
+
+    @property
+    def call(self) -> str:
+        args = ", ".join(f"{key}={value!r}" for key, value in self.args.items())
+        return f"{self.tool.name}({args})"
+
+
+async def _run(spec: Prefetch, timeout: float) -> str:
+    try:
+        result = await asyncio.wait_for(spec.tool.ainvoke(spec.args), timeout)
+    except TimeoutError:
+        logger.warning(f"Prefetch {spec.call} timed out after {timeout}s")
+        return f"(Unavailable: timed out after {timeout:g}s. Call {spec.tool.name} yourself.)"
+    except Exception as e:
+        logger.warning(f"Prefetch {spec.call} failed: {e}")
+        return f"(Unavailable: {type(e).__name__}: {e}. Call {spec.tool.name} yourself.)"
+    text = str(result).strip()
+    if len(text) > _MAX_SECTION_CHARS:
+        text = f"{text[:_MAX_SECTION_CHARS]}\n(Truncated. Call {spec.call} for the rest.)"
+    return text
+
+
+async def gather_context(specs: list[Prefetch], timeout: float = 60.0) -> str:
+    """Run every spec concurrently and format the results as one context block."""
+    if not specs:
+        return ""
+    started = time.monotonic()
+    results = await asyncio.gather(*(_run(spec, timeout) for spec in specs))
+    logger.info(f"Prefetched {len(specs)} workflow inputs in {time.monotonic() - started:.1f}s")
+
+    sections = [(
+        "## Prefetched Data\n"
+        "These tool calls were made when this run started. Use their results below "
+        "instead of repeating the same calls; call a tool again only if its section "
+        "says it is unavailable or you need different arguments."
+    )]
+    for spec, text in zip(specs, results):
+        sections.append(f"### {spec.label} -- {spec.call}\n{text}")
+    return "\n\n".join(sections)
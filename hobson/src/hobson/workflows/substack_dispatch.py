@@ -11,17 +11,38 @@ Michael writes his frame separately and signals Hobson to publish when ready.
 If 48 hours pass with no signal, Hobson publishes its section solo.
 """
 
+from hobson.tools.analytics import get_site_stats
+from hobson.tools.obsidian import read_daily_log, read_note
+from hobson.tools.printful import list_store_products
+from hobson.tools.substack import get_substack_posts
+from hobson.workflows.prefetch import Prefetch
+
+SUBSTACK_DISPATCH_PREFETCH = [
+    Prefetch("Daily log, last 7 days", read_daily_log, {"days": 7}),
+    Prefetch("Weekly review", read_note, {"path": "98 - Hobson Builds Character/Operations/Weekly Review.md"}),
+    Prefetch("Dashboard", read_note, {"path": "98 - Hobson Builds Character/Dashboard.md"}),
+    Prefetch("This week's traffic", get_site_stats, {"days": 7}),
+    Prefetch("Store products", list_store_products),
+    Prefetch("Substack posts and drafts", get_substack_posts, {"include_drafts": True}),
+]
+
 SUBSTACK_DISPATCH_PROMPT = """Prepare this week's Substack raw materials. Follow these steps:
 
-1. **Gather source material.** Read the following from Obsidian:
-   - '98 - Hobson Builds Character/Operations/Daily Log.md' (this week's entries)
+The Prefetched Data above already holds the notes and data listed in steps
+1 and 2. Work from it; do not repeat those calls.
+
+1. **Gather source material.** From Obsidian:
+   - This week's daily log entries (read_daily_log with days=7)
    - '98 - Hobson Builds Character/Operations/Weekly Review.md' (if the business
      review has run this week)
    - '98 - Hobson Builds Character/Dashboard.md' (current metrics)
 
-2. **Get fresh data.** Use get_site_stats with days=7 for this week's traffic.
-   Use list_store_products to check the current catalog. Use get_substack_posts
-   to see what was published previously (avoid repeating topics).
+2. **Get fresh data.** get_site_stats with days=7 has this week's traffic,
+   list_store_products the current catalog, and get_substack_posts what was
+   published previously and what is already drafted (avoid repeating topics). Use search_vault with folder='98 - Hobson Builds Character/Content/Substack' to
+   check a planned topic against past drafts. Before writing, run
+   check_topic_novelty (kinds='substack') on a summary of this week's angle
+   and keep it clearly different from the top matches.
 
 3. **Compose Hobson's Operational Report.** Write ONLY Hobson's section of the
    edition (30-40% of the final newsletter). Michael writes the rest separately.
@@ -64,8 +85,8 @@ SUBSTACK_DISPATCH_PROMPT = """Prepare this week's Substack raw materials. Follow
 
 4. **Save to Obsidian drafts.** Write the raw materials to
    '98 - Hobson Builds Character/Content/Substack/Drafts/' as markdown with
-   frontmatter including title, date, and content hash. Use a filename like
-   'week-N-hobson-log.md'.
+   frontmatter including title and date (the content hash is added when the
+   edition goes to Substack). Use a filename like 'week-N-hobson-log.md'.
 
    Also save a suggested edition title and subtitle for Michael to use or change.
 
@@ -78,7 +99,10 @@ SUBSTACK_DISPATCH_PROMPT = """Prepare this week's Substack raw materials. Follow
 
 DO NOT create a Substack draft at this stage. Michael will signal via Telegram
 when the full edition is ready. At that point, pick up the finalized draft from
-Obsidian, convert to HTML, and publish via create_substack_draft + publish_substack_draft.
+Obsidian and publish via create_substack_draft + publish_substack_draft. Pass the
+draft's markdown as is, frontmatter included; create_substack_draft drops the
+frontmatter, renders the body to HTML and returns its content hash (of the body
+alone), which goes in the draft's frontmatter.
 
 The Substack serves as a professional case study in AI governance. The dual
 perspective (Michael's strategic view + Hobson's operational view) is what makes
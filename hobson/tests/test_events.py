@@ -0,0 +1,314 @@
+"""Tests for the LISTEN/NOTIFY event bus, against an in-memory fake connection."""
+
+import asyncio
+
+import psycopg
+import pytest
+
+from hobson.events import Event, EventBus, _matches
+
+
+class FakeServer:
+    """Stands in for Postgres: the events table, cursors, and NOTIFY delivery."""
+
+    def __init__(self):
+        self.events = []
+        self.next_id = 1
+        self.cursors = {}
+        self.listeners = []
+        self.connects = 0
+        self.fail_connects = 0
+        self.conns = []
+
+    def reserve(self):
+        """An id taken by a transaction that has not committed yet."""
+        self.next_id += 1
+        return self.next_id - 1
+
+    def commit(self, event_id, topic, payload=None):
+        self.events.append({"id": event_id, "topic": topic, "payload": payload or {}, "created_at": None})
+        for queue in self.listeners:
+            queue.put_nowait(event_id)
+
+    def emit(self, topic, payload=None):
+        self.commit(self.reserve(), topic, payload)
+
+    async def connect(self, url, **kwargs):
+        self.connects += 1
+        if self.fail_connects:
+            self.fail_connects -= 1
+            raise psycopg.OperationalError("connection refused")
+        self.conns.append(FakeConn(self))
+        return self.conns[-1]
+
+
+class FakeCursor:
+    def __init__(self, rows):
+        self.rows = rows
+
+    async def fetchone(self):
+        return self.rows[0] if self.rows else None
+
+    async def fetchall(self):
+        return self.rows
+
+
+class FakeConn:
+    def __init__(self, server):
+        self.server = server
+        self.queue = asyncio.Queue()
+        self.dropped = False
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        if self.queue in self.server.listeners:
+            self.server.listeners.remove(self.queue)
+
+    async def execute(self, sql, params=()):
+        if sql.startswith("LISTEN"):
+            self.server.listeners.append(self.queue)
+            return FakeCursor([])
+        if "FROM hobson.event_cursors" in sql:
+            consumer = params[0]
+            rows = [{"last_event_id": self.server.cursors[consumer]}] if consumer in self.server.cursors else []
+            return FakeCursor(rows)
+        if "MAX(id)" in sql:
+            return FakeCursor([{"id": max((e["id"] for e in self.server.events), default=0)}])
+        if "FROM hobson.events" in sql and "WHERE id >" in sql:
+            rows = [dict(e) for e in self.server.events if e["id"] > params[0] or e["id"] in params[1]]
+            return FakeCursor(sorted(rows, key=lambda e: e["id"]))
+        if "INSERT INTO hobson.event_cursors" in sql:
+            self.server.cursors[params[0]] = params[1]
+            return FakeCursor([])
+        raise AssertionError(f"unexpected SQL: {sql}")
+
+    async def notifies(self, timeout=None, stop_after=None):
+        get = asyncio.ensure_future(self.queue.get())
+        drop = asyncio.ensure_future(self._wait_dropped())
+        done, pending = await asyncio.wait({get, drop}, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+        for task in pending:
+            task.cancel()
+        if drop in done:
+            raise psycopg.OperationalError("server closed the connection")
+        if get in done:
+            yield get.result()
+
+    async def _wait_dropped(self):
+        while not self.dropped:
+            await asyncio.sleep(0.005)
+
+
+async def _settle():
+    for _ in range(20):
+        await asyncio.sleep(0.01)
+
+
+@pytest.fixture
+def server():
+    return FakeServer()
+
+
+def _bus(server, consumer=None, **kwargs):
+    return EventBus(
+        "postgresql://test",
+        consumer=consumer,
+        cursor_flush_interval=0.01,
+        **kwargs,
+        min_reconnect_delay=0.01,
+        max_reconnect_delay=0.02,
+        connect=server.connect,
+    )
+
+
+def test_topic_matching():
+    assert _matches(("approval.resolved",), "approval.resolved")
+    assert not _matches(("approval.resolved",), "approval.created")
+    assert _matches(("approval.*",), "approval.created")
+    assert not _matches(("approval.*",), "approvals.created")
+    assert _matches((), "order.event")
+
+
+async def test_subscribers_get_new_events_in_order(server):
+    server.emit("approval.created", {"request_id": "old"})
+    bus = _bus(server)
+    seen = []
+
+    async def handler(event):
+        seen.append((event.topic, event.payload["request_id"]))
+
+    bus.subscribe(["approval.*"], handler)
+    task = asyncio.create_task(bus.run())
+    await bus.connected.wait()
+    server.emit("approval.created", {"request_id": "a"})
+    server.emit("order.event", {"request_id": "ignored"})
+    server.emit("approval.resolved", {"request_id": "a"})
+    await _settle()
+    task.cancel()
+    # Anonymous consumers start at the newest event, so "old" is not replayed
+    assert seen == [("approval.created", "a"), ("approval.resolved", "a")]
+
+
+async def test_reconnect_backfills_missed_events(server):
+    bus = _bus(server)
+    seen = []
+
+    async def handler(event):
+        seen.append(event.id)
+
+    bus.subscribe("order.event", handler)
+    task = asyncio.create_task(bus.run())
+    await bus.connected.wait()
+    server.emit("order.event")
+    await _settle()
+
+    # The server drops the connection; events keep arriving while the bus
+    # is disconnected, and its first reconnect attempt fails
+    server.conns[-1].dropped = True
+    server.listeners.clear()
+    server.fail_connects = 1
+    server.emit("order.event")
+    server.emit("order.event")
+    await _settle()
+    task.cancel()
+
+    assert seen == [1, 2, 3]
+    assert server.connects == 3
+    assert bus.connected.is_set()
+
+
+async def test_named_consumer_resumes_from_cursor(server):
+    server.emit("approval.resolved", {"request_id": "handled"})
+    server.cursors["agent"] = 1
+    server.emit("approval.resolved", {"request_id": "missed while down"})
+    bus = _bus(server, consumer="agent")
+    seen = []
+
+    async def handler(event):
+        seen.append(event.payload["request_id"])
+
+    bus.subscribe("approval.resolved", handler)
+    task = asyncio.create_task(bus.run())
+    await bus.connected.wait()
+    await _settle()
+    task.cancel()
+    assert seen == ["missed while down"]
+    assert server.cursors["agent"] == 2
+
+
+async def test_cursor_waits_for_handlers_to_finish(server):
+    bus = _bus(server, consumer="agent")
+    release = asyncio.Event()
+
+    async def slow(event):
+        if event.id == 1:
+            await release.wait()
+
+    bus.subscribe("approval.resolved", slow)
+    task = asyncio.create_task(bus.run())
+    await bus.connected.wait()
+    server.emit("approval.resolved")
+    server.emit("approval.resolved")
+    await _settle()
+    # Event 2 is handled, but 1 is not, so a restart must replay from 1
+    assert server.cursors["agent"] == 0
+
+    release.set()
+    await _settle()
+    task.cancel()
+    assert server.cursors["agent"] == 2
+
+
+async def test_event_committed_out_of_id_order_is_not_skipped(server):
+    bus = _bus(server, consumer="agent")
+    seen = []
+
+    async def handler(event):
+        seen.append(event.payload["request_id"])
+
+    bus.subscribe("approval.resolved", handler)
+    task = asyncio.create_task(bus.run())
+    await bus.connected.wait()
+    # Event 1's transaction is still open when event 2 commits
+    slow = server.reserve()
+    server.emit("approval.resolved", {"request_id": "fast"})
+    await _settle()
+    assert seen == ["fast"]
+    # A restart must read event 1 again, so the cursor stays behind it
+    assert server.cursors["agent"] == 0
+
+    server.commit(slow, "approval.resolved", {"request_id": "slow"})
+    await _settle()
+    task.cancel()
+    assert seen == ["fast", "slow"]
+    assert server.cursors["agent"] == 2
+
+
+async def test_rolled_back_id_stops_holding_the_cursor(server):
+    bus = _bus(server, consumer="agent", gap_timeout=0.05, poll_interval=0.01)
+    task = asyncio.create_task(bus.run())
+    await bus.connected.wait()
+    server.reserve()  # rolled back: id 1 never appears
+    server.emit("order.event")
+    await _settle()
+    task.cancel()
+    assert bus._gaps == {}
+    assert server.cursors["agent"] == 2
+
+
+async def test_query_errors_back_off_and_retry(server, monkeypatch):
+    server.emit("order.event")
+    bus = _bus(server, consumer="agent")
+    execute = FakeConn.execute
+    failures = [psycopg.errors.UndefinedTable("relation hobson.event_cursors does not exist")]
+
+    async def flaky(self, sql, params=()):
+        if failures and "FROM hobson.event_cursors" in sql:
+            raise failures.pop()
+        return await execute(self, sql, params)
+
+    monkeypatch.setattr(FakeConn, "execute", flaky)
+    task = asyncio.create_task(bus.run())
+    await asyncio.wait_for(bus.connected.wait(), 1)
+    task.cancel()
+    assert server.connects == 2
+
+
+async def test_wait_for_matches_predicate(server):
+    bus = _bus(server)
+    task = asyncio.create_task(bus.run())
+    await bus.connected.wait()
+    waiter = asyncio.create_task(
+        bus.wait_for("approval.resolved", lambda e: e.payload["request_id"] == "b", timeout=1)
+    )
+    await asyncio.sleep(0)
+    server.emit("approval.resolved", {"request_id": "a"})
+    server.emit("approval.resolved", {"request_id": "b"})
+    event = await waiter
+    task.cancel()
+    assert event.id == 2 and event.payload == {"request_id": "b"}
+
+
+async def test_wait_for_times_out():
+    bus = EventBus("postgresql://test")
+    with pytest.raises(asyncio.TimeoutError):
+        await bus.wait_for("approval.resolved", timeout=0.01)
+    assert bus._waiters == []
+
+
+async def test_failing_handler_does_not_stop_others():
+    bus = EventBus("postgresql://test")
+    seen = []
+
+    async def broken(event):
+        raise RuntimeError("boom")
+
+    async def ok(event):
+        seen.append(event.id)
+
+    bus.subscribe("x", broken)
+    bus.subscribe("x", ok)
+    bus.dispatch(Event(id=1, topic="x", payload={}))
+    await _settle()
+    assert seen == [1]
@@ -0,0 +1,69 @@
+"""Tests for the health server's Telegram webhook route."""
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from fastapi.testclient import TestClient
+from telegram import Bot
+
+from hobson.health import TELEGRAM_WEBHOOK_PATH, app
+
+SECRET = "s3cret-token_value"
+UPDATE = {
+    "update_id": 1001,
+    "message": {
+        "message_id": 5,
+        "date": 1760000000,
+        "chat": {"id": -100123, "type": "group", "title": "Hobson"},
+        "from": {"id": 42, "is_bot": False, "first_name": "Boss"},
+        "text": "status?",
+    },
+}
+
+
+@pytest.fixture
+def telegram_app():
+    fake = SimpleNamespace(bot=Bot("123456:TEST-TOKEN"), update_queue=asyncio.Queue())
+    app.state.telegram_app = fake
+    app.state.telegram_webhook_secret = SECRET
+    yield fake
+    app.state.telegram_app = None
+    app.state.telegram_webhook_secret = ""
+
+
+def _post(body, token=SECRET):
+    headers = {"X-Telegram-Bot-Api-Secret-Token": token} if token is not None else {}
+    return TestClient(app).post(TELEGRAM_WEBHOOK_PATH, json=body, headers=headers)
+
+
+def test_health():
+    assert TestClient(app).get("/health").json()["status"] == "ok"
+
+
+def test_webhook_disabled_in_polling_mode():
+    assert _post(UPDATE).status_code == 404
+
+
+def test_valid_update_is_queued(telegram_app):
+    resp = _post(UPDATE)
+    assert resp.status_code == 200
+    update = telegram_app.update_queue.get_nowait()
+    assert update.update_id == 1001
+    assert update.message.text == "status?"
+
+
+@pytest.mark.parametrize("token", [None, "", "wrong-token"])
+def test_bad_secret_is_rejected(telegram_app, token):
+    assert _post(UPDATE, token=token).status_code == 401
+    assert telegram_app.update_queue.empty()
+
+
+def test_malformed_body_is_rejected(telegram_app):
+    resp = TestClient(app).post(
+        TELEGRAM_WEBHOOK_PATH,
+        content=b"not json",
+        headers={"X-Telegram-Bot-Api-Secret-Token": SECRET},
+    )
+    assert resp.status_code == 400
+    assert telegram_app.update_queue.empty()
@@ -0,0 +1,228 @@
+"""Tests for the Cloudflare analytics warehouse and snapshot (GraphQL mocked with pytest-httpx)."""
+
+import json
+import re
+from datetime import UTC, date, datetime, timedelta
+
+import httpx
+import psycopg
+import pytest
+
+from hobson.tools import analytics
+
+
+class FixedDate(date):
+    @classmethod
+    def today(cls):
+        return cls(2026, 3, 10)
+
+
+class FakeMetricsDB:
+    def __init__(self):
+        self.rows: dict[tuple[date, str], dict] = {}
+        self.reads = 0
+
+    def get_metrics(self, metric_types, start, end):
+        self.reads += 1
+        return [
+            {"date": day, "metric_type": kind, "data": data}
+            for (day, kind), data in sorted(self.rows.items())
+            if kind in metric_types and start <= day < end
+        ]
+
+    def log_metrics(self, metric_type, by_date):
+        for day, data in by_date.items():
+            self.rows[(day, metric_type)] = json.loads(json.dumps(data))
+
+
+class FakeCloudflare:
+    """Answers the analytics query from per-day fixtures.
+
+    Records each request as (traffic window, ranked window): the date range
+    asked of the daily dataset, and the first and last-plus-one day ranked.
+    """
+
+    def __init__(self, pageviews: dict[str, int]):
+        self.pageviews = pageviews
+        self.paths: dict[str, dict[str, int]] = {}  # per-day overrides of the default top paths
+        self.adaptive_errors = None  # returned instead of data when rankings are asked for
+        self.requests = []
+
+    def _ranking(self, alias: str, day: str, limit: int) -> list[dict]:
+        if day not in self.pageviews:
+            return []
+        if alias.startswith("pages_"):
+            hits = self.paths.get(day, {"/blog/type-ii": 5, "/": 3})
+            groups = [{"count": n, "dimensions": {"clientRequestPath": path}} for path, n in hits.items()]
+        else:
+            groups = [{"count": 2, "dimensions": {"clientRefererHost": ""}}]
+        return sorted(groups, key=lambda g: -g["count"])[:limit]
+
+    def __call__(self, request: httpx.Request) -> httpx.Response:
+        body = json.loads(request.content)
+        variables = body["variables"]
+        zone, traffic, ranked = {}, None, []
+        if "start" in variables:
+            start, end = variables["start"], variables["end"]
+            traffic = (start, end)
+            zone["traffic"] = [
+                {"dimensions": {"date": day}, "sum": {"pageViews": self.pageviews[day], "requests": 3, "bytes": 0},
+                 "uniq": {"uniques": 1}}
+                for day in sorted(self.pageviews) if start <= day < end
+            ]
+        for alias, var in re.findall(r"(\w+): httpRequestsAdaptiveGroups\(filter: \$(\w+)", body["query"]):
+            window = variables[var]
+            day = window["datetime_geq"][:10]
+            assert window["datetime_lt"] == f"{date.fromisoformat(day) + timedelta(days=1)}T00:00:00Z"
+            ranked.append(day)
+            zone[alias] = self._ranking(alias, day, variables["ranked"])
+        days = sorted(set(ranked))
+        self.requests.append((
+            traffic,
+            (days[0], (date.fromisoformat(days[-1]) + timedelta(days=1)).isoformat()) if days else None,
+        ))
+        if days and self.adaptive_errors:
+            return httpx.Response(200, json={"data": None, "errors": self.adaptive_errors})
+        return httpx.Response(200, json={"data": {"viewer": {"zones": [zone]}}})
+
+
+@pytest.fixture
+def db(monkeypatch):
+    fake = FakeMetricsDB()
+    monkeypatch.setattr(analytics, "_db", fake)
+    monkeypatch.setattr(analytics, "date", FixedDate)
+    monkeypatch.setattr(analytics, "_snapshots", {})
+    return fake
+
+
+@pytest.fixture
+def cloudflare(httpx_mock):
+    days = {(date(2026, 3, 10) - timedelta(days=i)).isoformat(): 100 + i for i in range(1, 41)}
+    fake = FakeCloudflare(days)
+    httpx_mock.add_callback(fake, url=analytics._GQL_ENDPOINT, is_reusable=True)
+    return fake
+
+
+def test_one_request_per_dataset_serves_a_whole_workflow(db, cloudflare):
+    # Morning briefing: yesterday, the week, top pages and referrers
+    result = analytics.get_site_stats.invoke({"days": 1})
+    assert "Pageviews: 101" in result
+    assert "Previous 1 day: 102 pageviews (-1%)" in result
+    result = analytics.get_site_stats.invoke({"days": 7})
+    assert "Pageviews: 728" in result
+    assert "2026-03-03: 107 pageviews" in result
+    assert "Top 1 pages (last 7 days):\n      35 hits  /blog/type-ii" == analytics.get_top_pages.invoke(
+        {"days": 7, "limit": 1}
+    )
+    assert "14 hits  (direct)" in analytics.get_top_referrers.invoke({"days": 7})
+    # Four weeks of daily totals, but rankings only for the week asked for
+    assert cloudflare.requests == [(("2026-02-10", "2026-03-10"), None), (None, ("2026-03-03", "2026-03-10"))]
+    assert len({kind for _, kind in db.rows}) == 3
+
+
+def test_fetches_only_missing_days(db, cloudflare):
+    analytics.get_site_stats.invoke({"days": 1})
+    analytics._snapshots.clear()
+    # A 30-day window (60 with the comparison) only needs the 32 days not stored yet
+    assert "Pageviews: 3,465" in analytics.get_site_stats.invoke({"days": 30})
+    assert cloudflare.requests[1] == (("2026-01-09", "2026-02-10"), None)
+
+    # Everything is stored now; a fresh load reads Postgres only
+    analytics._snapshots.clear()
+    analytics.get_site_stats.invoke({"days": 30})
+    assert len(cloudflare.requests) == 2
+
+
+def test_snapshot_expires(db, cloudflare, monkeypatch):
+    analytics.get_site_stats.invoke({"days": 1})
+    monkeypatch.setattr(analytics, "monotonic", lambda: analytics._snapshots["daily"].loaded_at + 601)
+    reads = db.reads
+    analytics.get_site_stats.invoke({"days": 7})
+    assert db.reads == reads + 1
+    assert len(cloudflare.requests) == 1
+
+
+def test_each_day_keeps_its_own_top_pages(db, cloudflare):
+    # Busy days with far more paths than the stored top N must not crowd the
+    # quiet days out of their ranking
+    for i in range(2, 8):
+        day = (date(2026, 3, 10) - timedelta(days=i)).isoformat()
+        cloudflare.paths[day] = {f"/busy/{n}": 1000 - n for n in range(200)}
+    cloudflare.paths["2026-03-09"] = {"/quiet": 1}
+    result = analytics.get_top_pages.invoke({"days": 7, "limit": 500})
+    assert "1 hits  /quiet" in result
+    assert len(db.rows[(date(2026, 3, 8), analytics.PAGES)]["paths"]) == analytics._STORED_TOP_N
+    assert db.rows[(date(2026, 3, 9), analytics.PAGES)]["paths"] == {"/quiet": 1}
+
+
+def test_days_without_traffic_are_stored_as_zero(db, cloudflare):
+    cloudflare.pageviews.pop("2026-03-09")
+    assert analytics.get_site_stats.invoke({"days": 1}) == "No traffic data for 2026-03-09 to 2026-03-10."
+    assert db.rows[(date(2026, 3, 9), analytics.TRAFFIC)]["pageviews"] == 0
+    assert analytics.get_top_pages.invoke({"days": 1}) == "No page data for the last 1 days."
+    assert db.rows[(date(2026, 3, 9), analytics.PAGES)]["paths"] == {}
+    analytics._snapshots.clear()
+    analytics.get_site_stats.invoke({"days": 1})
+    analytics.get_top_pages.invoke({"days": 1})
+    assert len(cloudflare.requests) == 2
+
+
+def test_recently_fetched_days_are_provisional(db, cloudflare):
+    analytics.get_site_stats.invoke({"days": 1})
+    fetched_at = datetime(2026, 3, 10, 1, tzinfo=UTC).isoformat()
+    db.rows[(date(2026, 3, 9), analytics.TRAFFIC)]["fetched_at"] = fetched_at
+    analytics._snapshots.clear()
+    analytics.get_site_stats.invoke({"days": 1})
+    assert cloudflare.requests[1] == (("2026-03-09", "2026-03-10"), None)
+
+
+def test_works_without_postgres(monkeypatch, cloudflare):
+    class DownDB:
+        def get_metrics(self, *args):
+            raise psycopg.OperationalError("connection refused")
+
+    monkeypatch.setattr(analytics, "_db", DownDB())
+    monkeypatch.setattr(analytics, "date", FixedDate)
+    monkeypatch.setattr(analytics, "_snapshots", {})
+    assert "Pageviews: 101" in analytics.get_site_stats.invoke({"days": 1})
+    analytics._snapshots.clear()
+    assert "Pageviews: 101" in analytics.get_site_stats.invoke({"days": 1})
+    assert len(cloudflare.requests) == 2
+
+
+def test_api_errors_are_reported(db, httpx_mock):
+    httpx_mock.add_response(url=analytics._GQL_ENDPOINT, json={"errors": [{"message": "bad token"}]})
+    assert analytics.get_top_referrers.invoke({}).startswith("Analytics error: [{'message': 'bad token'}]")
+    assert db.rows == {}
+    assert analytics._snapshots == {}
+
+
+def test_traffic_insights(db, cloudflare):
+    cloudflare.pageviews.update({
+        (date(2026, 3, 10) - timedelta(days=i)).isoformat(): 100 + i % 3 for i in range(1, 57)
+    })
+    cloudflare.pageviews["2026-03-07"] = 400
+    cloudflare.paths["2026-03-07"] = {"/blog/type-ii": 1, "/blog/cold-plunge": 20}
+    result = analytics.get_traffic_insights.invoke({})
+    assert "Yesterday: 101 (7-day avg 143.9, 28-day avg 111.7)" in result
+    assert "Week over week: 1,007 vs 708 (+42%)" in result
+    assert "Month over month (28 days): 3,128 vs 2,829 (+11%)" in result
+    assert "2026-03-07: 400 pageviews, spike (typical 101;" in result
+    assert result.count("pageviews, spike") == 1
+    assert (
+        "Pages (last 7 days vs previous 7): /blog/type-ii 35->31 (-11%); / 21->18 (-14%);"
+        " /blog/cold-plunge new, 20 hits"
+    ) in result
+    assert "Referrers (last 7 days vs previous 7): no notable changes" in result
+    # 56 days of traffic, but rankings only for the two weeks compared; the
+    # other tools then share both loads
+    analytics.get_site_stats.invoke({"days": 7})
+    analytics.get_top_pages.invoke({"days": 7})
+    assert cloudflare.requests == [(("2026-01-13", "2026-03-10"), None), (None, ("2026-02-24", "2026-03-10"))]
+
+
+def test_adaptive_errors_leave_site_stats_working(db, cloudflare):
+    cloudflare.adaptive_errors = [{"message": "query time range is too large"}]
+    assert analytics.get_top_pages.invoke({"days": 7}).startswith("Analytics error:")
+    assert "Pageviews: 728" in analytics.get_site_stats.invoke({"days": 7})
+    assert {kind for _, kind in db.rows} == {analytics.TRAFFIC}
@@ -0,0 +1,229 @@
+"""Tests for the design job queue worker and status tool (no Postgres needed)."""
+
+import asyncio
+import json
+
+import pytest
+
+from hobson import design_worker
+from hobson.tools import image_gen
+
+
+class FakeDB:
+    def __init__(self, jobs=None):
+        self.jobs = {j["id"]: j for j in jobs or []}
+        self.finished = []
+        self.results = {}
+        self.heartbeats = []
+        self.stale = []
+
+    def claim_design_job(self, worker_id):
+        for job in self.jobs.values():
+            if job["generation_status"] == "queued":
+                job.update(generation_status="running", locked_by=worker_id)
+                return job
+        return None
+
+    def _holds(self, job_id, worker_id):
+        job = self.jobs[job_id]
+        return job["locked_by"] == worker_id and job["generation_status"] == "running"
+
+    def finish_design_job(self, job_id, worker_id, generation_status, result=None, **fields):
+        if not self._holds(job_id, worker_id):
+            return False
+        self.finished.append((job_id, generation_status, fields))
+        self.jobs[job_id].update(generation_status=generation_status, locked_by=None, result=result)
+        self.results[job_id] = result
+        return True
+
+    def heartbeat_design_job(self, job_id, worker_id):
+        self.heartbeats.append((job_id, worker_id))
+        return self._holds(job_id, worker_id)
+
+    def requeue_stale_design_jobs(self, stale_after_seconds, max_attempts):
+        stale, self.stale = self.stale, []
+        return stale
+
+    def get_design_jobs(self, job_ids):
+        return [self.jobs[i] for i in sorted(job_ids) if i in self.jobs]
+
+
+class FakeSend:
+    def __init__(self):
+        self.texts = []
+
+    async def ainvoke(self, args):
+        self.texts.append(args["text"])
+
+
+def _job(job_id=7, notify=True, status="running"):
+    return {
+        "id": job_id,
+        "concept_name": "Effort Compounds",
+        "generation_prompt": "A sticker",
+        "product_type": "sticker",
+        "aspect_ratio": "1:1",
+        "reuse_cached": False,
+        "notify": notify,
+        "generation_status": status,
+        "status_reason": None,
+        "locked_by": "host:1:0",
+        "result": None,
+    }
+
+
+class TestProcessJob:
+    async def test_success_stores_result_and_notifies(self, monkeypatch):
+        calls = []
+
+        async def fake_generate(*args, generation_id=None, worker_id=None):
+            calls.append((args, generation_id, worker_id))
+            return {"status": "success", "image_url": "https://r2/x.png", "generation_id": 7}
+
+        send = FakeSend()
+        monkeypatch.setattr(design_worker, "generate_design", fake_generate)
+        monkeypatch.setattr(design_worker, "send_message", send)
+        db = FakeDB([_job()])
+
+        await design_worker.process_job(db, db.jobs[7])
+
+        assert calls == [(("A sticker", "Effort Compounds", "sticker", "1:1", False), 7, "host:1:0")]
+        assert "https://r2/x.png" in send.texts[0]
+
+    async def test_generation_finishes_job_with_result_in_one_update(self, monkeypatch):
+        db = FakeDB([_job()])
+        monkeypatch.setattr(image_gen, "_db", db)
+        error = {"status": "filtered", "message": "No images"}
+
+        image_gen._record_generation(
+            7, error, "host:1:0", concept_name="Effort Compounds", generation_prompt="A sticker",
+            product_type="sticker", generation_status="filtered", status_reason="No images",
+        )
+
+        assert db.finished == [(7, "filtered", {"status_reason": "No images"})]
+        assert db.results[7] == {"concept_name": "Effort Compounds", **error}
+
+    async def test_result_is_dropped_once_the_job_is_requeued(self, monkeypatch):
+        db = FakeDB([_job(status="queued")])
+        db.jobs[7]["locked_by"] = None
+        monkeypatch.setattr(image_gen, "_db", db)
+
+        with pytest.raises(image_gen.LeaseLostError):
+            image_gen._record_generation(
+                7, {"status": "success"}, "host:1:0", concept_name="Effort Compounds",
+                generation_status="success",
+            )
+
+        assert db.finished == []
+        assert db.jobs[7]["generation_status"] == "queued"
+
+    async def test_lost_lease_cancels_generation_without_notifying(self, monkeypatch):
+        cancelled = asyncio.Event()
+
+        async def slow_generate(*args, generation_id=None, worker_id=None):
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+
+        send = FakeSend()
+        monkeypatch.setattr(design_worker, "_HEARTBEAT_SECONDS", 0.01)
+        monkeypatch.setattr(design_worker, "generate_design", slow_generate)
+        monkeypatch.setattr(design_worker, "send_message", send)
+        db = FakeDB([_job()])
+        # The reaper requeues the job and another worker claims it
+        db.jobs[7]["locked_by"] = "host:2:0"
+
+        result = await asyncio.wait_for(design_worker.process_job(db, dict(db.jobs[7], locked_by="host:1:0")), 1)
+
+        assert result is None
+        assert cancelled.is_set()
+        assert db.finished == []
+        assert send.texts == []
+
+    async def test_heartbeat_renews_lease_while_running(self, monkeypatch):
+        async def slow_generate(*args, generation_id=None, worker_id=None):
+            await asyncio.sleep(0.05)
+            return {"status": "success", "image_url": "https://r2/x.png"}
+
+        monkeypatch.setattr(design_worker, "_HEARTBEAT_SECONDS", 0.01)
+        monkeypatch.setattr(design_worker, "generate_design", slow_generate)
+        db = FakeDB([_job(notify=False)])
+
+        await design_worker.process_job(db, db.jobs[7])
+        renewed = len(db.heartbeats)
+        await asyncio.sleep(0.03)
+
+        assert renewed >= 2
+        assert set(db.heartbeats) == {(7, "host:1:0")}
+        assert len(db.heartbeats) == renewed
+
+    async def test_worker_error_fails_job(self, monkeypatch):
+        async def boom(*args, generation_id=None, worker_id=None):
+            raise RuntimeError("disk full")
+
+        send = FakeSend()
+        monkeypatch.setattr(design_worker, "generate_design", boom)
+        monkeypatch.setattr(design_worker, "send_message", send)
+        db = FakeDB([_job(notify=False)])
+
+        result = await design_worker.process_job(db, db.jobs[7])
+
+        assert result["status"] == "error"
+        assert db.finished[0][:2] == (7, "failed")
+        assert db.results[7]["concept_name"] == "Effort Compounds"
+        assert db.results[7]["message"] == "Worker error: disk full"
+        assert send.texts == []
+
+    async def test_worker_keeps_going_when_recording_a_job_fails(self, monkeypatch):
+        async def boom(*args, generation_id=None, worker_id=None):
+            raise RuntimeError("disk full")
+
+        def db_down(*args, **kwargs):
+            raise ConnectionError("database unavailable")
+
+        monkeypatch.setattr(design_worker, "generate_design", boom)
+        monkeypatch.setattr(design_worker, "_IDLE_POLL_SECONDS", 0.01)
+        db = FakeDB([_job(7, notify=False, status="queued"), _job(8, notify=False, status="queued")])
+        monkeypatch.setattr(db, "finish_design_job", db_down)
+
+        worker = asyncio.create_task(design_worker._worker_loop(db, "host:1:0"))
+        await asyncio.sleep(0.05)
+
+        # Job 7 could not be recorded, and the same worker went on to claim job 8
+        assert not worker.done()
+        assert [job["generation_status"] for job in db.jobs.values()] == ["running", "running"]
+        worker.cancel()
+
+    async def test_reaper_notifies_failed_jobs(self, monkeypatch):
+        send = FakeSend()
+        monkeypatch.setattr(design_worker, "send_message", send)
+        monkeypatch.setattr(design_worker, "_STALE_CHECK_SECONDS", 0.01)
+        db = FakeDB()
+        lost = {"status": "error", "concept_name": "Effort Compounds", "message": "Worker lost the job 3 times"}
+        db.stale = [
+            {"id": 7, "concept_name": "Effort Compounds", "notify": True, "generation_status": "failed", "result": lost},
+            {"id": 8, "concept_name": "Requeued", "notify": True, "generation_status": "queued", "result": None},
+        ]
+
+        reaper = asyncio.create_task(design_worker._requeue_loop(db))
+        await asyncio.sleep(0.03)
+        reaper.cancel()
+
+        assert send.texts == ["Design job 7 (Effort Compounds) error: Worker lost the job 3 times"]
+
+
+class TestGetDesignJobStatus:
+    async def test_reports_finished_and_pending_jobs(self, monkeypatch):
+        done = _job(1, status="success")
+        done["result"] = {"status": "success", "image_url": "https://r2/a.png"}
+        db = FakeDB([done, _job(2, status="queued")])
+        monkeypatch.setattr(image_gen, "_db", db)
+
+        out = json.loads(await image_gen.get_design_job_status.ainvoke({"job_ids": [1, 2, 3]}))
+
+        assert out["jobs"][0] == {"job_id": 1, "status": "success", "image_url": "https://r2/a.png"}
+        assert out["jobs"][1]["status"] == "queued"
+        assert out["pending"] == 1
+        assert out["unknown_job_ids"] == [3]
@@ -0,0 +1,119 @@
+"""Tests for the local git publishing backend against a bare repository."""
+
+import json
+import subprocess
+
+import pytest
+
+from hobson.tools import git_ops
+from hobson.tools.git_backends import GitBackendError, LocalGitBackend
+from hobson.tools.site_index import SiteIndex
+
+
+def _git(cwd, *args) -> str:
+    return subprocess.run(
+        ["git", "-c", "user.name=t", "-c", "user.email=t@t", *args],
+        cwd=cwd, check=True, capture_output=True, text=True,
+    ).stdout.strip()
+
+
+@pytest.fixture
+def repos(tmp_path):
+    """A bare 'GitHub' repo with one commit on master, and a working clone of it."""
+    bare = tmp_path / "remote.git"
+    seed = tmp_path / "seed"
+    _git(tmp_path, "init", "--quiet", "--bare", "-b", "master", str(bare))
+    _git(tmp_path, "clone", "--quiet", str(bare), str(seed))
+    (seed / "site/src/data/blog").mkdir(parents=True)
+    (seed / "site/src/data/blog/type-ii.md").write_text('---\ntitle: "Type II"\n---\n')
+    _git(seed, "add", ".")
+    _git(seed, "commit", "--quiet", "-m", "init")
+    _git(seed, "push", "--quiet", "origin", "HEAD:master")
+    clone = tmp_path / "clone"
+    _git(tmp_path, "clone", "--quiet", str(bare), str(clone))
+    return bare, seed, clone
+
+
+class TestLocalGitBackend:
+    def test_many_files_one_commit_one_push(self, repos):
+        bare, _, clone = repos
+        backend = LocalGitBackend(str(clone), github_repo="o/r")
+
+        result = backend.commit_files(
+            "master",
+            {"site/src/data/products/a.md": "A\n", "site/src/data/products/b.md": "B\n"},
+            "feat: add 2 products",
+        )
+
+        assert _git(bare, "rev-parse", "master") == result["sha"]
+        assert result["html_url"] == f"https://github.com/o/r/commit/{result['sha']}"
+        assert _git(bare, "rev-list", "--count", "master") == "2"
+        changed = _git(bare, "show", "--name-only", "--format=", "master").splitlines()
+        assert changed == ["site/src/data/products/a.md", "site/src/data/products/b.md"]
+
+    def test_rebuilds_on_top_when_remote_moved(self, repos):
+        bare, seed, clone = repos
+        backend = LocalGitBackend(str(clone))
+        # Someone else pushes after the clone was made
+        (seed / "README.md").write_text("hi\n")
+        _git(seed, "add", ".")
+        _git(seed, "commit", "--quiet", "-m", "other")
+        _git(seed, "push", "--quiet", "origin", "HEAD:master")
+        other = _git(seed, "rev-parse", "HEAD")
+
+        result = backend.commit_files("master", {"site/src/data/products/a.md": "A\n"}, "feat: add")
+
+        assert _git(bare, "rev-parse", f"{result['sha']}^") == other
+        assert _git(bare, "show", "master:README.md") == "hi"
+
+    def test_branch_created_from_base(self, repos):
+        bare, _, clone = repos
+        backend = LocalGitBackend(str(clone))
+
+        backend.ensure_branch("blog/rain", "master")
+        backend.ensure_branch("blog/rain", "master")  # idempotent
+        backend.commit_files("blog/rain", {"site/src/data/blog/rain.md": "Rain\n"}, "feat: add rain")
+
+        assert _git(bare, "rev-parse", "blog/rain^") == _git(bare, "rev-parse", "master")
+        # The clone's own checkout is left alone
+        assert _git(clone, "branch", "--show-current") == "master"
+        assert not (clone / "site/src/data/blog/rain.md").exists()
+        assert len(_git(clone, "worktree", "list").splitlines()) == 1
+
+    def test_unchanged_files_raise(self, repos):
+        _, _, clone = repos
+        backend = LocalGitBackend(str(clone))
+        with pytest.raises(GitBackendError, match="Nothing to commit"):
+            backend.commit_files(
+                "master", {"site/src/data/blog/type-ii.md": '---\ntitle: "Type II"\n---\n'}, "noop"
+            )
+
+
+class TestPublishBatchLocal:
+    def test_publish_batch_through_local_backend(self, repos, monkeypatch):
+        bare, _, clone = repos
+        monkeypatch.setattr(git_ops.settings, "bootstrap_mode", True)
+        monkeypatch.setattr(git_ops.settings, "site_checkout_path", str(clone))
+        monkeypatch.setattr(git_ops, "_site_index", SiteIndex())
+        monkeypatch.setattr(git_ops, "_backend_instance", LocalGitBackend(str(clone)))
+        product = {
+            "slug": "effort-compounds", "name": "Effort Compounds Sticker",
+            "description": "A sticker.", "price": "4.99",
+            "image": "https://cdn.example.com/img.png",
+            "printful_url": "https://buildscharacter.printful.me", "product_type": "sticker",
+        }
+        post = {
+            "slug": "type-ii", "title": "Type II", "description": "Fun later.",
+            "content": " ".join(["word"] * 300), "tags": "endurance",
+        }
+
+        blocked = git_ops.publish_batch.invoke(
+            {"blog_posts_json": json.dumps([post]), "products_json": json.dumps([product])}
+        )
+        assert "Slug 'type-ii' already exists" in blocked
+
+        result = git_ops.publish_batch.invoke({"products_json": json.dumps([product])})
+        assert "1 files to master in one commit" in result
+        assert 'name: "Effort Compounds Sticker"' in _git(
+            bare, "show", "master:site/src/data/products/effort-compounds.md"
+        )
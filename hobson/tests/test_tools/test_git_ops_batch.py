@@ -0,0 +1,93 @@
+"""Tests for batch publishing in git_ops (HTTP mocked with pytest-httpx)."""
+
+import json
+
+import pytest
+
+from hobson.tools import git_ops
+from hobson.tools.github_client import GitHubClient
+from hobson.tools.site_index import SiteIndex
+
+_REPO = "https://api.github.com/repos/pieChartsAreLies/buildscharacter"
+
+
+def _product(slug: str) -> dict:
+    return {
+        "slug": slug,
+        "name": f"{slug.title()} Sticker",
+        "description": "A sticker.",
+        "price": "4.99",
+        "image": "https://cdn.example.com/img.png",
+        "printful_url": "https://buildscharacter.printful.me",
+        "product_type": "sticker",
+    }
+
+
+def _mock_commit_flow(httpx_mock, ref_status: int = 200):
+    httpx_mock.add_response(url=f"{_REPO}/git/ref/heads/master", json={"object": {"sha": "head1"}})
+    httpx_mock.add_response(url=f"{_REPO}/git/commits/head1", json={"tree": {"sha": "tree0"}})
+    httpx_mock.add_response(url=f"{_REPO}/git/trees", method="POST", json={"sha": "tree1"})
+    httpx_mock.add_response(
+        url=f"{_REPO}/git/commits", method="POST",
+        json={"sha": "commit1", "html_url": "https://github.com/x/commit/commit1"},
+    )
+    httpx_mock.add_response(url=f"{_REPO}/git/refs/heads/master", method="PATCH", status_code=ref_status, json={})
+
+
+class TestPublishBatch:
+    @pytest.fixture(autouse=True)
+    def _settings(self, monkeypatch, tmp_path):
+        monkeypatch.setattr(git_ops.settings, "github_repo", "pieChartsAreLies/buildscharacter")
+        monkeypatch.setattr(git_ops.settings, "bootstrap_mode", True)
+        monkeypatch.setattr(git_ops.settings, "site_checkout_path", str(tmp_path))
+        monkeypatch.setattr(git_ops, "_client", GitHubClient("token"))
+        monkeypatch.setattr(git_ops, "_site_index", SiteIndex())
+        monkeypatch.setattr(git_ops, "_backend_instance", None)
+        self.products_dir = tmp_path / "site/src/data/products"
+        self.products_dir.mkdir(parents=True)
+
+    def test_products_land_in_one_commit(self, httpx_mock):
+        _mock_commit_flow(httpx_mock)
+        products = [_product("effort-compounds"), _product("type-ii")]
+
+        result = git_ops.publish_batch.invoke({"products_json": json.dumps(products)})
+
+        assert "2 files" in result and "commit1" in result
+        tree = json.loads(httpx_mock.get_request(url=f"{_REPO}/git/trees").content)
+        assert tree["base_tree"] == "tree0"
+        assert [e["path"] for e in tree["tree"]] == [
+            "site/src/data/products/effort-compounds.md",
+            "site/src/data/products/type-ii.md",
+        ]
+        assert 'name: "Type-Ii Sticker"' in tree["tree"][1]["content"]
+        ref = json.loads(httpx_mock.get_request(method="PATCH").content)
+        assert ref == {"sha": "commit1", "force": False}
+
+    def test_one_invalid_item_blocks_whole_batch(self, httpx_mock):
+        bad = _product("BAD SLUG")
+        result = git_ops.publish_batch.invoke(
+            {"products_json": json.dumps([_product("ok-one"), bad])}
+        )
+        assert result.startswith("PUBLISH BLOCKED")
+        assert "Product 2 (BAD SLUG)" in result
+        assert httpx_mock.get_requests() == []
+
+    def test_blog_posts_rejected_outside_bootstrap(self, httpx_mock, monkeypatch):
+        monkeypatch.setattr(git_ops.settings, "bootstrap_mode", False)
+        post = {
+            "slug": "rain", "title": "Rain", "description": "Wet.",
+            "content": " ".join(["word"] * 300), "tags": "outdoor",
+        }
+        result = git_ops.publish_batch.invoke({"blog_posts_json": json.dumps([post])})
+        assert "create_blog_post_pr" in result
+        assert httpx_mock.get_requests() == []
+
+    def test_existing_slug_blocks_batch(self, httpx_mock):
+        (self.products_dir / "type-ii.md").write_text('---\nname: "Type II Sticker"\n---\n')
+        products = [_product("effort-compounds"), _product("type-ii")]
+
+        result = git_ops.publish_batch.invoke({"products_json": json.dumps(products)})
+
+        assert result.startswith("PUBLISH BLOCKED")
+        assert "Slug 'type-ii' already exists" in result
+        assert httpx_mock.get_requests() == []
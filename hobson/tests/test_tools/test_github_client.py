@@ -0,0 +1,119 @@
+"""Tests for the shared GitHub client (HTTP mocked with pytest-httpx)."""
+
+import json
+
+import pytest
+
+from hobson.tools import git_ops
+from hobson.tools.github_client import GitHubClient
+
+_REF_URL = "https://api.github.com/repos/o/r/git/ref/heads/master"
+
+
+class TestConditionalRequests:
+    def test_304_served_from_cache(self, httpx_mock):
+        httpx_mock.add_response(url=_REF_URL, json={"object": {"sha": "abc"}}, headers={"ETag": '"v1"'})
+        httpx_mock.add_response(url=_REF_URL, status_code=304)
+        client = GitHubClient("token")
+
+        first = client.get(_REF_URL)
+        second = client.get(_REF_URL)
+
+        assert second.status_code == 200
+        assert second.json() == first.json() == {"object": {"sha": "abc"}}
+        assert httpx_mock.get_requests()[1].headers["If-None-Match"] == '"v1"'
+        assert client.stats == {"requests": 2, "not_modified": 1}
+
+    def test_changed_resource_replaces_cache(self, httpx_mock):
+        httpx_mock.add_response(url=_REF_URL, json={"object": {"sha": "abc"}}, headers={"ETag": '"v1"'})
+        httpx_mock.add_response(url=_REF_URL, json={"object": {"sha": "def"}}, headers={"ETag": '"v2"'})
+        httpx_mock.add_response(url=_REF_URL, status_code=304)
+        client = GitHubClient("token")
+
+        client.get(_REF_URL)
+        assert client.get(_REF_URL).json()["object"]["sha"] == "def"
+        assert client.get(_REF_URL).json()["object"]["sha"] == "def"
+        assert httpx_mock.get_requests()[2].headers["If-None-Match"] == '"v2"'
+
+    def test_cache_persists_across_instances(self, httpx_mock, tmp_path):
+        path = tmp_path / "etags.json"
+        httpx_mock.add_response(url=_REF_URL, json={"object": {"sha": "abc"}}, headers={"ETag": '"v1"'})
+        httpx_mock.add_response(url=_REF_URL, status_code=304)
+
+        first = GitHubClient("token", cache_path=str(path))
+        first.get(_REF_URL)
+        first.close()
+        resp = GitHubClient("token", cache_path=str(path)).get(_REF_URL)
+
+        assert resp.json() == {"object": {"sha": "abc"}}
+
+    def test_cache_writes_are_debounced(self, httpx_mock, tmp_path):
+        path = tmp_path / "etags.json"
+        client = GitHubClient("token", cache_path=str(path), save_interval=3600)
+        for i in range(3):
+            url = f"https://api.github.com/repos/o/r/git/commits/{i}"
+            httpx_mock.add_response(url=url, json={}, headers={"ETag": f'"{i}"'})
+            client.get(url)
+        assert not path.exists()
+
+        client.close()
+        assert len(json.loads(path.read_text())) == 3
+
+    def test_cache_is_bounded(self, httpx_mock):
+        client = GitHubClient("token", max_cache_entries=2)
+        for i in range(3):
+            url = f"https://api.github.com/repos/o/r/git/commits/{i}"
+            httpx_mock.add_response(url=url, json={}, headers={"ETag": f'"{i}"'})
+            client.get(url)
+        assert len(client._etags) == 2
+
+
+class TestRateLimit:
+    def test_no_delay_with_plenty_remaining(self):
+        client = GitHubClient("token", slowdown_below=100)
+        client.rate_limits["core"] = (4000, 1000.0)
+        assert client.pacing_delay("core", now=0) == 0
+
+    def test_spreads_remaining_budget_over_window(self):
+        client = GitHubClient("token", slowdown_below=100, max_delay=60)
+        client.rate_limits["core"] = (50, 100.0)
+        assert client.pacing_delay("core", now=0) == pytest.approx(2.0)
+
+    def test_sleeps_before_request_when_budget_low(self, httpx_mock):
+        sleeps = []
+        client = GitHubClient("token", slowdown_below=100, sleep=sleeps.append)
+        httpx_mock.add_response(
+            url=_REF_URL, json={},
+            headers={"X-RateLimit-Remaining": "5", "X-RateLimit-Reset": "9999999999"},
+        )
+        httpx_mock.add_response(url=_REF_URL, json={})
+        client.get(_REF_URL)
+        client.get(_REF_URL)
+        assert sleeps == [client.max_delay]
+
+
+class TestListOpenBlogPrs:
+    def test_single_graphql_round_trip(self, httpx_mock, monkeypatch):
+        monkeypatch.setattr(git_ops.settings, "github_repo", "o/r")
+        monkeypatch.setattr(git_ops, "_client", GitHubClient("token"))
+        pr = {
+            "number": 12, "title": "blog: Rain", "url": "https://github.com/o/r/pull/12",
+            "headRefName": "blog/rain", "createdAt": "2026-01-01T00:00:00Z",
+            "files": {"nodes": [{"path": "site/src/data/blog/rain.md"}]},
+            "commits": {"nodes": [{"commit": {"statusCheckRollup": {"state": "SUCCESS"}}}]},
+        }
+        other = {**pr, "number": 13, "headRefName": "fix/css"}
+        httpx_mock.add_response(
+            url="https://api.github.com/graphql",
+            json={"data": {"repository": {"pullRequests": {"nodes": [pr, other]}}}},
+        )
+
+        result = git_ops.list_open_blog_prs.invoke({})
+
+        assert len(httpx_mock.get_requests()) == 1
+        body = json.loads(httpx_mock.get_requests()[0].content)
+        assert body["variables"] == {"owner": "o", "name": "r"}
+        assert result == (
+            "- PR #12: blog: Rain (https://github.com/o/r/pull/12) [checks: success] "
+            "files: site/src/data/blog/rain.md"
+        )
@@ -0,0 +1,105 @@
+"""Tests for the Imagen prompt-level result cache."""
+
+import hashlib
+import json
+import os
+
+from hobson.tools.imagen_cache import ImagenCache, LocalCacheStore
+
+MODEL = "imagen-4.0-generate-001"
+PROMPT = "A die-cut sticker with bold charcoal text reading 'BUILDS CHARACTER'"
+
+
+def _cache(tmp_path, ttl_seconds=3600):
+    return ImagenCache(LocalCacheStore(str(tmp_path)), ttl_seconds=ttl_seconds)
+
+
+class TestImagenCache:
+    def test_roundtrip(self, tmp_path):
+        cache = _cache(tmp_path)
+        images = [b"png-one", b"png-two", b"png-three", b"png-four"]
+        cache.put(MODEL, PROMPT, "1:1", 4, images)
+        assert cache.get(MODEL, PROMPT, "1:1", 4) == images
+
+    def test_key_depends_on_every_field(self, tmp_path):
+        cache = _cache(tmp_path)
+        cache.put(MODEL, PROMPT, "1:1", 4, [b"a"])
+        assert cache.get(MODEL, PROMPT + " ", "1:1", 4) is None
+        assert cache.get(MODEL, PROMPT, "3:4", 4) is None
+        assert cache.get(MODEL, PROMPT, "1:1", 2) is None
+        assert cache.get("imagen-3.0", PROMPT, "1:1", 4) is None
+
+    def test_expired_entry_is_a_miss(self, tmp_path):
+        cache = _cache(tmp_path, ttl_seconds=60)
+        cache.put(MODEL, PROMPT, "1:1", 1, [b"a"])
+        entry_path = tmp_path / "entries" / f"{ImagenCache.key(MODEL, PROMPT, '1:1', 1)}.json"
+        entry = json.loads(entry_path.read_text())
+        entry["created_at"] -= 120
+        entry_path.write_text(json.dumps(entry))
+        assert cache.get(MODEL, PROMPT, "1:1", 1) is None
+
+    def test_shared_images_stored_once(self, tmp_path):
+        cache = _cache(tmp_path)
+        cache.put(MODEL, PROMPT, "1:1", 2, [b"same", b"other"])
+        cache.put(MODEL, "another prompt", "1:1", 2, [b"same", b"third"])
+        assert len(list((tmp_path / "blobs").iterdir())) == 3
+
+    def test_corrupt_blob_is_a_miss(self, tmp_path):
+        cache = _cache(tmp_path)
+        cache.put(MODEL, PROMPT, "1:1", 1, [b"original"])
+        digest = hashlib.sha256(b"original").hexdigest()
+        (tmp_path / "blobs" / f"{digest}.png").write_bytes(b"truncated")
+        assert cache.get(MODEL, PROMPT, "1:1", 1) is None
+
+
+class TestLocalCacheStore:
+    def test_concurrent_writers_use_separate_temp_files(self, tmp_path, monkeypatch):
+        store = LocalCacheStore(str(tmp_path))
+        replace = os.replace
+        temp_files = []
+
+        def replace_after_rival_write(src, dst):
+            temp_files.append(src)
+            if len(temp_files) == 1:
+                # A second worker writes the same blob before the first renames
+                store.put("blobs/x.png", b"second")
+            replace(src, dst)
+
+        monkeypatch.setattr(os, "replace", replace_after_rival_write)
+        store.put("blobs/x.png", b"first")
+        assert temp_files[0] != temp_files[1]
+        assert (tmp_path / "blobs" / "x.png").read_bytes() == b"first"
+        assert [p.name for p in (tmp_path / "blobs").iterdir()] == ["x.png"]
+
+
+class TestPrune:
+    def _age(self, path, seconds):
+        stat = path.stat()
+        os.utime(path, (stat.st_atime - seconds, stat.st_mtime - seconds))
+
+    def test_expired_entries_and_their_blobs_are_removed(self, tmp_path):
+        cache = _cache(tmp_path, ttl_seconds=60)
+        cache.put(MODEL, PROMPT, "1:1", 2, [b"shared", b"old-only"])
+        cache.put(MODEL, "fresh prompt", "1:1", 1, [b"shared"])
+        entry_path = tmp_path / "entries" / f"{ImagenCache.key(MODEL, PROMPT, '1:1', 2)}.json"
+        entry = json.loads(entry_path.read_text())
+        entry["created_at"] -= 120
+        entry_path.write_text(json.dumps(entry))
+        for blob in (tmp_path / "blobs").iterdir():
+            self._age(blob, 7200)
+
+        assert cache.prune() == (1, 1)
+        assert not entry_path.exists()
+        assert cache.get(MODEL, "fresh prompt", "1:1", 1) == [b"shared"]
+        assert len(list((tmp_path / "blobs").iterdir())) == 1
+
+    def test_recent_unreferenced_blobs_are_kept(self, tmp_path):
+        cache = _cache(tmp_path)
+        # A put() in progress: blob written, entry not yet
+        cache.store.put("blobs/pending.png", b"pending")
+        cache.store.put("entries/partial.json", b"{")
+        assert cache.prune() == (0, 0)
+        self._age(tmp_path / "blobs" / "pending.png", 7200)
+        self._age(tmp_path / "entries" / "partial.json", 7200)
+        assert cache.prune() == (1, 1)
+        assert list((tmp_path / "blobs").iterdir()) == []
@@ -0,0 +1,71 @@
+"""Tests for the markdown renderer used for Substack drafts."""
+
+from hobson.tools.markdown_html import render
+
+
+def test_blocks():
+    markdown = (
+        "# Week 12\n\n"
+        "First line\nsame paragraph.  \nAfter a break.\n\n"
+        "### Details\n\n"
+        "> Quoted\n> text\n\n"
+        "---\n\n"
+        "```\nx = 1 < 2\n```\n"
+    )
+    assert render(markdown) == (
+        "<h2>Week 12</h2>\n"
+        "<p>First line same paragraph.<br>After a break.</p>\n"
+        "<h3>Details</h3>\n"
+        "<blockquote><p>Quoted text</p></blockquote>\n"
+        "<hr>\n"
+        "<pre><code>x = 1 &lt; 2</code></pre>"
+    )
+
+
+def test_lists():
+    markdown = "- one\n  continued\n  - nested\n- two\n\n1. first\n2. second\nParagraph."
+    assert render(markdown) == (
+        "<ul><li>one continued<ul><li>nested</li></ul></li><li>two</li></ul>\n"
+        "<ol><li>first</li><li>second Paragraph.</li></ol>"
+    )
+    assert render("Intro:\n- a\n- b") == "<p>Intro:</p>\n<ul><li>a</li><li>b</li></ul>"
+
+
+def test_inline():
+    assert render("**Bold**, *italic*, __b__ and _i_, `a*b*c` and snake_case_name, 2 * 3 * 4.") == (
+        "<p><strong>Bold</strong>, <em>italic</em>, <strong>b</strong> and <em>i</em>, "
+        "<code>a*b*c</code> and snake_case_name, 2 * 3 * 4.</p>"
+    )
+    assert render('A [link](https://example.com/a_b_?x=1&y=2 "The title") here.') == (
+        '<p>A <a href="https://example.com/a_b_?x=1&amp;y=2" title="The title">link</a> here.</p>'
+    )
+
+
+def test_images():
+    assert render("![Sticker mockup](https://cdn.example.com/s.png)") == (
+        '<figure><img src="https://cdn.example.com/s.png" alt="Sticker mockup"></figure>'
+    )
+    assert render("See ![x](https://e.com/i.png) inline") == (
+        '<p>See <img src="https://e.com/i.png" alt="x"> inline</p>'
+    )
+
+
+def test_urls_with_parentheses():
+    assert render("[Foo](https://en.wikipedia.org/wiki/Foo_(bar)) and more") == (
+        '<p><a href="https://en.wikipedia.org/wiki/Foo_(bar)">Foo</a> and more</p>'
+    )
+    assert render("![Chart](/img/chart_(v2).png)") == '<figure><img src="/img/chart_(v2).png" alt="Chart"></figure>'
+    assert render("(see [notes](https://e.com/n))") == '<p>(see <a href="https://e.com/n">notes</a>)</p>'
+
+
+def test_unsafe_url_schemes_are_dropped():
+    assert render("[x](javascript:alert(1)) and [y](JavaScript:void(0))") == "<p>x and y</p>"
+    assert render("![pixel](data:image/png;base64,AAAA)") == "<p>pixel</p>"
+    assert render("[mail](mailto:hobson@example.com), [top](#top), [page](posts/week-3)") == (
+        '<p><a href="mailto:hobson@example.com">mail</a>, <a href="#top">top</a>, '
+        '<a href="posts/week-3">page</a></p>'
+    )
+
+
+def test_html_is_escaped():
+    assert render("<script>alert(1)</script> & co") == "<p>&lt;script&gt;alert(1)&lt;/script&gt; &amp; co</p>"
@@ -0,0 +1,91 @@
+"""Tests for check_topic_novelty and the topic index sources (sources stubbed)."""
+
+import json
+
+import pytest
+
+from hobson.config import settings
+from hobson.tools import git_ops, novelty, obsidian, substack
+from hobson.tools.site_index import SiteIndex
+from hobson.tools.vault_index import VaultIndex
+
+CONCEPT = f"{novelty.CONCEPTS_PREFIX}Effort Compounds.md"
+
+
+class FakeSubstack:
+    def __init__(self, posts):
+        self.posts = posts
+        self.calls = []
+
+    def get_published_posts(self, offset=0, limit=25):
+        self.calls.append(offset)
+        return {"posts": self.posts[offset: offset + limit]}
+
+    def get_drafts(self, filter=None, offset=None, limit=None):
+        return []
+
+
+@pytest.fixture
+def sources(monkeypatch, tmp_path):
+    site = SiteIndex()
+    blog = tmp_path / "site/src/data/blog"
+    blog.mkdir(parents=True)
+    (blog / "type-ii.md").write_text(
+        '---\ntitle: "Type II"\n---\n\nMiserable while it happens, valued in hindsight.\n'
+    )
+    site.refresh_from_directory(str(tmp_path))
+    monkeypatch.setattr(settings, "site_checkout_path", str(tmp_path))
+    monkeypatch.setattr(git_ops, "refresh_site_index", lambda: site)
+
+    vault = VaultIndex()
+    vault.sync({CONCEPT: None}, lambda path: "# Effort Compounds\n\nContour lines sticker, compounding effort.")
+    monkeypatch.setattr(obsidian, "refresh_vault_index", lambda: vault)
+
+    api = FakeSubstack([
+        {"id": i, "title": f"Week {i}", "subtitle": f"<p>Operational report {i}: revenue</p>"} for i in range(30)
+    ])
+    monkeypatch.setattr(substack, "_get_api", lambda refresh=False: api)
+    monkeypatch.setattr(settings, "substack_index_path", str(tmp_path / "substack.json"))
+    monkeypatch.setattr(substack, "_posts_index", None)
+    monkeypatch.setattr(substack, "_posts_refreshed_at", None)
+    monkeypatch.setattr(settings, "topic_index_path", str(tmp_path / "topics.json"))
+    monkeypatch.setattr(novelty, "_topic_index", None)
+    return api
+
+
+def test_backfill_pages_through_substack(sources):
+    counts = novelty.sync_topic_index(backfill=True)
+    assert counts == {"blog": 1, "concepts": 1, "substack drafts": 0, "substack posts": 30}
+    assert sources.calls == [0, 25]
+
+    # A normal sync reads the local posts index, refreshed at most every few minutes
+    assert novelty.sync_topic_index() == {"blog": 0, "concepts": 0, "substack drafts": 0, "substack posts": 0}
+    assert sources.calls == [0, 25]
+    assert len(novelty.topic_index()) == 32
+
+
+def test_check_topic_novelty(sources, monkeypatch):
+    novelty.sync_topic_index(backfill=True)
+    # Checks only query the local index; syncing is the scheduler's job
+    monkeypatch.setattr(substack, "_get_api", lambda refresh=False: pytest.fail("synced in a check"))
+    monkeypatch.setattr(git_ops, "refresh_site_index", lambda: pytest.fail("synced in a check"))
+    monkeypatch.setattr(obsidian, "refresh_vault_index", lambda: pytest.fail("synced in a check"))
+    result = json.loads(novelty.check_topic_novelty.invoke(
+        {"text": "Type II: miserable while it happens, valued in hindsight", "kinds": "blog"}
+    ))
+    assert result["status"] == "similar_found"
+    assert result["matches"][0] == {"kind": "blog", "title": "Type II", "id": "type-ii", "jaccard": 1.0}
+
+    result = json.loads(novelty.check_topic_novelty.invoke({"text": "Sourdough baking patience"}))
+    assert result == {"status": "novel", "indexed_documents": 32, "matches": []}
+    assert json.loads(novelty.check_topic_novelty.invoke({"text": "x", "kinds": "tweets"}))["status"] == "error"
+
+
+def test_unreachable_source_keeps_its_documents(sources, monkeypatch):
+    novelty.sync_topic_index(backfill=True)
+    monkeypatch.setattr(substack, "_get_api", lambda refresh=False: None)
+    monkeypatch.setattr(git_ops, "refresh_site_index", lambda: None)
+    substack._mark_posts_stale()
+    # Substack posts come from the index as last synced
+    assert novelty.sync_topic_index() == {"concepts": 0, "substack drafts": 0, "substack posts": 0}
+    assert len(novelty.topic_index()) == 32
@@ -0,0 +1,125 @@
+"""Tests for the Obsidian tools: sharded daily log and vault search (REST API mocked with pytest-httpx)."""
+
+from datetime import date
+from urllib.parse import quote
+
+import pytest
+
+from hobson.tools import obsidian
+from hobson.tools.vault_client import VaultClient
+from hobson.tools.vault_index import VaultIndex
+
+
+class FixedDate(date):
+    @classmethod
+    def today(cls):
+        return cls(2026, 3, 10)
+
+
+def _url(path):
+    return f"{obsidian._BASE_URL}/vault/{quote(path)}"
+
+
+@pytest.fixture(autouse=True)
+def _reset(monkeypatch):
+    monkeypatch.setattr(obsidian, "date", FixedDate)
+    monkeypatch.setattr(obsidian, "_days_started", set())
+    monkeypatch.setattr(obsidian, "_legacy_sections", None)
+    monkeypatch.setattr(obsidian, "_vault_client", VaultClient(obsidian._BASE_URL, "key", coalesce_window=0))
+
+
+TODAY = obsidian._daily_log_path("2026-03-10")
+
+
+class TestAppendToDailyLog:
+    def test_first_entry_of_the_day_adds_heading(self, httpx_mock):
+        httpx_mock.add_response(method="GET", url=_url(TODAY), status_code=404)
+        httpx_mock.add_response(method="POST", url=_url(TODAY))
+        obsidian.append_to_daily_log.invoke({"entry": "Morning briefing sent"})
+        post = httpx_mock.get_requests(method="POST")[0]
+        assert post.content == b"## 2026-03-10\n- Morning briefing sent\n"
+
+    def test_later_entries_skip_the_read(self, httpx_mock):
+        httpx_mock.add_response(method="GET", url=_url(TODAY), text="## 2026-03-10\n- first\n")
+        httpx_mock.add_response(method="POST", url=_url(TODAY), is_reusable=True)
+        obsidian.append_to_daily_log.invoke({"entry": "second"})
+        obsidian.append_to_daily_log.invoke({"entry": "third"})
+        assert len(httpx_mock.get_requests(method="GET")) == 1
+        assert [r.content for r in httpx_mock.get_requests(method="POST")] == [b"- second\n", b"- third\n"]
+
+    def test_never_reads_the_legacy_log(self, httpx_mock):
+        httpx_mock.add_response(method="GET", url=_url(TODAY), status_code=404)
+        httpx_mock.add_response(method="POST", url=_url(TODAY))
+        obsidian.append_to_daily_log.invoke({"entry": "x"})
+        assert all("Daily%20Log.md" not in str(r.url) for r in httpx_mock.get_requests())
+
+
+class TestReadDailyLog:
+    def test_reads_only_requested_days_oldest_first(self, httpx_mock):
+        yesterday = obsidian._daily_log_path("2026-03-09")
+        httpx_mock.add_response(method="GET", url=_url(yesterday), text="## 2026-03-09\n- a\n")
+        httpx_mock.add_response(method="GET", url=_url(TODAY), text="## 2026-03-10\n- b\n")
+        result = obsidian.read_daily_log.invoke({"days": 2})
+        assert result == "## 2026-03-09\n- a\n\n## 2026-03-10\n- b"
+        assert len(httpx_mock.get_requests()) == 2
+
+    def test_falls_back_to_legacy_log_once(self, httpx_mock):
+        legacy = "# Daily Log\n\n## 2026-03-08\n- old one\n\n## 2026-03-09\n- old two\n"
+        httpx_mock.add_response(method="GET", url=_url(obsidian._daily_log_path("2026-03-08")), status_code=404)
+        httpx_mock.add_response(method="GET", url=_url(obsidian._daily_log_path("2026-03-09")), status_code=404)
+        httpx_mock.add_response(method="GET", url=_url(TODAY), text="## 2026-03-10\n- new\n")
+        httpx_mock.add_response(method="GET", url=_url(obsidian.LEGACY_DAILY_LOG), text=legacy)
+        result = obsidian.read_daily_log.invoke({"days": 3})
+        assert result == "## 2026-03-08\n- old one\n\n## 2026-03-09\n- old two\n\n## 2026-03-10\n- new"
+        legacy_reads = [r for r in httpx_mock.get_requests() if str(r.url).endswith("Daily%20Log.md")]
+        assert len(legacy_reads) == 1
+
+    def test_failed_legacy_read_is_retried(self, httpx_mock):
+        httpx_mock.add_response(method="GET", url=_url(TODAY), status_code=404, is_reusable=True)
+        httpx_mock.add_response(method="GET", url=_url(obsidian.LEGACY_DAILY_LOG), status_code=503)
+        httpx_mock.add_response(method="GET", url=_url(obsidian.LEGACY_DAILY_LOG), text="## 2026-03-10\n- old\n")
+        assert obsidian.read_daily_log.invoke({"days": 1}) == "No daily log entries for the last 1 day(s)."
+        assert obsidian.read_daily_log.invoke({"days": 1}) == "## 2026-03-10\n- old"
+
+    def test_days_are_clamped(self, httpx_mock):
+        httpx_mock.add_response(method="GET", status_code=404, is_reusable=True)
+        obsidian.read_daily_log.invoke({"days": 10_000})
+        day_reads = [r for r in httpx_mock.get_requests() if "Daily%20Log/" in str(r.url)]
+        assert len(day_reads) == obsidian._MAX_LOG_DAYS
+
+    def test_no_entries(self, httpx_mock):
+        httpx_mock.add_response(method="GET", url=_url(TODAY), status_code=404)
+        httpx_mock.add_response(method="GET", url=_url(obsidian.LEGACY_DAILY_LOG), status_code=404)
+        assert obsidian.read_daily_log.invoke({"days": 1}) == "No daily log entries for the last 1 day(s)."
+
+
+class TestSearchVault:
+    def test_indexes_over_rest_then_serves_from_the_index(self, httpx_mock, monkeypatch):
+        index = VaultIndex()
+        monkeypatch.setattr(obsidian, "_vault_index", index)
+        monkeypatch.setattr(obsidian, "_index_listed_at", None)
+        monkeypatch.setattr(
+            obsidian, "_vault_client",
+            VaultClient(obsidian._BASE_URL, "key", coalesce_window=0, on_change=index.mark_dirty),
+        )
+        content, strategy = obsidian.INDEXED_FOLDERS
+        concept = f"{content}/Designs/Concepts/Effort Compounds.md"
+        httpx_mock.add_response(method="GET", url=_url(f"{content}/"), json={"files": ["Designs/"]})
+        httpx_mock.add_response(method="GET", url=_url(f"{content}/Designs/"), json={"files": ["Concepts/"]})
+        httpx_mock.add_response(
+            method="GET", url=_url(f"{content}/Designs/Concepts/"), json={"files": ["Effort Compounds.md"]}
+        )
+        httpx_mock.add_response(method="GET", url=_url(f"{strategy}/"), status_code=404)
+        httpx_mock.add_response(method="GET", url=_url(concept), text="# Effort Compounds\n\nContour lines.")
+
+        result = obsidian.search_vault.invoke({"query": "contour"})
+        assert result.startswith(f"{concept} (Effort Compounds)")
+
+        # Within the listing interval only notes we wrote are re-read
+        new = f"{content}/Designs/Concepts/Type II.md"
+        httpx_mock.add_response(method="PUT", url=_url(new))
+        httpx_mock.add_response(method="GET", url=_url(new), text="# Type II\n\nEndurance contour.")
+        obsidian.write_note.invoke({"path": new, "content": "# Type II\n\nEndurance contour."})
+        result = obsidian.search_vault.invoke({"query": "endurance"})
+        assert result.startswith(f"{new} (Type II)")
+        assert len(httpx_mock.get_requests(method="GET")) == 6
@@ -0,0 +1,260 @@
+"""Tests for banded print-file rendering."""
+
+import io
+
+import numpy as np
+import pytest
+from PIL import Image, ImageChops, ImageDraw
+
+from hobson.tools.print_file import (
+    BackgroundKey,
+    _estimate_background,
+    _extract_alpha,
+    _iter_bands,
+    _scaled_size,
+    _trim_box,
+    render_print_file,
+)
+
+
+def _make_design(width: int = 512, height: int = 512, mode: str = "RGBA") -> bytes:
+    """Charcoal shapes on a transparent background, encoded as PNG."""
+    img = Image.new(mode, (width, height), (0, 0, 0, 0) if mode == "RGBA" else (245, 240, 235))
+    draw = ImageDraw.Draw(img)
+    for i in range(8):
+        draw.ellipse((20 + i * 50, 30 + i * 40, 90 + i * 50, 160 + i * 40), fill=(26, 26, 26, 255))
+    draw.text((40, height - 60), "BUILDS CHARACTER", fill=(26, 26, 26, 255))
+    buf = io.BytesIO()
+    img.save(buf, format="PNG")
+    return buf.getvalue()
+
+
+class TestScaledSize:
+    def test_below_minimum_scales_to_cover_both_dimensions(self):
+        assert _scaled_size(1024, 1024, (1500, 1500)) == (1500, 1500)
+        assert _scaled_size(1024, 1024, (5400, 7200)) == (7200, 7200)
+
+    def test_at_minimum_returns_none(self):
+        assert _scaled_size(1500, 1500, (1500, 1500)) is None
+        assert _scaled_size(1024, 1024, (1000, 1000)) is None
+
+    def test_aspect_ratio_is_kept(self):
+        assert _scaled_size(1000, 500, (1500, 1500)) == (3000, 1500)
+
+    def test_unknown_product_returns_none(self):
+        assert _scaled_size(100, 100, None) is None
+
+
+class TestRenderPrintFile:
+    def test_upscaled_output_is_valid_png_at_target_size(self, tmp_path):
+        out = tmp_path / "print.png"
+        info = render_print_file(_make_design(), (1500, 1500), str(out), band_rows=100)
+        assert info["upscaled"] is True
+        assert (info["width"], info["height"]) == (1500, 1500)
+        assert info["bytes"] == out.stat().st_size
+        with Image.open(out) as img:
+            img.load()
+            assert img.size == (1500, 1500)
+
+    def test_banded_output_matches_full_resize(self, tmp_path):
+        """Bands must join without seams: alpha within rounding of a one-shot resize."""
+        src = _make_design()
+        out = tmp_path / "print.png"
+        render_print_file(src, (1500, 1500), str(out), band_rows=64)
+        expected = Image.open(io.BytesIO(src)).resize((1500, 1500), Image.LANCZOS)
+        with Image.open(out) as img:
+            diff = ImageChops.difference(img.getchannel("A"), expected.getchannel("A"))
+            assert diff.getextrema()[1] <= 1
+
+    def test_rgb_source_stays_rgb(self, tmp_path):
+        out = tmp_path / "print.png"
+        render_print_file(_make_design(mode="RGB"), (1000, 1000), str(out))
+        with Image.open(out) as img:
+            assert img.mode == "RGB"
+            assert img.size == (1000, 1000)
+
+    def test_large_enough_source_not_upscaled(self, tmp_path):
+        src = _make_design(1600, 1600)
+        out = tmp_path / "print.png"
+        info = render_print_file(src, (1500, 1500), str(out))
+        assert info["upscaled"] is False
+        assert (info["width"], info["height"]) == (1600, 1600)
+
+
+def _rgba_pixels(path_or_bytes) -> np.ndarray:
+    """Decode to RGBA with fully transparent pixels normalised to zero."""
+    src = io.BytesIO(path_or_bytes) if isinstance(path_or_bytes, bytes) else path_or_bytes
+    with Image.open(src) as img:
+        pixels = np.array(img.convert("RGBA"))
+    pixels[pixels[..., 3] == 0] = 0
+    return pixels
+
+
+def _lossless_sources() -> dict[str, bytes]:
+    """One source per encoding path: flat colors, anti-aliased charcoal, noise."""
+    flat = Image.new("RGBA", (400, 300), (0, 0, 0, 0))
+    draw = ImageDraw.Draw(flat)
+    draw.rectangle((50, 50, 350, 250), fill=(26, 26, 26, 255))
+    draw.rectangle((150, 100, 250, 200), fill=(139, 69, 19, 128))
+    noise = Image.fromarray(np.random.default_rng(1).integers(0, 256, (300, 200, 3), dtype=np.uint8))
+    sources = {"charcoal": _make_design()}
+    for name, img in (("flat", flat), ("noise", noise)):
+        buf = io.BytesIO()
+        img.save(buf, format="PNG")
+        sources[name] = buf.getvalue()
+    return sources
+
+
+class TestEncoding:
+    def test_flat_artwork_uses_palette_losslessly(self, tmp_path):
+        img = Image.new("RGBA", (400, 300), (0, 0, 0, 0))
+        draw = ImageDraw.Draw(img)
+        draw.rectangle((50, 50, 350, 250), fill=(26, 26, 26, 255))
+        draw.rectangle((150, 100, 250, 200), fill=(139, 69, 19, 255))
+        buf = io.BytesIO()
+        img.save(buf, format="PNG")
+        out = tmp_path / "print.png"
+        info = render_print_file(buf.getvalue(), None, str(out), band_rows=64)
+        assert info["mode"] == "P"
+        assert info["colors"] == 3
+        with Image.open(out) as encoded:
+            assert encoded.mode == "P"
+        assert (_rgba_pixels(out) == _rgba_pixels(buf.getvalue())).all()
+
+    def test_antialiased_charcoal_uses_gray_alpha_losslessly(self, tmp_path):
+        src = _make_design()
+        out = tmp_path / "print.png"
+        info = render_print_file(src, (1500, 1500), str(out))
+        assert info["mode"] == "LA"
+        rendered = np.vstack(list(_iter_bands(
+            Image.open(io.BytesIO(src)), (1500, 1500)
+        )))
+        assert (_rgba_pixels(out) == rendered).all()
+
+    def test_photographic_content_uses_truecolor_losslessly(self, tmp_path):
+        noise = np.random.default_rng(0).integers(0, 256, (300, 200, 3), dtype=np.uint8)
+        buf = io.BytesIO()
+        Image.fromarray(noise).save(buf, format="PNG")
+        out = tmp_path / "print.png"
+        info = render_print_file(buf.getvalue(), None, str(out), band_rows=50)
+        assert info["mode"] == "RGB"
+        with Image.open(out) as encoded:
+            assert (np.array(encoded) == noise).all()
+
+    def test_upscaled_bands_are_resampled_once(self, tmp_path, monkeypatch):
+        calls = []
+        resize = Image.Image.resize
+
+        def counting_resize(self, *args, **kwargs):
+            calls.append(kwargs.get("box"))
+            return resize(self, *args, **kwargs)
+
+        monkeypatch.setattr(Image.Image, "resize", counting_resize)
+        render_print_file(_make_design(), (1500, 1500), str(tmp_path / "print.png"), band_rows=500)
+        assert len(calls) == 3
+
+    def test_reports_savings_against_a_default_rgba_png(self, tmp_path):
+        out = tmp_path / "print.png"
+        info = render_print_file(_make_design(), (1500, 1500), str(out))
+        buf = io.BytesIO()
+        Image.fromarray(_rgba_pixels(out)).save(buf, format="PNG")
+        assert info["default_bytes"] == pytest.approx(len(buf.getvalue()), rel=0.02)
+        assert info["bytes"] == out.stat().st_size < info["default_bytes"]
+        assert info["savings_pct"] == round(100 * (1 - info["bytes"] / info["default_bytes"]), 1)
+        assert info["within_printful_limits"] is True
+
+    @pytest.mark.parametrize(
+        ("source", "min_size", "mode"),
+        [
+            ("flat", None, "P"),
+            ("charcoal", (1500, 1500), "LA"),
+            ("noise", None, "RGB"),
+        ],
+    )
+    def test_written_png_decodes_to_the_rendered_pixels(self, tmp_path, source, min_size, mode):
+        src = _lossless_sources()[source]
+        out = tmp_path / "print.png"
+        info = render_print_file(src, min_size, str(out), band_rows=64)
+        assert info["mode"] == mode
+        with Image.open(io.BytesIO(src)) as img:
+            img = img.convert("RGBA")
+            size = _scaled_size(img.size[0], img.size[1], min_size) or img.size
+            rendered = np.vstack(list(_iter_bands(img, size, 64)))
+        with Image.open(out) as written:
+            decoded = np.array(written.convert("RGBA"))
+        assert np.array_equal(decoded, rendered)
+        with Image.open(out) as encoded:
+            assert round(encoded.info["dpi"][0]) == 300
+
+
+def _sticker_on_background(bg=(245, 240, 235), size=(600, 400)) -> bytes:
+    """Opaque charcoal artwork on a plain background, as Imagen often returns."""
+    img = Image.new("RGB", size, bg)
+    draw = ImageDraw.Draw(img)
+    draw.ellipse((200, 120, 400, 280), fill=(26, 26, 26))
+    draw.rectangle((250, 180, 350, 220), fill=bg)
+    buf = io.BytesIO()
+    img.save(buf, format="PNG")
+    return buf.getvalue()
+
+
+class TestBackgroundRemoval:
+    def test_estimate_background_from_border(self):
+        pixels = np.array(Image.open(io.BytesIO(_sticker_on_background())).convert("RGBA"))
+        key = _estimate_background(pixels)
+        assert key is not None
+        assert key.color == (245, 240, 235)
+        assert key.ink > key.low
+
+    def test_transparent_border_is_not_keyed(self):
+        pixels = np.array(Image.open(io.BytesIO(_make_design())))
+        assert _estimate_background(pixels) is None
+
+    def test_busy_border_is_not_keyed(self):
+        noise = np.random.default_rng(1).integers(0, 256, (200, 200, 4), dtype=np.uint8)
+        noise[..., 3] = 255
+        assert _estimate_background(noise) is None
+
+    def test_extract_alpha_soft_edge(self):
+        key = BackgroundKey(color=(255, 255, 255), low=24, ink=231)
+        pixels = np.array([[[255, 255, 255, 255], [24, 24, 24, 255], [128, 128, 128, 255]]], dtype=np.uint8)
+        out = _extract_alpha(pixels, key)
+        assert out[0, 0, 3] == 0
+        assert out[0, 1, 3] == 255
+        assert 0 < out[0, 2, 3] < 255
+        # The half-covered edge pixel is un-blended back toward the ink color
+        assert out[0, 2, 0] < 64
+
+    def test_only_background_connected_to_the_border_is_keyed(self):
+        key = BackgroundKey(color=(255, 255, 255), low=24, ink=96)
+        pixels = np.full((9, 9, 4), 255, dtype=np.uint8)
+        pixels[2:7, 2:7, :3] = 0
+        pixels[4, 4, :3] = 255  # enclosed hole
+        pixels[4, 6:, :3] = 255  # notch open to the border
+        out = _extract_alpha(pixels, key)
+        assert out[0, 0, 3] == 0 and out[4, 5, 3] == 255
+        assert out[4, 4, 3] == 255
+        assert out[4, 6, 3] == 0
+
+    def test_trim_box_adds_margin_and_clips(self):
+        alpha = np.zeros((100, 200), dtype=np.uint8)
+        alpha[40:60, 50:150] = 255
+        assert _trim_box(alpha, margin=0.1) == (40, 30, 160, 70)
+        assert _trim_box(np.zeros((10, 10), dtype=np.uint8)) is None
+
+    def test_render_removes_background_and_trims(self, tmp_path):
+        out = tmp_path / "sticker.png"
+        info = render_print_file(
+            _sticker_on_background(), (1500, 1500), str(out), remove_background=True
+        )
+        assert info["background"] == "#f5f0eb"
+        left, top, right, bottom = info["trim_box"]
+        assert left < 200 and right > 400 and top < 120 and bottom > 280
+        assert info["width"] >= 1500 and info["height"] >= 1500
+        pixels = _rgba_pixels(out)
+        assert (pixels[0, 0] == 0).all()
+        # Left side of the ring is opaque ink. The background-colored bar in
+        # the middle is enclosed by ink, so it is artwork and stays opaque.
+        middle = pixels.shape[0] // 2
+        assert pixels[middle, 200, 3] == 255
+        assert (pixels[middle, pixels.shape[1] // 2] == (245, 240, 235, 255)).all()
@@ -0,0 +1,97 @@
+"""Tests for the site content index (pure module, no network)."""
+
+from pathlib import Path
+
+from hobson.tools.site_index import SiteIndex, parse_frontmatter, title_tokens
+
+SITE_BLOG = Path(__file__).resolve().parents[3] / "site/src/data/blog"
+
+
+def _post(title: str, tags: str = "[endurance]") -> str:
+    return f'---\ntitle: "{title}"\ndescription: "x"\ntags: {tags}\n---\n\nBody.\n'
+
+
+class TestFrontmatter:
+    def test_parses_real_site_post(self):
+        meta = parse_frontmatter((SITE_BLOG / "type-ii.md").read_text())
+        assert meta["title"]
+        assert meta["author"] == "Builds Character"
+        assert isinstance(meta["tags"], list) and meta["tags"]
+
+    def test_quotes_lists_and_missing_block(self):
+        meta = parse_frontmatter('---\nname: "Say \\"Hi\\""\nprice: 4.99\ntags: [a, "b c"]\n---\n')
+        assert meta == {"name": 'Say "Hi"', "price": "4.99", "tags": ["a", "b c"]}
+        assert parse_frontmatter("no frontmatter") == {}
+
+
+class TestRefreshFromTree:
+    def test_only_changed_blobs_are_fetched(self):
+        blobs = {"s1": _post("Effort Compounds"), "s2": _post("Type II"), "s3": _post("Type II, Again")}
+        fetched = []
+
+        def fetch(sha):
+            fetched.append(sha)
+            return blobs[sha]
+
+        tree = [
+            {"path": "site/src/data/blog/effort-compounds.md", "type": "blob", "sha": "s1"},
+            {"path": "site/src/data/blog/type-ii.md", "type": "blob", "sha": "s2"},
+            {"path": "site/src/pages/index.astro", "type": "blob", "sha": "x"},
+            {"path": "site/src/data/blog", "type": "tree", "sha": "t"},
+        ]
+        index = SiteIndex()
+        assert index.refresh_from_tree("root1", tree, fetch) == 2
+        assert index.refresh_from_tree("root1", tree, fetch) == 0
+
+        tree[1] = {"path": "site/src/data/blog/type-ii.md", "type": "blob", "sha": "s3"}
+        del tree[0]
+        assert index.refresh_from_tree("root2", tree, fetch) == 1
+        assert fetched == ["s1", "s2", "s3"]
+        assert index.get("blog", "effort-compounds") is None
+        assert index.get("blog", "type-ii").title == "Type II, Again"
+        assert len(index) == 1
+
+
+class TestRefreshFromDirectory:
+    def test_indexes_checkout_and_rereads_changed_files(self, tmp_path):
+        blog = tmp_path / "site/src/data/blog"
+        products = tmp_path / "site/src/data/products"
+        blog.mkdir(parents=True)
+        products.mkdir(parents=True)
+        (blog / "rain.md").write_text(_post("Rain on Day Three"))
+        (products / "type-ii-sticker.md").write_text('---\nname: "Type II Sticker"\nproduct_type: "sticker"\n---\n')
+
+        index = SiteIndex()
+        assert index.refresh_from_directory(str(tmp_path)) == 2
+        assert index.refresh_from_directory(str(tmp_path)) == 0
+        assert index.get("product", "type-ii-sticker").product_type == "sticker"
+        assert index.get("blog", "type-ii-sticker") is None
+
+        (blog / "rain.md").write_text(_post("Rain on Day Four, Revised"))
+        assert index.refresh_from_directory(str(tmp_path)) == 1
+        assert index.get("blog", "rain").title == "Rain on Day Four, Revised"
+
+    def test_real_site_checkout(self):
+        index = SiteIndex()
+        index.refresh_from_directory(str(SITE_BLOG.parents[3]))
+        assert index.get("blog", "type-ii") is not None
+
+
+class TestSimilarTitles:
+    def test_ranks_overlapping_titles_and_ignores_stopwords(self):
+        index = SiteIndex()
+        tree = [
+            {"path": f"site/src/data/blog/{slug}.md", "type": "blob", "sha": slug}
+            for slug in ("a", "b", "c")
+        ]
+        titles = {
+            "a": "Conditions Were Suboptimal",
+            "b": "When Conditions Are Suboptimal",
+            "c": "The Part You Don't Post",
+        }
+        index.refresh_from_tree("r", tree, lambda sha: _post(titles[sha]))
+
+        matches = index.similar_titles("Conditions Were Suboptimal Again")
+        assert [e.slug for e, _ in matches] == ["a", "b"]
+        assert index.similar_titles("The Art of the Post") == []
+        assert title_tokens("The Part You Don't Post") == {"part", "dont", "post"}
@@ -0,0 +1,135 @@
+"""Tests for the shared Substack session and posts index (python-substack Api faked)."""
+
+import hashlib
+from typing import ClassVar
+
+import pytest
+import substack as substack_lib
+from substack.exceptions import SubstackAPIException
+
+from hobson.config import settings
+from hobson.tools import substack
+
+
+class FakeApi:
+    instances: ClassVar[list["FakeApi"]] = []
+
+    def __init__(self, cookies_string, publication_url, timeout=None):
+        FakeApi.instances.append(self)
+        self.expired = False
+        self.profile_checks = 0
+        self.drafts_posted = []
+        self.posts = [
+            {"id": 2, "title": "Week 2", "slug": "week-2", "post_date": "2026-01-09T15:00:00Z"},
+            {"id": 1, "title": "Week 1", "slug": "week-1", "post_date": "2026-01-02T15:00:00Z"},
+        ]
+
+    def _check(self):
+        if self.expired:
+            raise SubstackAPIException(401, '{"error": "Not authorized"}')
+
+    def get_user_profile(self):
+        self.profile_checks += 1
+        self._check()
+        return {"id": 1}
+
+    def post_draft(self, body):
+        self._check()
+        self.drafts_posted.append(body)
+        return {"id": 77}
+
+    def publish_draft(self, draft_id, send=True):
+        self._check()
+        self.posts.insert(0, {"id": draft_id, "title": "Week 3", "slug": "week-3", "post_date": "2026-01-16T15:00:00Z"})
+
+    def get_published_posts(self, offset=0, limit=25):
+        self._check()
+        return self.posts[offset: offset + limit]
+
+    def get_drafts(self, filter=None, offset=None, limit=None):
+        self._check()
+        drafts = [{"id": 77, "draft_title": "Week 3", "draft_updated_at": "2026-01-15T10:00:00Z"}]
+        return drafts[offset or 0: (offset or 0) + (limit or len(drafts))]
+
+
+@pytest.fixture
+def api(monkeypatch, tmp_path):
+    FakeApi.instances = []
+    monkeypatch.setattr(substack_lib, "Api", FakeApi)
+    monkeypatch.setattr(settings, "substack_cookies", "substack.sid=abc")
+    monkeypatch.setattr(settings, "substack_index_path", str(tmp_path / "substack.json"))
+    monkeypatch.setattr(substack, "_api", None)
+    monkeypatch.setattr(substack, "_posts_index", None)
+    monkeypatch.setattr(substack, "_posts_refreshed_at", None)
+
+
+def test_session_is_shared(api):
+    substack.create_substack_draft.invoke({"title": "A", "body_markdown": "a"})
+    substack.create_substack_draft.invoke({"title": "B", "body_markdown": "b"})
+    assert len(FakeApi.instances) == 1
+    assert len(FakeApi.instances[0].drafts_posted) == 2
+
+
+def test_draft_is_rendered_and_signed_over_the_markdown(api):
+    markdown = "## Hobson's Log\n\nTraffic: **12** visitors."
+    result = substack.create_substack_draft.invoke({"title": "Week 3", "body_markdown": markdown, "subtitle": "s"})
+    digest = hashlib.sha256(markdown.encode()).hexdigest()[:16]
+    assert f"Content hash: {digest}" in result
+    (body,) = FakeApi.instances[0].drafts_posted
+    assert body == {
+        "title": "Week 3",
+        "subtitle": "s",
+        "type": "newsletter",
+        "body": "<h2>Hobson&#x27;s Log</h2>\n<p>Traffic: <strong>12</strong> visitors.</p>"
+        f"<hr><p><em>source-sha256: {digest}</em></p>",
+    }
+
+
+def test_draft_frontmatter_is_neither_rendered_nor_signed(api):
+    body = "Traffic: **12** visitors."
+    markdown = f"---\ntitle: Week 3\nstatus: draft\ncontent_hash: 0123abcd\n---\n\n{body}"
+    result = substack.create_substack_draft.invoke({"title": "Week 3", "body_markdown": markdown})
+    digest = hashlib.sha256(body.encode()).hexdigest()[:16]
+    assert f"Content hash: {digest}" in result
+    (posted,) = FakeApi.instances[0].drafts_posted
+    assert posted["body"] == f"<p>Traffic: <strong>12</strong> visitors.</p><hr><p><em>source-sha256: {digest}</em></p>"
+
+
+def test_expired_session_signs_in_again(api):
+    substack._get_api().expired = True
+    result = substack.create_substack_draft.invoke({"title": "A", "body_markdown": "a"})
+    assert result.startswith("Draft created on Substack: ID 77")
+    assert len(FakeApi.instances) == 2
+    assert len(FakeApi.instances[1].drafts_posted) == 1
+
+
+def test_idle_session_is_checked_before_reuse(api, monkeypatch):
+    first = substack._get_api()
+    monkeypatch.setattr(substack, "_api_checked_at", substack._api_checked_at - 31 * 60)
+    assert substack._get_api() is first
+    assert first.profile_checks == 1
+
+    first.expired = True
+    monkeypatch.setattr(substack, "_api_checked_at", substack._api_checked_at - 31 * 60)
+    assert substack._get_api() is not first
+
+
+def test_missing_cookies(api, monkeypatch):
+    monkeypatch.setattr(settings, "substack_cookies", "")
+    assert "SUBSTACK AUTH FAILED" in substack.create_substack_draft.invoke({"title": "A", "body_markdown": "x"})
+    assert "SUBSTACK AUTH FAILED" in substack.get_substack_posts.invoke({})
+
+
+def test_posts_come_from_the_local_index(api):
+    result = substack.get_substack_posts.invoke({"include_drafts": True})
+    assert "[2026-01-09] Week 2 (https://buildscharacter.substack.com/p/week-2)" in result
+    assert "[edited 2026-01-15] Week 3 (ID 77)" in result
+
+    # Served locally until the refresh interval passes or a post goes out
+    FakeApi.instances[0].posts.insert(0, {"id": 4, "title": "Week 4", "slug": "week-4", "post_date": "2026-01-23"})
+    assert "Week 4" not in substack.get_substack_posts.invoke({})
+    assert substack.publish_substack_draft.invoke({"draft_id": "77"}).startswith("Published draft 77")
+    result = substack.get_substack_posts.invoke({"include_drafts": True})
+    assert "[2026-01-23] Week 4" in result and "[2026-01-16] Week 3" in result
+    # Still in the fake's drafts listing, but now published
+    assert "No drafts on Substack." in result
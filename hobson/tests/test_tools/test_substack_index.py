@@ -0,0 +1,114 @@
+"""Tests for the local Substack posts index."""
+
+from hobson.tools.substack_index import SubstackIndex, post_from_api
+
+
+def published(n: int) -> dict:
+    return {
+        "id": n,
+        "title": f"Week {n}",
+        "slug": f"week-{n}",
+        "post_date": f"2026-01-{n:02d}T15:00:00.000Z",
+        "truncated_body_text": f"<p>Report {n} &amp; numbers</p>",
+    }
+
+
+class FakeFeed:
+    """Published posts newest first, paged, recording requested offsets."""
+
+    def __init__(self, count: int):
+        self.posts = [published(n) for n in range(count, 0, -1)]
+        self.drafts = []
+        self.calls = []
+
+    def published(self, offset, limit):
+        self.calls.append(offset)
+        return self.posts[offset: offset + limit]
+
+
+def test_post_from_api():
+    post = post_from_api(published(3), "published")
+    assert (post.id, post.title, post.slug, post.date[:10]) == ("3", "Week 3", "week-3", "2026-01-03")
+    assert post.text == "Report 3 & numbers"
+    draft = post_from_api({"id": 9, "draft_title": "Next week", "draft_updated_at": "2026-02-01"}, "draft")
+    assert (draft.title, draft.status, draft.date) == ("Next week", "draft", "2026-02-01")
+
+
+def test_incremental_refresh_stops_at_known_posts():
+    feed = FakeFeed(12)
+    index = SubstackIndex()
+    assert index.refresh(feed.published, page_size=5) == 12
+    assert feed.calls == [0, 5, 10]
+    assert [p.id for p in index.posts()][:3] == ["12", "11", "10"]
+
+    # Two new posts: one page is enough
+    feed.posts[:0] = [published(14), published(13)]
+    feed.calls.clear()
+    assert index.refresh(feed.published, page_size=5) == 2
+    assert feed.calls == [0]
+    assert index.newest().startswith("2026-01-14")
+
+
+def test_full_refresh_drops_unpublished_posts():
+    feed = FakeFeed(6)
+    index = SubstackIndex()
+    index.refresh(feed.published, page_size=5)
+    feed.posts = [p for p in feed.posts if p["id"] != 2]
+    assert index.refresh(feed.published, page_size=5) == 0
+    assert len(index) == 6
+    assert index.refresh(feed.published, page_size=5, full=True) == 1
+    assert "2" not in {p.id for p in index.posts()}
+
+
+def test_drafts_are_replaced_and_published_drafts_move_over():
+    feed = FakeFeed(2)
+    index = SubstackIndex()
+    drafts = [{"id": 3, "draft_title": "Week 3", "draft_updated_at": "2026-01-03"}, {"id": 4, "draft_title": "Idea"}]
+    index.refresh(feed.published, lambda offset, limit: drafts[offset: offset + limit])
+    assert [p.id for p in index.posts("draft")] == ["3", "4"]
+
+    feed.posts.insert(0, published(3))
+    drafts = [{"id": 3, "draft_title": "Week 3", "is_published": True}]
+    index.refresh(feed.published, lambda offset, limit: drafts[offset: offset + limit])
+    assert index.posts("draft") == []
+    assert index.posts("published")[0].id == "3"
+
+
+def test_save_and_load(tmp_path):
+    path = str(tmp_path / "cache" / "substack.json")
+    index = SubstackIndex()
+    index.refresh(FakeFeed(3).published)
+    index.save(path)
+
+    loaded = SubstackIndex.load(path)
+    assert loaded.posts() == index.posts()
+    assert loaded.synced_at == index.synced_at
+    assert SubstackIndex.load(str(tmp_path / "missing.json")).synced_at is None
+
+
+def test_drafts_are_listed_past_the_first_page():
+    feed = FakeFeed(1)
+    index = SubstackIndex()
+    drafts = [{"id": n, "draft_title": f"Idea {n}"} for n in range(100, 112)]
+    calls = []
+
+    def fetch_drafts(offset, limit):
+        calls.append(offset)
+        return drafts[offset: offset + limit]
+
+    index.refresh(feed.published, fetch_drafts, page_size=5)
+    assert calls == [0, 5, 10]
+    assert len(index.posts("draft")) == 12
+
+    # Drafts on later pages are kept, not dropped as missing
+    drafts = drafts[1:]
+    index.refresh(feed.published, fetch_drafts, page_size=5)
+    assert len(index.posts("draft")) == 11
+
+
+def test_drafts_listing_that_ignores_the_offset_ends():
+    feed = FakeFeed(1)
+    index = SubstackIndex()
+    drafts = [{"id": n, "draft_title": f"Idea {n}"} for n in range(10, 15)]
+    index.refresh(feed.published, lambda offset, limit: drafts, page_size=5)
+    assert len(index.posts("draft")) == 5
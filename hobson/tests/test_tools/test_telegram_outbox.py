@@ -0,0 +1,151 @@
+"""Tests for the rate-limited Telegram send queue (fake bot)."""
+
+import asyncio
+from datetime import timedelta
+
+import pytest
+import telegram.error
+
+from hobson.tools.telegram_outbox import TG_MAX_LEN, Outbox, TokenBucket
+
+
+class FakeBot:
+    def __init__(self, failures=None):
+        self.sent = []
+        self.failures = list(failures or [])
+
+    async def send_message(self, chat_id, text, parse_mode=None, reply_markup=None):
+        if self.failures:
+            raise self.failures.pop(0)
+        self.sent.append({"chat_id": chat_id, "text": text, "parse_mode": parse_mode, "reply_markup": reply_markup})
+        return len(self.sent)
+
+    async def edit_message_text(self, chat_id, message_id, text, parse_mode=None, reply_markup=None):
+        if self.failures:
+            raise self.failures.pop(0)
+        self.sent.append({"chat_id": chat_id, "edit": message_id, "text": text})
+        return message_id
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestTokenBucket:
+    def test_burst_then_refill(self):
+        clock = Clock()
+        bucket = TokenBucket(rate=2.0, capacity=3, clock=clock)
+        for _ in range(3):
+            assert bucket.delay() == 0
+            bucket.take()
+        assert bucket.delay() == pytest.approx(0.5)
+        clock.now = 0.5
+        assert bucket.delay() == 0
+
+    def test_refill_is_capped_at_capacity(self):
+        clock = Clock()
+        bucket = TokenBucket(rate=1.0, capacity=2, clock=clock)
+        bucket.take()
+        bucket.take()
+        clock.now = 100
+        bucket.take()
+        bucket.take()
+        assert bucket.delay() == pytest.approx(1.0)
+
+
+class TestOutbox:
+    async def test_send_returns_message(self):
+        bot = FakeBot()
+        outbox = Outbox(bot)
+        assert await outbox.send("1", "hello") == 1
+        assert bot.sent[0]["parse_mode"] == "Markdown"
+
+    async def test_per_chat_rate_spaces_sends(self):
+        bot = FakeBot()
+        outbox = Outbox(bot, chat_rate=20.0, chat_burst=1)
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        await asyncio.gather(*(outbox.send("1", f"m{i}") for i in range(3)))
+        # First send uses the burst token; the next two wait ~50ms each
+        assert loop.time() - start >= 0.09
+        assert [m["text"] for m in bot.sent] == ["m0", "m1", "m2"]
+
+    async def test_retry_after_pauses_and_retries(self):
+        bot = FakeBot(failures=[telegram.error.RetryAfter(timedelta(seconds=0.05))])
+        outbox = Outbox(bot)
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        await outbox.send("1", "hello")
+        assert loop.time() - start >= 0.04
+        assert [m["text"] for m in bot.sent] == ["hello"]
+        assert outbox.stats["retry_after"] == 1
+
+    async def test_bad_markdown_falls_back_to_plain_text(self):
+        bot = FakeBot(failures=[telegram.error.BadRequest("Can't parse entities")])
+        outbox = Outbox(bot)
+        await outbox.send("1", "*unbalanced")
+        assert bot.sent == [{"chat_id": "1", "text": "*unbalanced", "parse_mode": None, "reply_markup": None}]
+
+    async def test_queued_notifications_are_coalesced(self):
+        bot = FakeBot()
+        outbox = Outbox(bot)
+        results = await asyncio.gather(*(outbox.send("1", f"alert {i}", coalesce=True) for i in range(3)))
+        assert [m["text"] for m in bot.sent] == ["alert 0\n\nalert 1\n\nalert 2"]
+        assert results == [1, 1, 1]
+        assert outbox.stats["coalesced"] == 2
+
+    async def test_messages_with_buttons_are_never_merged(self):
+        bot = FakeBot()
+        outbox = Outbox(bot)
+        await asyncio.gather(
+            outbox.send("1", "a", coalesce=True),
+            outbox.send("1", "approve?", reply_markup="keyboard", coalesce=True),
+            outbox.send("1", "b", coalesce=True),
+            outbox.send("2", "other chat", coalesce=True),
+        )
+        assert [m["text"] for m in bot.sent] == ["a", "approve?", "b", "other chat"]
+        assert bot.sent[1]["reply_markup"] == "keyboard"
+
+    async def test_coalescing_respects_message_limit(self):
+        bot = FakeBot()
+        outbox = Outbox(bot)
+        big = "x" * (TG_MAX_LEN - 4)
+        await asyncio.gather(outbox.send("1", big, coalesce=True), outbox.send("1", "tail", coalesce=True))
+        assert [len(m["text"]) for m in bot.sent] == [len(big), 4]
+
+    async def test_failure_is_raised_to_every_waiter(self):
+        bot = FakeBot(failures=[RuntimeError("network down")])
+        outbox = Outbox(bot)
+        results = await asyncio.gather(
+            outbox.send("1", "a", coalesce=True),
+            outbox.send("1", "b", coalesce=True),
+            return_exceptions=True,
+        )
+        assert all(isinstance(r, RuntimeError) for r in results)
+        # The sender keeps running after a failure
+        assert await outbox.send("1", "c") == 1
+
+    async def test_later_edit_supersedes_queued_edit(self):
+        bot = FakeBot()
+        outbox = Outbox(bot)
+        results = await asyncio.gather(
+            outbox.edit("1", 7, "draft one"),
+            outbox.send("1", "other"),
+            outbox.edit("1", 7, "draft two"),
+        )
+        assert bot.sent == [
+            {"chat_id": "1", "text": "other", "parse_mode": "Markdown", "reply_markup": None},
+            {"chat_id": "1", "edit": 7, "text": "draft two"},
+        ]
+        assert results == [7, 1, 7]
+        assert outbox.stats["superseded"] == 1
+
+    async def test_unchanged_edit_is_not_an_error(self):
+        bot = FakeBot(failures=[telegram.error.BadRequest("Message is not modified")])
+        outbox = Outbox(bot)
+        assert await outbox.edit("1", 7, "same") is None
+        assert bot.sent == []
@@ -0,0 +1,92 @@
+"""Tests for streamed Telegram replies (fake bot, canned agent stream)."""
+
+import asyncio
+from types import SimpleNamespace
+
+from langchain_core.messages import AIMessage, AIMessageChunk, ToolMessage
+
+from hobson.tools.telegram_outbox import Outbox
+from hobson.tools.telegram_stream import PLACEHOLDER, StreamingReply, message_text, stream_agent
+
+
+class FakeBot:
+    def __init__(self):
+        self.calls = []
+
+    async def send_message(self, chat_id, text, parse_mode=None, reply_markup=None):
+        self.calls.append(("send", text, parse_mode))
+        return SimpleNamespace(message_id=len(self.calls))
+
+    async def edit_message_text(self, chat_id, message_id, text, parse_mode=None, reply_markup=None):
+        self.calls.append(("edit", text, parse_mode))
+        return SimpleNamespace(message_id=message_id)
+
+
+class FakeAgent:
+    def __init__(self, events, delay=0.0):
+        self.events = events
+        self.delay = delay
+
+    async def astream(self, inputs, config=None, stream_mode=None):
+        for event in self.events:
+            await asyncio.sleep(self.delay)
+            yield event
+
+
+def _events():
+    call = {"name": "read_note", "args": {}, "id": "call-1"}
+    return [
+        ("messages", (AIMessageChunk(content="Let me look"), {"langgraph_node": "agent"})),
+        ("updates", {"agent": {"messages": [AIMessage(content="Let me look", tool_calls=[call])]}}),
+        ("updates", {"tools": {"messages": [ToolMessage(content="ok", tool_call_id="call-1", name="read_note")]}}),
+        ("messages", (AIMessageChunk(content="All "), {"langgraph_node": "agent"})),
+        ("messages", (AIMessageChunk(content=[{"type": "text", "text": "done."}]), {"langgraph_node": "agent"})),
+        ("values", {"messages": ["final state"]}),
+    ]
+
+
+class TestStreamingReply:
+    async def test_render_shows_progress_then_text(self):
+        reply = StreamingReply(Outbox(FakeBot()), "1")
+        assert reply.render() == PLACEHOLDER
+        reply.add_text("preamble")
+        reply.tool_started("c1", "read_note")
+        reply.tool_finished("c1", "read_note")
+        reply.tool_started("c2", "search_vault")
+        reply.add_text("Answer")
+        assert reply.render() == "Ran read_note\nRunning search_vault...\n\nAnswer"
+
+    async def test_edits_are_throttled_to_latest_state(self):
+        bot = FakeBot()
+        reply = StreamingReply(Outbox(bot), "1", min_interval=0.05)
+        await reply.start()
+        for word in ["a", "b", "c", "d"]:
+            reply.add_text(word)
+            await asyncio.sleep(0)
+        await asyncio.sleep(0.08)
+        await reply.finish(["final answer", "overflow"])
+        # Placeholder, one edit for the burst of tokens, final edit, overflow chunk
+        assert bot.calls == [
+            ("send", PLACEHOLDER, None),
+            ("edit", "a", None),
+            ("edit", "abcd", None),
+            ("edit", "final answer", "Markdown"),
+            ("send", "overflow", "Markdown"),
+        ]
+
+    async def test_stream_agent_feeds_reply_and_returns_final_state(self):
+        bot = FakeBot()
+        reply = StreamingReply(Outbox(bot), "1", min_interval=0)
+        await reply.start()
+        final = await stream_agent(FakeAgent(_events(), delay=0.01), {}, {}, reply)
+        assert final == {"messages": ["final state"]}
+        assert reply.render() == "Ran read_note\n\nAll done."
+        edits = [text for kind, text, _ in bot.calls if kind == "edit"]
+        assert "Running read_note..." in edits
+        await reply.finish(["All done."])
+
+
+def test_message_text_handles_content_parts():
+    assert message_text("plain") == "plain"
+    assert message_text([{"type": "text", "text": "a"}, {"type": "tool_use"}, "b"]) == "ab"
+    assert message_text(None) == ""
@@ -0,0 +1,90 @@
+"""Tests for the MinHash/LSH topic index (pure module, no network)."""
+
+import time
+from pathlib import Path
+
+import numpy as np
+
+from hobson.tools.site_index import parse_frontmatter, strip_frontmatter
+from hobson.tools.topic_index import TopicIndex, shingles
+
+SITE_BLOG = Path(__file__).resolve().parents[3] / "site/src/data/blog"
+
+
+def _site_index() -> TopicIndex:
+    index = TopicIndex()
+    for path in sorted(SITE_BLOG.glob("*.md")):
+        text = path.read_text()
+        index.add(f"blog:{path.stem}", "blog", parse_frontmatter(text)["title"], strip_frontmatter(text))
+    return index
+
+
+def test_shingles_drop_stopwords_and_stem():
+    assert shingles("The miles you're running, and the mile you ran") == {"mile", "youre", "runn", "ran"}
+    assert shingles("alpha beta gamma delta", lead_words=2) == {"alpha", "beta"}
+
+
+def test_signature_agreement_estimates_jaccard():
+    a = "effort compounds over months and years of steady training on hard trails"
+    b = "effort compounds over years of deliberate practice on hard mountain trails"
+    sa, sb = shingles(a), shingles(b)
+    exact = len(sa & sb) / len(sa | sb)
+    estimates = [
+        np.mean(TopicIndex(seed=seed).signature(a) == TopicIndex(seed=seed).signature(b)) for seed in range(20)
+    ]
+    assert abs(np.mean(estimates) - exact) < 0.05
+
+
+def test_closest_published_post_ranks_first():
+    index = _site_index()
+    start = time.perf_counter()
+    matches = index.query(
+        "Type II fun: why hard experiences feel better in hindsight than in the moment. "
+        "The discomfort fades and the lesson stays."
+    )
+    assert (time.perf_counter() - start) < 0.05
+    assert matches[0].doc_id == "blog:type-ii"
+    assert matches[0].title.startswith("Type II")
+
+
+def test_identical_text_scores_one_and_kinds_filter():
+    index = TopicIndex()
+    index.add("concept:a", "concept", "Tuesday. Again.", "Quiet resolve mug, one color")
+    index.add("blog:a", "blog", "Tuesday. Again.", "Quiet resolve mug, one color")
+    assert [m.score for m in index.query("Tuesday. Again.\nQuiet resolve mug, one color")] == [1.0, 1.0]
+    assert [m.doc_id for m in index.query("Tuesday again quiet resolve", kinds=["concept"])] == ["concept:a"]
+    assert index.query("the and of") == []
+
+
+def test_sync_reloads_only_changed_versions_and_prunes_by_scope():
+    index = TopicIndex()
+    loads = []
+
+    def item(title, version, text):
+        def load():
+            loads.append(title)
+            return text
+        return (title, version, load)
+
+    index.sync("substack", {"vault:a": item("A", "1", "alpha edition"), "post:1": item("P", "x", "published")})
+    index.sync("substack", {"vault:a": item("A", "2", "alpha revised")}, scope="vault:")
+    assert loads == ["A", "P", "A"]
+    assert len(index) == 2  # post:1 is outside the pruned scope
+
+    index.sync("substack", {"vault:a": item("A", "2", "alpha revised")}, prune=False)
+    assert loads == ["A", "P", "A"]
+    index.sync("substack", {})
+    assert len(index) == 0
+
+
+def test_save_and_load_round_trip(tmp_path):
+    index = _site_index()
+    path = tmp_path / "cache" / "topics.json"
+    index.save(str(path))
+    loaded = TopicIndex.load(str(path))
+    assert len(loaded) == len(index)
+    assert loaded.version("blog:type-ii") is None
+    assert loaded.query("type ii retrospective difficulty")[0].doc_id == "blog:type-ii"
+    # A different configuration can't use the saved signatures
+    assert len(TopicIndex.load(str(path), lead_words=100)) == 0
+    assert len(TopicIndex.load(str(tmp_path / "missing.json"))) == 0
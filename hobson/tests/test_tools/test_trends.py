@@ -0,0 +1,89 @@
+"""Tests for the trend and anomaly calculations."""
+
+import math
+
+import numpy as np
+import pytest
+
+from hobson.tools import trends
+
+
+def test_rolling_mean():
+    out = trends.rolling_mean(np.array([1, 2, 3, 4, 5]), 3)
+    assert np.isnan(out[:2]).all()
+    assert out[2:].tolist() == [2.0, 3.0, 4.0]
+    assert np.isnan(trends.rolling_mean(np.array([1, 2]), 3)).all()
+
+
+def test_period_delta():
+    values = np.array([5] * 7 + [6] * 7)
+    delta = trends.period_delta(values, 7)
+    assert (delta.current, delta.previous) == (42, 35)
+    assert delta.change == pytest.approx(0.2)
+    assert trends.period_delta(values, 8) is None
+    assert trends.period_delta(np.array([0] * 7 + [3] * 7), 7).change is None
+
+
+def test_anomalies_flag_recent_spikes_and_drops():
+    rng = np.random.default_rng(0)
+    values = 100 + rng.normal(0, 5, 40).round()
+    values[-3] = 300
+    values[-1] = 10
+    found = trends.anomalies(values, baseline=28, recent=7)
+    assert [(a.index, a.direction) for a in found] == [(37, "spike"), (39, "drop")]
+    assert found[0].z > 3 and found[1].robust_z < -3.5
+
+
+def test_anomalies_ignore_older_days_and_short_series():
+    values = np.full(40, 50.0)
+    values[5] = 500
+    assert trends.anomalies(values, baseline=28, recent=7) == []
+    assert trends.anomalies(values[:20], baseline=28) == []
+
+
+def test_robust_score_survives_an_earlier_spike():
+    # A big spike in the baseline inflates the standard deviation enough to
+    # hide a later jump from the plain z-score, but not from median/MAD
+    values = np.array([100.0, 102.0, 98.0, 101.0] * 7 + [100.0] * 5 + [140.0])
+    values[10] = 2000
+    z, robust = trends.anomaly_scores(values, baseline=28)
+    assert abs(z[-1]) < 3
+    assert robust[-1] > 3.5
+    assert [a.index for a in trends.anomalies(values)] == [len(values) - 1]
+
+
+def test_flat_baseline():
+    z, robust = trends.anomaly_scores(np.array([7.0] * 29 + [7.0, 9.0]), baseline=28)
+    assert (z[29], robust[29]) == (0.0, 0.0)
+    # Scales are floored at one visit rather than dividing by zero
+    assert (z[30], robust[30]) == (2.0, 2.0)
+
+
+def test_sparse_baseline_scores_stay_finite():
+    steady = [12.0] * 27 + [13.0]
+    z, robust = trends.anomaly_scores(np.array([*steady, 13.0]), baseline=28)
+    assert np.isfinite([z[28], robust[28]]).all()
+    assert trends.anomalies(np.array([*steady, 13.0]), baseline=28) == []
+
+    (spike,) = trends.anomalies(np.array([*steady, 40.0]), baseline=28)
+    assert spike.direction == "spike" and math.isfinite(spike.robust_z)
+
+    # Mostly zero-traffic days: MAD is 0, so the mean absolute deviation sets the scale
+    quiet = np.array([0.0] * 20 + [10.0, 0.0, 12.0, 0.0, 9.0, 0.0, 8.0, 0.0, 60.0])
+    _, robust = trends.anomaly_scores(quiet, baseline=28)
+    assert robust[28] == pytest.approx(60 / (39 / 28 * trends._MEAN_AD_SCALE))
+
+
+def test_growth():
+    rising, falling, new = trends.growth(
+        {"/a": 30, "/b": 5, "/c": 12, "/tiny": 2},
+        {"/a": 10, "/b": 20, "/gone": 8, "/tiny": 1},
+    )
+    assert [(g.key, g.change) for g in rising] == [("/a", 2.0)]
+    assert [(g.key, g.current, g.previous) for g in falling] == [("/b", 5, 20), ("/gone", 0, 8)]
+    assert [(g.key, g.change) for g in new] == [("/c", None)]
+
+
+def test_growth_limit():
+    rising, _, _ = trends.growth({f"/{i}": 10 + i for i in range(5)}, {f"/{i}": 10 for i in range(5)}, limit=2)
+    assert [g.key for g in rising] == ["/4", "/3"]
@@ -0,0 +1,136 @@
+"""Tests for the shared Obsidian vault client, over an httpx.MockTransport."""
+
+import threading
+
+import httpx
+import pytest
+
+from hobson.tools.vault_client import VaultClient
+
+
+class FakeVault:
+    """In-memory Obsidian REST API."""
+
+    def __init__(self):
+        self.notes = {}
+        self.requests = []
+        self.fail = False
+
+    def __call__(self, request: httpx.Request) -> httpx.Response:
+        path = request.url.path.removeprefix("/vault/")
+        self.requests.append((request.method, path))
+        if self.fail:
+            return httpx.Response(500)
+        if request.method == "GET":
+            if path.endswith("/"):
+                files = [p[len(path):] for p in self.notes if p.startswith(path)]
+                return httpx.Response(200, json={"files": files}) if files else httpx.Response(404)
+            if path not in self.notes:
+                return httpx.Response(404)
+            return httpx.Response(200, text=self.notes[path])
+        if request.method == "PUT":
+            self.notes[path] = request.content.decode()
+            return httpx.Response(204)
+        if request.method == "POST":
+            self.notes[path] = self.notes.get(path, "") + request.content.decode()
+            return httpx.Response(204)
+        return httpx.Response(405)
+
+
+@pytest.fixture
+def server():
+    return FakeVault()
+
+
+def _client(server, **kwargs):
+    kwargs.setdefault("coalesce_window", 0)
+    return VaultClient("https://vault.test", "key", transport=httpx.MockTransport(server), **kwargs)
+
+
+class TestReadCache:
+    def test_reads_are_cached(self, server):
+        server.notes["a.md"] = "hello"
+        client = _client(server)
+        assert client.read("a.md") == "hello"
+        assert client.read("a.md") == "hello"
+        assert server.requests == [("GET", "a.md")]
+        assert client.metrics()["cache_hits"] == 1
+
+    def test_own_writes_invalidate(self, server):
+        server.notes["a.md"] = "v1"
+        client = _client(server)
+        client.read("a.md")
+        client.write("a.md", "v2")
+        assert client.read("a.md") == "v2"
+        client.append("a.md", "+")
+        assert client.read("a.md") == "v2+"
+
+    def test_entries_expire(self, server):
+        now = [0.0]
+        server.notes["a.md"] = "v1"
+        client = _client(server, cache_ttl=10, clock=lambda: now[0])
+        client.read("a.md")
+        server.notes["a.md"] = "edited in Obsidian"
+        now[0] = 11
+        assert client.read("a.md") == "edited in Obsidian"
+
+    def test_missing_note_is_none(self, server):
+        assert _client(server).read("missing.md") is None
+
+
+class TestAppendCoalescing:
+    def test_concurrent_appends_share_one_request(self, server):
+        client = _client(server, coalesce_window=0.1)
+        start = threading.Barrier(4)
+
+        def append(i):
+            start.wait()
+            client.append("log.md", f"- {i}\n")
+
+        threads = [threading.Thread(target=append, args=(i,)) for i in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        assert server.requests == [("POST", "log.md")]
+        assert sorted(server.notes["log.md"].splitlines()) == ["- 0", "- 1", "- 2", "- 3"]
+        metrics = client.metrics()
+        assert (metrics["appends"], metrics["append_requests"]) == (4, 1)
+
+    def test_read_flushes_pending_appends(self, server):
+        client = _client(server, coalesce_window=5)
+        writer = threading.Thread(target=client.append, args=("log.md", "pending\n"))
+        writer.start()
+        while not client._pending:
+            pass
+        # The read does not wait out the window, and sees the append
+        assert client.read("log.md") == "pending\n"
+        writer.join(timeout=1)
+        assert not writer.is_alive()
+
+    def test_errors_reach_every_caller(self, server):
+        server.fail = True
+        client = _client(server)
+        with pytest.raises(httpx.HTTPStatusError):
+            client.append("log.md", "x")
+
+
+def test_metrics_track_latency_and_errors(server):
+    client = _client(server)
+    client.read("missing.md")
+    client.write("a.md", "x")
+    server.fail = True
+    with pytest.raises(httpx.HTTPStatusError):
+        client.write("a.md", "y")
+    ops = client.metrics()["operations"]
+    assert ops["read"]["count"] == 1 and ops["read"]["errors"] == 0
+    assert ops["write"]["count"] == 2 and ops["write"]["errors"] == 1
+    assert ops["write"]["max_ms"] >= ops["write"]["p50_ms"] >= 0
+
+
+def test_list_folder(server):
+    server.notes["Concepts/a.md"] = "x"
+    client = _client(server)
+    assert client.list_folder("Concepts") == '{"files":["a.md"]}'
+    assert client.list_folder("Nope") is None
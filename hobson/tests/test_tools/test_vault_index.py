@@ -0,0 +1,123 @@
+"""Tests for the local vault search index (pure module, no network)."""
+
+import os
+
+from hobson.tools.vault_index import VaultIndex
+
+CONCEPTS = "98 - Hobson Builds Character/Content/Designs/Concepts"
+
+
+def _concept(title: str, body: str) -> str:
+    return f'---\ntitle: "{title}"\nstatus: concept\n---\n\n{body}\n'
+
+
+class Reader:
+    def __init__(self, notes):
+        self.notes = notes
+        self.reads = []
+
+    def __call__(self, path):
+        self.reads.append(path)
+        return self.notes.get(path)
+
+
+class TestSearch:
+    def test_ranks_title_matches_and_returns_snippets(self):
+        index = VaultIndex()
+        notes = {
+            f"{CONCEPTS}/effort.md": _concept("Effort Compounds", "Minimal contour lines on a sticker."),
+            f"{CONCEPTS}/tuesday.md": _concept("Tuesday. Again.", "Quiet resolve about effort, on a mug."),
+            "98 - Hobson Builds Character/Strategy/Brand Guidelines.md": "# Brand\n\nNothing relevant.",
+        }
+        index.sync({path: None for path in notes}, Reader(notes))
+
+        hits = index.search("effort")
+        assert [hit.path for hit in hits] == [f"{CONCEPTS}/effort.md", f"{CONCEPTS}/tuesday.md"]
+        assert hits[0].title == "Effort Compounds"
+        assert "**effort**" in hits[1].snippet.lower()
+        # Stemming: "compounding" finds "Compounds"
+        assert index.search("compounding")[0].path == f"{CONCEPTS}/effort.md"
+
+    def test_folder_filter_and_query_punctuation(self):
+        index = VaultIndex()
+        notes = {
+            f"{CONCEPTS}/a.md": "# Type II\n\nEndurance.",
+            "98 - Hobson Builds Character/Content/Blog/Drafts/b.md": "# Type II fun\n\nEndurance.",
+        }
+        index.sync({path: None for path in notes}, Reader(notes))
+        assert [hit.path for hit in index.search('endurance "OR" (', folder=CONCEPTS)] == [f"{CONCEPTS}/a.md"]
+        assert index.search("!!!") == []
+
+
+class TestIncrementalSync:
+    def test_versions_skip_unchanged_notes(self):
+        index = VaultIndex()
+        notes = {f"{CONCEPTS}/a.md": "# A\n\nfirst", f"{CONCEPTS}/b.md": "# B\n\nsecond"}
+        reader = Reader(notes)
+        assert index.sync({p: "v1" for p in notes}, reader) == 2
+        reader.reads.clear()
+
+        notes[f"{CONCEPTS}/b.md"] = "# B\n\nrevised"
+        listing = {f"{CONCEPTS}/a.md": "v1", f"{CONCEPTS}/b.md": "v2"}
+        assert index.sync(listing, reader) == 1
+        assert reader.reads == [f"{CONCEPTS}/b.md"]
+        assert index.search("revised") and not index.search("second")
+
+    def test_unversioned_notes_are_rechecked_after_interval_and_hash_compared(self):
+        now = [0.0]
+        index = VaultIndex(recheck_after=100, clock=lambda: now[0])
+        notes = {f"{CONCEPTS}/a.md": "# A\n\nfirst"}
+        reader = Reader(notes)
+        index.sync({f"{CONCEPTS}/a.md": None}, reader)
+        reader.reads.clear()
+
+        index.sync({f"{CONCEPTS}/a.md": None}, reader)
+        assert reader.reads == []
+        now[0] = 101
+        # Re-read, but the hash is unchanged so nothing is re-indexed
+        assert index.sync({f"{CONCEPTS}/a.md": None}, reader) == 0
+        assert reader.reads == [f"{CONCEPTS}/a.md"]
+
+    def test_dirty_notes_are_reread_without_a_listing(self):
+        index = VaultIndex()
+        notes = {f"{CONCEPTS}/a.md": "# A\n\nfirst"}
+        reader = Reader(notes)
+        prefixes = (f"{CONCEPTS}/",)
+        index.sync({f"{CONCEPTS}/a.md": None}, reader, prefixes)
+
+        notes[f"{CONCEPTS}/a.md"] = "# A\n\nupdated"
+        notes[f"{CONCEPTS}/new.md"] = "# New\n\nfresh concept"
+        index.mark_dirty(f"{CONCEPTS}/a.md")
+        index.mark_dirty(f"{CONCEPTS}/new.md")
+        index.mark_dirty("98 - Hobson Builds Character/Operations/Elsewhere.md")
+        assert index.sync(None, reader, prefixes) == 2
+        assert len(index) == 2
+        assert index.search("updated") and index.search("fresh")
+
+    def test_deleted_notes_are_dropped(self):
+        index = VaultIndex()
+        notes = {f"{CONCEPTS}/a.md": "# A\n\nalpha", f"{CONCEPTS}/b.md": "# B\n\nbeta"}
+        index.sync({p: None for p in notes}, Reader(notes), (f"{CONCEPTS}/",))
+        index.sync({f"{CONCEPTS}/a.md": None}, Reader(notes), (f"{CONCEPTS}/",))
+        assert len(index) == 1 and not index.search("beta")
+
+
+def test_refresh_from_directory_uses_mtime(tmp_path):
+    folder = tmp_path / CONCEPTS
+    folder.mkdir(parents=True)
+    (folder / "a.md").write_text("# A\n\nalpha")
+    (folder / "notes.txt").write_text("ignored")
+    db = tmp_path / "index" / "vault.sqlite3"
+    index = VaultIndex(str(db))
+    assert index.refresh_from_directory(str(tmp_path), [CONCEPTS]) == 1
+    assert index.refresh_from_directory(str(tmp_path), [CONCEPTS]) == 0
+
+    (folder / "a.md").write_text("# A\n\nomega")
+    os.utime(folder / "a.md", ns=(1, 1))
+    assert index.refresh_from_directory(str(tmp_path), [CONCEPTS]) == 1
+    index.close()
+
+    # Persisted across restarts
+    reopened = VaultIndex(str(db))
+    assert reopened.search("omega")[0].path == f"{CONCEPTS}/a.md"
+    assert reopened.refresh_from_directory(str(tmp_path), [CONCEPTS]) == 0
@@ -0,0 +1,124 @@
+"""Tests for workflow runs that pause on send_approval_request and resume.
+
+Uses a scripted chat model and an in-memory checkpointer in place of Gemini
+and Postgres.
+"""
+
+import pytest
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage, ToolMessage
+from langgraph.checkpoint.memory import InMemorySaver
+from langgraph.prebuilt import create_react_agent
+
+from hobson import scheduler
+from hobson.tools import telegram
+
+
+class ScriptedModel(GenericFakeChatModel):
+    def bind_tools(self, tools, **kwargs):
+        return self
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs):
+        return self._generate(messages, stop, run_manager, **kwargs)
+
+
+class FakeDB:
+    def __init__(self):
+        self.approvals = {}
+        self.runs = {}
+
+    # run log
+    def log_run_start(self, workflow, inputs, llm_provider=None):
+        self.runs["run-1"] = {"workflow": workflow, "status": "running"}
+        return "run-1"
+
+    def log_run_complete(self, run_id, status, outputs=None, error=None):
+        self.runs[run_id].update(status=status, outputs=outputs, error=error)
+
+    # approvals
+    def create_approval(self, request_id, action, reasoning, estimated_cost=0, thread_id=None):
+        if request_id in self.approvals:
+            return False
+        self.approvals[request_id] = {"request_id": request_id, "action": action, "thread_id": thread_id}
+        return True
+
+
+class FakeOutbox:
+    def __init__(self):
+        self.sent = []
+
+    async def send(self, chat_id, text, parse_mode="Markdown", reply_markup=None, coalesce=False):
+        self.sent.append(text)
+
+
+@pytest.fixture
+def env(monkeypatch):
+    db = FakeDB()
+    outbox = FakeOutbox()
+    monkeypatch.setattr(scheduler, "HobsonDB", lambda url: db)
+    monkeypatch.setattr(telegram, "_db", db)
+    monkeypatch.setattr(telegram, "_get_outbox", lambda: outbox)
+    scheduler._failure_counts.clear()
+    return db, outbox
+
+
+def _agent():
+    call = {"name": "send_approval_request", "args": {"action": "Create 3 stickers", "reasoning": "Strong concepts"}, "id": "call-1"}
+    model = ScriptedModel(messages=iter([
+        AIMessage(content="", tool_calls=[call]),
+        AIMessage(content="Done."),
+    ]))
+    return create_react_agent(model, [telegram.send_approval_request], checkpointer=InMemorySaver())
+
+
+async def _run_until_paused(env):
+    db, _ = env
+    agent = _agent()
+    await scheduler.run_workflow(agent, "design_batch", "Run the design batch")
+    assert db.runs["run-1"]["status"] == "waiting_approval"
+    (request_id,) = db.approvals
+    return agent, request_id
+
+
+async def test_run_pauses_on_approval(env):
+    db, outbox = env
+    _, request_id = await _run_until_paused(env)
+    assert db.runs["run-1"]["outputs"] == {"pending_approvals": [request_id]}
+    assert db.approvals[request_id]["thread_id"] == "workflow-design_batch:run-1"
+    assert len(outbox.sent) == 1 and request_id in outbox.sent[0]
+
+
+@pytest.mark.parametrize("status, expected", [
+    ("approved", "APPROVED. Proceed with: Create 3 stickers"),
+    ("denied", "DENIED"),
+    ("expired", "EXPIRED"),
+])
+async def test_resume_continues_from_the_tool_call(env, status, expected):
+    db, outbox = env
+    agent, request_id = await _run_until_paused(env)
+    thread_id = db.approvals[request_id]["thread_id"]
+
+    assert await scheduler.resume_workflow(agent, thread_id, request_id, status)
+
+    assert db.runs["run-1"]["status"] == "success"
+    state = await agent.aget_state(scheduler._workflow_config(thread_id))
+    tool_results = [m.content for m in state.values["messages"] if isinstance(m, ToolMessage)]
+    assert len(tool_results) == 1 and expected in tool_results[0]
+    assert state.values["messages"][-1].content == "Done."
+    # Re-running the tool on resume must not send the request again
+    assert len(outbox.sent) == 1
+
+
+async def test_resume_without_paused_run_is_a_noop(env):
+    db, _ = env
+    agent, request_id = await _run_until_paused(env)
+    thread_id = db.approvals[request_id]["thread_id"]
+    assert not await scheduler.resume_workflow(agent, thread_id, "unknown", "approved")
+    assert db.runs["run-1"]["status"] == "waiting_approval"
+
+
+def test_request_id_is_stable_per_thread_and_call():
+    a = telegram._approval_request_id("workflow-x:1", "call-1")
+    assert a == telegram._approval_request_id("workflow-x:1", "call-1")
+    assert a != telegram._approval_request_id("workflow-x:2", "call-1")
+    assert len(a) == 12
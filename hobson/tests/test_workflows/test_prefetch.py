@@ -0,0 +1,122 @@
+"""Tests for workflow prefetch: concurrent tool calls injected ahead of the prompt."""
+
+import asyncio
+import time
+
+from langchain_core.tools import tool
+
+from hobson import scheduler
+from hobson.workflows import prefetch
+from hobson.workflows.prefetch import Prefetch, gather_context
+
+
+@tool
+async def slow_stats(days: int = 1) -> str:
+    """Traffic for the last days."""
+    await asyncio.sleep(0.2)
+    return f"Pageviews ({days}d): 12"
+
+
+@tool
+async def slow_products() -> str:
+    """Store products."""
+    await asyncio.sleep(0.2)
+    return "3 products"
+
+
+@tool
+def read_log(days: int = 1) -> str:
+    """Daily log."""
+    return f"log for {days} days"
+
+
+@tool
+def broken() -> str:
+    """Always fails."""
+    raise RuntimeError("vault down")
+
+
+async def test_calls_run_concurrently_and_keep_spec_order():
+    started = time.monotonic()
+    context = await gather_context([
+        Prefetch("Traffic", slow_stats, {"days": 7}),
+        Prefetch("Products", slow_products),
+        Prefetch("Log", read_log, {"days": 2}),
+    ])
+    assert time.monotonic() - started < 0.35
+    assert context.startswith("## Prefetched Data\n")
+    assert context.index("### Traffic -- slow_stats(days=7)\nPageviews (7d): 12") < context.index(
+        "### Products -- slow_products()\n3 products"
+    ) < context.index("### Log -- read_log(days=2)\nlog for 2 days")
+
+
+async def test_failures_and_timeouts_are_reported_per_section():
+    context = await gather_context(
+        [Prefetch("Broken", broken), Prefetch("Slow", slow_products), Prefetch("Log", read_log)],
+        timeout=0.05,
+    )
+    assert "### Broken -- broken()\n(Unavailable: RuntimeError: vault down. Call broken yourself.)" in context
+    assert "### Slow -- slow_products()\n(Unavailable: timed out after 0.05s. Call slow_products yourself.)" in context
+    assert "### Log -- read_log()\nlog for 1 days" in context
+
+
+async def test_long_results_are_truncated(monkeypatch):
+    monkeypatch.setattr(prefetch, "_MAX_SECTION_CHARS", 5)
+    context = await gather_context([Prefetch("Log", read_log, {"days": 3})])
+    assert context.endswith("### Log -- read_log(days=3)\nlog f\n(Truncated. Call read_log(days=3) for the rest.)")
+
+
+async def test_no_specs():
+    assert await gather_context([]) == ""
+
+
+class FakeDB:
+    def __init__(self):
+        self.runs = {}
+
+    def log_run_start(self, workflow, inputs, llm_provider=None):
+        self.runs["run-1"] = {"workflow": workflow, "inputs": inputs}
+        return "run-1"
+
+    def log_run_complete(self, run_id, status, outputs=None, error=None):
+        self.runs[run_id]["status"] = status
+
+
+class RecordingAgent:
+    def __init__(self):
+        self.messages = []
+
+    async def ainvoke(self, inputs, config=None):
+        self.messages.extend(inputs["messages"])
+        return {"messages": []}
+
+
+async def test_run_workflow_prepends_prefetched_data(monkeypatch):
+    db = FakeDB()
+    monkeypatch.setattr(scheduler, "HobsonDB", lambda url: db)
+    scheduler._failure_counts.clear()
+    agent = RecordingAgent()
+
+    await scheduler.run_workflow(
+        agent, "morning_briefing", "Run the morning briefing.", [Prefetch("Log", read_log, {"days": 2})]
+    )
+
+    (message,) = agent.messages
+    assert message["content"].startswith("## Prefetched Data\n")
+    assert message["content"].endswith(
+        "### Log -- read_log(days=2)\nlog for 2 days\n\n## Workflow\nRun the morning briefing."
+    )
+    assert db.runs["run-1"]["inputs"] == {"message": "Run the morning briefing.", "prefetch": ["read_log(days=2)"]}
+    assert db.runs["run-1"]["status"] == "success"
+
+
+async def test_run_workflow_without_prefetch_sends_the_prompt_as_is(monkeypatch):
+    db = FakeDB()
+    monkeypatch.setattr(scheduler, "HobsonDB", lambda url: db)
+    scheduler._failure_counts.clear()
+    agent = RecordingAgent()
+
+    await scheduler.run_workflow(agent, "design_batch", "Run the design batch")
+
+    assert agent.messages == [{"role": "user", "content": "Run the design batch"}]
+    assert db.runs["run-1"]["inputs"] == {"message": "Run the design batch"}
@@ -41,7 +41,30 @@ def log_event(
                 Json(raw_payload) if raw_payload else None,
             ),
         )
-        return result.rowcount > 0
+        if result.rowcount == 0:
+            return False
+        # Wake Hobson's event bus listeners. The event commits with the insert,
+        # but in a savepoint: if emitting fails (e.g. the events schema is not
+        # deployed), only the notification is lost, never the order event.
+        try:
+            with conn.transaction():
+                conn.execute(
+                    "SELECT hobson.emit_event(%s, %s)",
+                    (
+                        "order.event",
+                        Json({
+                            "printful_order_id": printful_order_id,
+                            "event_type": event_type,
+                            "production_cost": production_cost,
+                            "retail_total": retail_total,
+                            "item_count": item_count,
+                            "rule_violated": rule_violated,
+                        }),
+                    ),
+                )
+        except psycopg.Error as e:
+            logger.warning("Could not emit order.event for order %s: %s", printful_order_id, e)
+        return True
 
 
 def get_recent_confirmed_count(hours: int = 1) -> int: